@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Compare the throughput of the tjson5 implementations: CPython with the
+compiled extension, CPython with the pure-Python fallback and PyPy with
+the fallback.
+
+Each configuration runs bench_suite.py in its own interpreter on the same
+corpora (the fallback is forced with TJSON5_PURE_PYTHON=1), and the MB/s
+of parse, load_file and dumps are printed side by side, with json on
+CPython as reference. PyPy is looked up as pypy3 on the PATH unless given
+with --pypy; without it, its column is left out.
+
+Example:
+    python benchmarks/bench_implementations.py --kinds nested,wide --sizes 1M
+"""
+import sys
+import os
+import json
+import shutil
+import argparse
+import tempfile
+import subprocess
+from pathlib import Path
+
+import corpus
+
+benchmarks_dir = Path(__file__).parent
+project_dir = benchmarks_dir.parent
+
+OPERATIONS = ("parse", "load_file", "dumps")
+
+def run_suite(python, pure, args, output):
+    """Run bench_suite.py with the given interpreter and return its results."""
+    env = dict(os.environ, TJSON5_PURE_PYTHON="1" if pure else "0")
+    command = [python, str(benchmarks_dir / "bench_suite.py"), "--kinds", args.kinds,
+               "--sizes", args.sizes, "--seed", str(args.seed), "--min-time", str(args.min_time),
+               "--no-memory", "--output", output]
+    subprocess.run(command, env=env, cwd=str(project_dir), check=True,
+                   stdout=subprocess.DEVNULL if args.quiet else None)
+    with open(output, "r", encoding="utf-8") as f:
+        return json.load(f)["results"]
+
+def throughputs(results, library):
+    """Map (corpus, operation) to the MB/s of library in the results."""
+    return {(entry["corpus"], entry["operation"]): entry["mb_per_s"]
+            for entry in results if entry["library"] == library}
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the throughput of the tjson5 implementations")
+    parser.add_argument("--kinds", default=",".join(corpus.KINDS),
+                        help="comma-separated corpus kinds (default: all)")
+    parser.add_argument("--sizes", default="1M", help="comma-separated corpus sizes (default: 1M)")
+    parser.add_argument("--seed", type=int, default=0, help="corpus generator seed")
+    parser.add_argument("--min-time", type=float, default=1.0,
+                        help="seconds to spend timing each operation")
+    parser.add_argument("--pypy", default=shutil.which("pypy3"),
+                        help="PyPy interpreter (default: pypy3 on the PATH)")
+    parser.add_argument("--quiet", action="store_true", help="do not print the suite runs")
+    args = parser.parse_args()
+
+    configurations = [("CPython+extension", sys.executable, False, "tjson5"),
+                      ("CPython+fallback", sys.executable, True, "tjson5-py")]
+    if args.pypy:
+        configurations.append(("PyPy+fallback", args.pypy, True, "tjson5-py"))
+    else:
+        print("PyPy not found (pass --pypy), skipping PyPy+fallback", file=sys.stderr)
+
+    columns = []
+    reference = None
+    with tempfile.TemporaryDirectory() as directory:
+        for index, (name, python, pure, library) in enumerate(configurations):
+            results = run_suite(python, pure, args, os.path.join(directory, f"{index}.json"))
+            columns.append((name, throughputs(results, library)))
+            if reference is None:
+                reference = throughputs(results, "json")
+
+    print(f"\nThroughput in MB/s\n{'corpus':22} {'operation':10} {'json':>9}"
+          + "".join(f" {name:>18}" for name, _ in columns))
+    for key in sorted(reference, key=lambda key: (key[0], OPERATIONS.index(key[1]))):
+        line = f"{key[0]:22} {key[1]:10} {reference[key]:9.1f}"
+        for _, values in columns:
+            value = values.get(key)
+            line += f" {value:18.1f}" if value is not None else f" {'-':>18}"
+        print(line)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Measure the memory held by a parsed document with and without key and
+string value interning, on tests/test.tjson5 repeated to a larger size.
+"""
+import sys
+import os
+import gc
+import time
+import tracemalloc
+from pathlib import Path
+
+# Add project directory to path to import the package
+project_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(project_dir))
+
+import tjson5
+
+COPIES = 50
+
+def retained(text, **options):
+    """Return the bytes held by the parsed result and the parse time."""
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = tjson5.parse(text, **options)
+    elapsed = time.perf_counter() - start
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del result
+    return size, elapsed
+
+def main():
+    print("Memory of a parsed document with and without interning")
+    print("======================================================")
+
+    test_file = os.path.join(project_dir, "tests", "test.tjson5")
+    with open(test_file, "r", encoding="utf-8") as f:
+        text = f.read()
+    # Each copy is parsed separately, so the same keys and values repeat
+    text = "[" + ",\n".join([text] * COPIES) + "]"
+    print(f"\ntests/test.tjson5 x {COPIES}: {len(text.encode('utf-8')) / (1024 * 1024):.1f} MB")
+
+    baseline = None
+    for name, options in [("no interning", {"intern_keys": False}),
+                          ("intern_keys (default)", {}),
+                          ("intern_values=64", {"intern_values": 64})]:
+        size, elapsed = retained(text, **options)
+        baseline = baseline or size
+        print(f"- {name:22} {size / (1024 * 1024):8.2f} MB  {size / baseline:6.1%}"
+              f"  (parse {elapsed * 1000:.1f} ms under tracemalloc)")
+
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Compare the throughput of the native decoder behind tjson5.parse with the
+regex-rewrite + json.loads pipeline it replaced.
+"""
+import sys
+import os
+import time
+from pathlib import Path
+
+# Add project directory to path to import the package
+project_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(project_dir))
+
+import tjson5
+import legacy_pipeline
+
+def make_document(parts):
+    """Build a chip-description style document with the given number of parts."""
+    lines = ["// Generated benchmark document", "{", '  series: "BENCH",', "  parts: ["]
+    for i in range(parts):
+        lines.append("    {")
+        lines.append(f'      name: "PART{i:06d}",  // part number')
+        lines.append('      "package": "LQFP64",')
+        lines.append(f"      address: 0x{i * 16:08X},")
+        lines.append(f"      mask: 0b{i & 0xFF:08b},")
+        lines.append('      description: """')
+        lines.append(f"        Part {i} of the series with a \"quoted\" word")
+        lines.append('        and a second line of text.')
+        lines.append('      """,')
+        lines.append(f"      values: [{i}, {i * 0.5}, -{i}, true, null,],")
+        lines.append("    },")
+    lines.append("  ],")
+    lines.append("}")
+    return "\n".join(lines)
+
+def measure(func, text, min_time=1.0):
+    """Return the best time per call of func(text) over a run of min_time seconds."""
+    best = float("inf")
+    deadline = time.perf_counter() + min_time
+    while True:
+        start = time.perf_counter()
+        func(text)
+        elapsed = time.perf_counter() - start
+        best = min(best, elapsed)
+        if time.perf_counter() > deadline:
+            return best
+
+def main():
+    print("Triple-JSON5 parse throughput: native decoder vs. legacy pipeline")
+    print("=================================================================")
+
+    test_file = os.path.join(project_dir, "tests", "test.tjson5")
+    with open(test_file, "r", encoding="utf-8") as f:
+        corpus = [("tests/test.tjson5", f.read())]
+    for parts in (100, 10000):
+        corpus.append((f"generated ({parts} parts)", make_document(parts)))
+
+    for name, text in corpus:
+        size_mb = len(text.encode("utf-8")) / (1024 * 1024)
+        native = measure(tjson5.parse, text)
+        legacy = measure(legacy_pipeline.parse, text)
+        print(f"\n{name}: {size_mb * 1024:.1f} KB")
+        print(f"- native decoder:  {native * 1000:8.2f} ms  {size_mb / native:8.1f} MB/s")
+        print(f"- legacy pipeline: {legacy * 1000:8.2f} ms  {size_mb / legacy:8.1f} MB/s")
+        print(f"- speedup:         {legacy / native:8.1f}x")
+
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite: throughput, latency percentiles and peak memory of
+tjson5.parse, tjson5.load_file and tjson5.dumps on the generated corpora
+(see corpus.py), compared with the json module on the equivalent JSON.
+
+The tjson5 results are labelled with the implementation in use:
+"tjson5" for the compiled extension and "tjson5-py" for the pure-Python
+fallback (selected with TJSON5_PURE_PYTHON=1, or on PyPy). See
+bench_implementations.py to compare them.
+
+Results are written as JSON with --output. Given a previous results file
+with --baseline, the run fails (exit status 1) when the throughput of a
+tjson5 operation drops by more than --threshold, either in absolute
+terms or, with --relative, relative to json on the same machine.
+
+tjson5.dumps with the default options writes the same standard JSON as
+json.dumps, so it must keep pace with it: with --baseline or --parity,
+the run also fails when it is slower than json by more than --threshold.
+
+Examples:
+    python benchmarks/bench_suite.py --sizes 1K,1M --output baseline.json
+    python benchmarks/bench_suite.py --sizes 1K,1M --baseline baseline.json --threshold 0.1
+    python benchmarks/bench_suite.py --kinds hex_binary,nested --parity
+"""
+import sys
+import gc
+import json
+import time
+import platform
+import argparse
+from datetime import datetime, timezone
+from pathlib import Path
+
+# Add project directory to path to import the package
+project_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(project_dir))
+
+import tjson5
+import corpus
+
+try:
+    import tracemalloc
+except ImportError:  # PyPy
+    tracemalloc = None
+
+RESULTS_VERSION = 1
+
+# Operations that must be at least as fast as json on every corpus
+JSON_PARITY_OPERATIONS = ("dumps",)
+
+# Name of tjson5 in the results, by implementation
+LIBRARY = "tjson5" if tjson5.IMPLEMENTATION == "extension" else "tjson5-py"
+
+def load_json_file(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def time_calls(func, min_time, min_runs, max_runs):
+    """Call func repeatedly for about min_time seconds and return the time of each call."""
+    times = []
+    gc.collect()
+    deadline = time.perf_counter() + min_time
+    while len(times) < max_runs and (len(times) < min_runs or time.perf_counter() < deadline):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return times
+
+def percentile(values, q):
+    """Return the q-th percentile (0-100) of the sorted values, interpolated."""
+    position = (len(values) - 1) * q / 100
+    low = int(position)
+    high = min(low + 1, len(values) - 1)
+    return values[low] + (values[high] - values[low]) * (position - low)
+
+def peak_memory(func):
+    """Return the peak memory allocated by one call of func, in bytes."""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+def measure(name, operation, library, func, size, args):
+    """Benchmark func on an input (or output) of size bytes and return its result entry."""
+    times = sorted(time_calls(func, args.min_time, args.min_runs, args.max_runs))
+    median = percentile(times, 50)
+    result = {
+        "corpus": name,
+        "operation": operation,
+        "library": library,
+        "bytes": size,
+        "runs": len(times),
+        "mb_per_s": size / (1024 * 1024) / median if median else None,
+        "p50_ms": median * 1000,
+        "p90_ms": percentile(times, 90) * 1000,
+        "p99_ms": percentile(times, 99) * 1000,
+        "peak_mb": None if args.no_memory or tracemalloc is None else peak_memory(func) / (1024 * 1024),
+    }
+    return result
+
+def run_corpus(kind, size, args):
+    """Run every operation of both libraries on one corpus."""
+    tjson5_path, json_path = corpus.write_corpus(kind, size, args.seed, args.corpus_dir)
+    with open(tjson5_path, "r", encoding="utf-8") as f:
+        text = f.read()
+    with open(json_path, "r", encoding="utf-8") as f:
+        json_text = f.read()
+    value = tjson5.parse(text)
+    if value != json.loads(json_text):
+        raise AssertionError(f"{tjson5_path} and {json_path} are not equivalent")
+    name = f"{kind}-{corpus.format_size(size)}"
+    tjson5_size = len(text.encode("utf-8"))
+    json_size = len(json_text.encode("utf-8"))
+    output_size = len(json.dumps(value).encode("utf-8"))
+    cases = [
+        ("parse", LIBRARY, lambda: tjson5.parse(text), tjson5_size),
+        ("parse", "json", lambda: json.loads(json_text), json_size),
+        ("load_file", LIBRARY, lambda: tjson5.load_file(tjson5_path), tjson5_size),
+        ("load_file", "json", lambda: load_json_file(json_path), json_size),
+        ("dumps", LIBRARY, lambda: tjson5.dumps(value), output_size),
+        ("dumps", "json", lambda: json.dumps(value), output_size),
+    ]
+    return [measure(name, operation, library, func, size, args)
+            for operation, library, func, size in cases]
+
+def speed(results, entry, relative):
+    """Return the throughput of a tjson5 entry, divided by json's if relative."""
+    if not relative:
+        return entry["mb_per_s"]
+    for other in results:
+        if (other["corpus"], other["operation"], other["library"]) == \
+                (entry["corpus"], entry["operation"], "json"):
+            return entry["mb_per_s"] / other["mb_per_s"]
+    return None
+
+def find_regressions(results, baseline, threshold, relative):
+    """Return a message for each tjson5 result slower than the baseline by more than threshold."""
+    regressions = []
+    for entry in results:
+        if entry["library"] == "json":
+            continue
+        for old in baseline:
+            if (old["corpus"], old["operation"], old["library"]) == \
+                    (entry["corpus"], entry["operation"], entry["library"]):
+                current = speed(results, entry, relative)
+                previous = speed(baseline, old, relative)
+                if current and previous and current < previous * (1 - threshold):
+                    unit = "x json" if relative else "MB/s"
+                    regressions.append(f"{entry['corpus']} {entry['operation']}: {current:.2f} {unit}, "
+                                       f"baseline {previous:.2f} {unit} ({current / previous - 1:+.1%})")
+    return regressions
+
+def find_parity_failures(results, threshold):
+    """Return a message for each JSON_PARITY_OPERATIONS result slower than json by more than threshold."""
+    failures = []
+    for entry in results:
+        if entry["library"] != "json" and entry["operation"] in JSON_PARITY_OPERATIONS:
+            ratio = speed(results, entry, True)
+            if ratio and ratio < 1 - threshold:
+                failures.append(f"{entry['corpus']} {entry['operation']}: {ratio:.2f}x json")
+    return failures
+
+def print_results(results):
+    print(f"\n{'corpus':22} {'operation':10} {'library':9} {'MB/s':>9} {'p50 ms':>10} "
+          f"{'p90 ms':>10} {'p99 ms':>10} {'peak MB':>9} {'runs':>6}")
+    for entry in results:
+        peak = "" if entry["peak_mb"] is None else f"{entry['peak_mb']:9.2f}"
+        print(f"{entry['corpus']:22} {entry['operation']:10} {entry['library']:9} "
+              f"{entry['mb_per_s']:9.1f} {entry['p50_ms']:10.3f} {entry['p90_ms']:10.3f} "
+              f"{entry['p99_ms']:10.3f} {peak:>9} {entry['runs']:6d}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the TJSON5 benchmark suite")
+    parser.add_argument("--kinds", default=",".join(corpus.KINDS),
+                        help="comma-separated corpus kinds (default: all)")
+    parser.add_argument("--sizes", default="1K,1M",
+                        help="comma-separated corpus sizes from 1K to 1G (default: 1K,1M)")
+    parser.add_argument("--seed", type=int, default=0, help="corpus generator seed")
+    parser.add_argument("--corpus-dir", default=corpus.DEFAULT_DIRECTORY,
+                        help="where generated corpora are kept between runs")
+    parser.add_argument("--min-time", type=float, default=1.0,
+                        help="seconds to spend timing each operation")
+    parser.add_argument("--min-runs", type=int, default=5)
+    parser.add_argument("--max-runs", type=int, default=1000)
+    parser.add_argument("--no-memory", action="store_true", help="skip the peak memory runs")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--baseline", help="results JSON file to compare with")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="allowed throughput drop against the baseline (default: 0.10)")
+    parser.add_argument("--relative", action="store_true",
+                        help="compare throughput relative to json instead of absolute MB/s")
+    parser.add_argument("--parity", action="store_true",
+                        help="fail when dumps is slower than json by more than --threshold")
+    args = parser.parse_args()
+
+    print("TJSON5 benchmark suite")
+    print("======================")
+    print(f"tjson5 {tjson5.__version__} ({tjson5.IMPLEMENTATION}), {platform.python_implementation()} "
+          f"{platform.python_version()}, {platform.platform()}")
+
+    results = []
+    for kind in args.kinds.split(","):
+        if kind not in corpus.KINDS:
+            parser.error(f"unknown corpus kind {kind!r}")
+        for size in args.sizes.split(","):
+            results.extend(run_corpus(kind, corpus.parse_size(size), args))
+    print_results(results)
+
+    if args.output:
+        document = {
+            "version": RESULTS_VERSION,
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "environment": {
+                "tjson5": tjson5.__version__,
+                "tjson5_implementation": tjson5.IMPLEMENTATION,
+                "python": platform.python_version(),
+                "implementation": platform.python_implementation(),
+                "platform": platform.platform(),
+                "machine": platform.machine(),
+            },
+            "settings": {"seed": args.seed, "min_time": args.min_time},
+            "results": results,
+        }
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(document, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+    status = 0
+    if args.baseline or args.parity:
+        failures = find_parity_failures(results, args.threshold)
+        if failures:
+            print(f"\nSlower than json by more than {args.threshold:.0%}:")
+            for message in failures:
+                print(f"- {message}")
+            status = 1
+        else:
+            print(f"\n{', '.join(JSON_PARITY_OPERATIONS)} within {args.threshold:.0%} of json")
+    if args.baseline:
+        baseline = load_json_file(args.baseline)
+        regressions = find_regressions(results, baseline["results"], args.threshold, args.relative)
+        if regressions:
+            print(f"\nThroughput regressions beyond {args.threshold:.0%}:")
+            for message in regressions:
+                print(f"- {message}")
+            return 1
+        print(f"\nNo throughput regressions beyond {args.threshold:.0%} against {args.baseline}")
+    return status
+
+if __name__ == "__main__":
+    sys.exit(main())
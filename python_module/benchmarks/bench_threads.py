@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Thread scaling benchmark: total throughput of tjson5.parse and json.loads
+when the same corpus (see corpus.py) is parsed from 1 to N threads at once.
+
+tjson5 scans the input without holding the GIL, so on a regular CPython
+build its throughput grows with the threads until building the Python
+objects (which needs the GIL) dominates. On a free-threaded build
+(python3.13t and later) both stages run in parallel.
+
+Example:
+    python benchmarks/bench_threads.py --kind nested --size 1M --threads 1,2,4,8
+"""
+import sys
+import os
+import json
+import time
+import platform
+import argparse
+import threading
+from pathlib import Path
+
+# Add project directory to path to import the package
+project_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(project_dir))
+
+import tjson5
+import corpus
+
+def throughput(func, size, threads, duration):
+    """Call func from threads threads for about duration seconds and return the total MB/s."""
+    start = threading.Barrier(threads + 1)
+    calls = [0] * threads
+    deadline = []
+
+    def worker(index):
+        start.wait()
+        while time.perf_counter() < deadline[0]:
+            func()
+            calls[index] += 1
+
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    for thread in workers:
+        thread.start()
+    began = time.perf_counter()
+    deadline.append(began + duration)
+    start.wait()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - began
+    return sum(calls) * size / (1024 * 1024) / elapsed
+
+def gil_status():
+    is_gil_enabled = getattr(sys, "_is_gil_enabled", None)
+    if is_gil_enabled is None:
+        return "GIL enabled"
+    return "GIL enabled" if is_gil_enabled() else "free-threaded, GIL disabled"
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure parse throughput from 1 to N threads")
+    parser.add_argument("--kind", default="nested", choices=sorted(corpus.KINDS),
+                        help="corpus kind (default: nested)")
+    parser.add_argument("--size", default="1M", help="corpus size, e.g. 64K or 1M (default: 1M)")
+    parser.add_argument("--threads", default=None,
+                        help="comma-separated thread counts (default: 1, 2, 4... up to the CPU count)")
+    parser.add_argument("--duration", type=float, default=2.0,
+                        help="seconds to run each thread count (default: 2)")
+    parser.add_argument("--seed", type=int, default=0, help="corpus generator seed")
+    parser.add_argument("--corpus-dir", default=corpus.DEFAULT_DIRECTORY,
+                        help="where generated corpora are kept between runs")
+    args = parser.parse_args()
+
+    if args.threads:
+        counts = [int(n) for n in args.threads.split(",")]
+    else:
+        counts = [1]
+        while counts[-1] * 2 <= (os.cpu_count() or 1):
+            counts.append(counts[-1] * 2)
+
+    tjson5_path, json_path = corpus.write_corpus(args.kind, corpus.parse_size(args.size),
+                                                 args.seed, args.corpus_dir)
+    with open(tjson5_path, "r", encoding="utf-8") as f:
+        text = f.read()
+    with open(json_path, "r", encoding="utf-8") as f:
+        json_text = f.read()
+    tjson5_size = len(text.encode("utf-8"))
+    json_size = len(json_text.encode("utf-8"))
+
+    print("TJSON5 thread scaling benchmark")
+    print("===============================")
+    print(f"tjson5 {tjson5.__version__}, {platform.python_implementation()} "
+          f"{platform.python_version()} ({gil_status()}), {os.cpu_count()} CPUs")
+    print(f"Corpus: {os.path.basename(tjson5_path)} ({tjson5_size / 1024:.0f} KB)\n")
+    print(f"{'threads':>7} {'tjson5 MB/s':>12} {'speedup':>8} {'json MB/s':>10} {'speedup':>8}")
+
+    base = None
+    for threads in counts:
+        ours = throughput(lambda: tjson5.parse(text), tjson5_size, threads, args.duration)
+        theirs = throughput(lambda: json.loads(json_text), json_size, threads, args.duration)
+        if base is None:
+            base = (ours, theirs)
+        print(f"{threads:7d} {ours:12.1f} {ours / base[0]:7.2f}x {theirs:10.1f} {theirs / base[1]:7.2f}x")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+Show that preprocessTripleQuotedStrings scales linearly with the size of the
+triple-quoted strings in a document, from 1 KB up to 10 MB.
+"""
+import sys
+import time
+from pathlib import Path
+
+# Add project directory to path to import the package
+project_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(project_dir))
+
+import tjson5
+
+LINE = 'Register description with "quotes", a \\backslash\tand a tab.\n'
+
+def make_document(size):
+    """Build a document with one triple-quoted string of roughly size bytes."""
+    body = LINE * max(1, size // len(LINE))
+    return '{\n  // description block\n  name: "REG",\n  description: """' + body + '""",\n}'
+
+def measure(func, text, repeat=5):
+    """Return the best time of func(text) over a few runs."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(text)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def main():
+    print("Triple-quoted string preprocessing: scaling with string size")
+    print("============================================================")
+    print(f"{'size':>10}  {'time (ms)':>10}  {'ms per MB':>10}")
+
+    for size in (1 << 10, 10 << 10, 100 << 10, 1 << 20, 10 << 20):
+        text = make_document(size)
+        elapsed = measure(tjson5.preprocessTripleQuotedStrings, text)
+        size_mb = len(text) / (1024 * 1024)
+        print(f"{len(text) // 1024:>8} KB  {elapsed * 1000:>10.3f}  {elapsed * 1000 / size_mb:>10.2f}")
+
+    print("\nA roughly constant 'ms per MB' column means linear scaling.")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
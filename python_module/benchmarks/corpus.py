@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Deterministic generator for the benchmark corpora.
+
+Each corpus is a top-level array of generated records of one kind, written
+until the file reaches the requested size, together with the equivalent
+JSON document. The same kind, size and seed always produce the same files
+for a given Python version, so results from different runs are comparable.
+
+Kinds:
+- nested: deeply nested objects and arrays
+- wide: objects with hundreds of keys
+- triple_quotes: large multi-line triple-quoted strings
+- comments: line and block comments around every member
+- hex_binary: arrays of hexadecimal and binary integers
+- unquoted_keys: chip-description records with bare identifier keys,
+  single-quoted strings and trailing commas
+"""
+import sys
+import os
+import json
+import random
+import argparse
+from pathlib import Path
+
+# Add project directory to path to import the package
+project_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(project_dir))
+
+import tjson5
+
+DEFAULT_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), "corpus")
+
+WORDS = ("clock", "timer", "adc", "channel", "port", "register", "mask", "enable",
+         "reset", "flash", "bank", "sector", "pin", "mode", "speed", "pull", "drive")
+
+SIZE_UNITS = {"K": 1024, "M": 1024 ** 2, "G": 1024 ** 3}
+
+def parse_size(text):
+    """Convert a size such as '1K', '16M' or '1G' to a number of bytes."""
+    text = text.strip().upper().rstrip("B")
+    if text and text[-1] in SIZE_UNITS:
+        return int(float(text[:-1]) * SIZE_UNITS[text[-1]])
+    return int(text)
+
+def format_size(size):
+    """Convert a number of bytes to the shortest of '1K', '16M', '1G' or '123'."""
+    for unit in ("G", "M", "K"):
+        if size % SIZE_UNITS[unit] == 0:
+            return f"{size // SIZE_UNITS[unit]}{unit}"
+    return str(size)
+
+def _words(rng, count):
+    return " ".join(rng.choice(WORDS) for _ in range(count))
+
+def _nested(rng, budget):
+    depth = rng.randint(8, 48)
+    text = f'"{_words(rng, 2)}"'
+    for level in range(depth):
+        if level % 3 == 2:
+            text = f'[{level}, {text}, {rng.random():.6f}]'
+        else:
+            text = f'{{"level": {level}, "child": {text}, "on": {"true" if level % 2 else "false"}}}'
+    return text
+
+def _wide(rng, budget):
+    members = []
+    for i in range(rng.randint(200, 1000)):
+        choice = rng.randrange(4)
+        if choice == 0:
+            value = str(rng.randrange(-10 ** 6, 10 ** 6))
+        elif choice == 1:
+            value = f"{rng.uniform(-1000, 1000):.4f}"
+        elif choice == 2:
+            value = "null" if rng.randrange(2) else "true"
+        else:
+            value = f'"{_words(rng, rng.randint(1, 4))}"'
+        members.append(f'"field_{i:04d}": {value}')
+    return "{" + ", ".join(members) + "}"
+
+def _triple_quotes(rng, budget):
+    length = rng.randint(16 * 1024, 256 * 1024)
+    length = max(64, min(length, budget // 4))
+    lines = []
+    size = 0
+    while size < length:
+        line = "    " + _words(rng, rng.randint(4, 16))
+        if rng.randrange(8) == 0:
+            line += ' "quoted" \\n'
+        lines.append(line)
+        size += len(line) + 1
+    body = "\n".join(lines)
+    return f'{{"name": "{_words(rng, 1)}", "text": """\n{body}\n"""}}'
+
+def _comments(rng, budget):
+    members = []
+    for i in range(rng.randint(4, 12)):
+        if rng.randrange(2):
+            comment = f"// {_words(rng, rng.randint(3, 10))}\n  "
+        else:
+            comment = f"/* {_words(rng, rng.randint(3, 10))}\n     {_words(rng, 5)} */ "
+        members.append(f'{comment}"{rng.choice(WORDS)}_{i}": {rng.randrange(1000)}')
+    return "{\n  " + ",\n  ".join(members) + " // end of record\n}"
+
+def _hex_binary(rng, budget):
+    values = []
+    for _ in range(64):
+        value = rng.getrandbits(rng.choice((8, 16, 32)))
+        sign = "-" if rng.randrange(8) == 0 else ""
+        values.append(f"{sign}0x{value:X}" if rng.randrange(3) else f"{sign}0b{value & 0xFFFF:b}")
+    return "[" + ", ".join(values) + "]"
+
+def _unquoted_keys(rng, budget):
+    number = rng.randrange(10 ** 6)
+    return (f"{{\n  name: 'PART{number:06d}',\n"
+            f"  package: '{rng.choice(('LQFP64', 'QFN48', 'BGA100'))}',\n"
+            f"  flash: {rng.choice((64, 128, 256, 512))},\n"
+            f"  address: 0x{number * 16:08X},\n"
+            f"  pins: [{', '.join(str(rng.randrange(100)) for _ in range(rng.randint(4, 16)))},],\n"
+            f"  description: '{_words(rng, rng.randint(4, 12))}',\n}}")
+
+KINDS = {
+    "nested": _nested,
+    "wide": _wide,
+    "triple_quotes": _triple_quotes,
+    "comments": _comments,
+    "hex_binary": _hex_binary,
+    "unquoted_keys": _unquoted_keys,
+}
+
+def corpus_paths(kind, size, seed=0, directory=DEFAULT_DIRECTORY):
+    """Return the paths of the TJSON5 and JSON files of a corpus."""
+    name = f"{kind}-{format_size(size)}-{seed}"
+    return (os.path.join(directory, name + ".tjson5"), os.path.join(directory, name + ".json"))
+
+def write_corpus(kind, size, seed=0, directory=DEFAULT_DIRECTORY):
+    """
+    Write the TJSON5 corpus of kind with about size bytes and its JSON
+    equivalent, unless they already exist. Returns both paths.
+    """
+    tjson5_path, json_path = corpus_paths(kind, size, seed, directory)
+    if os.path.exists(tjson5_path) and os.path.exists(json_path):
+        return tjson5_path, json_path
+    generate = KINDS[kind]
+    rng = random.Random(f"{kind}-{seed}")
+    os.makedirs(directory, exist_ok=True)
+    with open(tjson5_path + ".tmp", "w", encoding="utf-8", newline="\n") as out, \
+            open(json_path + ".tmp", "w", encoding="utf-8", newline="\n") as out_json:
+        header = f"// Generated benchmark corpus: {kind}, {format_size(size)}, seed {seed}\n[\n"
+        out.write(header)
+        out_json.write("[\n")
+        written = len(header)
+        first = True
+        while first or written < size - 2:
+            item = generate(rng, size - written)
+            if not first:
+                out.write(",\n")
+                out_json.write(",\n")
+            out.write(item)
+            # Each item is converted on its own, which keeps memory bounded for large corpora
+            out_json.write(json.dumps(tjson5.parse(item)))
+            written += len(item.encode("utf-8")) + 2
+            first = False
+        out.write("\n]\n")
+        out_json.write("\n]\n")
+    os.replace(tjson5_path + ".tmp", tjson5_path)
+    os.replace(json_path + ".tmp", json_path)
+    return tjson5_path, json_path
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate the benchmark corpora")
+    parser.add_argument("--kinds", default=",".join(KINDS),
+                        help="comma-separated corpus kinds (default: all)")
+    parser.add_argument("--sizes", default="1K,1M", help="comma-separated sizes, e.g. 1K,1M,1G")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--directory", default=DEFAULT_DIRECTORY)
+    args = parser.parse_args()
+    for kind in args.kinds.split(","):
+        for size in args.sizes.split(","):
+            for path in write_corpus(kind, parse_size(size), args.seed, args.directory):
+                print(f"{path}: {os.path.getsize(path) / 1024:.1f} KB")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
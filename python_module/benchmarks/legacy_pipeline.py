@@ -0,0 +1,49 @@
+"""
+The regex-rewrite + json.loads pipeline that tjson5parser.parse used before
+the native decoder, kept here only as a baseline for the benchmarks.
+"""
+import re
+import json
+import sys
+from pathlib import Path
+
+# Add project directory to path to import the package
+project_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(project_dir))
+
+from tjson5parser import preprocessTripleQuotedStrings, preprocessHexBinary
+
+FIRST_JSON_CHAR_REGEX = re.compile(r'[\[\{]')
+SINGLE_LINE_COMMENT_REGEX = re.compile(r'//.*?$', re.MULTILINE)
+MULTI_LINE_COMMENT_REGEX = re.compile(r'/\*.*?\*/', re.DOTALL)
+UNQUOTED_KEY_REGEX = re.compile(r'([{,]\s*)([a-zA-Z_][a-zA-Z0-9_]*)\s*:', re.DOTALL)
+TRAILING_COMMA_OBJ_REGEX = re.compile(r',\s*\}')
+TRAILING_COMMA_ARR_REGEX = re.compile(r',\s*\]')
+
+def strip_leading_comments(text):
+    """Strip comments at the beginning of the file before the first { or ["""
+    match = FIRST_JSON_CHAR_REGEX.search(text)
+    if match:
+        start_pos = match.start()
+        if start_pos > 0:
+            prefix = text[:start_pos]
+            if re.match(r'^(\s*((//[^\n]*\n)|(\/\*[\s\S]*?\*\/)))*\s*$', prefix):
+                return text[start_pos:]
+    return text
+
+def process_json5_features(text):
+    """Remove comments, quote unquoted keys and drop trailing commas."""
+    processed = SINGLE_LINE_COMMENT_REGEX.sub('', text)
+    processed = MULTI_LINE_COMMENT_REGEX.sub('', processed)
+    processed = UNQUOTED_KEY_REGEX.sub(r'\1"\2":', processed)
+    processed = TRAILING_COMMA_OBJ_REGEX.sub('}', processed)
+    processed = TRAILING_COMMA_ARR_REGEX.sub(']', processed)
+    return processed
+
+def parse(text):
+    """Parse text the way tjson5parser.parse did (success path only)."""
+    if text.lstrip().startswith('//'):
+        text = strip_leading_comments(text)
+    processed_text = preprocessTripleQuotedStrings(text)
+    processed_text = preprocessHexBinary(processed_text)
+    return json.loads(process_json5_features(processed_text))
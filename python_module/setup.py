@@ -1,6 +1,7 @@
 from setuptools import setup, Extension
 import os
 import sys
+import platform
 
 # Read the README.md file for the long description
 with open(os.path.join(os.path.dirname(__file__), "README.md"), "r") as f:
@@ -29,6 +30,11 @@ if USE_CYTHON:
             print("Cython not available, using pre-generated C file")
             ext_modules = [Extension("tjson5parser", ["tjson5parser.c"], language="c")]
 
+# The extension relies on CPython internals: on PyPy the package uses its
+# pure-Python implementation (tjson5/pure.py) instead
+if platform.python_implementation() == 'PyPy':
+    ext_modules = []
+
 setup(
     name="tjson5",
     version="0.1.7",
@@ -54,6 +60,8 @@ setup(
         "Programming Language :: Python :: 3.10",
         "Programming Language :: Python :: 3.12",
         "Programming Language :: Python :: Implementation :: CPython",
+        "Programming Language :: Python :: Implementation :: PyPy",
+        "Programming Language :: Python :: Free Threading :: 2 - Beta",
         "Topic :: Software Development :: Libraries :: Python Modules",
     ],
 )
\ No newline at end of file
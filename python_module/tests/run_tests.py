@@ -70,6 +70,22 @@ def main():
     tests = [
         (os.path.join(current_dir, "test_01.py"), "Unit Tests"),
         (os.path.join(current_dir, "test_02.py"), "Simple Usage Example"),
+        (os.path.join(current_dir, "test_streaming.py"), "Streaming Parser Tests"),
+        (os.path.join(current_dir, "test_lazy.py"), "Lazy Document Tests"),
+        (os.path.join(current_dir, "test_cache.py"), "File Cache Tests"),
+        (os.path.join(current_dir, "test_bulk.py"), "Bulk Loader Tests"),
+        (os.path.join(current_dir, "test_index.py"), "Index Tests"),
+        (os.path.join(current_dir, "test_dump.py"), "Serializer Tests"),
+        (os.path.join(current_dir, "test_types.py"), "Typed Decoding Tests"),
+        (os.path.join(current_dir, "test_arrays.py"), "Numeric Array Tests"),
+        (os.path.join(current_dir, "test_stats.py"), "Profiling Stats Tests"),
+        (os.path.join(current_dir, "test_threads.py"), "Threaded Parsing Tests"),
+        (os.path.join(current_dir, "test_schema.py"), "Schema Validation Tests"),
+        (os.path.join(current_dir, "test_extract.py"), "Path Extraction Tests"),
+        (os.path.join(current_dir, "test_validate.py"), "Validation and Lint Tests"),
+        (os.path.join(current_dir, "test_document.py"), "Incremental Document Tests"),
+        (os.path.join(current_dir, "test_watch.py"), "File Watcher Tests"),
+        (os.path.join(current_dir, "test_pure.py"), "Pure-Python Implementation Tests"),
         (os.path.join(current_dir, "test_parse_large_file.py"), "Large File Parser Test"),
         (os.path.join(current_dir, "verify_package.py"), "Package Verification")
     ]
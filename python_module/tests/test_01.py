@@ -40,6 +40,18 @@ class TestTJSON5Parser(unittest.TestCase):
             print(f"After preprocessing: {json.loads(processed)}")
             raise
     
+    def test_preprocess_triple_quoted_strings(self):
+        """Test that preprocessed triple-quoted strings are valid JSON with the same content"""
+        import json
+        json_data = '{"text": """a "quote", a \\\\backslash,\ttab\r\nnew line"""}'
+        processed = tjson5parser.preprocessTripleQuotedStrings(json_data)
+        self.assertEqual(json.loads(processed), tjson5parser.parse(json_data))
+        # Regular strings and comments are copied unchanged
+        json_data = '''{"plain": "not \\"""" triple", 'single': '"""', // "comment
+            "text": """x"""}'''
+        processed = tjson5parser.preprocessTripleQuotedStrings(json_data)
+        self.assertEqual(processed, json_data.replace('"""x"""', '"x"'))
+
     def test_hex_numbers(self):
         """Test hexadecimal numbers"""
         json_data = '{"value": 0xFF}'
@@ -71,6 +83,116 @@ class TestTJSON5Parser(unittest.TestCase):
         result = tjson5parser.parse(json_data)
         self.assertEqual(result, {"array": [1, 2, 3], "object": {"a": 1, "b": 2}})
     
+    def test_unquoted_keys_and_single_quotes(self):
+        """Test JSON5 identifier keys and single-quoted strings"""
+        json_data = "{name: 'it\\'s', $ref: 1, _x2: [true, false, null]}"
+        result = tjson5parser.parse(json_data)
+        self.assertEqual(result, {"name": "it's", "$ref": 1, "_x2": [True, False, None]})
+
+    def test_string_escapes(self):
+        """Test JSON and JSON5 escape sequences"""
+        json_data = r'["a\"b\\c\/d", "é\x41\t", "😀", "line \
+continued"]'
+        result = tjson5parser.parse(json_data)
+        self.assertEqual(result, ['a"b\\c/d', "éA\t", "\U0001F600", "line continued"])
+
+    def test_string_contents_untouched(self):
+        """Test that comment markers and number literals inside strings are kept"""
+        json_data = '{"url": "http://example.com/*x*/", "0b01": "0xFF"}'
+        result = tjson5parser.parse(json_data)
+        self.assertEqual(result, {"url": "http://example.com/*x*/", "0b01": "0xFF"})
+
+    def test_json5_numbers(self):
+        """Test JSON5 number forms"""
+        result = tjson5parser.parse("[+1, -0x10, .5, 5., 1e3, Infinity, -Infinity, 0xFFFFFFFFFFFFFFFFFF]")
+        self.assertEqual(result, [1, -16, 0.5, 5.0, 1000.0, float("inf"), float("-inf"), 2**72 - 1])
+        self.assertNotEqual(tjson5parser.parse("NaN"), tjson5parser.parse("NaN"))
+
+    def test_hooks(self):
+        """Test the json-style hooks and the hex/binary hook"""
+        from collections import OrderedDict
+        from decimal import Decimal
+        json_data = "{b: 1.10, a: [0xFF, -0b11, +7, 12345678901234567890], c: {d: 1e2}}"
+        result = tjson5parser.parse(json_data, object_pairs_hook=OrderedDict, parse_float=Decimal)
+        self.assertIsInstance(result, OrderedDict)
+        self.assertIsInstance(result["c"], OrderedDict)
+        self.assertEqual(list(result), ["b", "a", "c"])
+        self.assertEqual(str(result["b"]), "1.10")
+        self.assertEqual(result["c"]["d"], Decimal("1e2"))
+        result = tjson5parser.parse(json_data, parse_int=str, parse_hex_bin=lambda s: ("hex", s))
+        self.assertEqual(result["a"], [("hex", "0xFF"), ("hex", "-0b11"), "+7", "12345678901234567890"])
+        self.assertEqual(tjson5parser.parse(json_data, parse_int=float)["a"][:2], [255, -3])
+        result = tjson5parser.parse(json_data, object_hook=lambda d: sorted(d.items()))
+        self.assertEqual(result[0][0], "a")
+        self.assertEqual(result[2], ("c", [("d", 100.0)]))
+        # object_pairs_hook takes priority, as in json
+        result = tjson5parser.parse("{a: {}}", object_hook=dict.keys, object_pairs_hook=list)
+        self.assertEqual(result, [("a", [])])
+
+    def test_interning(self):
+        """Test sharing of equal keys and short string values"""
+        json_data = '[{"name": "LQFP64", pkg: "LQFP64"}, {"name": "LQFP64", pkg: "a long value"}]'
+        first, second = tjson5parser.parse(json_data)
+        self.assertIs(list(first)[0], list(second)[0])
+        self.assertIsNot(first["name"], second["name"])
+        first, second = tjson5parser.parse(json_data, intern_keys=False)
+        self.assertIsNot(list(first)[0], list(second)[0])
+        first, second = tjson5parser.parse(json_data, intern_values=6)
+        self.assertIs(first["name"], second["name"])
+        self.assertIs(first["pkg"], second["name"])
+        self.assertEqual(second["pkg"], "a long value")
+        # A shared table carries strings across parses
+        table = {}
+        first = tjson5parser.parse(json_data, intern_values=20, intern_table=table)
+        second = tjson5parser.parse(json_data, intern_values=20, intern_table=table)
+        self.assertIs(first[1]["pkg"], second[1]["pkg"])
+        self.assertIn("name", table)
+
+    def test_syntax_errors(self):
+        """Test that malformed input raises TJSON5ParseError"""
+        for json_data in ['{"a": 1} x', '[1 2]', '{"a" 1}', '[1,,2]', '"abc', '/* open',
+                          '"""open', '', '// only a comment', '[' * 100000]:
+            with self.assertRaises(tjson5parser.TJSON5ParseError, msg=json_data[:20]):
+                tjson5parser.parse(json_data)
+
+    def test_bytes_input(self):
+        """Test parsing raw input with encoding detection"""
+        import codecs
+        import mmap
+        expected = {"name": "é", "value": 0xFF}
+        text = '{name: "é", value: 0xFF}'
+        for data in [text.encode("utf-8"), bytearray(text.encode("utf-8")),
+                     memoryview(text.encode("utf-8")), codecs.BOM_UTF8 + text.encode("utf-8"),
+                     text.encode("utf-16"), text.encode("utf-16-le"), text.encode("utf-32"),
+                     text.encode("latin1")]:
+            self.assertEqual(tjson5parser.parse(data), expected, msg=repr(data[:8]))
+        with mmap.mmap(-1, len(text.encode("utf-8"))) as mapped:
+            mapped.write(text.encode("utf-8"))
+            self.assertEqual(tjson5parser.parse(mapped), expected)
+        with self.assertRaises(tjson5parser.TJSON5ParseError):
+            tjson5parser.parse(text.encode("latin1"), encodings=["utf-8"])
+
+    def test_load_file_encodings(self):
+        """Test load_file on raw files, including the latin1 fallback and memory mapping"""
+        import tempfile
+        import tjson5
+        text = '// comment\n{name: "Café", values: [0b11]}'
+        for data in [text.encode("utf-8"), text.encode("latin1"), text.encode("utf-16")]:
+            with tempfile.NamedTemporaryFile(suffix=".tjson5", delete=False) as tf:
+                tf.write(data)
+            try:
+                self.assertEqual(tjson5.load_file(tf.name), {"name": "Café", "values": [3]})
+                old_threshold = tjson5.MMAP_THRESHOLD
+                tjson5.MMAP_THRESHOLD = 1
+                try:
+                    self.assertEqual(tjson5.load_file(tf.name), {"name": "Café", "values": [3]})
+                finally:
+                    tjson5.MMAP_THRESHOLD = old_threshold
+            finally:
+                os.unlink(tf.name)
+        with self.assertRaises(FileNotFoundError):
+            tjson5.load_file(os.path.join(os.path.dirname(__file__), "missing.tjson5"))
+
     def test_error_position_mapping(self):
         """Test that error positions are correctly mapped"""
         json_data = '''{"text": """This is a
@@ -83,6 +205,27 @@ class TestTJSON5Parser(unittest.TestCase):
         # Check that the error message is informative
         self.assertIn("Triple-JSON5", error_str)
     
+    def test_error_location(self):
+        """Test that errors report the line, column and excerpt of the original source"""
+        import pickle
+        json_data = '''{
+    // comment with "quotes"
+    text: """line one
+line two""",
+    value: 0xZZ,
+}'''
+        with self.assertRaises(tjson5parser.TJSON5ParseError) as cm:
+            tjson5parser.parse(json_data)
+        error = cm.exception
+        self.assertEqual((error.lineno, error.colno), (5, 12))
+        self.assertEqual(json_data[error.pos:error.pos + 4], "0xZZ")
+        self.assertEqual(error.excerpt, "5 |     value: 0xZZ,\n  |            ^")
+        self.assertIn("line 5 column 12", str(error))
+        # The location survives pickling (e.g. across process pools)
+        copy = pickle.loads(pickle.dumps(error))
+        self.assertEqual((copy.pos, copy.lineno, copy.colno, copy.excerpt, str(copy)),
+                         (error.pos, error.lineno, error.colno, error.excerpt, str(error)))
+
     def test_sample_file(self):
         """Test parsing a real TJSON5 file from the project"""
         # Path to test file - now using the test.tjson5 in the tests directory
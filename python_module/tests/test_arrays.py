@@ -0,0 +1,142 @@
+import unittest
+import sys
+from array import array
+from pathlib import Path
+
+# Add project directory to path to import the package
+project_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(project_dir))
+
+import tjson5
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+SAMPLE = '''{
+    name: "ADC1",
+    samples: [12, 0x0FFF, 0, 4095, 2048,],
+    offsets: [-3, 0b101, 127],
+    gains: [1, 0.5, 1e3, Infinity],
+    matrix: [[1, 2], [3, 4]],
+    mixed: [1, "two", null],
+    empty: [],
+}'''
+
+class TestArrays(unittest.TestCase):
+
+    def test_inferred_types(self):
+        """Test that every numeric array gets the narrowest array.array type"""
+        result = tjson5.parse(SAMPLE, arrays='array')
+        self.assertEqual(result["samples"], array('H', [12, 4095, 0, 4095, 2048]))
+        self.assertEqual(result["offsets"], array('b', [-3, 5, 127]))
+        self.assertEqual(result["gains"], array('d', [1.0, 0.5, 1000.0, float("inf")]))
+        self.assertEqual(result["matrix"], [array('B', [1, 2]), array('B', [3, 4])])
+        self.assertEqual(result["mixed"], [1, "two", None])
+        self.assertEqual(result["empty"], [])
+        self.assertEqual(result["name"], "ADC1")
+        for text, typecode in [("[255, 256]", 'H'), ("[-129]", 'h'), ("[65536]", 'I'),
+                               ("[-2147483649]", 'q'), ("[9223372036854775807]", 'Q')]:
+            self.assertEqual(tjson5.parse(text, arrays='array').typecode, typecode, msg=text)
+        # Integers above the int64 range make an unsigned 64-bit array, unless
+        # the array also holds negative integers
+        self.assertEqual(tjson5.parse("[1, 0xFFFFFFFFFFFFFFFF]", arrays='array'),
+                         array('Q', [1, 2 ** 64 - 1]))
+        self.assertEqual(tjson5.parse("[9223372036854775808, 1.5]", arrays='array'),
+                         array('d', [2.0 ** 63, 1.5]))
+        self.assertEqual(tjson5.parse("[-1, 9223372036854775808]", arrays='array'),
+                         [-1, 9223372036854775808])
+        self.assertEqual(tjson5.parse("[9223372036854775808, -1]", arrays='array'),
+                         [9223372036854775808, -1])
+        # Integers beyond 64 bits keep the array a list
+        self.assertEqual(tjson5.parse("[1, 18446744073709551616]", arrays='array'),
+                         [1, 18446744073709551616])
+        self.assertEqual(tjson5.parse("[2, 0xFFFFFFFFFFFFFFFF]", arrays={"": 'Q'}),
+                         array('Q', [2, 2 ** 64 - 1]))
+        with self.assertRaises(tjson5.TJSON5ParseError):
+            tjson5.parse("[0xFFFFFFFFFFFFFFFF]", arrays={"": 'q'})
+        self.assertEqual(tjson5.parse(SAMPLE, arrays=True), result)
+
+    def test_key_paths(self):
+        """Test fixed typecodes at key paths and their errors"""
+        result = tjson5.parse(SAMPLE, arrays={"samples": 'i', "gains": 'f', "matrix[*]": 'array',
+                                              "empty": 'H'})
+        self.assertEqual(result["samples"], array('i', [12, 4095, 0, 4095, 2048]))
+        self.assertEqual(result["gains"], array('f', [1.0, 0.5, 1000.0, float("inf")]))
+        self.assertEqual(result["matrix"], [array('B', [1, 2]), array('B', [3, 4])])
+        self.assertEqual(result["empty"], array('H'))
+        self.assertEqual(result["offsets"], [-3, 5, 127])
+        cases = [
+            ({"samples": 'B'}, "Number out of range for numeric array samples", "0x0FFF"),
+            ({"offsets": 'Q'}, "Number out of range for numeric array offsets", "-3"),
+            ({"gains": 'q'}, "Expected integer in numeric array gains", "0.5"),
+            ({"mixed": 'array'}, "Expected number in numeric array mixed", '"two"'),
+            ({"name": 'array'}, "Expected numeric array for name", '"ADC1"'),
+        ]
+        for arrays, message, token in cases:
+            with self.assertRaises(tjson5.TJSON5ParseError, msg=message) as cm:
+                tjson5.parse(SAMPLE, arrays=arrays)
+            self.assertIn(message, str(cm.exception))
+            self.assertEqual(cm.exception.pos, SAMPLE.index(token), msg=message)
+        with self.assertRaises(tjson5.TJSON5ParseError):
+            tjson5.parse("[1 2]", arrays='array')
+        with self.assertRaises(ValueError):
+            tjson5.parse("[1]", arrays={"": 'u'})
+        with self.assertRaises(ValueError):
+            tjson5.parse("[1]", arrays='list')
+
+    def test_dump(self):
+        """Test that numeric arrays are written back as arrays"""
+        result = tjson5.parse(SAMPLE, arrays='array')
+        self.assertEqual(tjson5.parse(tjson5.dumps(result)), tjson5.parse(SAMPLE))
+        self.assertEqual(tjson5.dumps(array('H', [1, 255]), hex_paths=["[*]"]), "[0x1, 0xFF]")
+        self.assertEqual(tjson5.dumps({"a": array('b')}), '{"a": []}')
+
+    def test_cache_copies(self):
+        """Test that cached numeric arrays are not shared between loads"""
+        import os
+        import tempfile
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "data.tjson5")
+            with open(path, "w") as f:
+                f.write(SAMPLE)
+            cache = tjson5.FileCache()
+            first = cache.load(path, arrays='array')
+            first["samples"][0] = 1
+            self.assertEqual(cache.load(path, arrays='array')["samples"][0], 12)
+            frozen = tjson5.FileCache(frozen=True).load(path, arrays='array')
+            self.assertEqual(frozen["samples"], (12, 4095, 0, 4095, 2048))
+
+    @unittest.skipIf(numpy is None, "NumPy is not installed")
+    def test_numpy(self):
+        """Test NumPy output with inferred and fixed dtypes"""
+        result = tjson5.parse(SAMPLE, arrays='numpy')
+        self.assertEqual(result["samples"].dtype, numpy.uint16)
+        self.assertEqual(result["offsets"].dtype, numpy.int8)
+        self.assertEqual(result["gains"].tolist(), [1.0, 0.5, 1000.0, float("inf")])
+        self.assertTrue(result["samples"].flags.writeable)
+        result = tjson5.parse(SAMPLE, arrays={"samples": numpy.float16, "offsets": '>i4',
+                                              "gains": 'numpy'})
+        self.assertEqual(result["samples"].dtype, numpy.float16)
+        self.assertEqual(result["offsets"].dtype, numpy.dtype('>i4'))
+        self.assertEqual(result["offsets"].tolist(), [-3, 5, 127])
+        self.assertEqual(result["gains"].dtype, numpy.float64)
+        self.assertEqual(tjson5.parse("[0, 0xFFFFFFFFFFFFFFFF]", arrays='numpy').dtype,
+                         numpy.uint64)
+        with self.assertRaises(tjson5.TJSON5ParseError):
+            tjson5.parse(SAMPLE, arrays={"samples": 'uint8'})
+        with self.assertRaises(ValueError):
+            tjson5.parse("[1]", arrays={"": 'complex64'})
+
+    @unittest.skipIf(numpy is None, "NumPy is not installed")
+    def test_dump_numpy(self):
+        """Test that NumPy arrays and scalars are written back as arrays and numbers"""
+        result = tjson5.parse(SAMPLE, arrays='numpy')
+        self.assertEqual(tjson5.parse(tjson5.dumps(result, indent=2)), tjson5.parse(SAMPLE))
+        self.assertEqual(tjson5.dumps(numpy.arange(4, dtype=numpy.int16).reshape(2, 2)),
+                         "[[0, 1], [2, 3]]")
+        self.assertEqual(tjson5.dumps([numpy.uint8(7), numpy.zeros(0)]), "[7, []]")
+
+if __name__ == "__main__":
+    unittest.main()
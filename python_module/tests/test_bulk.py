@@ -0,0 +1,73 @@
+import unittest
+import os
+import sys
+import shutil
+import tempfile
+from pathlib import Path
+
+# Add project directory to path to import the package
+project_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(project_dir))
+
+import tjson5
+from tjson5 import bulk
+
+class TestLoadMany(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.expected = {}
+        for i in range(12):
+            path = os.path.join(self.tmpdir, f"{i:02}.tjson5")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(f"{{index: {i}, data: [{', '.join(['0xFF'] * i * 10)}]}}")
+            self.expected[path] = {"index": i, "data": [255] * i * 10}
+        os.mkdir(os.path.join(self.tmpdir, "sub"))
+        self.bad = os.path.join(self.tmpdir, "sub", "bad.tjson5")
+        with open(self.bad, "w", encoding="utf-8") as f:
+            f.write("{a: 1,\n b: }")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def check(self, results, paths):
+        self.assertEqual(list(results), paths)
+        for path in paths:
+            if path == self.bad:
+                self.assertIsInstance(results[path], tjson5.TJSON5ParseError)
+                self.assertEqual(results[path].lineno, 2)
+            elif path in self.expected:
+                self.assertEqual(results[path], self.expected[path])
+            else:
+                self.assertIsInstance(results[path], FileNotFoundError)
+
+    def test_executors(self):
+        """Test process, thread and serial loading of a list of files"""
+        missing = os.path.join(self.tmpdir, "missing.tjson5")
+        paths = list(reversed(list(self.expected))) + [self.bad, missing]
+        for executor in ("process", "thread"):
+            self.check(tjson5.load_many(paths, workers=3, executor=executor), paths)
+        self.check(tjson5.load_many(paths, workers=1), paths)
+        with self.assertRaises(ValueError):
+            tjson5.load_many(paths, executor="fiber")
+
+    def test_directory_and_glob(self):
+        """Test expanding a directory or a glob pattern"""
+        all_paths = sorted(list(self.expected) + [self.bad])
+        self.check(tjson5.load_many(self.tmpdir, workers=2, executor="thread"), all_paths)
+        self.check(tjson5.load_many(Path(self.tmpdir), workers=2, executor="thread"), all_paths)
+        pattern = os.path.join(self.tmpdir, "0*.tjson5")
+        self.check(tjson5.load_many(pattern, workers=2, executor="thread"),
+                   sorted(p for p in self.expected if os.path.basename(p).startswith("0")))
+        self.assertEqual(tjson5.load_many([]), {})
+
+    def test_chunks(self):
+        """Test that chunks start with the largest files and cover every file once"""
+        paths = list(self.expected)
+        chunks = bulk._make_chunks(paths, 2)
+        self.assertGreater(len(chunks), 1)
+        self.assertEqual(chunks[0][0], len(paths) - 1)
+        self.assertEqual(sorted(i for chunk in chunks for i in chunk), list(range(len(paths))))
+
+if __name__ == "__main__":
+    unittest.main()
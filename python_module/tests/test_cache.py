@@ -0,0 +1,171 @@
+import unittest
+import os
+import sys
+import shutil
+import tempfile
+import threading
+from pathlib import Path
+
+# Add project directory to path to import the package
+project_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(project_dir))
+
+import tjson5
+
+class TestFileCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def write(self, name, text, mtime=1000000000):
+        """Write a file with an old modification time, so its stat is trusted"""
+        path = os.path.join(self.tmpdir, name)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+        if mtime is not None:
+            os.utime(path, (mtime, mtime))
+        return path
+
+    def test_hits_and_misses(self):
+        """Test that unchanged files are served from the cache"""
+        cache = tjson5.FileCache()
+        path = self.write("a.tjson5", "{a: [1, 0xFF]}")
+        self.assertEqual(cache.load(path), {"a": [1, 255]})
+        self.assertEqual(cache.load(path), {"a": [1, 255]})
+        self.assertEqual(cache.cache_info(), tjson5.CacheInfo(1, 1, 0, 1, 14))
+
+    def test_copies_are_independent(self):
+        """Test that modifying a returned result does not affect the cache"""
+        cache = tjson5.FileCache()
+        path = self.write("a.tjson5", "{a: [1, {b: 2}]}")
+        first = cache.load(path)
+        first["a"][1]["b"] = 3
+        first["c"] = 4
+        self.assertEqual(cache.load(path), {"a": [1, {"b": 2}]})
+
+    def test_frozen(self):
+        """Test that frozen results are shared and read-only"""
+        cache = tjson5.FileCache(frozen=True)
+        path = self.write("a.tjson5", "{a: [1, {b: 2}]}")
+        first = cache.load(path)
+        self.assertIs(cache.load(path), first)
+        self.assertEqual(first["a"][1], {"b": 2})
+        self.assertEqual(first["a"], (1, {"b": 2}))
+        with self.assertRaises(TypeError):
+            first["a"][1]["b"] = 3
+
+    def test_changed_and_touched_files(self):
+        """Test that changed files are parsed again and touched files are not"""
+        cache = tjson5.FileCache()
+        path = self.write("a.tjson5", "{a: 1}")
+        self.assertEqual(cache.load(path), {"a": 1})
+        self.write("a.tjson5", "{a: 2}")  # same size and mtime, stat alone cannot tell
+        self.assertEqual(cache.load(path), {"a": 1})
+        self.write("a.tjson5", "{a: 2}", mtime=1000000001)
+        self.assertEqual(cache.load(path), {"a": 2})
+        self.write("a.tjson5", "{a: 2}", mtime=1000000002)
+        self.assertEqual(cache.load(path), {"a": 2})
+        self.assertEqual(cache.cache_info()[:3], (2, 2, 0))
+        # Recently modified files are always verified by content hash
+        self.write("a.tjson5", "{a: 3}", mtime=None)
+        self.assertEqual(cache.load(path), {"a": 3})
+        self.write("a.tjson5", "{a: 4}", mtime=None)
+        self.assertEqual(cache.load(path), {"a": 4})
+
+    def test_eviction(self):
+        """Test LRU eviction by entry count and total size"""
+        paths = [self.write(f"{i}.tjson5", f"[{i}]") for i in range(4)]
+        cache = tjson5.FileCache(max_entries=2)
+        for path in paths[:3]:
+            cache.load(path)
+        cache.load(paths[1])
+        cache.load(paths[3])  # evicts paths[2], the least recently used
+        self.assertEqual(cache.cache_info(), tjson5.CacheInfo(1, 4, 2, 2, 6))
+        cache.load(paths[1])
+        self.assertEqual(cache.cache_info().hits, 2)
+        cache = tjson5.FileCache(max_bytes=7)
+        for path in paths:
+            cache.load(path)
+        self.assertEqual(cache.cache_info()[2:], (2, 2, 6))
+        big = self.write("big.tjson5", "[" + "1," * 10 + "]")
+        cache.load(big)
+        self.assertEqual(len(cache), 2)
+
+    def test_invalidate(self):
+        """Test explicit invalidation"""
+        cache = tjson5.FileCache()
+        path = self.write("a.tjson5", "[1]")
+        other = self.write("b.tjson5", "[2]")
+        cache.load(path)
+        cache.load(path, encodings=["latin1"])
+        cache.load(other)
+        cache.invalidate(path)
+        self.assertEqual(len(cache), 1)
+        cache.load(path)
+        self.assertEqual(cache.cache_info().misses, 4)
+        cache.invalidate()
+        self.assertEqual(len(cache), 0)
+        cache.clear()
+        self.assertEqual(cache.cache_info(), tjson5.CacheInfo(0, 0, 0, 0, 0))
+
+    def test_load_file(self):
+        """Test load_file with the default and an explicit cache"""
+        path = self.write("a.tjson5", "{name: 'x'}")
+        self.assertEqual(tjson5.load_file(path, cache=True), {"name": "x"})
+        self.assertEqual(tjson5.load_file(path, cache=True), {"name": "x"})
+        cache = tjson5.FileCache()
+        tjson5.load_file(path, cache=cache)
+        self.assertEqual(cache.cache_info().misses, 1)
+        with self.assertRaises(tjson5.TJSON5ParseError):
+            tjson5.load_file(self.write("bad.tjson5", "{a: }"), cache=cache)
+        self.assertEqual(len(cache), 1)
+        # Hooks are part of the key
+        self.assertEqual(tjson5.load_file(path, cache=cache, object_pairs_hook=list), [("name", "x")])
+        self.assertEqual(tjson5.load_file(path, cache=cache), {"name": "x"})
+        self.assertEqual(cache.cache_info()[:2], (1, 2))
+
+    def test_unhashable_options(self):
+        """Test that option dicts are keyed by contents and intern tables by identity"""
+        cache = tjson5.FileCache()
+        path = self.write("a.tjson5", "{a: [1, 2], b: [3, 4]}")
+        for name in "abab":
+            # A new dict each time, which may reuse the id of a collected one
+            value = cache.load(path, arrays={name: "array"})
+            self.assertEqual(type(value[name]).__name__, "array", name)
+            self.assertIs(type(value["b" if name == "a" else "a"]), list)
+        self.assertEqual(cache.cache_info()[:2], (2, 2))
+        table = {}
+        cache.load(path, intern_table=table)
+        cache.load(path, intern_table=table)
+        cache.load(path, intern_table={})
+        self.assertEqual(cache.cache_info()[:2], (3, 4))
+
+    def test_threads(self):
+        """Test concurrent loads from several threads"""
+        cache = tjson5.FileCache(max_entries=3)
+        paths = [self.write(f"{i}.tjson5", f"{{value: {i}}}") for i in range(5)]
+        errors = []
+
+        def worker():
+            try:
+                for n in range(200):
+                    i = n % len(paths)
+                    self.assertEqual(cache.load(paths[i]), {"value": i})
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        info = cache.cache_info()
+        self.assertEqual(info.hits + info.misses, 1600)
+        self.assertEqual(info.entries, 3)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,98 @@
+import unittest
+import os
+import sys
+from pathlib import Path
+
+# Add project directory to path to import the package
+project_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(project_dir))
+
+import tjson5
+
+test_file = os.path.join(os.path.dirname(os.path.abspath(__file__)), "test.tjson5")
+
+SAMPLE = '''// Chip description
+{
+    series: "APM32F4",
+    parts: [
+        {name: "APM32F405", pins: [1, 2, 3], tags: ["a"]},
+        {name: "APM32F407", pins: [4, 5], tags: []},
+    ],
+    notes: """two
+lines""",
+}'''
+
+class TestDocument(unittest.TestCase):
+
+    def edit(self, doc, old, new):
+        """Replace the first occurrence of old in the source with new"""
+        start = doc.source.index(old)
+        return doc.apply_edit(start, start + len(old), new)
+
+    def test_edits(self):
+        """Test that edits give the value of a full parse and the changed paths"""
+        doc = tjson5.Document(SAMPLE)
+        self.assertEqual(doc.value, tjson5.parse(SAMPLE))
+        before = doc.value
+        value, changed = self.edit(doc, "405", "415")
+        self.assertEqual(changed, {("parts", 0, "name")})
+        self.assertEqual(value["parts"][0]["name"], "APM32F415")
+        # Untouched containers are shared, the previous value is unchanged
+        self.assertIs(value["parts"][1], before["parts"][1])
+        self.assertEqual(before["parts"][0]["name"], "APM32F405")
+        value, changed = self.edit(doc, "[1, 2, 3]", "[1, 2]")
+        self.assertEqual(changed, {("parts", 0, "pins", 2)})
+        value, changed = self.edit(doc, "tags: []", "tags: [], extra: {x: 0xFF}")
+        self.assertEqual(changed, {("parts", 1, "extra")})
+        value, changed = self.edit(doc, "// Chip", "// The chip")
+        self.assertEqual(changed, set())
+        value, changed = self.edit(doc, "    ]", "        {name: 'new'},\n    ]")
+        self.assertEqual(changed, {("parts", 2)})
+        self.assertEqual(value, tjson5.parse(doc.source))
+        self.assertIs(doc.value, value)
+
+    def test_structure_changes(self):
+        """Test edits that reach beyond their container"""
+        doc = tjson5.Document(SAMPLE)
+        # Closing the array early makes the rest of the object invalid
+        with self.assertRaises(tjson5.TJSON5ParseError):
+            self.edit(doc, '"a"]', '"a"]]')
+        self.assertEqual(doc.value, tjson5.parse(SAMPLE))
+        value, changed = self.edit(doc, '"a"]]', '"a"], more: []')
+        self.assertEqual(value, tjson5.parse(doc.source))
+        self.assertEqual(changed, {("parts", 0, "more")})
+        # A comment that swallows the end of a container
+        doc = tjson5.Document(SAMPLE)
+        value, changed = self.edit(doc, "pins: [4, 5], ", "/* pins: [4, 5], */ ")
+        self.assertEqual(changed, {("parts", 1, "pins")})
+        with self.assertRaises(tjson5.TJSON5ParseError):
+            self.edit(doc, "tags: []", "tags: [] //")
+        # Objects become arrays, and scalar documents are parsed again in full
+        doc = tjson5.Document("[1, {a: 1}]")
+        self.assertEqual(doc.apply_edit(4, 10, "[2]"), ([1, [2]], {(1,)}))
+        doc = tjson5.Document("1")
+        self.assertEqual(doc.apply_edit(0, 1, "{a: 2}"), ({"a": 2}, {()}))
+        with self.assertRaises(ValueError):
+            doc.apply_edit(3, 100, "")
+
+    def test_random_edits(self):
+        """Test many edits of a real document against full parses"""
+        with open(test_file, "r", encoding="utf-8") as f:
+            doc = tjson5.Document(f.read().encode("utf-8"))
+        pieces = ["{", "}", "[", "]", ",", ":", '"', " ", "1", "x: 2,", "/*", "*/", '"""']
+        for i in range(300):
+            source = doc.source
+            start = (i * 7919) % len(source)
+            end = min(len(source), start + i % 4)
+            replacement = pieces[i % len(pieces)] if i % 3 else ""
+            try:
+                expected = tjson5.parse(source[:start] + replacement + source[end:])
+            except tjson5.TJSON5ParseError:
+                with self.assertRaises(tjson5.TJSON5ParseError):
+                    doc.apply_edit(start, end, replacement)
+                continue
+            value, changed = doc.apply_edit(start, end, replacement)
+            self.assertEqual(value, expected)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,124 @@
+import unittest
+import io
+import os
+import sys
+import json
+from pathlib import Path
+
+# Add project directory to path to import the package
+project_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(project_dir))
+
+import tjson5
+
+class TestDump(unittest.TestCase):
+
+    def setUp(self):
+        test_file = os.path.join(os.path.dirname(os.path.abspath(__file__)), "test.tjson5")
+        self.data = tjson5.load_file(test_file)
+
+    def test_json_compatible(self):
+        """Test that the default output is identical to the json module"""
+        data = {"a": [1, 2.5, -0.0, 10 ** 30, True, None, "é\n\"\\"], 1: {}, 2.5: [],
+                None: (1,), False: "x", "nested": {"b": [[], [{}]]}}
+        for indent in (None, 0, 2, "\t"):
+            self.assertEqual(tjson5.dumps(data, indent=indent), json.dumps(data, indent=indent))
+            self.assertEqual(tjson5.dumps(self.data, indent=indent),
+                             json.dumps(self.data, indent=indent))
+        self.assertEqual(tjson5.dumps("é", ensure_ascii=False), json.dumps("é", ensure_ascii=False))
+        self.assertEqual(tjson5.dumps([float("nan"), float("inf"), float("-inf")]),
+                         "[NaN, Infinity, -Infinity]")
+
+    def test_compact_types(self):
+        """Test the types json does not know in the compact output, which json writes"""
+        from array import array
+        from types import MappingProxyType
+        data = {"a": array("i", [1, -2]), "m": MappingProxyType({"x": (1.5, array("d"))})}
+        expected = '{"a": [1, -2], "m": {"x": [1.5, []]}}'
+        self.assertEqual(tjson5.dumps(data), expected)
+        self.assertEqual(json.loads(tjson5.dumps(data, indent=1)), json.loads(expected))
+        f = io.StringIO()
+        tjson5.dump(data, f)
+        self.assertEqual(f.getvalue(), expected)
+        f = io.StringIO()
+        tjson5.dump_documents([data, [1]], f)
+        self.assertEqual(f.getvalue(), expected + "\n[1]\n")
+        for options in ({}, {"indent": 2}):
+            with self.assertRaisesRegex(TypeError, "object is not TJSON5 serializable"):
+                tjson5.dumps([object()], **options)
+
+    def test_tjson5_options(self):
+        """Test triple-quoted strings, unquoted keys, hex values and trailing commas"""
+        data = {"name": "x", "two words": 1, "_id$2": {"text": "line 1\n\tline 2"},
+                "registers": [{"mask": 255, "reset": 0}, {"mask": -16, "reset": 1}]}
+        text = tjson5.dumps(data, indent=2, triple_quotes=True, unquoted_keys=True,
+                            hex_paths=["registers[*].mask"], trailing_commas=True)
+        self.assertEqual(text, '''{
+  name: "x",
+  "two words": 1,
+  _id$2: {
+    text: """line 1
+\tline 2""",
+  },
+  registers: [
+    {
+      mask: 0xFF,
+      reset: 0,
+    },
+    {
+      mask: -0x10,
+      reset: 1,
+    },
+  ],
+}''')
+        self.assertEqual(tjson5.parse(text), data)
+        self.assertEqual(tjson5.dumps([1, {"a": 2}], trailing_commas=True, unquoted_keys=True),
+                         "[1, {a: 2,},]")
+        self.assertEqual(tjson5.dumps({"a": [1, 2]}, hex_paths=["a[1]"]), '{"a": [1, 0x2]}')
+
+    def test_triple_quote_fallback(self):
+        """Test that strings that would not round-trip stay regular strings"""
+        for s in ['one line', 'ends with "\nquote"', 'has """\n inside', 'cr\r\nlf',
+                  'bell\n\x07', 'é\nnon-ascii']:
+            text = tjson5.dumps([s], triple_quotes=True)
+            self.assertEqual(text, json.dumps([s]), msg=repr(s))
+        text = tjson5.dumps(["é\nnon-ascii"], triple_quotes=True, ensure_ascii=False)
+        self.assertEqual(text, '["""é\nnon-ascii"""]')
+        self.assertEqual(tjson5.parse(text), ["é\nnon-ascii"])
+
+    def test_round_trip(self):
+        """Test that the sample file survives a TJSON5 round trip"""
+        text = tjson5.dumps(self.data, indent=4, triple_quotes=True, unquoted_keys=True,
+                            hex_paths=["*"], trailing_commas=True, ensure_ascii=False)
+        self.assertEqual(tjson5.parse(text), self.data)
+
+    def test_chunked_writes(self):
+        """Test that dump writes in chunks and produces the same text as dumps"""
+        class Recorder(io.StringIO):
+            writes = 0
+            def write(self, s):
+                self.writes += 1
+                return super().write(s)
+
+        data = [self.data] * 20
+        f = Recorder()
+        tjson5.dump(data, f, indent=2, unquoted_keys=True)
+        self.assertEqual(f.getvalue(), tjson5.dumps(data, indent=2, unquoted_keys=True))
+        self.assertGreater(f.writes, 1)
+        self.assertLess(f.writes, len(f.getvalue()) // 1000)
+
+    def test_errors(self):
+        """Test unsupported values and circular references"""
+        with self.assertRaises(TypeError):
+            tjson5.dumps({"a": object()})
+        with self.assertRaises(TypeError):
+            tjson5.dumps({(1, 2): 1})
+        data = {"a": []}
+        data["a"].append(data)
+        with self.assertRaises(ValueError):
+            tjson5.dumps(data)
+        shared = [1]
+        self.assertEqual(tjson5.dumps([shared, shared]), "[[1], [1]]")
+
+if __name__ == "__main__":
+    unittest.main()
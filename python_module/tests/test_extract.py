@@ -0,0 +1,119 @@
+import unittest
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# Add project directory to path to import the package
+project_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(project_dir))
+
+import tjson5
+
+test_file = os.path.join(os.path.dirname(os.path.abspath(__file__)), "test.tjson5")
+
+SAMPLE = '''// Chip description
+{
+    series: "APM32F4",
+    'pins': {"wirebonding-layout": [1, 2], x: 3},
+    parts: [
+        {name: "APM32F405", pins: 64, tags: ["a", "b"]},
+        {name: 'APM32\\u0046407', pins: 0x30, extra: {deep: [1, {name: "nested"}]}},
+    ],
+    notes: """ignored "text" """,
+}'''
+
+class TestExtract(unittest.TestCase):
+
+    def test_paths(self):
+        """Test plain, wildcard, index and quoted key paths"""
+        data = tjson5.parse(SAMPLE)
+        result = tjson5.extract(SAMPLE, ["series", "parts[*].name", "parts[1].pins",
+                                         'pins["wirebonding-layout"]', "parts[*].tags[1]",
+                                         "parts[0]", "missing", "parts[5].name"])
+        self.assertEqual(result, {
+            "series": "APM32F4",
+            "parts[*].name": ["APM32F405", "APM32F407"],
+            "parts[1].pins": 48,
+            'pins["wirebonding-layout"]': [1, 2],
+            "parts[*].tags[1]": ["b"],
+            "parts[0]": data["parts"][0],
+        })
+        self.assertEqual(tjson5.extract(SAMPLE, ""), {"": data})
+        self.assertEqual(tjson5.extract(SAMPLE, [("parts", "*", "pins")]),
+                         {("parts", "*", "pins"): [64, 48]})
+        self.assertEqual(tjson5.extract("[[1, 2], [3, 4]]", ["[*][1]", "[0][*]", "[0]"]),
+                         {"[*][1]": [2, 4], "[0][*]": [1, 2], "[0]": [1, 2]})
+
+    def test_compiled(self):
+        """Test reusing compiled paths on several documents and on files"""
+        paths = tjson5.compile_paths(["parts[*].name", "series"])
+        self.assertEqual(len(paths), 2)
+        data = tjson5.load_file(test_file)
+        expected = {"parts[*].name": [part["name"] for part in data["parts"]]}
+        if "series" in data:
+            expected["series"] = data["series"]
+        self.assertEqual(tjson5.extract(Path(test_file), paths), expected)
+        with open(test_file, "rb") as f:
+            self.assertEqual(tjson5.extract(f.read(), paths), expected)
+        self.assertEqual(tjson5.extract(SAMPLE, paths)["series"], "APM32F4")
+
+    def test_errors(self):
+        """Test syntax errors in the scanned part and the early stop"""
+        with self.assertRaises(tjson5.TJSON5ParseError) as cm:
+            tjson5.extract(SAMPLE.replace("pins: 64,", "pins: 64 x"), ["parts[*].name"])
+        self.assertEqual(cm.exception.lineno, 6)
+        with self.assertRaises(tjson5.TJSON5ParseError):
+            tjson5.extract(SAMPLE + " extra", ["parts[*].name"])
+        with self.assertRaises(tjson5.TJSON5ParseError):
+            tjson5.extract("", ["a"])
+        # Once every path without a wildcard is found outside of an open
+        # object, the rest is not read
+        self.assertEqual(tjson5.extract('{a: 1} garbage', ["a"]), {"a": 1})
+        self.assertEqual(tjson5.validate('{a: 1} garbage'), [(1, 8, "Extra data")])
+        self.assertEqual(tjson5.extract('[{a: 1}, {b: [', ["[0].a"]), {"[0].a": 1})
+        # ...but the rest of an object may hold a duplicate key
+        with self.assertRaises(tjson5.TJSON5ParseError):
+            tjson5.extract('{a: 1, b: [', ["a"])
+        with self.assertRaises(tjson5.TJSON5ParseError):
+            tjson5.extract('[{a: 1, b: [', ["[0].a"])
+        # ...and a path with a wildcard may match anywhere
+        with self.assertRaises(tjson5.TJSON5ParseError):
+            tjson5.extract('[{a: 1}, {b: [', ["[0].a", "[*].b"])
+        with self.assertRaises(ValueError):
+            tjson5.compile_paths(["parts[x"])
+
+    def test_duplicate_keys(self):
+        """Test that duplicate keys give the values of parse, where the last member wins"""
+        text = '''{
+            a: 1, b: {c: 2, d: [1, {e: 3}]}, "x": [{y: 1, y: 2}, {"y": 3}],
+            a: 4, b: {c: 5, c: 6}, 'q\\u0020r': 1, "q r": {s: 2},
+        }'''
+        data = tjson5.parse(text)
+        self.assertEqual(data["b"], {"c": 6})
+        paths = ["a", "b.c", "b.d", "b.d[1].e", "*", "b.*", "x[*].y", "x[0]", "*.c", "*[*].*",
+                 "'q r'", '"q r".s', "", "x[*]"]
+        for path in paths:
+            expected = list(tjson5.items(tjson5.dumps(data), path))
+            result = tjson5.extract(text, [path]).get(path)
+            if "*" in path:
+                self.assertEqual(result, expected, msg=path)
+            else:
+                self.assertEqual([] if result is None else [result], expected, msg=path)
+        self.assertEqual(tjson5.extract(text, ["*"])["*"], list(data.values()))
+        self.assertEqual(tjson5.extract(text, paths), tjson5.extract(tjson5.dumps(data), paths))
+
+    def test_large_document(self):
+        """Test skipping many subtrees across token batches"""
+        text = "[" + ",".join(f'{{id: {i}, name: "n{i}", data: {{v: [{i}, [{i}]], s: "x"}}}}'
+                             for i in range(3000)) + "]"
+        result = tjson5.extract(text, ["[*].id", "[2999].data.v[1]"])
+        self.assertEqual(result["[*].id"], list(range(3000)))
+        self.assertEqual(result["[2999].data.v[1]"], [2999])
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "large.tjson5"
+            path.write_text(text, encoding="utf-16")
+            self.assertEqual(tjson5.extract(path, "[1500].name"), {"[1500].name": "n1500"})
+
+if __name__ == "__main__":
+    unittest.main()
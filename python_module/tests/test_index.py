@@ -0,0 +1,141 @@
+import unittest
+import os
+import sys
+import time
+import shutil
+import tempfile
+from pathlib import Path
+
+# Add project directory to path to import the package
+project_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(project_dir))
+
+import tjson5
+from tjson5.index import Index, Match
+
+class TestIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.root = os.path.join(self.tmpdir, "devices")
+        os.makedirs(os.path.join(self.root, "sub"))
+        self.write("a.tjson5", '''{
+            series: "A",
+            parts: [{name: "A1", package: "LQFP64"}, {name: "A2", package: "QFN32"}],
+            flags: {enabled: true, mask: 0xFF, big: 0xFFFFFFFFFFFFFFFFFF, none: null},
+        }''')
+        self.write("sub/b.tjson5", '''{
+            series: "B",
+            parts: [{name: "B1", package: "LQFP64", "odd.key": 1.5}],
+        }''')
+        self.index = Index(os.path.join(self.tmpdir, "index.db"), self.root)
+
+    def tearDown(self):
+        self.index.close()
+        shutil.rmtree(self.tmpdir)
+
+    def write(self, name, text, mtime=1000000000):
+        path = os.path.join(self.root, name)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.utime(path, (mtime, mtime))
+        return path
+
+    def test_find(self):
+        """Test key path and value lookups"""
+        b = os.path.join("sub", "b.tjson5")
+        self.index.update()
+        matches = self.index.find("parts[*].package", "LQFP64")
+        self.assertEqual([(m.file, m.path, m.value) for m in matches],
+                         [("a.tjson5", ("parts", 0, "package"), "LQFP64"),
+                          (b, ("parts", 0, "package"), "LQFP64")])
+        self.assertEqual([m.value for m in self.index.find("parts[1].name")], ["A2"])
+        self.assertEqual([m.value for m in self.index.find("series")], ["A", "B"])
+        self.assertEqual([m.path for m in self.index.find("*", "B")], [("series",)])
+        self.assertEqual([m.path for m in self.index.find("parts[*].*", "A1")], [("parts", 0, "name")])
+        self.assertEqual([m.value for m in self.index.find('parts[0]["odd.key"]')], [1.5])
+        self.assertEqual(self.index.find("flags.enabled", True)[0].value, True)
+        self.assertEqual(self.index.find("flags.mask", 255.0)[0].value, 255)
+        self.assertEqual(self.index.find("flags.enabled", 1), [])
+        self.assertEqual(self.index.find("flags.none", None)[0].value, None)
+        self.assertEqual(self.index.find("flags.big", 2 ** 72 - 1)[0].value, 2 ** 72 - 1)
+        self.assertEqual(self.index.find("missing.*"), [])
+        self.assertEqual([m.path for m in self.index.find("flags")], [("flags",)])
+
+    def test_load(self):
+        """Test decoding matches and their ancestors from the stored offsets"""
+        self.index.update()
+        match = self.index.find("parts[*].package", "QFN32")[0]
+        self.assertEqual(self.index.load(match), "QFN32")
+        self.assertEqual(self.index.load(match, up=1), {"name": "A2", "package": "QFN32"})
+        self.assertEqual(self.index.load(match, up=3),
+                         tjson5.load_file(os.path.join(self.root, "a.tjson5")))
+        # A stale match is re-indexed and looked up by its key path
+        self.write("a.tjson5", '{parts: [{name: "X"}, {package: "QFN48"}]}', mtime=1000000001)
+        self.assertEqual(self.index.load(match), "QFN48")
+        self.assertEqual(self.index.find("parts[*].package", "QFN32"), [])
+        with self.assertRaises(KeyError):
+            self.index.load(Match("a.tjson5", ("parts", 5), None, 0))
+
+    def test_incremental_update(self):
+        """Test that only new, changed and removed files are processed"""
+        b = os.path.join("sub", "b.tjson5")
+        stats = self.index.update()
+        self.assertEqual(stats.added, ["a.tjson5", b])
+        stats = self.index.update()
+        self.assertEqual((stats.added, stats.updated, stats.unchanged), ([], [], ["a.tjson5", b]))
+        # Touched but unchanged
+        self.write("a.tjson5", open(os.path.join(self.root, "a.tjson5")).read(), mtime=1000000005)
+        self.write("c.tjson5", "{series: 'C', parts: [}")
+        os.unlink(os.path.join(self.root, b))
+        stats = self.index.update()
+        self.assertEqual(stats, (["c.tjson5"], [], ["a.tjson5"], [b], ["c.tjson5"]))
+        self.assertEqual([m.value for m in self.index.find("series")], ["A"])
+        self.assertIn("line 1", self.index.files()["c.tjson5"])
+        self.write("c.tjson5", "{series: 'C'}", mtime=1000000006)
+        stats = self.index.update()
+        self.assertEqual((stats.updated, stats.failed), (["c.tjson5"], []))
+        self.assertEqual([m.value for m in self.index.find("series")], ["A", "C"])
+
+    def test_duplicate_keys(self):
+        """Test that a repeated key is indexed with its last value, as parse() keeps it"""
+        path = self.write("a.tjson5", '''{
+            part: {name: "old", pins: [1, 2], old: true},
+            part: {name: "new", pins: [3]},
+            series: "A", series: "A2",
+        }''')
+        self.index.update()
+        self.assertEqual([(m.path, m.value) for m in self.index.find("part.*")],
+                         [(("part", "name"), "new"), (("part", "pins"), None)])
+        self.assertEqual([m.value for m in self.index.find("part.pins[*]")], [3])
+        self.assertEqual([m.value for m in self.index.find("series") if m.file == "a.tjson5"], ["A2"])
+        match = self.index.find("part.name")[0]
+        self.assertEqual(self.index.load(match), "new")
+        self.assertEqual(self.index.load(match, up=1), tjson5.load_file(path)["part"])
+
+    def test_racy_mtime(self):
+        """Test that a same-size edit within the mtime tick of indexing is not missed"""
+        path = self.write("a.tjson5", '{series: "A"}')
+        mtime_ns = time.time_ns()
+        os.utime(path, ns=(mtime_ns, mtime_ns))
+        self.index.update()
+        match = self.index.find("series")[0]
+        self.write("a.tjson5", '{series:"Zz"}')
+        os.utime(path, ns=(mtime_ns, mtime_ns))
+        self.assertEqual(self.index.load(match), "Zz")
+        self.write("a.tjson5", '{series: "Y"}')
+        os.utime(path, ns=(mtime_ns, mtime_ns))
+        self.assertEqual(self.index.update().updated, ["a.tjson5"])
+        self.assertEqual([m.value for m in self.index.find("series")], ["Y", "B"])
+
+    def test_persistence(self):
+        """Test that the index is reused across connections"""
+        self.index.update()
+        self.index.close()
+        with Index(os.path.join(self.tmpdir, "index.db"), self.root) as index:
+            self.assertEqual(len(index.update().unchanged), 2)
+            self.assertEqual(len(index.find("parts[*].name")), 3)
+        self.index = Index(os.path.join(self.tmpdir, "index.db"), self.root)
+
+if __name__ == "__main__":
+    unittest.main()
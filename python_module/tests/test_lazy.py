@@ -0,0 +1,93 @@
+import unittest
+import os
+import sys
+import threading
+from pathlib import Path
+
+# Add project directory to path to import the package
+project_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(project_dir))
+
+import tjson5
+
+SAMPLE = '''// Leading comment
+{
+    name: "TJSON5 Example",
+    description: """
+        A "quoted" multi-line
+        description
+    """,
+    values: [1, 0xFF, 0b1010, {nested: true},],  /* trailing comma */
+    'empty': {},
+}'''
+
+class TestLazyDocument(unittest.TestCase):
+
+    def test_keys_without_decoding(self):
+        """Test that keys, len and membership do not decode any value"""
+        doc = tjson5.lazy_document(SAMPLE)
+        self.assertIsInstance(doc, tjson5.LazyMapping)
+        self.assertEqual(list(doc), ["name", "description", "values", "empty"])
+        self.assertEqual(len(doc), 4)
+        self.assertIn("values", doc)
+        self.assertNotIn("missing", doc)
+        self.assertEqual(doc._cache, {})
+
+    def test_values_decoded_once(self):
+        """Test that values are decoded on first access and then cached"""
+        doc = tjson5.lazy_document(SAMPLE)
+        values = doc["values"]
+        self.assertEqual(values, [1, 255, 10, {"nested": True}])
+        self.assertIs(doc["values"], values)
+        self.assertEqual(list(doc._cache), ["values"])
+        self.assertEqual(dict(doc), tjson5.parse(SAMPLE))
+        with self.assertRaises(KeyError):
+            doc["missing"]
+
+    def test_threads(self):
+        """Test decoding the same lazy mapping from several threads"""
+        text = "{" + ", ".join(f"k{i}: [{i}, 'v{i}']" for i in range(200)) + "}"
+        expected = tjson5.parse(text)
+        for _ in range(20):
+            doc = tjson5.lazy_document(text)
+            results = []
+            threads = [threading.Thread(target=lambda: results.append(dict(doc)))
+                       for _ in range(4)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            self.assertEqual(results, [expected] * 4)
+
+    def test_sequence(self):
+        """Test indexing and slicing a lazy top-level array"""
+        doc = tjson5.lazy_document('[1, "two", [3], {four: 4}]')
+        self.assertIsInstance(doc, tjson5.LazySequence)
+        self.assertEqual(len(doc), 4)
+        self.assertEqual(doc[-1], {"four": 4})
+        self.assertEqual(doc[1:3], ["two", [3]])
+        self.assertEqual(list(doc), [1, "two", [3], {"four": 4}])
+        with self.assertRaises(IndexError):
+            doc[4]
+
+    def test_scalar_and_bytes(self):
+        """Test scalar documents and raw input"""
+        self.assertEqual(tjson5.lazy_document(" 0xFF // hex"), 255)
+        doc = tjson5.lazy_document('{name: "Café"}'.encode("utf-16"))
+        self.assertEqual(doc["name"], "Café")
+
+    def test_errors_at_load(self):
+        """Test that syntax errors are raised by the scan, not on access"""
+        for text in ['{a: 1, b: [1 2]}', '{a: 1', '[1,,2]', '{a: 1} x', '']:
+            with self.assertRaises(tjson5.TJSON5ParseError, msg=text):
+                tjson5.lazy_document(text)
+
+    def test_load_lazy(self):
+        """Test load_lazy on the sample file"""
+        test_file = os.path.join(os.path.dirname(os.path.abspath(__file__)), "test.tjson5")
+        doc = tjson5.load_lazy(test_file)
+        self.assertEqual(doc["series"], "APM32F411")
+        self.assertEqual(dict(doc), tjson5.load_file(test_file))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,148 @@
+import unittest
+import os
+import sys
+import subprocess
+from pathlib import Path
+
+# Add project directory to path to import the package
+project_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(project_dir))
+
+import tjson5
+from tjson5 import pure
+
+try:
+    import tjson5parser
+except ImportError:
+    tjson5parser = None
+
+test_file = os.path.join(os.path.dirname(os.path.abspath(__file__)), "test.tjson5")
+
+BROKEN = [
+    "",
+    "   // only a comment",
+    "{a: 1",
+    "{a 1}",
+    "[1, 2 3]",
+    "{a: 1,, b: 2}",
+    "[1, 2] x",
+    '{a: "abc',
+    '{a: "\\x1g"}',
+    "{a: 0x}",
+    "{a: 1 /* open",
+    '{a: """abc}',
+]
+
+class TestPure(unittest.TestCase):
+
+    def setUp(self):
+        with open(test_file, "r", encoding="utf-8") as f:
+            self.text = f.read()
+
+    def test_api(self):
+        """Test that the pure-Python module has the API of the extension"""
+        for name in ("parse", "load", "loads", "dump", "dumps", "iterparse", "items", "Parser",
+                     "iter_documents", "dump_documents", "compile_schema", "Schema", "compile_paths", "Paths", "extract", "validate",
+                     "preprocessTripleQuotedStrings", "preprocessHexBinary"):
+            self.assertTrue(callable(getattr(pure, name)), name)
+        self.assertIn(tjson5.IMPLEMENTATION, ("extension", "python"))
+        self.assertTrue(issubclass(pure.TJSON5ValidationError, pure.TJSON5ParseError))
+
+    def test_parse(self):
+        """Test decoding with the pure-Python implementation"""
+        data = pure.parse(self.text)
+        self.assertEqual(data, pure.parse(self.text.encode("utf-16")))
+        self.assertEqual(pure.parse("[0xFF, 0b1010, -0x10, 1e3, .5, +1, Infinity]"),
+                         [255, 10, -16, 1000.0, 0.5, 1, float("inf")])
+        self.assertEqual(pure.parse('{a: """line "one"\nline two""", \'b\': \'x\\u0041\',}'),
+                         {"a": 'line "one"\nline two', "b": "xA"})
+        self.assertEqual(pure.parse('{a: "x" /* c */, b: [1 // c\n, 2\u2028, 3]}'),
+                         {"a": "x", "b": [1, 2, 3]})
+        self.assertEqual(pure.parse("[1.5, 2]", parse_float=str, parse_int=float), ["1.5", 2.0])
+        self.assertEqual(pure.parse("{a: 1, a: 2}", object_pairs_hook=list), [("a", 1), ("a", 2)])
+        self.assertEqual(pure.loads(pure.dumps(data)), data)
+        self.assertEqual(len(pure.parse("[" * 900 + "]" * 900)), 1)
+        with self.assertRaises(pure.TJSON5ParseError) as cm:
+            pure.parse("[" * 5000 + "]" * 5000)
+        self.assertIn("Maximum nesting depth exceeded", str(cm.exception))
+        if tjson5parser is not None:
+            self.assertEqual(data, tjson5parser.parse(self.text))
+            self.assertEqual(pure.dumps(data, indent=4, triple_quotes=True, unquoted_keys=True),
+                             tjson5parser.dumps(data, indent=4, triple_quotes=True,
+                                                unquoted_keys=True))
+
+    @unittest.skipIf(tjson5parser is None, "extension not built")
+    def test_errors(self):
+        """Test that errors have the messages and positions of the extension"""
+        for text in BROKEN:
+            with self.assertRaises(tjson5parser.TJSON5ParseError) as expected:
+                tjson5parser.parse(text)
+            with self.assertRaises(pure.TJSON5ParseError) as cm:
+                pure.parse(text)
+            self.assertEqual((str(cm.exception), cm.exception.lineno, cm.exception.colno),
+                             (str(expected.exception), expected.exception.lineno,
+                              expected.exception.colno), text[:20])
+            self.assertEqual(pure.validate(text), tjson5parser.validate(text))
+
+    @unittest.skipIf(tjson5parser is None, "extension not built")
+    def test_nesting_depth(self):
+        """Test that too deep documents fail at the same position in both implementations"""
+        for text in ["[" * 5000 + "]" * 5000, "  {a: " + "[" * 5000 + "]" * 5000 + "}",
+                     "[1, {a: " + "{b: " * 5000 + "1" + "}" * 5000 + "}]"]:
+            with self.assertRaises(tjson5parser.TJSON5ParseError) as expected:
+                tjson5parser.parse(text)
+            with self.assertRaises(pure.TJSON5ParseError) as cm:
+                pure.parse(text)
+            self.assertEqual((str(cm.exception), cm.exception.lineno, cm.exception.colno),
+                             (str(expected.exception), expected.exception.lineno,
+                              expected.exception.colno))
+            self.assertEqual(pure.validate(text), tjson5parser.validate(text))
+            self.assertEqual(pure.validate(text), [(1, expected.exception.colno,
+                                                    "Maximum nesting depth exceeded")])
+
+    @unittest.skipIf(tjson5parser is None, "extension not built")
+    def test_features(self):
+        """Test extraction, schemas, typed arrays and streaming against the extension"""
+        paths = ["name", "*", "busses[*].name"]
+        self.assertEqual(pure.extract(self.text, pure.compile_paths(paths)),
+                         tjson5parser.extract(self.text, tjson5parser.compile_paths(paths)))
+        schema = {"type": "object", "additionalProperties": {"type": ["string", "array"]}}
+        with self.assertRaises(tjson5parser.TJSON5ValidationError) as expected:
+            tjson5parser.parse(self.text, schema=tjson5parser.compile_schema(schema))
+        with self.assertRaises(pure.TJSON5ValidationError) as cm:
+            pure.parse(self.text, schema=pure.compile_schema(schema))
+        self.assertEqual([(e.path, e.lineno, e.colno, str(e)) for e in cm.exception.errors],
+                         [(e.path, e.lineno, e.colno, str(e)) for e in expected.exception.errors])
+        numbers = "[[1, 2, 300], [-1, 2.5], [70000, 1]]"
+        for arrays in ("array", {"[1]": "f"}):
+            self.assertEqual(pure.parse(numbers, arrays=arrays),
+                             tjson5parser.parse(numbers, arrays=arrays))
+        parser = pure.Parser()
+        events = []
+        data = self.text.encode("utf-8")
+        for i in range(0, len(data), 7):
+            parser.feed(data[i:i + 7])
+            events.extend(parser.events())
+        parser.close()
+        events.extend(parser.events())
+        expected = tjson5parser.Parser()
+        expected.feed(data)
+        expected.close()
+        self.assertEqual(events, expected.events())
+
+    def test_selection(self):
+        """Test selecting the implementation with TJSON5_PURE_PYTHON"""
+        env = os.environ.copy()
+        env["TJSON5_PURE_PYTHON"] = "1"
+        code = "import tjson5; print(tjson5.IMPLEMENTATION, tjson5.parse('{a: [1, 0x2]}'))"
+        result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True,
+                                cwd=str(project_dir), env=env)
+        self.assertEqual(result.stdout, "python {'a': [1, 2]}\n", result.stderr)
+        # The package tests pass with either implementation
+        test = os.path.join(os.path.dirname(os.path.abspath(__file__)), "test_extract.py")
+        result = subprocess.run([sys.executable, test], capture_output=True, text=True,
+                                cwd=str(project_dir), env=env)
+        self.assertEqual(result.returncode, 0, result.stderr)
+
+if __name__ == "__main__":
+    unittest.main()
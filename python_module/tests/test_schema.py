@@ -0,0 +1,180 @@
+import unittest
+import os
+import sys
+import pickle
+from pathlib import Path
+
+# Add project directory to path to import the package
+project_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(project_dir))
+
+import tjson5
+
+PART_SCHEMA = {
+    "type": "object",
+    "required": ["name", "parts"],
+    "properties": {
+        "name": {"type": "string", "pattern": "^[A-Z]"},
+        "mode": {"enum": ["fast", "slow"]},
+        "parts": {"type": "array", "items": {"$ref": "#/$defs/part"}, "minItems": 1},
+    },
+    "additionalProperties": False,
+    "$defs": {
+        "part": {
+            "type": "object",
+            "required": ["pin"],
+            "properties": {
+                "pin": {"type": "integer", "minimum": 0, "maximum": 255},
+                "label": {"type": ["string", "null"], "maxLength": 8},
+                "child": {"$ref": "#/$defs/part"},
+            },
+        },
+    },
+}
+
+BAD_DOCUMENT = '''{
+  name: "apm32",
+  parts: [
+    {pin: 0x1FF, label: null},
+    {pin: 'x'},
+    {child: {pin: 1.5}},
+  ],
+  mode: 'medium',
+  extra: true,
+}'''
+
+class TestSchema(unittest.TestCase):
+
+    def test_valid(self):
+        """Test that valid documents parse to the same value as without a schema"""
+        schema = tjson5.compile_schema(PART_SCHEMA)
+        text = '{name: "APM32", parts: [{pin: 0xFF, child: {pin: 0b1, label: """io"""}}], mode: "fast"}'
+        self.assertEqual(tjson5.parse(text, schema=schema), tjson5.parse(text))
+        self.assertEqual(tjson5.parse(text, schema=PART_SCHEMA), tjson5.parse(text))
+        self.assertTrue(schema.is_valid(tjson5.parse(text)))
+        self.assertEqual(tjson5.parse("1.0", schema={"type": "integer"}), 1.0)
+
+    def test_errors(self):
+        """Test that every failure is reported with its key path and source location"""
+        schema = tjson5.compile_schema(PART_SCHEMA)
+        with self.assertRaises(tjson5.TJSON5ValidationError) as cm:
+            tjson5.parse(BAD_DOCUMENT, schema=schema)
+        found = [(e.path, e.lineno, e.colno) for e in cm.exception.errors]
+        self.assertEqual(found, [
+            (("name",), 2, 9),
+            (("parts", 0, "pin"), 4, 11),
+            (("parts", 1, "pin"), 5, 11),
+            (("parts", 2, "child", "pin"), 6, 19),
+            (("parts", 2), 6, 5),
+            (("mode",), 8, 9),
+            ((), 9, 3),
+        ])
+        self.assertIs(cm.exception, cm.exception.errors[0])
+        self.assertIsInstance(cm.exception, tjson5.TJSON5ParseError)
+        messages = [str(e).splitlines()[0] for e in cm.exception.errors]
+        self.assertIn("parts[0].pin: 511 is greater than the maximum of 255", messages[1])
+        self.assertIn("parts[1].pin: expected integer, got string", messages[2])
+        self.assertIn("parts[2]: missing required property 'pin'", messages[4])
+        self.assertIn("document: property 'extra' is not allowed", messages[6])
+        error = pickle.loads(pickle.dumps(cm.exception))
+        self.assertEqual((error.path, error.lineno, error.colno), (("name",), 2, 9))
+
+    def test_fail_fast(self):
+        """Test stopping at the first failure"""
+        schema = tjson5.compile_schema(PART_SCHEMA, fail_fast=True)
+        with self.assertRaises(tjson5.TJSON5ValidationError) as cm:
+            tjson5.parse(BAD_DOCUMENT, schema=schema)
+        self.assertEqual([e.path for e in cm.exception.errors], [("name",)])
+        # Syntax errors after the first failure are not reached
+        with self.assertRaises(tjson5.TJSON5ValidationError):
+            tjson5.parse('{name: "x", parts: [{pin: 1} {pin: 2}]}', schema=schema)
+        with self.assertRaises(tjson5.TJSON5ParseError) as cm:
+            tjson5.parse('{name: "X", parts: [{pin: 1} {pin: 2}]}', schema=schema)
+        self.assertNotIsInstance(cm.exception, tjson5.TJSON5ValidationError)
+
+    def test_keywords(self):
+        """Test the supported keywords one by one"""
+        cases = [
+            ({"const": 1}, ["1", "1.0"], ["true", "2"]),
+            ({"enum": [True, None]}, ["true", "null"], ["1", "false"]),
+            ({"minLength": 2, "maxLength": 3}, ["'ab'", "1"], ["'a'", "'abcd'"]),
+            ({"exclusiveMinimum": 0, "exclusiveMaximum": 1}, ["0.5"], ["0", "1"]),
+            ({"minimum": 0, "exclusiveMinimum": True}, ["1"], ["0"]),
+            ({"multipleOf": 0.5}, ["1.5", "4"], ["1.2"]),
+            ({"patternProperties": {"^x": {"type": "integer"}}, "additionalProperties": {"type": "string"}},
+             ["{x1: 1, y: 'a'}"], ["{x1: 'a'}", "{y: 1}"]),
+            ({"minProperties": 1, "maxProperties": 1}, ["{a: 1}"], ["{}", "{a: 1, b: 2}"]),
+            ({"prefixItems": [{"type": "string"}], "items": False}, ["['a']", "[]"], ["[1]", "['a', 1]"]),
+            ({"items": [{"type": "string"}], "additionalItems": {"type": "integer"}}, ["['a', 1]"], ["['a', 'b']"]),
+            ({"maxItems": 1, "uniqueItems": True}, ["[1]"], ["[1, 2]"]),
+            ({"uniqueItems": True}, ["[1, true, {a: 1}, {a: 2}]"], ["[1, 1.0]", "[{a: [1]}, {a: [1]}]"]),
+            ({"allOf": [{"type": "integer"}, {"minimum": 2}]}, ["2"], ["1", "2.5"]),
+            ({"anyOf": [{"type": "string"}, {"type": "array"}]}, ["'a'", "[]"], ["1"]),
+            ({"oneOf": [{"type": "integer"}, {"minimum": 2}]}, ["1", "2.5"], ["3", "-1.5"]),
+            ({"not": {"type": "null"}}, ["0"], ["null"]),
+            ({"properties": {"a": {"$ref": "#"}, "b": {"type": "integer"}}}, ["{a: {a: {b: 1}}}"], ["{a: {a: {b: 'x'}}}"]),
+            (False, [], ["1"]),
+        ]
+        for schema, valid, invalid in cases:
+            compiled = tjson5.compile_schema(schema)
+            for text in valid:
+                tjson5.parse(text, schema=compiled)
+                self.assertTrue(compiled.is_valid(tjson5.parse(text)), msg=(schema, text))
+            for text in invalid:
+                with self.assertRaises(tjson5.TJSON5ValidationError, msg=(schema, text)):
+                    tjson5.parse(text, schema=compiled)
+                self.assertFalse(compiled.is_valid(tjson5.parse(text)), msg=(schema, text))
+
+    def test_validate(self):
+        """Test checking values that are already decoded"""
+        schema = tjson5.compile_schema(PART_SCHEMA)
+        with self.assertRaises(tjson5.TJSON5ValidationError) as cm:
+            schema.validate({"name": "X", "parts": [{"pin": -1}], "other": 1})
+        self.assertEqual([e.path for e in cm.exception.errors], [("parts", 0, "pin"), ()])
+        self.assertIsNone(cm.exception.lineno)
+        schema.validate({"name": "X", "parts": ({"pin": 1},)})
+
+    def test_invalid_schemas(self):
+        """Test errors in the schema itself"""
+        for schema in [{"type": "float"}, {"$ref": "other.json#/a"}, {"$ref": "#/missing"},
+                       {"pattern": "("}]:
+            with self.assertRaises(ValueError, msg=schema):
+                tjson5.compile_schema(schema)
+        with self.assertRaises(TypeError):
+            tjson5.compile_schema([])
+        with self.assertRaises(ValueError):
+            tjson5.parse("{}", schema={}, arrays={"a": "array"})
+
+    def test_unsupported_keywords(self):
+        """Test that keywords that are not implemented are rejected, not skipped"""
+        for schema in [{"contains": {"type": "integer"}}, {"minContains": 1}, {"maxContains": 1},
+                       {"propertyNames": {"pattern": "^a"}}, {"dependencies": {"a": ["b"]}},
+                       {"dependentRequired": {"a": ["b"]}}, {"dependentSchemas": {"a": {}}},
+                       {"if": {"type": "string"}, "then": {"minLength": 1}}, {"then": {}},
+                       {"else": {}}, {"unevaluatedProperties": False}, {"unevaluatedItems": False},
+                       {"format": "date-time"}, {"$dynamicRef": "#node"},
+                       {"properties": {"a": {"type": "array", "contains": {"const": 1}}}},
+                       {"$defs": {"a": {"if": {}}}, "$ref": "#/$defs/a"}]:
+            with self.assertRaisesRegex(ValueError, "Unsupported keyword", msg=schema):
+                tjson5.compile_schema(schema)
+            with self.assertRaises(ValueError, msg=schema):
+                tjson5.parse("[1]", schema=schema)
+        schema = tjson5.compile_schema({
+            "$schema": "https://json-schema.org/draft/2020-12/schema", "$id": "chip",
+            "$comment": "c", "title": "t", "description": "d", "default": 1, "examples": [1],
+            "deprecated": False, "readOnly": False, "writeOnly": False, "type": "integer",
+            "$defs": {"unused": {"title": "u"}}})
+        self.assertTrue(schema.is_valid(1))
+        self.assertFalse(schema.is_valid("1"))
+
+    def test_load_file(self):
+        """Test validating a file through load_file"""
+        test_file = os.path.join(os.path.dirname(os.path.abspath(__file__)), "test.tjson5")
+        schema = tjson5.compile_schema({"type": "object", "required": ["parts"],
+                                        "properties": {"parts": {"type": "array"}}})
+        self.assertEqual(tjson5.load_file(test_file, schema=schema), tjson5.load_file(test_file))
+        with self.assertRaises(tjson5.TJSON5ValidationError):
+            tjson5.load_file(test_file, schema={"type": "array"})
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,157 @@
+import unittest
+import asyncio
+import os
+import sys
+import threading
+import tempfile
+from pathlib import Path
+
+# Add project directory to path to import the package
+project_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(project_dir))
+
+import tjson5
+from tjson5.stats import registry
+
+TEXT = '''// Header comment
+{
+    name: "TEST", /* inline */ values: [1, 0x2, 3.5],
+    nested: {flag: true},
+}'''
+
+class TestStats(unittest.TestCase):
+
+    def test_parse_stats(self):
+        """Test the stages and counters recorded by parse"""
+        stats = {}
+        tjson5.parse(TEXT, stats=stats)
+        self.assertNotIn("decode", stats)
+        self.assertFalse(stats["error"])
+        parse = stats["parse"]
+        self.assertGreaterEqual(parse["seconds"], 0)
+        self.assertEqual(parse["chars"], len(TEXT))
+        self.assertEqual({name: parse[name] for name in tjson5.stats.COUNTS},
+                         {"objects": 2, "arrays": 1, "keys": 4, "strings": 1, "numbers": 3,
+                          "comments": 2})
+        stats = {}
+        tjson5.parse('"caf\xe9"'.encode("latin1"), stats=stats)
+        self.assertEqual(stats["decode"]["encoding"], "latin1")
+        self.assertTrue(stats["decode"]["fallback"])
+        self.assertEqual((stats["decode"]["bytes"], stats["decode"]["chars"]), (6, 6))
+        stats = {}
+        with self.assertRaises(tjson5.TJSON5ParseError):
+            tjson5.parse("[1, 2", stats=stats)
+        self.assertTrue(stats["error"])
+        self.assertEqual(stats["parse"]["numbers"], 2)
+
+    def test_load_file_stats(self):
+        """Test the read stage and cache outcome of load_file"""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "config.tjson5")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(TEXT)
+            stats = {}
+            tjson5.load_file(path, stats=stats)
+            self.assertEqual(stats["read"]["bytes"], len(TEXT))
+            self.assertFalse(stats["read"]["mmap"])
+            self.assertEqual(stats["decode"]["encoding"], "utf-8")
+            cache = tjson5.FileCache()
+            stats = {}
+            cache.load(path, stats=stats)
+            self.assertEqual(stats["cache"], "miss")
+            self.assertIn("parse", stats)
+            stats = {}
+            tjson5.load_file(path, cache=cache, stats=stats)
+            self.assertEqual(stats, {"cache": "hit"})
+
+    def test_cache_stats(self):
+        """Test that FileCache hits and misses reach profiling() and the registry"""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "config.tjson5")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(TEXT)
+            cache = tjson5.FileCache()
+            registry.reset()
+            registry.enable()
+            try:
+                with tjson5.profiling() as profile:
+                    cache.load(path)
+                    cache.load(path)
+                    os.utime(path, (1000000000, 1000000000))  # Touched but unchanged
+                    tjson5.load_file(path, cache=cache)
+            finally:
+                registry.disable()
+        self.assertEqual([stats["cache"] for stats in profile.calls], ["miss", "hit", "hit"])
+        totals = profile.totals()
+        self.assertEqual((totals["calls"], totals["cache_hits"], totals["cache_misses"]), (3, 2, 1))
+        self.assertEqual(totals["parse"]["numbers"], 3)
+        counters = registry.snapshot()["counters"]
+        self.assertEqual((counters["calls"], counters["cache_hits"], counters["cache_misses"]),
+                         (3, 2, 1))
+        self.assertIn("tjson5_cache_hits_total 2\n", registry.prometheus())
+        self.assertEqual(cache.cache_info()[:2], (2, 1))
+
+    def test_profiling(self):
+        """Test that profiling() collects the calls of its own thread only"""
+        with tjson5.profiling() as profile:
+            tjson5.parse(TEXT)
+            tjson5.parse(TEXT.encode("utf-8"))
+            with self.assertRaises(tjson5.TJSON5ParseError):
+                tjson5.parse("{")
+            thread = threading.Thread(target=tjson5.parse, args=("[1]",))
+            thread.start()
+            thread.join()
+        tjson5.parse(TEXT)
+        self.assertEqual(len(profile.calls), 3)
+        totals = profile.totals()
+        self.assertEqual((totals["calls"], totals["errors"], totals["fallbacks"]), (3, 1, 0))
+        self.assertEqual(totals["parse"]["numbers"], 6)
+        self.assertEqual(totals["decode"]["bytes"], len(TEXT))
+        self.assertFalse(tjson5.stats.enabled)
+
+    def test_profiling_workers(self):
+        """Test that profiling() collects the calls of aload and load_many workers"""
+        with tempfile.TemporaryDirectory() as tmp:
+            paths = []
+            for i in range(4):
+                paths.append(os.path.join(tmp, f"{i}.tjson5"))
+                with open(paths[-1], "w", encoding="utf-8") as f:
+                    f.write(f"[{i}, 0xFF]")
+            for executor in ("thread", "process"):
+                with tjson5.profiling() as profile:
+                    tjson5.load_many(paths, workers=2, executor=executor)
+                totals = profile.totals()
+                self.assertEqual((totals["calls"], totals["parse"]["numbers"]), (4, 8), executor)
+            with tjson5.profiling() as profile:
+                self.assertEqual(asyncio.run(tjson5.aload(paths[1])), [1, 255])
+            self.assertEqual(len(profile.calls), 1)
+            self.assertIn("read", profile.calls[0])
+        self.assertFalse(tjson5.stats.enabled)
+
+    def test_registry(self):
+        """Test the process-wide counters, histograms and Prometheus output"""
+        registry.reset()
+        tjson5.parse(TEXT)
+        self.assertEqual(registry.snapshot()["counters"]["calls"], 0)
+        registry.enable()
+        try:
+            tjson5.parse(TEXT)
+            thread = threading.Thread(target=tjson5.parse, args=(TEXT.encode("utf-8"),))
+            thread.start()
+            thread.join()
+        finally:
+            registry.disable()
+        snapshot = registry.snapshot()
+        self.assertEqual(snapshot["counters"]["calls"], 2)
+        self.assertEqual(snapshot["counters"]["keys"], 8)
+        self.assertEqual(snapshot["counters"]["bytes_decoded"], len(TEXT))
+        self.assertEqual(snapshot["histograms"]["parse"]["count"], 2)
+        self.assertEqual(snapshot["histograms"]["parse"]["buckets"][-1], (float("inf"), 2))
+        self.assertEqual(snapshot["histograms"]["read"]["count"], 0)
+        text = registry.prometheus()
+        self.assertIn("tjson5_calls_total 2\n", text)
+        self.assertIn('tjson5_stage_seconds_bucket{stage="parse",le="+Inf"} 2\n', text)
+        self.assertIn('tjson5_stage_seconds_count{stage="decode"} 1\n', text)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,250 @@
+import unittest
+import asyncio
+import io
+import os
+import sys
+from pathlib import Path
+
+# Add project directory to path to import the package
+project_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(project_dir))
+
+import tjson5
+
+SAMPLE = '''// Leading comment
+{
+    name: "TJSON5 Example",
+    description: """
+        A "quoted" multi-line
+        description
+    """,
+    values: [1, 0xFF, 0b1010, {nested: true},],  /* trailing comma */
+    'empty': {},
+}'''
+
+class TestIterparse(unittest.TestCase):
+
+    def test_events(self):
+        """Test the event sequence and key paths"""
+        events = list(tjson5.iterparse('{a: [1, {b: "x"}], c: {}}'))
+        self.assertEqual(events, [
+            ((), 'start_map', None),
+            ((), 'map_key', 'a'),
+            (('a',), 'start_array', None),
+            (('a', 0), 'value', 1),
+            (('a', 1), 'start_map', None),
+            (('a', 1), 'map_key', 'b'),
+            (('a', 1, 'b'), 'value', 'x'),
+            (('a', 1), 'end_map', None),
+            (('a',), 'end_array', None),
+            ((), 'map_key', 'c'),
+            (('c',), 'start_map', None),
+            (('c',), 'end_map', None),
+            ((), 'end_map', None),
+        ])
+
+    def test_chunk_boundaries(self):
+        """Test that tokens split across chunks give the same events for any chunk size"""
+        expected = list(tjson5.iterparse(SAMPLE))
+        for chunk_size in (1, 2, 3, 5, 64):
+            self.assertEqual(list(tjson5.iterparse(io.StringIO(SAMPLE), chunk_size=chunk_size)), expected)
+            self.assertEqual(list(tjson5.iterparse(SAMPLE.encode("utf-16"), chunk_size=chunk_size)), expected)
+
+    def test_items(self):
+        """Test building the values under a key path"""
+        self.assertEqual(list(tjson5.items(SAMPLE, "values[*]", chunk_size=4)),
+                         [1, 255, 10, {"nested": True}])
+        self.assertEqual(list(tjson5.items(SAMPLE, "")), [tjson5.parse(SAMPLE)])
+        test_file = os.path.join(os.path.dirname(os.path.abspath(__file__)), "test.tjson5")
+        data = tjson5.load_file(test_file)
+        with open(test_file, "rb") as f:
+            self.assertEqual(list(tjson5.items(f, "parts[*].name", chunk_size=1000)),
+                             [part["name"] for part in data["parts"]])
+        with open(test_file, "rb") as f:
+            self.assertEqual(list(tjson5.items(f, 'pins["wirebonding-layout"]')),
+                             [data["pins"]["wirebonding-layout"]])
+
+    def test_key_path_syntax(self):
+        """Test quoted keys in dotted segments and brackets, and invalid paths"""
+        text = '{"a.b": {c: 1}, "x[\\"y": 2, "a]b": 3, "*": 4, k: [5, 6], "\'q": 7}'
+        cases = [('"a.b".c', [1]), ("'a.b'.c", [1]), ('["a.b"].c', [1]), ('"a.b"["c"]', [1]),
+                 ("'x[\"y'", [2]), ('x["y', None), ('["a]b"]', [3]),
+                 ("[ 'a]b' ]", [3]), ('"*"', [4]), ('*', [{"c": 1}, 2, 3, 4, [5, 6], 7]),
+                 ('k[ 1 ]', [6]), ('k.*', [5, 6]), ('"\'q"', [7]), ('a]b', [3])]
+        for path, expected in cases:
+            if expected is None:
+                with self.assertRaises(ValueError, msg=path):
+                    list(tjson5.items(text, path))
+            else:
+                self.assertEqual(list(tjson5.items(text, path)), expected, msg=path)
+        for path in ['"a.b"c', "k[0]b", "k[0]'b'", 'k[-1]', 'k[ -1 ]', 'k[+1]', 'k[1_0]', 'k[x]',
+                     'k[0', '["a"', '"a', 'a..b', '.a', 'a.', '"a"."b"x', "['a' b]"]:
+            with self.assertRaises(ValueError, msg=path):
+                tjson5.compile_paths([path])
+
+    def test_errors(self):
+        """Test that errors report the same location regardless of chunking"""
+        for chunk_size in (1, 1000):
+            with self.assertRaises(tjson5.TJSON5ParseError) as cm:
+                list(tjson5.iterparse('{\n  a: [1,\n  ,2]}', chunk_size=chunk_size))
+            self.assertEqual((cm.exception.lineno, cm.exception.colno, cm.exception.pos), (3, 3, 13))
+        for text in ['', '{a: 1', '"unterminated', '"""open', '/* open', '[1] [2]']:
+            with self.assertRaises(tjson5.TJSON5ParseError, msg=text):
+                list(tjson5.iterparse(text, chunk_size=2))
+
+class TestPushParser(unittest.TestCase):
+
+    def feed_all(self, chunks, **kwargs):
+        parser = tjson5.Parser(**kwargs)
+        events = []
+        for chunk in chunks:
+            parser.feed(chunk)
+            events.extend(parser.events())
+        self.assertFalse(parser.done)
+        parser.close()
+        events.extend(parser.events())
+        self.assertTrue(parser.done)
+        return events
+
+    def test_chunk_boundaries(self):
+        """Test that any split of the input, text or bytes, gives the same events"""
+        expected = list(tjson5.iterparse(SAMPLE))
+        for size in (1, 2, 3, 7, 1000):
+            chunks = [SAMPLE[i:i + size] for i in range(0, len(SAMPLE), size)]
+            self.assertEqual(self.feed_all(chunks), expected)
+            for encoding in ("utf-8-sig", "utf-16", "utf-32-le"):
+                data = SAMPLE.encode(encoding)
+                chunks = [data[i:i + size] for i in range(0, len(data), size)]
+                self.assertEqual(self.feed_all(chunks), expected, msg=encoding)
+        data = 'ab\u00e9'.encode("latin1")
+        self.assertEqual(self.feed_all([b'"', data, b'"'], encoding="latin1"),
+                         [((), 'value', 'ab\u00e9')])
+
+    def test_incremental_events(self):
+        """Test that events are returned as soon as their tokens are complete"""
+        parser = tjson5.Parser()
+        parser.feed('{a: """x')
+        self.assertEqual(parser.events(), [((), 'start_map', None), ((), 'map_key', 'a')])
+        parser.feed('y""", /* c')
+        self.assertEqual(parser.events(), [(('a',), 'value', 'xy')])
+        parser.feed('omment */ b: 12')
+        self.assertEqual(parser.events(), [((), 'map_key', 'b')])
+        parser.feed('3}')
+        self.assertEqual(parser.events(), [(('b',), 'value', 123), ((), 'end_map', None)])
+        self.assertFalse(parser.done)
+        parser.close()
+        self.assertEqual(parser.events(), [])
+        self.assertTrue(parser.done)
+
+    def test_errors(self):
+        """Test truncated, invalid and misused input"""
+        parser = tjson5.Parser()
+        parser.feed('[1, """open')
+        parser.events()
+        parser.close()
+        with self.assertRaises(tjson5.TJSON5ParseError):
+            parser.events()
+        with self.assertRaises(tjson5.TJSON5ParseError):
+            parser.feed("more")
+        parser = tjson5.Parser()
+        parser.feed('{\n  a: [1,\n  ,2]}')
+        with self.assertRaises(tjson5.TJSON5ParseError) as cm:
+            parser.events()
+        self.assertEqual((cm.exception.lineno, cm.exception.colno, cm.exception.pos), (3, 3, 13))
+        parser = tjson5.Parser()
+        parser.feed(b'"ab')
+        with self.assertRaises(tjson5.TJSON5ParseError):
+            parser.feed(b'\xff"')
+        parser = tjson5.Parser()
+        parser.feed(b'"\xc3')
+        with self.assertRaises(tjson5.TJSON5ParseError):
+            parser.close()
+        parser = tjson5.Parser()
+        parser.feed("[")
+        with self.assertRaises(TypeError):
+            parser.feed(b"1]")
+
+class TestDocuments(unittest.TestCase):
+
+    def test_iter_documents(self):
+        """Test reading concatenated and newline-separated documents for any chunk size"""
+        text = SAMPLE + '\n{a: 1}{b: [2]}\n"x" 12 true null\n// note\n[]\n'
+        expected = [tjson5.parse(SAMPLE), {"a": 1}, {"b": [2]}, "x", 12, True, None, []]
+        for chunk_size in (1, 2, 3, 7, 64, 65536):
+            self.assertEqual(list(tjson5.iter_documents(text, chunk_size=chunk_size)), expected)
+            self.assertEqual(list(tjson5.iter_documents(io.BytesIO(text.encode("utf-16")),
+                                                        chunk_size=chunk_size)), expected)
+        self.assertEqual(list(tjson5.iter_documents(b"")), [])
+        self.assertEqual(list(tjson5.iter_documents(" // only a comment\n")), [])
+
+    def test_dump_documents(self):
+        """Test writing documents one per line and reading them back"""
+        records = [{"id": i, "tags": ["a", "b"][:i % 3], "note": "two\nlines" if i % 4 else None}
+                   for i in range(200)]
+        out = io.StringIO()
+        tjson5.dump_documents(records, out)
+        self.assertEqual(out.getvalue().count("\n"), len(records))
+        self.assertEqual(out.getvalue().splitlines()[1], tjson5.dumps(records[1]))
+        for chunk_size in (5, 100, 65536):
+            self.assertEqual(list(tjson5.iter_documents(out.getvalue(), chunk_size=chunk_size)),
+                             records)
+        out = io.StringIO()
+        tjson5.dump_documents(records, out, indent=2, triple_quotes=True, unquoted_keys=True)
+        self.assertIn('"""', out.getvalue())
+        self.assertEqual(list(tjson5.iter_documents(out.getvalue(), chunk_size=10)), records)
+
+    def test_errors(self):
+        """Test that the documents before an error are yielded and the error located in the stream"""
+        for chunk_size in (1, 4, 1000):
+            documents = tjson5.iter_documents('{a: 1}\n{b: 2}\n{c: 3 d: 4}\n{e: 5}',
+                                              chunk_size=chunk_size)
+            self.assertEqual(next(documents), {"a": 1})
+            self.assertEqual(next(documents), {"b": 2})
+            with self.assertRaises(tjson5.TJSON5ParseError) as cm:
+                next(documents)
+            self.assertEqual((cm.exception.lineno, cm.exception.colno), (3, 7))
+        for text in ['{a: 1', '[1] "open', '1 /* open', '[1] ]']:
+            with self.assertRaises(tjson5.TJSON5ParseError, msg=text):
+                list(tjson5.iter_documents(text, chunk_size=2))
+
+class TestAsyncio(unittest.TestCase):
+
+    def test_aiterparse(self):
+        """Test events from a StreamReader and from an async iterable of chunks"""
+        expected = list(tjson5.iterparse(SAMPLE))
+
+        async def from_reader():
+            reader = asyncio.StreamReader()
+            reader.feed_data(SAMPLE.encode("utf-8"))
+            reader.feed_eof()
+            return [event async for event in tjson5.aiterparse(reader, chunk_size=5)]
+
+        async def chunks():
+            for i in range(0, len(SAMPLE), 3):
+                await asyncio.sleep(0)
+                yield SAMPLE[i:i + 3]
+
+        async def from_iterable():
+            return [event async for event in tjson5.aiterparse(chunks())]
+
+        self.assertEqual(asyncio.run(from_reader()), expected)
+        self.assertEqual(asyncio.run(from_iterable()), expected)
+
+    def test_aload(self):
+        """Test loading a file without blocking the event loop"""
+        test_file = os.path.join(os.path.dirname(os.path.abspath(__file__)), "test.tjson5")
+
+        async def main():
+            ticks = 0
+            task = asyncio.ensure_future(tjson5.aload(test_file, stats={}))
+            while not task.done():
+                ticks += 1
+                await asyncio.sleep(0)
+            return task.result(), ticks
+
+        data, ticks = asyncio.run(main())
+        self.assertEqual(data, tjson5.load_file(test_file))
+        self.assertGreater(ticks, 0)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,67 @@
+import unittest
+import os
+import sys
+import threading
+from pathlib import Path
+
+# Add project directory to path to import the package
+project_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(project_dir))
+
+import tjson5
+
+test_file = os.path.join(os.path.dirname(os.path.abspath(__file__)), "test.tjson5")
+
+class TestThreads(unittest.TestCase):
+
+    def test_concurrent_parses(self):
+        """Test that documents parsed from several threads at once come out the same"""
+        with open(test_file, "r", encoding="utf-8") as f:
+            text = "[" + ",\n".join([f.read()] * 20) + "]"
+        expected = tjson5.parse(text)
+        results = []
+        errors = []
+
+        def worker():
+            try:
+                for _ in range(5):
+                    results.append(tjson5.parse(text) == expected)
+                    with self.assertRaises(tjson5.TJSON5ParseError):
+                        tjson5.parse(text + " x")
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        self.assertEqual(results, [True] * 20)
+
+    def test_long_documents(self):
+        """Test values and errors past the first batch of tokens"""
+        items = [{"id": i, "name": f"item{i}", "tags": ["a", "b"]} for i in range(2000)]
+        text = "[\n" + ",\n".join(f'  {{id: {i}, name: "item{i}", tags: [\'a\', "b",],}}'
+                                   for i in range(2000)) + "\n] // end"
+        self.assertEqual(tjson5.parse(text), items)
+        stats = {}
+        tjson5.parse(text, stats=stats)
+        self.assertEqual((stats["parse"]["objects"], stats["parse"]["comments"]), (2000, 1))
+        cases = [
+            (text + "\n}", "Extra data", len(text) + 1),
+            (text.replace('"item1999"', '"item\n1999"'), "Unterminated string", text.index('"item1999"')),
+            (text.replace('"item1999"', '"item\\x1"'), "Invalid \\x escape", text.index('"item1999"') + 6),
+            (text.replace("id: 1500,", "id: 1500"), "Expecting ',' delimiter", text.index("id: 1500,") + 9),
+        ]
+        for bad, message, pos in cases:
+            with self.assertRaises(tjson5.TJSON5ParseError, msg=message) as cm:
+                tjson5.parse(bad)
+            self.assertIn(message, str(cm.exception))
+            self.assertEqual(cm.exception.pos, pos, msg=message)
+        with self.assertRaises(tjson5.TJSON5ParseError) as cm:
+            tjson5.parse("[" * 100000 + "]" * 100000)
+        self.assertIn("Maximum nesting depth exceeded", str(cm.exception))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,135 @@
+import unittest
+import os
+import sys
+from dataclasses import dataclass, field
+from typing import Dict, List, NamedTuple, Optional, Union
+from pathlib import Path
+
+# Add project directory to path to import the package
+project_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(project_dir))
+
+import tjson5
+
+@dataclass
+class Part:
+    name: str
+    package: str
+    flash: Optional[int] = None
+
+class Pin(NamedTuple):
+    number: int
+    names: List[str] = []
+
+class Register:
+    __slots__ = ("address", "mask")
+
+@dataclass
+class Series:
+    series: str
+    parts: List[Part]
+    pins: Dict[str, Pin] = field(default_factory=dict)
+    ratio: float = 1.0
+    extra: Union[int, str, None] = None
+
+@dataclass
+class Node:
+    value: int
+    children: List["Node"]
+
+@dataclass
+class Checked:
+    size: int
+
+    def __post_init__(self):
+        if self.size < 0:
+            raise ValueError("size must not be negative")
+
+SAMPLE = '''{
+    series: "APM32F411",
+    parts: [
+        {name: "APM32F411VCT6", package: "LQFP100", flash: 0x40000},
+        {name: "APM32F411CCU6", package: "QFN48"},
+    ],
+    pins: {PA0: {number: 23, names: ["PA0", "WKUP"]}},
+    ratio: 2,
+}'''
+
+class TestTypes(unittest.TestCase):
+
+    def test_key_paths(self):
+        """Test building classes at key paths"""
+        result = tjson5.parse(SAMPLE, types={"parts[*]": Part, "pins.*": Pin})
+        self.assertEqual(result["parts"], [Part("APM32F411VCT6", "LQFP100", 0x40000),
+                                           Part("APM32F411CCU6", "QFN48")])
+        self.assertEqual(result["pins"], {"PA0": Pin(23, ["PA0", "WKUP"])})
+        self.assertEqual(result["series"], "APM32F411")
+        result = tjson5.parse('[{address: 0x40000000, mask: 0xFF}]', types={"[1]": Part, "[0]": Register})
+        self.assertEqual((result[0].address, result[0].mask), (0x40000000, 0xFF))
+
+    def test_nested_annotations(self):
+        """Test that annotated fields are built recursively"""
+        result = tjson5.parse(SAMPLE, types=Series)
+        self.assertIsInstance(result, Series)
+        self.assertEqual(result.parts[1], Part("APM32F411CCU6", "QFN48"))
+        self.assertEqual(result.pins["PA0"], Pin(23, ["PA0", "WKUP"]))
+        self.assertEqual(result.ratio, 2)
+        tree = tjson5.parse("{value: 1, children: [{value: 2, children: []}]}", types=Node)
+        self.assertEqual(tree, Node(1, [Node(2, [])]))
+        # A key path overrides the annotation of a field
+        @dataclass
+        class Other:
+            name: str
+            package: str
+            flash: int = 0
+
+        result = tjson5.parse(SAMPLE, types={"": Series, "parts[*]": Other})
+        self.assertEqual(result.parts[1], Other("APM32F411CCU6", "QFN48"))
+
+    def test_validation(self):
+        """Test that unknown, missing and mistyped fields are reported with their location"""
+        cases = [
+            ('{parts: [{name: "A", package: "B", pins: 3}]}', "Unknown field 'pins' for Part", 35),
+            ('{parts: [{name: "A"}]}', "Cannot create Part", 9),
+            ('{parts: [{name: "A", package: 5}]}', "Expected str for Part.package, got int", 30),
+            ('{parts: [{name: "A", package: "B", flash: "x"}]}', "Expected int or null", 42),
+            ('{parts: [{name: "A", package: "B", flash: true}]}', "got bool", 42),
+            ('{parts: ["A"]}', "Expected Part for parts[*], got str", 9),
+        ]
+        for text, message, pos in cases:
+            with self.assertRaises(tjson5.TJSON5ParseError, msg=text) as cm:
+                tjson5.parse(text, types={"parts[*]": Part})
+            self.assertIn(message, str(cm.exception))
+            self.assertEqual(cm.exception.pos, pos, msg=text)
+        with self.assertRaises(tjson5.TJSON5ParseError) as cm:
+            tjson5.parse('{series: "S", parts: [], extra: 1.5}', types=Series)
+        self.assertIn("Expected int or str or null for Series.extra, got float", str(cm.exception))
+        with self.assertRaises(tjson5.TJSON5ParseError) as cm:
+            tjson5.parse("[{address: 1}]", types={"[*]": Register})
+        self.assertIn("Missing field 'mask' for Register", str(cm.exception))
+        with self.assertRaises(tjson5.TJSON5ParseError) as cm:
+            tjson5.parse("{size: -1}", types=Checked)
+        self.assertIn("size must not be negative", str(cm.exception))
+        with self.assertRaises(TypeError):
+            tjson5.parse("{}", types={"": int})
+
+    def test_load_file(self):
+        """Test typed loading of the sample file"""
+        @dataclass
+        class Bus:
+            name: str
+            clock: str
+            peripherals: List[str]
+
+        test_file = os.path.join(os.path.dirname(os.path.abspath(__file__)), "test.tjson5")
+        data = tjson5.load_file(test_file)
+        typed = tjson5.load_file(test_file, types={"busses[*]": Bus})
+        self.assertEqual(typed["busses"], [Bus(**bus) for bus in data["busses"]])
+        self.assertEqual(typed["pins"], data["pins"])
+        with self.assertRaises(tjson5.TJSON5ParseError) as cm:
+            tjson5.load_file(test_file, types={"parts[*]": Part})
+        self.assertIn("Unknown field 'wirebonding-layout' for Part", str(cm.exception))
+        self.assertEqual(cm.exception.lineno, 26)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,117 @@
+import unittest
+import os
+import sys
+import subprocess
+import tempfile
+from pathlib import Path
+
+# Add project directory to path to import the package
+project_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(project_dir))
+
+import tjson5
+
+test_file = os.path.join(os.path.dirname(os.path.abspath(__file__)), "test.tjson5")
+
+BROKEN = '''{
+    name: "chip"
+    pins: [1, 2 3, 4],
+    bad: "\\x1g",
+    flags: {a: , b: 2},
+    ok: true,
+}'''
+
+class TestValidate(unittest.TestCase):
+
+    def test_valid(self):
+        """Test that valid documents have no errors"""
+        with open(test_file, "r", encoding="utf-8") as f:
+            text = f.read()
+        self.assertEqual(tjson5.validate(text), [])
+        self.assertEqual(tjson5.validate(Path(test_file)), [])
+        self.assertEqual(tjson5.validate(text.encode("utf-16")), [])
+
+    def test_recovery(self):
+        """Test that scanning resumes after each error"""
+        self.assertEqual(tjson5.validate(BROKEN), [
+            (3, 5, "Expecting ',' delimiter"),
+            (3, 17, "Expecting ',' delimiter"),
+            (4, 12, "Invalid \\x escape"),
+            (5, 16, "Expecting value"),
+        ])
+        with self.assertRaises(tjson5.TJSON5ParseError) as cm:
+            tjson5.parse(BROKEN)
+        self.assertEqual((cm.exception.lineno, cm.exception.colno), (3, 5))
+        self.assertEqual(tjson5.validate(BROKEN, max_errors=2), tjson5.validate(BROKEN)[:2])
+        # Unterminated strings end at their line, brackets close the open containers
+        self.assertEqual(tjson5.validate('{a: "abc\n, b: [1, ?], c: 1 2}'), [
+            (1, 5, "Unterminated string starting at"),
+            (2, 10, "Expecting value"),
+            (2, 19, "Expecting ',' delimiter"),
+        ])
+        self.assertEqual(tjson5.validate('{a: [1, {b: ?}, 2 3], c: [1, 2}}'), [
+            (1, 13, "Expecting value"),
+            (1, 19, "Expecting ',' delimiter"),
+            (1, 31, "Expecting ',' delimiter"),
+            (1, 32, "Extra data"),
+        ])
+
+    def test_unrecoverable(self):
+        """Test errors after which scanning stops"""
+        self.assertEqual(tjson5.validate(""), [(1, 1, "Empty or invalid input")])
+        self.assertEqual(tjson5.validate("[1, 2] x"), [(1, 8, "Extra data")])
+        self.assertEqual(tjson5.validate("[1,\n 2"), [(2, 3, "Expecting ',' delimiter")])
+        self.assertEqual(tjson5.validate("{a: 1 /* open"), [(1, 7, "Unterminated comment")])
+
+    def test_nesting_depth(self):
+        """Test that documents too deep for parse() are rejected with its error"""
+        for text in ["[" * 5000 + "]" * 5000, '// deep\n {"a": ' + "[{x: " * 3000 + "1" + "}]" * 3000 + "}"]:
+            with self.assertRaises(tjson5.TJSON5ParseError) as cm:
+                tjson5.parse(text)
+            self.assertEqual(tjson5.validate(text),
+                             [(cm.exception.lineno, cm.exception.colno, "Maximum nesting depth exceeded")])
+        self.assertEqual(tjson5.validate("[1,, " + "[" * 5000 + "]" * 5000 + "]"),
+                         [(1, 1, "Maximum nesting depth exceeded"), (1, 4, "Expecting value")])
+        text = "[" * 500 + "]" * 500
+        self.assertEqual(tjson5.validate(text), [])
+        self.assertEqual(len(tjson5.parse(text)), 1)
+
+    def test_long_documents(self):
+        """Test errors past the first batch of tokens"""
+        lines = [f'  {{id: {i}, name: "item{i}"}},' for i in range(3000)]
+        lines[100] = lines[100].replace(",", "", 1)
+        lines[2500] = lines[2500].replace('"item2500"', '"item\\u25"')
+        text = "[\n" + "\n".join(lines) + "\n]"
+        self.assertEqual(tjson5.validate(text), [
+            (102, 12, "Expecting ',' delimiter"),
+            (2502, 27, "Invalid \\u escape"),
+        ])
+        self.assertEqual(tjson5.validate(text, max_errors=None), tjson5.validate(text))
+
+    def test_many(self):
+        """Test validating a directory tree"""
+        with tempfile.TemporaryDirectory() as directory:
+            good = os.path.join(directory, "good.tjson5")
+            bad = os.path.join(directory, "sub", "bad.tjson5")
+            os.mkdir(os.path.dirname(bad))
+            with open(good, "w", encoding="utf-8") as f:
+                f.write("{a: 1}")
+            with open(bad, "w", encoding="utf-8") as f:
+                f.write("{a: 1 b: 2}")
+            results = tjson5.validate_many(directory, workers=1)
+            self.assertEqual(results, {bad: [(1, 7, "Expecting ',' delimiter")], good: []})
+            self.assertEqual(tjson5.validate_many(directory, workers=2, executor="thread"), results)
+            missing = os.path.join(directory, "missing.tjson5")
+            self.assertIsInstance(tjson5.validate_many([missing])[missing], OSError)
+
+            command = [sys.executable, "-m", "tjson5", "lint", "--workers", "2", directory]
+            result = subprocess.run(command, capture_output=True, text=True, cwd=str(project_dir))
+            self.assertEqual(result.returncode, 1)
+            self.assertEqual(result.stdout, f"{bad}:1:7: Expecting ',' delimiter\n")
+            self.assertIn("2 files checked, 1 errors in 1 files", result.stderr)
+            command = [sys.executable, "-m", "tjson5", "lint", "--quiet", good]
+            result = subprocess.run(command, capture_output=True, text=True, cwd=str(project_dir))
+            self.assertEqual((result.returncode, result.stdout, result.stderr), (0, "", ""))
+
+if __name__ == "__main__":
+    unittest.main()
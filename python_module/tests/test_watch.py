@@ -0,0 +1,207 @@
+import unittest
+import os
+import sys
+import time
+import tempfile
+import threading
+from pathlib import Path
+
+# Add project directory to path to import the package
+project_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(project_dir))
+
+import tjson5
+from tjson5.watch import _load_libc
+
+class TestDiff(unittest.TestCase):
+
+    def test_diff(self):
+        """Test the structural diff of two values"""
+        old = {"a": 1, "b": [1, 2, 3], "c": {"d": "x"}, "e": float("nan"), "f": 1}
+        new = {"a": 1, "b": [1, 5], "c": {"d": "x", "g": None}, "e": float("nan"), "f": 1.0,
+               "h": []}
+        self.assertEqual(tjson5.diff(old, new), tjson5.Diff(
+            added=[("c", "g"), ("h",)], removed=[("b", 2)], changed=[("b", 1), ("f",)]))
+        self.assertEqual(tjson5.diff(old, old), ([], [], []))
+        self.assertEqual(tjson5.diff([1], {"a": 1}), ([], [], [()]))
+
+class TestWatch(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.directory = self.tmp.name
+        self.events = []
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def callback(self, path, value, diff):
+        if isinstance(value, Exception):
+            value = type(value).__name__
+        self.events.append((os.path.relpath(path, self.directory), value, diff))
+
+    def write(self, name, text):
+        path = os.path.join(self.directory, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+        return path
+
+    def take(self):
+        events, self.events = self.events, []
+        return events
+
+    def test_polling(self):
+        """Test the changes found by check() when polling"""
+        self.write("a.tjson5", "{a: 1, b: [1, 2]}")
+        self.write("notes.txt", "not watched")
+        watcher = tjson5.Watcher(self.directory, self.callback, debounce=0, inotify=False)
+        self.assertFalse(watcher.using_inotify)
+        self.assertEqual(watcher.check(), [os.path.join(self.directory, "a.tjson5")])
+        self.assertEqual(self.take(), [("a.tjson5", {"a": 1, "b": [1, 2]}, ([()], [], []))])
+        self.assertEqual(watcher.check(), [])
+        # Only the value counts: comments and formatting are not reported
+        self.write("a.tjson5", "// comment\n{a: 1, b: [1, 2,],}")
+        self.assertEqual(watcher.check(), [])
+        self.write("a.tjson5", "{a: 2, b: [1], c: 3}")
+        self.write("sub/b.tjson5", "[1,")
+        watcher.check()
+        self.assertEqual(self.take(), [
+            ("a.tjson5", {"a": 2, "b": [1], "c": 3}, ([("c",)], [("b", 1)], [("a",)])),
+            (os.path.join("sub", "b.tjson5"), "TJSON5ParseError", None),
+        ])
+        self.write("sub/b.tjson5", "[1]")
+        os.remove(os.path.join(self.directory, "a.tjson5"))
+        watcher.check()
+        self.assertEqual(self.take(), [
+            ("a.tjson5", None, ([], [()], [])),
+            (os.path.join("sub", "b.tjson5"), [1], ([()], [], [])),
+        ])
+        self.assertEqual(watcher.values, {os.path.join(self.directory, "sub", "b.tjson5"): [1]})
+
+    def test_files_and_patterns(self):
+        """Test watching single files and glob patterns"""
+        a = self.write("a.tjson5", "1")
+        self.write("x/b.tjson5", "2")
+        self.write("x/c.json", "3")
+        pattern = os.path.join(self.directory, "x", "*.json")
+        watcher = tjson5.Watcher([a, pattern], self.callback, debounce=0, inotify=False,
+                                 parse_int=str)
+        watcher.check()
+        self.assertEqual(self.take(), [("a.tjson5", "1", ([()], [], [])),
+                                       (os.path.join("x", "c.json"), "3", ([()], [], []))])
+
+    def test_debounce(self):
+        """Test that files written to during the debounce wait are left for later"""
+        path = self.write("a.tjson5", "[1]")
+        watcher = tjson5.Watcher(self.directory, self.callback, debounce=0.2, inotify=False)
+        writer = threading.Timer(0.05, self.write, ("a.tjson5", "[1, 2]"))
+        writer.start()
+        self.assertEqual(watcher.check(), [])
+        writer.join()
+        self.assertEqual(watcher.check(), [path])
+        self.assertEqual(self.take(), [("a.tjson5", [1, 2], ([()], [], []))])
+
+    def test_callback_without_lock(self):
+        """Test that the callback may use the watcher from other threads"""
+        self.write("a.tjson5", "[1]")
+        self.write("b.tjson5", "[2]")
+        seen = []
+
+        def callback(path, value, diff):
+            # Blocks if the watcher's lock is held while calling back
+            reader = threading.Thread(target=lambda: seen.append(len(watcher.values)))
+            reader.start()
+            reader.join(5)
+            self.assertFalse(reader.is_alive())
+
+        watcher = tjson5.Watcher(self.directory, callback, debounce=0, inotify=False)
+        self.assertEqual(len(watcher.check()), 2)
+        self.assertEqual(seen, [2, 2])
+
+    def test_concurrent_checks(self):
+        """Test that checks from several threads report each change once"""
+        path = self.write("a.tjson5", "[1]")
+        watcher = tjson5.Watcher(self.directory, self.callback, debounce=0.2, inotify=False)
+        watcher.check()
+        self.take()
+        results = []
+
+        def check():
+            results.append(watcher.check())
+
+        for text in (None, "[2]"):
+            if text is None:
+                os.unlink(path)
+            else:
+                self.write("a.tjson5", text)
+            threads = [threading.Thread(target=check) for _ in range(4)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join(5)
+            self.assertEqual(len(results), 4)
+            self.assertEqual(sum(len(paths) for paths in results), 1)
+            self.assertEqual(len(self.take()), 1)
+            results.clear()
+
+    def test_parse_without_lock(self):
+        """Test that files are parsed without the watcher's lock held"""
+        self.write("a.tjson5", "{a: 1}")
+        seen = []
+
+        def object_hook(obj):
+            reader = threading.Thread(target=lambda: seen.append(len(watcher.values)))
+            reader.start()
+            reader.join(5)
+            self.assertFalse(reader.is_alive())
+            return obj
+
+        watcher = tjson5.Watcher(self.directory, self.callback, debounce=0, inotify=False,
+                                 object_hook=object_hook)
+        watcher.check()
+        self.assertEqual(seen, [0])
+
+    def test_callback_errors(self):
+        """Test that every change is reported before the callback's first error is raised"""
+        self.write("a.tjson5", "[1]")
+        self.write("b.tjson5", "[2]")
+
+        def callback(path, value, diff):
+            self.callback(path, value, diff)
+            raise ValueError(path)
+
+        watcher = tjson5.Watcher(self.directory, callback, debounce=0, inotify=False)
+        with self.assertRaises(ValueError) as cm:
+            watcher.check()
+        self.assertTrue(str(cm.exception).endswith("a.tjson5"))
+        self.assertEqual([event[0] for event in self.take()], ["a.tjson5", "b.tjson5"])
+        self.assertEqual(watcher.check(), [])
+
+    def background(self, **options):
+        self.write("a.tjson5", "{a: 1}")
+        with tjson5.watch(self.directory, self.callback, interval=0.05, debounce=0.05,
+                          **options) as watcher:
+            self.assertEqual(self.take(), [("a.tjson5", {"a": 1}, ([()], [], []))])
+            self.write("new/b.tjson5", "{b: 1}")
+            self.write("a.tjson5", "{a: 2}")
+            deadline = time.time() + 5
+            while len(self.events) < 2 and time.time() < deadline:
+                time.sleep(0.02)
+        self.assertEqual(sorted(self.take()), [
+            ("a.tjson5", {"a": 2}, ([], [], [("a",)])),
+            (os.path.join("new", "b.tjson5"), {"b": 1}, ([()], [], [])),
+        ])
+        return watcher
+
+    def test_background_polling(self):
+        """Test watching in a background thread by polling"""
+        self.assertFalse(self.background(inotify=False).using_inotify)
+
+    @unittest.skipIf(_load_libc() is None, "inotify not available")
+    def test_background_inotify(self):
+        """Test watching in a background thread with inotify"""
+        self.assertTrue(self.background(inotify=True).using_inotify)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -20,45 +20,258 @@ with open('config.tjson5', 'r') as f:
 # Load from a file with encoding fallback
 data = tjson5.load_file('config.tjson5')
 
+# Parse raw bytes (encoding detected from the BOM, else utf-8 then latin1)
+data = tjson5.parse(b'{key: 0xFF}')
+
+# Cache parsed files across calls (re-parsed only when the file changes)
+data = tjson5.load_file('config.tjson5', cache=True)
+
+# Load a whole directory of files in parallel (path -> result or error)
+results = tjson5.load_many('devices/', workers=8)
+
+# Pick a few values out of a large file without building the rest
+values = tjson5.extract(pathlib.Path('chip.tjson5'), ['series', 'parts[*].name'])
+
+# Check the syntax of a file, reporting every error as (line, column, message)
+errors = tjson5.validate(pathlib.Path('config.tjson5'))
+
+# Load a large file lazily: values are decoded on first access
+config = tjson5.load_lazy('config.tjson5')
+print(config['series'])
+
+# Stream a large file as events, or one record at a time
+with open('huge.tjson5', 'rb') as f:
+    for part in tjson5.items(f, 'parts[*]'):
+        print(part['name'])
+
+# Push chunks as they arrive, or read an asyncio stream
+parser = tjson5.Parser()
+parser.feed(chunk)
+events = parser.events()
+async for path, event, value in tjson5.aiterparse(reader):
+    ...
+data = await tjson5.aload('config.tjson5')
+
+# Read and write streams of many small documents, e.g. one per line
+with open('records.tjson5l', 'rb') as f:
+    for record in tjson5.iter_documents(f):
+        ...
+with open('records.tjson5l', 'w') as f:
+    tjson5.dump_documents(records, f)
+
 # Dump to a file (standard JSON format)
 with open('output.json', 'w') as f:
     tjson5.dump(data, f, indent=2)
+
+# Or as Triple-JSON5, with triple-quoted strings and unquoted keys
+text = tjson5.dumps(data, indent=2, triple_quotes=True, unquoted_keys=True)
+
+# Validate against a JSON Schema while parsing
+schema = tjson5.compile_schema({'type': 'object', 'required': ['name']})
+data = tjson5.load_file('config.tjson5', schema=schema)
+
+# Time the stages of a call, or of every call in a block
+stats = {}
+data = tjson5.load_file('config.tjson5', stats=stats)
+with tjson5.profiling() as profile:
+    data = tjson5.load_file('config.tjson5')
+print(profile.totals())
+
+# Keep a document in an editor: edits decode only the object or array around them
+doc = tjson5.Document(text)
+value, changed = doc.apply_edit(start, end, 'replacement')  # changed: {('key', 0), ...}
+
+# Hot-reload a directory: callback(path, value, diff) with the added, removed
+# and changed key paths of each file that changed
+watcher = tjson5.watch('devices/', on_change, interval=2.0)
+watcher.stop()
+
+# The compiled extension is used when available, otherwise (or with
+# TJSON5_PURE_PYTHON=1) the pure-Python implementation, e.g. on PyPy
+print(tjson5.IMPLEMENTATION)  # 'extension' or 'python'
 """
 
 import os
-from tjson5parser import parse, load, loads, dump, dumps, TJSON5ParseError, preprocessTripleQuotedStrings, preprocessHexBinary
+import mmap
+import time
+import contextlib
+from tjson5._backend import IMPLEMENTATION, parser as _parser
+parse, load, loads, dump, dumps = _parser.parse, _parser.load, _parser.loads, _parser.dump, _parser.dumps
+TJSON5ParseError, TJSON5ValidationError = _parser.TJSON5ParseError, _parser.TJSON5ValidationError
+preprocessTripleQuotedStrings, preprocessHexBinary = _parser.preprocessTripleQuotedStrings, _parser.preprocessHexBinary
+iterparse, items, Parser = _parser.iterparse, _parser.items, _parser.Parser
+iter_documents, dump_documents = _parser.iter_documents, _parser.dump_documents
+compile_schema, Schema = _parser.compile_schema, _parser.Schema
+compile_paths, Paths = _parser.compile_paths, _parser.Paths
+_extract, _validate = _parser.extract, _parser.validate
+from tjson5.lazy import LazyMapping, LazySequence, lazy_document
+from tjson5.document import Document, Diff, diff
+from tjson5.watch import Watcher, watch
+from tjson5.cache import FileCache, CacheInfo
+from tjson5 import cache as _cache
+from tjson5.bulk import load_many, validate_many
+from tjson5 import index
+from tjson5 import stats as _stats
+from tjson5.stats import profiling
+from tjson5.aio import aiterparse, aload
 
 # Define the version
 __version__ = "0.1.7"
 
-def load_file(filename, encodings=None):
+# Files at least this large are memory-mapped instead of read into memory
+MMAP_THRESHOLD = 1024 * 1024
+
+def load_file(filename, encodings=None, cache=False, stats=None, **options):
     """
     Load a TJSON5 file with automatic encoding detection.
-    
+
+    The file is opened once in binary mode and either read in a single call
+    or, for large files, memory-mapped. The encoding is detected from the
+    raw bytes (byte order mark or null-byte pattern) and the bytes are
+    decoded by the parser, without an intermediate copy.
+
     Args:
         filename: Path to the TJSON5 file
-        encodings: List of encodings to try, defaults to ['utf-8', 'latin1']
-    
+        encodings: List of encodings to try when there is no byte order mark,
+            defaults to ['utf-8', 'latin1']
+        cache: True to use the shared tjson5.cache.default_cache, or a FileCache
+            instance. Cached files are only parsed again when their contents
+            change. Defaults to False (always parse).
+        stats: Dict filled with the timing and counters of the call, as for
+            parse, plus the 'read' stage (seconds, bytes, and mmap if the
+            file was memory-mapped) and, with a cache, 'cache' ('hit' or 'miss')
+        **options: Decoder options passed to parse, such as object_hook,
+            parse_float or intern_values
+
     Returns:
         Parsed content as Python objects
-        
+
     Raises:
-        TJSON5ParseError: If the file cannot be parsed
+        TJSON5ParseError: If the file cannot be decoded or parsed
         FileNotFoundError: If the file does not exist
     """
-    if encodings is None:
-        encodings = ['utf-8', 'latin1']
-    
-    if not os.path.exists(filename):
-        raise FileNotFoundError(f"File not found: {filename}")
-    
-    last_error = None
-    for encoding in encodings:
-        try:
-            with open(filename, 'r', encoding=encoding, errors='replace' if encoding == 'utf-8' else None) as f:
-                return load(f)
-        except Exception as e:
-            last_error = e
-    
-    # If we get here, all encodings failed
-    raise TJSON5ParseError(f"Failed to parse file with any encoding: {last_error}")
\ No newline at end of file
+    if stats is None and _stats.enabled:
+        stats = {}
+    if cache is True:
+        cache = _cache.default_cache
+    if cache is not None and cache is not False:
+        return cache.load(filename, encodings, stats=stats, **options)
+    start = time.perf_counter() if stats is not None else 0
+    with _open_source(filename) as data:
+        if stats is not None:
+            stats['read'] = {'seconds': time.perf_counter() - start, 'bytes': len(data),
+                             'mmap': isinstance(data, mmap.mmap)}
+        return parse(data, encodings=encodings, stats=stats, **options)
+
+def load_lazy(filename, encodings=None):
+    """
+    Load a TJSON5 file lazily.
+
+    The file is scanned once to index the top-level object or array, and
+    each child value is only decoded when it is first accessed (then
+    cached). len(), keys() and iteration work without decoding values.
+
+    Args:
+        filename: Path to the TJSON5 file
+        encodings: List of encodings to try when there is no byte order mark,
+            defaults to ['utf-8', 'latin1']
+
+    Returns:
+        A LazyMapping (top-level object), a LazySequence (top-level array)
+        or the value itself for a scalar document
+
+    Raises:
+        TJSON5ParseError: If the file cannot be decoded or its structure is invalid
+        FileNotFoundError: If the file does not exist
+    """
+    with _open_source(filename) as data:
+        return lazy_document(data, encodings)
+
+def extract(source, paths, encodings=None):
+    """
+    Return the values at the given key paths of a TJSON5 document, without
+    building the rest of it.
+
+    Subtrees outside the paths are skipped by the scanner without creating
+    any object for them. The values are those parse would give: for a
+    duplicate key, the last member wins, so the object around a match is
+    always scanned to its end. When no path has a wildcard, scanning stops
+    once every path has been found outside of any open object (e.g. at the
+    end of the document's value, or after an item of a top-level array):
+    the rest of the document is then neither read nor checked.
+
+    Args:
+        source: The document as a string or raw bytes (bytes, bytearray,
+            memoryview, mmap), or the path of a file as a pathlib.Path or
+            other os.PathLike (plain strings are documents, not file names)
+        paths: Key paths such as "series" or "parts[*].name", or a Paths
+            object from compile_paths to reuse across calls
+        encodings: List of encodings to try when there is no byte order mark,
+            defaults to ['utf-8', 'latin1']
+
+    Returns:
+        A dict mapping each path to its value. Paths without a wildcard map
+        to their value and are left out if absent; paths with a wildcard
+        map to the list of matching values, in the order of the parsed
+        document.
+
+    Raises:
+        TJSON5ParseError: If the part of the document that was scanned is
+            invalid (use validate to check all of it)
+        FileNotFoundError: If the file does not exist
+    """
+    if isinstance(source, os.PathLike):
+        with _open_source(source) as data:
+            return _extract(data, paths, encodings)
+    return _extract(source, paths, encodings)
+
+def validate(source, max_errors=100, encodings=None):
+    """
+    Check the syntax of a TJSON5 document without building any value.
+
+    Scanning resumes after each error at the next comma or closing bracket,
+    so one call reports the errors of the whole document.
+
+    Args:
+        source: The document as a string or raw bytes (bytes, bytearray,
+            memoryview, mmap), or the path of a file as a pathlib.Path or
+            other os.PathLike (plain strings are documents, not file names)
+        max_errors: Stop after this many errors, None for no limit
+        encodings: List of encodings to try when there is no byte order mark,
+            defaults to ['utf-8', 'latin1']
+
+    Returns:
+        A list of (line, column, message) tuples in source order, empty if
+        the document is valid
+
+    Raises:
+        TJSON5ParseError: If the document cannot be decoded
+        FileNotFoundError: If the file does not exist
+    """
+    if isinstance(source, os.PathLike):
+        with _open_source(source) as data:
+            return _validate(data, max_errors, encodings)
+    return _validate(source, max_errors, encodings)
+
+@contextlib.contextmanager
+def _open_source(filename):
+    """
+    Open filename once in binary mode and yield its raw contents, either
+    read in a single call or, for large files, memory-mapped.
+    """
+    with open(filename, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        mapped = None
+        if size >= MMAP_THRESHOLD:
+            try:
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except (OSError, ValueError):
+                # Not mappable (e.g. a pipe or special file), read it instead
+                pass
+        if mapped is None:
+            data = f.read()
+    if mapped is None:
+        yield data
+    else:
+        with mapped:
+            yield mapped
@@ -0,0 +1,60 @@
+"""
+Command line tools for TJSON5 files.
+
+    python -m tjson5 lint [paths...] [--workers N] [--max-errors N]
+
+lint checks the syntax of files, directories (all *.tjson5 files below
+them) and glob patterns in parallel, printing each error as
+path:line:column: message. The exit status is 1 if any file has an error.
+"""
+
+import sys
+import argparse
+
+from tjson5.bulk import validate_many, _expand_paths
+
+def lint(args):
+    paths = []
+    for path in args.paths:
+        paths.extend(_expand_paths(path))
+    max_errors = args.max_errors if args.max_errors > 0 else None
+    results = validate_many(paths, workers=args.workers, executor=args.executor,
+                            max_errors=max_errors)
+    failed = 0
+    count = 0
+    for path, errors in results.items():
+        if isinstance(errors, Exception):
+            # Unreadable or undecodable file
+            failed += 1
+            count += 1
+            print(f"{path}: {str(errors).splitlines()[0]}")
+            continue
+        if errors:
+            failed += 1
+            count += len(errors)
+        for line, column, message in errors:
+            print(f"{path}:{line}:{column}: {message}")
+    if not args.quiet:
+        print(f"{len(results)} files checked, {count} errors in {failed} files", file=sys.stderr)
+    return 1 if failed else 0
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m tjson5', description="TJSON5 command line tools")
+    commands = parser.add_subparsers(dest='command')
+    command = commands.add_parser('lint', help="check the syntax of TJSON5 files")
+    command.add_argument('paths', nargs='*', default=['.'],
+                         help="files, directories or glob patterns (default: the current directory)")
+    command.add_argument('--workers', type=int, default=None,
+                         help="number of worker processes (default: the CPU count)")
+    command.add_argument('--executor', default='process', choices=['process', 'thread'])
+    command.add_argument('--max-errors', type=int, default=100,
+                         help="errors reported per file, 0 for no limit (default: 100)")
+    command.add_argument('--quiet', action='store_true', help="do not print the summary")
+    args = parser.parse_args(argv)
+    if args.command == 'lint':
+        return lint(args)
+    parser.print_help()
+    return 2
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,21 @@
+"""
+Selection of the parser implementation behind the tjson5 package.
+
+The compiled tjson5parser extension is used when it can be imported.
+Otherwise, or when the TJSON5_PURE_PYTHON environment variable is set to
+anything but "0", the package uses tjson5.pure: the same API in pure
+Python, for PyPy and for platforms without a build of the extension.
+"""
+
+import os
+
+if os.environ.get('TJSON5_PURE_PYTHON', '') not in ('', '0'):
+    from tjson5 import pure as parser
+    IMPLEMENTATION = 'python'
+else:
+    try:
+        import tjson5parser as parser
+        IMPLEMENTATION = 'extension'
+    except ImportError:
+        from tjson5 import pure as parser
+        IMPLEMENTATION = 'python'
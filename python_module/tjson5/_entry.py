@@ -0,0 +1,36 @@
+"""
+Cached state of a parsed file, shared by tjson5.cache and tjson5.watch.
+
+An entry remembers the modification time, size and content hash of the
+file it was parsed from, so that an unchanged file can be recognized from
+its os.stat result alone, and a touched but unchanged one from its hash.
+tjson5.index applies the same rule to the files it has indexed.
+"""
+
+import time
+
+# Modification times closer than this to the time of the parse are not
+# trusted on their own: the file may still be written to within the same
+# timestamp tick, so such entries are always verified by content hash.
+RACY_WINDOW = 2.0
+
+def is_racy(mtime_ns, read_ns):
+    """Whether a file modified at mtime_ns and read at read_ns may have changed unseen."""
+    return read_ns - mtime_ns <= RACY_WINDOW * 1e9
+
+class Entry:
+    __slots__ = ('mtime_ns', 'size', 'digest', 'value', 'trust_stat')
+
+    def __init__(self, stat, digest, value):
+        self.digest = digest
+        self.value = value
+        self.update_stat(stat)
+
+    def update_stat(self, stat):
+        self.mtime_ns = stat.st_mtime_ns
+        self.size = stat.st_size
+        self.trust_stat = not is_racy(stat.st_mtime_ns, time.time_ns())
+
+    def stat_matches(self, stat):
+        return (self.trust_stat and self.mtime_ns == stat.st_mtime_ns
+                and self.size == stat.st_size)
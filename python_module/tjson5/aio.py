@@ -0,0 +1,77 @@
+"""
+asyncio interface: parse events from an asynchronous stream, and load
+files without blocking the event loop.
+"""
+
+import asyncio
+import functools
+import contextvars
+
+from tjson5._backend import parser as _parser
+
+Parser, DEFAULT_CHUNK_SIZE = _parser.Parser, _parser.DEFAULT_CHUNK_SIZE
+
+async def aiterparse(stream, chunk_size=DEFAULT_CHUNK_SIZE, encoding=None):
+    """
+    Parse a Triple-JSON5 document from an asynchronous stream and yield
+    parse events as the input arrives.
+
+        async for path, event, value in tjson5.aiterparse(reader):
+            ...
+
+    Args:
+        stream: An object with a coroutine read(n) method, such as an
+            asyncio.StreamReader, or an async iterable of chunks. Chunks
+            may be strings or bytes-like objects.
+        chunk_size: Number of characters or bytes read at a time
+        encoding: Encoding of raw input; detected from the byte order mark
+            or null-byte pattern by default, falling back to utf-8
+
+    Yields (path, event, value) tuples as for iterparse.
+
+    Raises:
+        TJSON5ParseError: If the document is invalid
+    """
+    parser = Parser(encoding)
+    if hasattr(stream, 'read'):
+        while True:
+            chunk = await stream.read(chunk_size)
+            if not chunk:
+                break
+            parser.feed(chunk)
+            for event in parser.events():
+                yield event
+    else:
+        async for chunk in stream:
+            parser.feed(chunk)
+            for event in parser.events():
+                yield event
+    parser.close()
+    for event in parser.events():
+        yield event
+
+async def aload(filename, encodings=None, **options):
+    """
+    Load a TJSON5 file without blocking the event loop.
+
+    The file is read and parsed by load_file in the loop's default
+    executor. Parsing scans the text without holding the GIL, so other
+    threads keep running meanwhile.
+
+    Args:
+        filename: Path to the TJSON5 file
+        encodings: List of encodings to try when there is no byte order mark,
+            defaults to ['utf-8', 'latin1']
+        **options: Other arguments of load_file, such as cache, stats or
+            decoder options
+
+    Returns:
+        Parsed content as Python objects
+    """
+    from tjson5 import load_file
+    loop = asyncio.get_running_loop()
+    # Run in a copy of the task's context, so that an active tjson5.profiling()
+    # block records the call
+    call = functools.partial(contextvars.copy_context().run, load_file, filename, encodings,
+                             **options)
+    return await loop.run_in_executor(None, call)
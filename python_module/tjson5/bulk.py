@@ -0,0 +1,187 @@
+"""
+Parallel loading and validation of many TJSON5 files.
+
+Files are ordered by size, largest first, and grouped into chunks of
+roughly equal work so that each task sent to a worker carries enough
+parsing to amortize the inter-process round trip, and the biggest files
+do not end up straggling at the end of the batch.
+"""
+
+import os
+import glob
+import pathlib
+import contextvars
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from tjson5._backend import parser as _parser
+from tjson5 import stats as _stats
+
+TJSON5ParseError = _parser.TJSON5ParseError
+
+# Target amount of source text per task, in bytes
+CHUNK_BYTES = 4 * 1024 * 1024
+
+# Maximum number of files per task
+CHUNK_FILES = 64
+
+def _expand_paths(paths):
+    """Expand a directory, a glob pattern or an iterable of paths into a list of paths."""
+    if isinstance(paths, (str, bytes, os.PathLike)):
+        paths = os.fspath(paths)
+        if os.path.isdir(paths):
+            pattern = os.path.join(paths, '**', '*.tjson5')
+            return sorted(glob.glob(pattern, recursive=True))
+        if glob.has_magic(paths):
+            return sorted(glob.glob(paths, recursive=True))
+        return [paths]
+    return list(paths)
+
+def _load_chunk(paths, encodings, options):
+    """Load a list of files, returning each result or the error it raised."""
+    from tjson5 import load_file
+    results = []
+    for path in paths:
+        try:
+            results.append(load_file(path, encodings, **options))
+        except (TJSON5ParseError, OSError) as e:
+            results.append(e)
+    return results
+
+def _validate_chunk(paths, encodings, max_errors):
+    """Validate a list of files, returning each list of errors or the error it raised."""
+    from tjson5 import validate
+    results = []
+    for path in paths:
+        try:
+            results.append(validate(_as_path(path), max_errors, encodings))
+        except (TJSON5ParseError, OSError) as e:
+            results.append(e)
+    return results
+
+def _profiled_chunk(function, paths, encodings, argument):
+    """
+    Call function in a worker process under profiling(), returning its
+    results and the stats of the calls it made, to be recorded by the
+    parent process.
+    """
+    with _stats.profiling() as profile:
+        results = function(paths, encodings, argument)
+    return results, profile.calls
+
+def _as_path(path):
+    """Return path as an os.PathLike, so that validate reads it as a file name."""
+    return path if isinstance(path, os.PathLike) else pathlib.Path(os.fsdecode(path))
+
+def _make_chunks(paths, workers):
+    """
+    Group the indices of paths into chunks, largest files first.
+
+    Chunks are capped at CHUNK_BYTES and CHUNK_FILES, and at an even share
+    of the total size per worker so that small batches still spread out.
+    """
+    sizes = []
+    for path in paths:
+        try:
+            sizes.append(os.stat(path).st_size)
+        except OSError:
+            sizes.append(0)  # Reported when the worker opens it
+    order = sorted(range(len(paths)), key=lambda i: sizes[i], reverse=True)
+    limit = max(1, min(CHUNK_BYTES, sum(sizes) // (workers * 4)))
+    chunks = []
+    chunk = []
+    chunk_size = 0
+    for i in order:
+        if chunk and (chunk_size + sizes[i] > limit or len(chunk) >= CHUNK_FILES):
+            chunks.append(chunk)
+            chunk = []
+            chunk_size = 0
+        chunk.append(i)
+        chunk_size += sizes[i]
+    if chunk:
+        chunks.append(chunk)
+    return chunks
+
+def load_many(paths, workers=None, executor='process', encodings=None, **options):
+    """
+    Load many TJSON5 files in parallel.
+
+    Args:
+        paths: A directory (all *.tjson5 files below it), a glob pattern
+            (e.g. 'devices/**/*.tjson5') or an iterable of file paths
+        workers: Number of worker processes or threads, defaults to the
+            number of CPUs. With workers=1 the files are loaded serially in
+            the calling thread.
+        executor: 'process' (the default) or 'thread'
+        encodings: List of encodings to try when there is no byte order mark,
+            defaults to ['utf-8', 'latin1']
+        **options: Decoder options passed to parse, such as hooks (which
+            must be picklable for the process executor) or interning
+
+    Returns:
+        A dict mapping each path, in input order, to its parsed content or,
+        if the file could not be loaded, to the TJSON5ParseError (or OSError)
+        it raised. One bad file does not abort the batch.
+    """
+    return _run(_load_chunk, paths, workers, executor, encodings, options)
+
+def validate_many(paths, workers=None, executor='process', encodings=None, max_errors=100):
+    """
+    Check the syntax of many TJSON5 files in parallel, without building them.
+
+    Args:
+        paths: A directory (all *.tjson5 files below it), a glob pattern
+            or an iterable of file paths
+        workers: Number of worker processes or threads, defaults to the
+            number of CPUs. With workers=1 the files are checked serially in
+            the calling thread.
+        executor: 'process' (the default) or 'thread'
+        encodings: List of encodings to try when there is no byte order mark,
+            defaults to ['utf-8', 'latin1']
+        max_errors: Maximum number of errors reported per file, None for no limit
+
+    Returns:
+        A dict mapping each path, in input order, to its list of
+        (line, column, message) errors (empty for a valid file) or, if the
+        file could not be read or decoded, to the TJSON5ParseError (or
+        OSError) it raised.
+    """
+    return _run(_validate_chunk, paths, workers, executor, encodings, max_errors)
+
+def _run(function, paths, workers, executor, encodings, argument):
+    """Call function on chunks of the expanded paths in a pool, and map each path to its result."""
+    if executor not in ('process', 'thread'):
+        raise ValueError(f"executor must be 'process' or 'thread', not {executor!r}")
+    paths = _expand_paths(paths)
+    if workers is None:
+        workers = os.cpu_count() or 1
+    results = [None] * len(paths)
+    if workers <= 1 or len(paths) <= 1:
+        results = function(paths, encodings, argument)
+    else:
+        pool_class = ProcessPoolExecutor if executor == 'process' else ThreadPoolExecutor
+        chunks = _make_chunks(paths, workers)
+        # Calls made by workers are recorded by the profiles of the caller
+        # (see tjson5.profiling): threads run in a copy of its context, and
+        # processes send their stats back
+        profiled = executor == 'process' and _stats.enabled
+        with pool_class(max_workers=min(workers, len(chunks))) as pool:
+            futures = []
+            for chunk in chunks:
+                chunk_paths = [paths[i] for i in chunk]
+                if executor == 'thread':
+                    futures.append(pool.submit(contextvars.copy_context().run, function,
+                                               chunk_paths, encodings, argument))
+                elif profiled:
+                    futures.append(pool.submit(_profiled_chunk, function, chunk_paths,
+                                               encodings, argument))
+                else:
+                    futures.append(pool.submit(function, chunk_paths, encodings, argument))
+            for chunk, future in zip(chunks, futures):
+                chunk_results = future.result()
+                if profiled:
+                    chunk_results, calls = chunk_results
+                    for stats in calls:
+                        _stats._record(stats)
+                for i, result in zip(chunk, chunk_results):
+                    results[i] = result
+    return dict(zip(paths, results))
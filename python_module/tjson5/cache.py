@@ -0,0 +1,199 @@
+"""
+Process-level cache for parsed TJSON5 files.
+
+A FileCache maps a file path to its parsed content. A lookup first
+compares the file's modification time and size with the cached entry and,
+when they differ, falls back to comparing a hash of the contents, so a
+file that was touched but not changed is not parsed again. Least recently
+used entries are evicted when the cache exceeds its entry or byte limits.
+"""
+
+import os
+import hashlib
+import threading
+from array import array
+from collections import OrderedDict, namedtuple
+from types import MappingProxyType
+
+from tjson5 import stats as _stats
+from tjson5._backend import parser as _parser
+from tjson5._entry import Entry as _Entry
+
+parse, _copy = _parser.parse, _parser._copy_document
+
+CacheInfo = namedtuple('CacheInfo', ['hits', 'misses', 'evictions', 'entries', 'bytes'])
+
+class FileCache:
+    """
+    Thread-safe LRU cache of parsed TJSON5 files.
+
+    Args:
+        max_entries: Maximum number of cached files (None for no limit)
+        max_bytes: Maximum total size of the cached source files in bytes
+            (None for no limit). Files larger than this are never cached.
+        frozen: If True, every lookup returns the same deep-frozen result
+            (objects become read-only mappings, arrays become tuples). If
+            False (the default), every lookup returns a fresh copy of the
+            cached dicts and lists that the caller is free to modify.
+    """
+
+    def __init__(self, max_entries=256, max_bytes=64 * 1024 * 1024, frozen=False):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.frozen = frozen
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def load(self, filename, encodings=None, **options):
+        """
+        Return the parsed content of filename, parsing it only if it is not
+        cached or has changed since it was cached.
+
+        Decoder options (see parse) are part of the cache key. Objects
+        created by hooks are not copied, only the dicts and lists around them.
+        A stats dict (see parse) also records 'cache' as 'hit' or 'miss'.
+        While stats are collected (see tjson5.profiling), hits are recorded
+        like the parse of a miss.
+
+        Raises:
+            TJSON5ParseError: If the file cannot be decoded or parsed
+            FileNotFoundError: If the file does not exist
+        """
+        stats = options.pop('stats', None)
+        if stats is None and _stats.enabled:
+            stats = {}
+        key = (os.path.abspath(os.fspath(filename)), tuple(encodings) if encodings else None,
+               _options_key(options) if options else None)
+        if stats is not None:
+            stats['cache'] = 'hit'
+        with open(filename, 'rb') as f:
+            stat = os.fstat(f.fileno())
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None and entry.stat_matches(stat):
+                    return self._hit(key, entry, stats)
+            data = f.read()
+        digest = hashlib.blake2b(data, digest_size=16).digest()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.digest == digest:
+                # Touched but unchanged, remember the new timestamp
+                entry.update_stat(stat)
+                return self._hit(key, entry, stats)
+        if stats is not None:
+            stats['cache'] = 'miss'
+        value = parse(data, encodings=encodings, stats=stats, **options)
+        if self.frozen:
+            value = _freeze(value)
+        with self._lock:
+            self._misses += 1
+            self._store(key, _Entry(stat, digest, value))
+        return value if self.frozen else _copy(value)
+
+    def invalidate(self, filename=None):
+        """Drop the cached entries for filename, or all entries if it is None."""
+        with self._lock:
+            if filename is None:
+                self._entries.clear()
+                self._bytes = 0
+                return
+            path = os.path.abspath(os.fspath(filename))
+            for key in [key for key in self._entries if key[0] == path]:
+                self._bytes -= self._entries.pop(key).size
+
+    def clear(self):
+        """Drop all entries and reset the statistics."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = self._hits = self._misses = self._evictions = 0
+
+    def cache_info(self):
+        """Return a CacheInfo(hits, misses, evictions, entries, bytes) tuple."""
+        with self._lock:
+            return CacheInfo(self._hits, self._misses, self._evictions,
+                             len(self._entries), self._bytes)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _hit(self, key, entry, stats):
+        # Called with the lock held. A miss reaches the stats sink through
+        # parse, a hit is passed to it here
+        self._entries.move_to_end(key)
+        self._hits += 1
+        if stats is not None and _stats.enabled:
+            _stats._record(stats)
+        value = entry.value
+        return value if self.frozen else _copy(value)
+
+    def _store(self, key, entry):
+        # Called with the lock held
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self._bytes -= old.size
+        if self.max_bytes is not None and entry.size > self.max_bytes:
+            return
+        self._entries[key] = entry
+        self._bytes += entry.size
+        while ((self.max_entries is not None and len(self._entries) > self.max_entries)
+               or (self.max_bytes is not None and self._bytes > self.max_bytes)):
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= evicted.size
+            self._evictions += 1
+
+class _Identity:
+    """
+    Hashable stand-in for an object that is compared by identity. It holds
+    a reference to the object, so that its id cannot be reused while the
+    cache key exists.
+    """
+    __slots__ = ('value',)
+
+    def __init__(self, value):
+        self.value = value
+
+    def __hash__(self):
+        return id(self.value)
+
+    def __eq__(self, other):
+        return type(other) is _Identity and other.value is self.value
+
+def _options_key(options):
+    # A shared intern table is used by identity: results built with another
+    # table hold other string objects
+    return tuple(sorted((name, _Identity(value) if name == 'intern_table' else _canonical(value))
+                        for name, value in options.items()))
+
+def _canonical(value):
+    """Return a hashable form of an option value that compares by contents."""
+    if isinstance(value, dict):
+        items = [(_canonical(k), _canonical(v)) for k, v in value.items()]
+        return (dict, tuple(sorted(items, key=repr)))
+    if isinstance(value, (list, tuple)):
+        return (type(value), tuple(_canonical(item) for item in value))
+    if isinstance(value, (set, frozenset)):
+        return (frozenset, frozenset(_canonical(item) for item in value))
+    try:
+        hash(value)
+    except TypeError:
+        return _Identity(value)
+    return value
+
+def _freeze(value):
+    """Convert a parsed document to read-only mappings and tuples."""
+    if type(value) is dict:
+        return MappingProxyType({k: _freeze(v) for k, v in value.items()})
+    if type(value) is list:
+        return tuple(_freeze(v) for v in value)
+    if type(value) is array:
+        return tuple(value)
+    if hasattr(value, 'setflags'):  # numpy.ndarray, from parse(arrays=...)
+        value.setflags(write=False)
+    return value
+
+# Cache used by load_file(..., cache=True)
+default_cache = FileCache()
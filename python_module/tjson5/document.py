@@ -0,0 +1,196 @@
+"""
+Incrementally reparsed TJSON5 documents.
+
+A Document keeps the source text of a document, its decoded value and a
+tree of the source spans of its objects and arrays. apply_edit() replaces
+a range of the source and decodes again only the innermost object or array
+that encloses the edit, splicing the result into the value. The whole
+document is decoded again only when the edit does not fit inside one (for
+example when it removes a bracket).
+"""
+
+from bisect import bisect_right
+from collections import namedtuple
+
+from tjson5._backend import parser as _parser
+
+TJSON5ParseError, _decode_source, _decode_spans = \
+    _parser.TJSON5ParseError, _parser._decode_source, _parser._decode_spans
+
+# Fields of a span node (see _decode_spans)
+_LENGTH, _KEYS, _STARTS, _ENDS, _CHILDREN = range(5)
+
+Diff = namedtuple('Diff', ['added', 'removed', 'changed'])
+
+class Document:
+    """
+    A TJSON5 document that can be edited and decoded again incrementally.
+
+    Objects and arrays are decoded as dicts and lists, without hooks. Values
+    returned by apply_edit share the containers that the edit did not touch
+    with the previous value, which is never modified.
+    """
+
+    __slots__ = ('_source', '_value', '_node', '_start')
+
+    def __init__(self, source, encodings=None):
+        """
+        Decode source (a string or raw input, see parse) and record the
+        spans of its objects and arrays. Raises TJSON5ParseError if the
+        source is not a valid document.
+        """
+        self._source = _decode_source(source, encodings)
+        self._value, self._node, self._start, _ = _decode_spans(self._source, 0, True)
+
+    @property
+    def source(self):
+        """The current source text, with every edit applied."""
+        return self._source
+
+    @property
+    def value(self):
+        """The decoded value of the last valid source."""
+        return self._value
+
+    def apply_edit(self, start, end, replacement):
+        """
+        Replace source[start:end] with replacement and decode the result.
+
+        Only the innermost object or array around the edit (whose brackets
+        the edit leaves alone) is decoded again. If that fails, or the
+        container no longer ends where it did, the next enclosing one is
+        tried, up to the whole document.
+
+        Returns (value, changed): the new value of the document and the set
+        of key paths (tuples of keys and indices) of the values that were
+        added, removed or changed.
+
+        Raises TJSON5ParseError if the edited source is not a valid document.
+        The edit is applied to the source all the same, so that the offsets
+        of later edits refer to it; value stays that of the last valid
+        source until an edit makes the document valid again.
+        """
+        source = self._source
+        if not 0 <= start <= end <= len(source):
+            raise ValueError(f"Invalid edit range {start}:{end} for {len(source)} characters")
+        text = source[:start] + replacement + source[end:]
+        delta = len(replacement) - (end - start)
+        self._source = text
+        chain = self._enclosing(start, end)
+        while chain:
+            node, offset, old, path, _ = chain[-1]
+            try:
+                value, new_node, _, stop = _decode_spans(text, offset, False)
+            except TJSON5ParseError:
+                pass
+            else:
+                if stop == offset + node[_LENGTH] + delta:
+                    changed = _changed_paths(old, value, path)
+                    self._splice(chain, value, new_node, delta)
+                    return self._value, changed
+            # The edit reaches beyond this container
+            chain.pop()
+        old = self._value
+        try:
+            self._value, self._node, self._start, _ = _decode_spans(text, 0, True)
+        except TJSON5ParseError:
+            self._node = None
+            raise
+        return self._value, _changed_paths(old, self._value, ())
+
+    def _enclosing(self, start, end):
+        """
+        Return the objects and arrays whose brackets enclose source[start:end],
+        outermost first, as (node, offset, value, path, index) entries where
+        index is the position of the container among the members of the
+        previous one.
+        """
+        chain = []
+        node = self._node
+        offset = self._start
+        value = self._value
+        path = ()
+        index = None
+        while node is not None and offset < start and end < offset + node[_LENGTH]:
+            chain.append((node, offset, value, path, index))
+            starts = node[_STARTS]
+            index = bisect_right(starts, start - offset) - 1
+            if index < 0 or end - offset > node[_ENDS][index]:
+                break
+            keys = node[_KEYS]
+            if keys is None:
+                key = index
+            else:
+                key = keys[index]
+                if keys.count(key) > 1:
+                    # A duplicate key: the value only holds the last one
+                    break
+            offset += starts[index]
+            node = node[_CHILDREN][index]
+            value = value[key]
+            path += (key,)
+        return chain
+
+    def _splice(self, chain, value, node, delta):
+        """
+        Put the decoded value and span node of the last container of chain
+        in place, shifting the spans that follow the edit by delta.
+        """
+        for depth in range(len(chain) - 1, 0, -1):
+            _, _, _, path, index = chain[depth]
+            parent, _, parent_value, _, _ = chain[depth - 1]
+            parent[_CHILDREN][index] = node
+            starts, ends = parent[_STARTS], parent[_ENDS]
+            ends[index] += delta
+            for i in range(index + 1, len(starts)):
+                starts[i] += delta
+                ends[i] += delta
+            parent[_LENGTH] += delta
+            copy = parent_value.copy()
+            copy[path[-1]] = value
+            value, node = copy, parent
+        self._value = value
+        self._node = node
+
+def diff(old, new):
+    """
+    Compare two decoded documents.
+
+    Returns a Diff(added, removed, changed) of lists of key paths (tuples of
+    keys and indices), in document order. Objects are compared key by key
+    and arrays index by index; a path is only listed at the top of the
+    subtree that was added, removed or replaced, and values of different
+    types differ even when they compare equal (1, 1.0 and True).
+    """
+    result = Diff([], [], [])
+    _diff(old, new, (), result)
+    return result
+
+def _changed_paths(old, new, path):
+    """Return the set of key paths below path that were added, removed or changed."""
+    result = Diff([], [], [])
+    _diff(old, new, path, result)
+    return set(result.added) | set(result.removed) | set(result.changed)
+
+def _diff(old, new, path, result):
+    if old is new:
+        return
+    if type(old) is dict and type(new) is dict:
+        for key, value in old.items():
+            if key in new:
+                _diff(value, new[key], path + (key,), result)
+            else:
+                result.removed.append(path + (key,))
+        for key in new:
+            if key not in old:
+                result.added.append(path + (key,))
+    elif type(old) is list and type(new) is list:
+        for index in range(min(len(old), len(new))):
+            _diff(old[index], new[index], path + (index,), result)
+        for index in range(len(new), len(old)):
+            result.removed.append(path + (index,))
+        for index in range(len(old), len(new)):
+            result.added.append(path + (index,))
+    elif type(old) is not type(new) or (old != new and not (old != old and new != new)):
+        # NaN is taken as equal to NaN
+        result.changed.append(path)
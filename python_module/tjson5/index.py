@@ -0,0 +1,347 @@
+"""
+Persistent index of the key paths and values in a tree of TJSON5 files.
+
+The index is a SQLite database holding one row per value of every indexed
+document: its key path, its scalar value (if it is not an object or array)
+and its character offset in the source. Key-path and value lookups are
+answered from the database without opening the files, and the subtree of
+a match is decoded by seeking to its stored offset instead of parsing the
+whole file.
+
+Example:
+    with tjson5.index.Index('devices.db', 'devices/') as idx:
+        idx.update()  # only new or changed files are parsed
+        for match in idx.find('parts[*].package', 'LQFP64'):
+            part = idx.load(match, up=1)  # the part object containing the match
+"""
+
+import os
+import glob
+import json
+import time
+import sqlite3
+import hashlib
+from collections import namedtuple
+
+from tjson5._backend import parser as _parser
+from tjson5._entry import is_racy as _is_racy
+
+TJSON5ParseError, _decode_source, _collect_nodes, _decode_at, _parse_key_path = (
+    _parser.TJSON5ParseError, _parser._decode_source, _parser._collect_nodes,
+    _parser._decode_at, _parser._parse_key_path)
+
+Match = namedtuple('Match', ['file', 'path', 'value', 'offset'])
+UpdateStats = namedtuple('UpdateStats', ['added', 'updated', 'unchanged', 'removed', 'failed'])
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    path TEXT UNIQUE NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    digest BLOB NOT NULL,
+    error TEXT,
+    indexed_ns INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS nodes (
+    file_id INTEGER NOT NULL,
+    path TEXT NOT NULL,
+    shape TEXT NOT NULL,
+    type TEXT NOT NULL,
+    value,
+    offset INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS nodes_shape_value ON nodes (shape, value);
+CREATE INDEX IF NOT EXISTS nodes_file_path ON nodes (file_id, path);
+"""
+
+_INT64_MIN = -2 ** 63
+_INT64_MAX = 2 ** 63 - 1
+
+_MISSING = object()
+
+_ENCODER = json.JSONEncoder(ensure_ascii=False, separators=(',', ':'))
+
+def _dump_path(path):
+    return _ENCODER.encode(list(path))
+
+def _shape(path):
+    """The key path with every array index replaced by null."""
+    return _dump_path([c if isinstance(c, str) else None for c in path])
+
+def _append_path(encoded, component):
+    """Append an encoded component to an encoded path."""
+    return ('[' if encoded == '[]' else encoded[:-1] + ',') + component + ']'
+
+def _db_value(value):
+    """Return the (type, stored value) pair of a scalar value."""
+    if value is None:
+        return 'null', None
+    if value is True or value is False:
+        return 'bool', int(value)
+    if isinstance(value, int):
+        if _INT64_MIN <= value <= _INT64_MAX:
+            return 'int', value
+        return 'int', str(value)  # Too large for SQLite, kept exact as text
+    if isinstance(value, float):
+        return 'float', value
+    return 'str', value
+
+def _stat_unchanged(row, stat):
+    """
+    Whether a file whose files row is (id, mtime_ns, size, digest,
+    indexed_ns) can be taken as unchanged from its stat alone. A
+    modification time too close to the time the file was indexed is not
+    trusted, as the file may have been written to again within the same
+    timestamp tick.
+    """
+    return (row is not None and row[1] == stat.st_mtime_ns and row[2] == stat.st_size
+            and not _is_racy(row[1], row[4]))
+
+def _py_value(kind, value):
+    """Inverse of _db_value; objects and arrays have the value None."""
+    if kind == 'bool':
+        return bool(value)
+    if kind == 'int':
+        return int(value)
+    if kind == 'float':
+        return float('nan') if value is None else value
+    if kind == 'str':
+        return value
+    return None
+
+def _node_rows(file_id, nodes):
+    # Nodes come in document order, so the encoded path and shape of each
+    # node's parent are known and only the last component is encoded.
+    # A key repeated in an object keeps its last value, as in parse(): the
+    # earlier values and their descendants are left out.
+    encode = _ENCODER.encode
+    final = {node[0]: i for i, node in enumerate(nodes)}
+    alive = {}
+    paths = {(): '[]'}
+    shapes = {(): '[]'}
+    for i, (path, offset, value) in enumerate(nodes):
+        alive[path] = final[path] == i and (not path or alive[path[:-1]])
+        if not alive[path]:
+            continue
+        if path:
+            parent = path[:-1]
+            last = path[-1]
+            if isinstance(last, str):
+                last = encode(last)
+                paths[path] = _append_path(paths[parent], last)
+                shapes[path] = _append_path(shapes[parent], last)
+            else:
+                paths[path] = _append_path(paths[parent], str(last))
+                shapes[path] = _append_path(shapes[parent], 'null')
+        if value is dict:
+            kind, value = 'object', None
+        elif value is list:
+            kind, value = 'array', None
+        else:
+            kind, value = _db_value(value)
+        yield file_id, paths[path], shapes[path], kind, value, offset
+
+class Index:
+    """
+    Index of the TJSON5 files below a directory, stored in a SQLite database.
+
+    Args:
+        database: Path of the SQLite database file (created if missing)
+        root: Directory containing the files, paths in the index are
+            relative to it
+        pattern: Glob pattern of the files to index, relative to root
+        encodings: List of encodings to try when there is no byte order mark,
+            defaults to ['utf-8', 'latin1']
+    """
+
+    def __init__(self, database, root, pattern='**/*.tjson5', encodings=None):
+        self.root = os.path.abspath(os.fspath(root))
+        self.pattern = pattern
+        self.encodings = encodings
+        self._db = sqlite3.connect(os.fspath(database))
+        self._db.executescript(_SCHEMA)
+        columns = [row[1] for row in self._db.execute("PRAGMA table_info(files)")]
+        if 'indexed_ns' not in columns:
+            # Databases from before indexed_ns: every file is hashed once
+            with self._db:
+                self._db.execute("ALTER TABLE files ADD COLUMN indexed_ns INTEGER NOT NULL DEFAULT 0")
+
+    def close(self):
+        self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def update(self):
+        """
+        Bring the index up to date with the files on disk.
+
+        Files whose modification time and size are unchanged are skipped,
+        unless they were modified less than two seconds before they were
+        indexed (and so may have been written to again within the same
+        timestamp tick), and files that were touched but whose content hash
+        is unchanged are not parsed again. Files that fail to parse are
+        recorded with their error and have no entries.
+
+        Returns:
+            UpdateStats(added, updated, unchanged, removed, failed), each a
+            list of relative paths
+        """
+        stats = UpdateStats([], [], [], [], [])
+        known = {row[0]: row[1:] for row in
+                 self._db.execute("SELECT path, id, mtime_ns, size, digest, indexed_ns FROM files")}
+        on_disk = set()
+        with self._db:
+            for name in sorted(glob.glob(os.path.join(self.root, self.pattern), recursive=True)):
+                if not os.path.isfile(name):
+                    continue
+                rel = os.path.relpath(name, self.root)
+                on_disk.add(rel)
+                self._update_file(rel, known.get(rel), stats)
+            for rel in sorted(set(known) - on_disk):
+                self._remove_file(known[rel][0])
+                stats.removed.append(rel)
+        return stats
+
+    def _update_file(self, rel, row, stats):
+        with open(os.path.join(self.root, rel), 'rb') as f:
+            stat = os.fstat(f.fileno())
+            if _stat_unchanged(row, stat):
+                stats.unchanged.append(rel)
+                return
+            now = time.time_ns()
+            data = f.read()
+        digest = hashlib.blake2b(data, digest_size=16).digest()
+        if row is not None and row[3] == digest:
+            self._db.execute("UPDATE files SET mtime_ns = ?, size = ?, indexed_ns = ? WHERE id = ?",
+                             (stat.st_mtime_ns, stat.st_size, now, row[0]))
+            stats.unchanged.append(rel)
+            return
+        error = None
+        try:
+            nodes = _collect_nodes(_decode_source(data, self.encodings))
+        except TJSON5ParseError as e:
+            nodes = []
+            error = str(e)
+        if row is None:
+            file_id = self._db.execute(
+                "INSERT INTO files (path, mtime_ns, size, digest, error, indexed_ns) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (rel, stat.st_mtime_ns, stat.st_size, digest, error, now)).lastrowid
+            stats.added.append(rel)
+        else:
+            file_id = row[0]
+            self._db.execute("DELETE FROM nodes WHERE file_id = ?", (file_id,))
+            self._db.execute(
+                "UPDATE files SET mtime_ns = ?, size = ?, digest = ?, error = ?, indexed_ns = ? "
+                "WHERE id = ?",
+                (stat.st_mtime_ns, stat.st_size, digest, error, now, file_id))
+            stats.updated.append(rel)
+        if error is not None:
+            stats.failed.append(rel)
+        self._db.executemany("INSERT INTO nodes VALUES (?, ?, ?, ?, ?, ?)",
+                             _node_rows(file_id, nodes))
+
+    def _remove_file(self, file_id):
+        self._db.execute("DELETE FROM nodes WHERE file_id = ?", (file_id,))
+        self._db.execute("DELETE FROM files WHERE id = ?", (file_id,))
+
+    def files(self):
+        """Return a dict of the indexed relative paths to their parse error (or None)."""
+        return dict(self._db.execute("SELECT path, error FROM files ORDER BY path"))
+
+    def find(self, path, value=_MISSING):
+        """
+        Find the values at a key path, optionally equal to value.
+
+        Args:
+            path: Key path in the syntax of items(), e.g. 'parts[*].package'
+                or 'pins["wirebonding-layout"]'. '*' matches any key or index.
+            value: If given, only scalar values equal to it are returned
+
+        Returns:
+            A list of Match(file, path, value, offset) tuples in file and
+            document order, where file is relative to root, path is a tuple
+            of keys and indices and value is None for objects and arrays
+        """
+        pattern = _parse_key_path(path)
+        if None in pattern:
+            shapes = [shape for (shape,) in self._db.execute("SELECT DISTINCT shape FROM nodes")
+                      if _shape_matches(pattern, json.loads(shape))]
+            if not shapes:
+                return []
+        else:
+            shapes = [_shape(pattern)]
+        sql = ("SELECT files.path, nodes.path, nodes.type, nodes.value, nodes.offset "
+               "FROM nodes JOIN files ON files.id = nodes.file_id "
+               f"WHERE nodes.shape IN ({', '.join('?' * len(shapes))})")
+        params = list(shapes)
+        if value is not _MISSING:
+            kind, db_value = _db_value(value)
+            if kind == 'null':
+                sql += " AND nodes.type = 'null'"
+            else:
+                sql += " AND nodes.value = ?"
+                params.append(db_value)
+                if kind in ('int', 'float'):
+                    sql += " AND nodes.type IN ('int', 'float')"
+                else:
+                    sql += " AND nodes.type = ?"
+                    params.append(kind)
+        sql += " ORDER BY files.path, nodes.offset"
+        indices = [(i, c) for i, c in enumerate(pattern) if isinstance(c, int)]
+        matches = []
+        for file, node_path, kind, db_value, offset in self._db.execute(sql, params):
+            node_path = tuple(json.loads(node_path))
+            if all(node_path[i] == c for i, c in indices):
+                matches.append(Match(file, node_path, _py_value(kind, db_value), offset))
+        return matches
+
+    def load(self, match, up=0):
+        """
+        Decode the subtree of a match, or of its ancestor up levels above it.
+
+        Only the value itself is decoded: the file is read and the decoder
+        starts at the stored offset. If the file changed since it was
+        indexed (or may have, see update), it is indexed again first.
+
+        Raises:
+            KeyError: If the path no longer exists in the file
+        """
+        path = match.path[:len(match.path) - up] if up else match.path
+        with open(os.path.join(self.root, match.file), 'rb') as f:
+            stat = os.fstat(f.fileno())
+            data = f.read()
+        row = self._file_row(match.file)
+        if not _stat_unchanged(row, stat):
+            with self._db:
+                self._update_file(match.file, row, UpdateStats([], [], [], [], []))
+            row = self._file_row(match.file)
+        # The last row of a path is the value that parse() keeps, should the
+        # database still hold the shadowed values of a repeated key
+        node = self._db.execute("SELECT offset FROM nodes WHERE file_id = ? AND path = ? "
+                                "ORDER BY offset DESC LIMIT 1",
+                                (row[0], _dump_path(path))).fetchone()
+        if node is None:
+            raise KeyError(path)
+        return _decode_at(_decode_source(data, self.encodings), node[0])
+
+    def _file_row(self, rel):
+        return self._db.execute("SELECT id, mtime_ns, size, digest, indexed_ns FROM files "
+                                "WHERE path = ?", (rel,)).fetchone()
+
+def _shape_matches(pattern, shape):
+    if len(pattern) != len(shape):
+        return False
+    for c, s in zip(pattern, shape):
+        if c is None:
+            continue
+        if isinstance(c, int) and s is not None:
+            return False
+        if isinstance(c, str) and c != s:
+            return False
+    return True
@@ -0,0 +1,94 @@
+"""
+Lazily decoded TJSON5 documents.
+
+A lazy document is scanned once to find where each child of the top-level
+object or array starts. Children are only decoded when first accessed,
+after which the decoded value is cached. len(), keys(), membership tests
+and iteration over keys never decode values.
+"""
+
+from collections.abc import Mapping, Sequence
+
+from tjson5._backend import parser as _parser
+
+_decode_source, _index_document, _decode_at = \
+    _parser._decode_source, _parser._index_document, _parser._decode_at
+
+class LazyMapping(Mapping):
+    """Read-only mapping over a TJSON5 object that decodes values on first access."""
+
+    __slots__ = ('_text', '_offsets', '_cache')
+
+    def __init__(self, text, offsets):
+        self._text = text
+        self._offsets = offsets
+        self._cache = {}
+
+    def __getitem__(self, key):
+        try:
+            return self._cache[key]
+        except KeyError:
+            pass
+        # The source text is kept even once every value is decoded, as
+        # another thread may be between the cache miss and the decode
+        value = _decode_at(self._text, self._offsets[key])
+        self._cache[key] = value
+        return value
+
+    def __contains__(self, key):
+        return key in self._offsets
+
+    def __iter__(self):
+        return iter(self._offsets)
+
+    def __len__(self):
+        return len(self._offsets)
+
+    def __repr__(self):
+        return f"<LazyMapping with {len(self)} keys, {len(self._cache)} decoded>"
+
+class LazySequence(Sequence):
+    """Read-only sequence over a TJSON5 array that decodes items on first access."""
+
+    __slots__ = ('_text', '_offsets', '_cache', '_decoded')
+
+    def __init__(self, text, offsets):
+        self._text = text
+        self._offsets = offsets
+        self._cache = [None] * len(offsets)
+        self._decoded = [False] * len(offsets)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self._offsets)))]
+        if index < 0:
+            index += len(self._offsets)
+        if not 0 <= index < len(self._offsets):
+            raise IndexError("LazySequence index out of range")
+        if not self._decoded[index]:
+            self._cache[index] = _decode_at(self._text, self._offsets[index])
+            self._decoded[index] = True
+        return self._cache[index]
+
+    def __len__(self):
+        return len(self._offsets)
+
+    def __repr__(self):
+        return f"<LazySequence with {len(self)} items, {sum(self._decoded)} decoded>"
+
+def lazy_document(data, encodings=None):
+    """
+    Scan a TJSON5 document (string or raw input) and return a LazyMapping
+    or LazySequence for its top-level container. A document that is a
+    single scalar value is decoded and returned as-is.
+
+    The structure of the whole document is checked during the scan, so
+    syntax errors are raised here rather than on access.
+    """
+    text = _decode_source(data, encodings)
+    offsets, value = _index_document(text)
+    if offsets is None:
+        return value
+    if isinstance(offsets, dict):
+        return LazyMapping(text, offsets)
+    return LazySequence(text, offsets)
@@ -0,0 +1,4078 @@
+"""
+Triple-JSON5 parser implemented in pure Python.
+
+This module has the same API and behaviour as the tjson5parser extension:
+the same values, the same errors at the same locations, hooks, typed
+decoding, numeric arrays, schema validation, extraction, linting,
+streaming and serialization. tjson5 uses it where the extension is not
+available, e.g. on PyPy, or when the TJSON5_PURE_PYTHON environment
+variable is set.
+
+The decoder is written for PyPy's JIT: it is a recursive descent over the
+input string by index, runs of characters (whitespace, plain string
+content, digits and identifiers) are matched in place with precompiled
+regular expressions, and the input is never sliced one character at a
+time. Substrings are only made for the keys, strings and numbers that
+are returned.
+"""
+import re
+import sys
+import codecs
+import dataclasses
+import reprlib
+import typing
+try:
+    from types import UnionType as _UnionType
+except ImportError:  # Python < 3.10
+    _UnionType = None
+from array import array
+from collections.abc import Mapping
+from decimal import Decimal
+from json import JSONEncoder
+from json.encoder import encode_basestring, encode_basestring_ascii
+from time import perf_counter as _clock
+
+# Define exception class for parse errors
+class TJSON5ParseError(Exception):
+    """
+    Exception raised for Triple-JSON5 parsing errors.
+
+    Syntax errors carry their location in the original source: pos is the
+    character offset, lineno and colno are 1-based, and excerpt shows the
+    offending line with a caret under the column. These attributes are
+    None for errors without a location (e.g. encoding errors).
+    """
+    def __init__(self, message, pos=None, lineno=None, colno=None, excerpt=None):
+        super().__init__(message)
+        self.pos = pos
+        self.lineno = lineno
+        self.colno = colno
+        self.excerpt = excerpt
+
+    def __reduce__(self):
+        return (self.__class__, (self.args[0], self.pos, self.lineno, self.colno, self.excerpt))
+
+class TJSON5ValidationError(TJSON5ParseError):
+    """
+    Exception raised when a value does not match a JSON Schema (see
+    compile_schema).
+
+    path is the key path of the invalid value, as a tuple of keys and
+    array indices. Errors found while parsing carry the location of the
+    value in the source, like syntax errors. Unless the schema was
+    compiled with fail_fast, every failure in the document is collected
+    and errors lists them all in the order they were found; the first one
+    is raised.
+    """
+    def __init__(self, message, pos=None, lineno=None, colno=None, excerpt=None, path=()):
+        super().__init__(message, pos, lineno, colno, excerpt)
+        self.path = path
+        self.errors = [self]
+
+    def __reduce__(self):
+        return (self.__class__, (self.args[0], self.pos, self.lineno, self.colno, self.excerpt,
+                                 self.path))
+
+# Longest stretch of a source line shown on either side of an error
+EXCERPT_CONTEXT = 40
+
+def _parse_error(text, msg, pos, offset=0, line_offset=0, col_offset=0, path=None):
+    """
+    Build a TJSON5ParseError for msg at character offset pos of text, or
+    a TJSON5ValidationError for the value at key path if one is given.
+
+    When text is only the tail of a larger (streamed) document, offset is the
+    number of characters before it, line_offset the number of newlines in
+    them and col_offset the length of the partial line they end with.
+    """
+    line_start = text.rfind('\n', 0, pos) + 1
+    line_end = text.find('\n', pos)
+    if line_end < 0:
+        line_end = len(text)
+    lineno = line_offset + text.count('\n', 0, line_start) + 1
+    colno = pos - line_start + 1
+    if line_start == 0:
+        colno += col_offset
+    # Show the line around the error, clipped for very long (minified) lines
+    start = max(line_start, pos - EXCERPT_CONTEXT)
+    end = min(line_end, pos + EXCERPT_CONTEXT)
+    prefix = '...' if start > line_start or (start == 0 and col_offset > 0) else ''
+    suffix = '...' if end < line_end else ''
+    snippet = text[start:end].rstrip('\r').replace('\t', ' ')
+    gutter = f"{lineno} | "
+    excerpt = (f"{gutter}{prefix}{snippet}{suffix}\n"
+               f"{' ' * (len(gutter) - 2)}| {' ' * (len(prefix) + pos - start)}^")
+    location = f"line {lineno} column {colno} (char {offset + pos})\n{excerpt}"
+    if path is not None:
+        return TJSON5ValidationError(
+            f"Schema validation failed: {_format_path(path)}: {msg}: {location}",
+            offset + pos, lineno, colno, excerpt, path
+        )
+    return TJSON5ParseError(
+        f"Failed to parse Triple-JSON5: {msg}: {location}",
+        offset + pos, lineno, colno, excerpt
+    )
+
+# Regular expressions for the preprocessing helpers
+HEX_REGEX = re.compile(r'\b0x([0-9A-Fa-f]+)\b')
+BINARY_REGEX = re.compile(r'\b0b([01]+)\b')
+
+# We won't use json5 - we'll implement everything ourselves
+HAS_JSON5 = False
+
+# Encodings tried in order for bytes input without a byte order mark
+DEFAULT_ENCODINGS = ('utf-8', 'latin1')
+
+NAN = float('nan')
+POS_INF = float('inf')
+NEG_INF = float('-inf')
+
+def _escape_triple_content(segment):
+    """Escape the content of a triple-quoted string for a regular JSON string."""
+    return (segment.replace('\\', '\\\\').replace('"', '\\"')
+            .replace('\n', '\\n').replace('\r', '\\r').replace('\t', '\\t'))
+
+def process_triple_quotes(text):
+    """
+    Process triple-quoted strings by converting them to regular quoted strings.
+
+    Everything between triple-quoted strings is copied as whole slices;
+    regular strings and comments are skipped over so that quotes inside
+    them are left alone.
+    """
+    result_parts = []
+    length = len(text)
+    pos = 0
+    copy_start = 0
+    while pos < length:
+        c = text[pos]
+        if c == '"' and text.startswith('""', pos + 1):
+            end = text.find('"""', pos + 3)
+            if end < 0:  # Unterminated, leave the rest untouched
+                break
+            result_parts.append(text[copy_start:pos])
+            result_parts.append('"')
+            result_parts.append(_escape_triple_content(text[pos + 3:end]))
+            result_parts.append('"')
+            pos = end + 3
+            copy_start = pos
+        elif c == '"' or c == "'":
+            # Regular string, copied as-is
+            quote = c
+            pos += 1
+            while pos < length:
+                c = text[pos]
+                if c == '\\':
+                    pos += 2
+                    continue
+                pos += 1
+                if c == quote or c == '\n':
+                    break
+        elif text.startswith('//', pos):
+            end = text.find('\n', pos + 2)
+            pos = length if end < 0 else end
+        elif text.startswith('/*', pos):
+            end = text.find('*/', pos + 2)
+            pos = length if end < 0 else end + 2
+        else:
+            pos += 1
+
+    if copy_start == 0:
+        return text
+    result_parts.append(text[copy_start:])
+    return "".join(result_parts)
+
+def process_number_formats(text):
+    """Convert hex and binary literals to decimal."""
+    # Replace hex numbers
+    text = HEX_REGEX.sub(lambda m: str(int(m.group(1), 16)), text)
+    # Replace binary numbers
+    text = BINARY_REGEX.sub(lambda m: str(int(m.group(1), 2)), text)
+    return text
+
+# ---------------------------------------------------------------------------
+# Scanning
+# ---------------------------------------------------------------------------
+#
+# The scan functions take the text, a position and the text length, and
+# return the position after what they matched (or a negative value on
+# failure). Runs of characters are matched with the compiled expressions
+# below, in place, as str.isspace, str.isalpha and str.isalnum (used by
+# the extension) classify them.
+
+# Whitespace: ASCII spaces, the BOM and the Unicode spaces
+_SPACES = re.compile('[ \t\n\r\x0b\x0c\ufeff\x85\xa0\u1680\u2000-\u200a'
+                     '\u2028\u2029\u202f\u205f\u3000]*').match
+# The rest of a line, up to a line terminator
+_LINE_REST = re.compile('[^\n\r\u2028\u2029]*').match
+_DIGITS = re.compile('[0-9]*').match
+_HEX_DIGITS = re.compile('[0-9A-Fa-f]*').match
+_BINARY_DIGITS = re.compile('[01]*').match
+# Identifiers: a letter, '_' or '$', then also digits (non-ASCII first
+# characters are checked with str.isalpha)
+_IDENTIFIER = re.compile(r'(?:[A-Za-z_$]|[^\x00-\x7f])[\w$]*').match
+# Characters of a quoted string up to its quote, an escape or a line break
+_STRING_RUNS = {
+    '"': re.compile(r'[^"\\\n\r]*').match,
+    "'": re.compile(r"[^'\\\n\r]*").match,
+}
+# Characters that error recovery steps over in one go
+_RECOVERY_RUN = re.compile(r'[^{}\[\],"\'/]*').match
+
+_HEX_VALUES = {c: int(c, 16) for c in '0123456789abcdefABCDEF'}
+# Characters that start a number, and the simple escapes with their values
+_NUMBER_START = frozenset('0123456789-+.IN')
+_ESCAPES = {'n': '\n', 't': '\t', 'r': '\r', 'b': '\b', 'f': '\f', 'v': '\v',
+            '\n': '', '\u2028': '', '\u2029': ''}
+
+def _is_digit(c):
+    return '0' <= c <= '9' and c != ''
+
+def _is_ident_start(c):
+    return c == '_' or c == '$' or c.isalpha()
+
+def _is_ident_part(c):
+    return c == '_' or c == '$' or c.isalnum()
+
+# Kinds of number tokens
+NUM_INT = 0
+NUM_FLOAT = 1
+NUM_INF = 2
+NUM_NAN = 3
+
+# Parser states: what is expected next (shared with the event parser)
+ST_VALUE = 0        # expecting a value
+ST_MAP_KEY = 1      # expecting a key or '}'
+ST_MAP_COLON = 2    # expecting ':'
+ST_MAP_NEXT = 3     # expecting ',' or '}'
+ST_ARRAY_VALUE = 4  # expecting a value or ']'
+ST_ARRAY_NEXT = 5   # expecting ',' or ']'
+ST_DONE = 6         # the document is complete
+
+# Syntax errors found while scanning, with their messages in _SYNTAX_ERRORS
+ERR_NONE = 0
+ERR_EMPTY = 1
+ERR_VALUE = 2
+ERR_PROPERTY_NAME = 3
+ERR_COLON = 4
+ERR_COMMA = 5
+ERR_EXTRA_DATA = 6
+ERR_STRING = 7
+ERR_TRIPLE_STRING = 8
+ERR_COMMENT = 9
+ERR_HEX = 10
+ERR_BINARY = 11
+ERR_LEADING_ZERO = 12
+ERR_EXPONENT = 13
+ERR_X_ESCAPE = 14
+ERR_U_ESCAPE = 15
+ERR_ESCAPE = 16
+
+_SYNTAX_ERRORS = (
+    None,
+    "Empty or invalid input",
+    "Expecting value",
+    "Expecting property name",
+    "Expecting ':' delimiter",
+    "Expecting ',' delimiter",
+    "Extra data",
+    "Unterminated string starting at",
+    "Unterminated triple-quoted string",
+    "Unterminated comment",
+    "Invalid hex literal",
+    "Invalid binary literal",
+    "Invalid number with leading zero",
+    "Invalid exponent",
+    "Invalid \\x escape",
+    "Invalid \\u escape",
+    "Invalid escape",
+)
+
+def _skip_ws(text, pos, length):
+    """
+    Return the position after the whitespace and comments at pos, or
+    -1 - start for an unterminated comment starting at start.
+    """
+    while True:
+        pos = _SPACES(text, pos).end()
+        if not text.startswith('/', pos):
+            return pos
+        if text.startswith('//', pos):
+            pos = _LINE_REST(text, pos + 2).end()
+        elif text.startswith('/*', pos):
+            end = text.find('*/', pos + 2)
+            if end < 0:
+                return -1 - pos
+            pos = end + 2
+        else:
+            return pos
+
+def _match_word(text, pos, word):
+    """Return True if the ASCII word is at pos, not followed by an identifier character."""
+    end = pos + len(word)
+    return text.startswith(word, pos) and not (end < len(text) and _is_ident_part(text[end]))
+
+def _scan_string(text, pos, length):
+    """
+    Return the position after the single, double or triple-quoted string
+    at pos, or -1 if it is unterminated.
+    """
+    quote = text[pos]
+    if quote == '"' and text.startswith('""', pos + 1):
+        # Triple-quoted: everything up to the closing """ is taken verbatim
+        end = text.find('"""', pos + 3)
+        return -1 if end < 0 else end + 3
+    run = _STRING_RUNS[quote]
+    i = pos + 1
+    while True:
+        i = run(text, i).end()
+        if i >= length:
+            return -1
+        c = text[i]
+        if c == quote:
+            return i + 1
+        if c != '\\':
+            return -1  # A line break
+        # A line continuation with \r\n counts as a single escape
+        if text.startswith('\r\n', i + 1):
+            i += 1
+        i += 2
+
+def _string_error(text, pos):
+    """Return the ERR_* code of the unterminated string at pos."""
+    return ERR_TRIPLE_STRING if text.startswith('"""', pos) else ERR_STRING
+
+def _scan_key(text, pos, length):
+    """
+    Return the position after the object key at pos, a quoted string or an
+    identifier, or -1 if there is none (see _key_error).
+    """
+    c = text[pos] if pos < length else ''
+    if c == '"' or c == "'":
+        return _scan_string(text, pos, length)
+    match = _IDENTIFIER(text, pos)
+    if match is None or (c > '\x7f' and not c.isalpha()):
+        return -1
+    return match.end()
+
+def _key_error(text, pos):
+    """Return the ERR_* code of a failed _scan_key at pos."""
+    if text.startswith('"', pos) or text.startswith("'", pos):
+        return _string_error(text, pos)
+    return ERR_PROPERTY_NAME
+
+def _check_escapes(text, quote, i, length):
+    """
+    Check the escapes of a string from i (in its content) up to the
+    closing quote or the end of the line, as they are decoded. Returns
+    None if they are valid, or the (ERR_* code, position) of the first
+    invalid one.
+    """
+    run = _STRING_RUNS[quote]
+    while True:
+        i = run(text, i).end()
+        if i >= length or text[i] != '\\':
+            return None
+        i += 1
+        if i >= length:
+            return None
+        c = text[i]
+        i += 1
+        if c == 'x' or c == 'u':
+            for _ in range(2 if c == 'x' else 4):
+                if i >= length or text[i] not in _HEX_VALUES:
+                    return (ERR_X_ESCAPE if c == 'x' else ERR_U_ESCAPE), i - 2
+                i += 1
+        elif c == '\r':
+            if text.startswith('\n', i):
+                i += 1
+        elif _is_digit(c) and not (c == '0' and not (i < length and _is_digit(text[i]))):
+            return ERR_ESCAPE, i - 2
+
+def _scan_number(text, pos, length):
+    """
+    Scan the number (decimal, hex, binary, Infinity or NaN) at pos without
+    converting it. Returns (end, kind, base, digits_start), where end is
+    minus the ERR_* code if there is no valid number at pos.
+    """
+    i = pos
+    c = text[i] if i < length else ''
+    if c == '-' or c == '+':
+        i += 1
+        c = text[i] if i < length else ''
+    if c == 'I' or c == 'N':
+        if _match_word(text, i, 'Infinity'):
+            return i + 8, NUM_INF, 10, i
+        if _match_word(text, i, 'NaN'):
+            return i + 3, NUM_NAN, 10, i
+        return -ERR_VALUE, NUM_INT, 10, i
+    if c == '0' and i + 1 < length and text[i + 1] in 'xXbB':
+        if text[i + 1] in 'xX':
+            end = _HEX_DIGITS(text, i + 2).end()
+            base = 16
+        else:
+            end = _BINARY_DIGITS(text, i + 2).end()
+            base = 2
+        if end == i + 2:
+            return -(ERR_HEX if base == 16 else ERR_BINARY), NUM_INT, base, i + 2
+        return end, NUM_INT, base, i + 2
+    digits = i
+    # Decimal integer part
+    i = _DIGITS(text, i).end()
+    if i - digits > 1 and text[digits] == '0':
+        return -ERR_LEADING_ZERO, NUM_INT, 10, digits
+    kind = NUM_INT
+    if text.startswith('.', i):
+        kind = NUM_FLOAT
+        i = _DIGITS(text, i + 1).end()
+        if i - digits == 1:
+            return -ERR_VALUE, kind, 10, digits
+    elif i == digits:
+        return -ERR_VALUE, kind, 10, digits
+    if i < length and (text[i] == 'e' or text[i] == 'E'):
+        kind = NUM_FLOAT
+        i += 1
+        if i < length and (text[i] == '-' or text[i] == '+'):
+            i += 1
+        end = _DIGITS(text, i).end()
+        if end == i:
+            return -ERR_EXPONENT, kind, 10, digits
+        i = end
+    return i, kind, 10, digits
+
+def _after_value(stack):
+    """Return the state that follows a complete value, given the open containers."""
+    if not stack:
+        return ST_DONE
+    return ST_MAP_NEXT if stack[-1] == '{' else ST_ARRAY_NEXT
+
+# ---------------------------------------------------------------------------
+# Linting
+# ---------------------------------------------------------------------------
+
+def _recover(text, length, stack, state, error, pos):
+    """
+    Return the (position, state) to resume scanning at after the syntax
+    error at pos, closing the containers of stack that it skips, or None
+    if there is nothing to resume. A missing comma (before anything but a
+    closing bracket) or colon is taken as present; otherwise scanning
+    resumes at the next comma, or at the next closing bracket of an open
+    container, skipping strings, comments and nested brackets on the way.
+    """
+    if not stack or pos >= length or error == ERR_EXTRA_DATA \
+            or error == ERR_COMMENT or error == ERR_TRIPLE_STRING:
+        return None
+    c = text[pos]
+    if error == ERR_COLON:
+        return pos, ST_VALUE
+    if error == ERR_COMMA and c != '}' and c != ']':
+        return pos, ST_MAP_KEY if state == ST_MAP_NEXT else ST_ARRAY_VALUE
+    if error == ERR_STRING:
+        # The string runs to the end of its line
+        pos = _LINE_REST(text, pos).end()
+    nested = 0
+    while pos < length:
+        c = text[pos]
+        if c == '{' or c == '[':
+            nested += 1
+            pos += 1
+        elif nested > 0 and (c == '}' or c == ']'):
+            nested -= 1
+            pos += 1
+        elif c == ',' and nested == 0:
+            return pos + 1, ST_MAP_KEY if stack[-1] == '{' else ST_ARRAY_VALUE
+        elif c == '}' or c == ']':
+            opening = '{' if c == '}' else '['
+            d = len(stack) - 1
+            while d >= 0 and stack[d] != opening:
+                d -= 1
+            if d >= 0:
+                # The scan closes the container when it reads c
+                del stack[d + 1:]
+                return pos, ST_MAP_NEXT if c == '}' else ST_ARRAY_NEXT
+            pos += 1
+        elif c == '"' or c == "'":
+            end = _scan_string(text, pos, length)
+            pos = end if end > 0 else pos + 1
+        elif c == '/':
+            end = _skip_ws(text, pos, length)
+            if end < 0:
+                return None
+            pos = end if end > pos else pos + 1
+        else:
+            pos = _RECOVERY_RUN(text, pos + 1).end()
+    return None
+
+# Frames that parse() uses, in place of the caller's, before the decoder
+# recurses once per nested object or array (decode_document, decode_value
+# and decode_value_at, plus the one that hits the limit)
+_DOCUMENT_FRAMES = 4
+
+def _nesting_limit():
+    """
+    Return the nesting depth at which parse() would stop with "Maximum
+    nesting depth exceeded" if it were called instead of the caller: the
+    recursion limit less the frames in use.
+    """
+    frame = sys._getframe(1)
+    depth = 0
+    while frame is not None:
+        depth += 1
+        frame = frame.f_back
+    return sys.getrecursionlimit() - depth - _DOCUMENT_FRAMES
+
+def _lint(text, max_errors, max_depth):
+    """
+    Return the (pos, message) of the syntax errors of text, at most
+    max_errors of them (all of them if max_errors is negative), in the
+    order they are found. The text is scanned with the same state machine
+    as the extension's tokenizer, without building any value.
+
+    A document with more than max_depth nested objects and arrays gets the
+    error that the decoder raises for it, at the start of its value, and
+    ends the scan.
+    """
+    length = len(text)
+    errors = []
+    stack = []
+    state = ST_VALUE
+    pos = 0
+    last = -1
+    start = 0
+    while max_errors < 0 or len(errors) < max_errors:
+        error = ERR_NONE
+        pos = _skip_ws(text, pos, length)
+        if pos < 0:
+            error = ERR_COMMENT
+            pos = -1 - pos
+        c = text[pos] if pos < length else ''
+        if error:
+            pass
+        elif state == ST_DONE:
+            if pos >= length:
+                break
+            error = ERR_EXTRA_DATA
+        elif state == ST_MAP_COLON:
+            if c == ':':
+                pos += 1
+                state = ST_VALUE
+                continue
+            error = ERR_COLON
+        elif (state == ST_MAP_NEXT or state == ST_ARRAY_NEXT) and c == ',':
+            pos += 1
+            state = ST_MAP_KEY if state == ST_MAP_NEXT else ST_ARRAY_VALUE
+            continue
+        elif (c == '}' and (state == ST_MAP_KEY or state == ST_MAP_NEXT)) or (
+                c == ']' and (state == ST_ARRAY_VALUE or state == ST_ARRAY_NEXT)):
+            stack.pop()
+            state = _after_value(stack)
+            pos += 1
+            continue
+        elif state == ST_MAP_NEXT or state == ST_ARRAY_NEXT:
+            error = ERR_COMMA
+        elif c == '"' or c == "'":
+            # Errors in the escapes of a string come before it is found unterminated
+            end = _scan_string(text, pos, length)
+            if not text.startswith('"""', pos):
+                escape = _check_escapes(text, c, pos + 1, length)
+                if escape is not None:
+                    errors.append((escape[1], _SYNTAX_ERRORS[escape[0]]))
+            if end < 0:
+                error = _string_error(text, pos)
+            else:
+                pos = end
+                state = ST_MAP_COLON if state == ST_MAP_KEY else _after_value(stack)
+                continue
+        elif state == ST_MAP_KEY:
+            end = _scan_key(text, pos, length)
+            if end < 0:
+                error = ERR_PROPERTY_NAME
+            else:
+                pos = end
+                state = ST_MAP_COLON
+                continue
+        elif c == '{' or c == '[':
+            if not stack:
+                start = pos
+            elif len(stack) >= max_depth:
+                errors.append((start, "Maximum nesting depth exceeded"))
+                break
+            stack.append(c)
+            state = ST_MAP_KEY if c == '{' else ST_ARRAY_VALUE
+            pos += 1
+            continue
+        else:
+            if c in _NUMBER_START:
+                end = _scan_number(text, pos, length)[0]
+                if end < 0:
+                    error = -end
+            elif c == 't' and _match_word(text, pos, 'true'):
+                end = pos + 4
+            elif c == 'f' and _match_word(text, pos, 'false'):
+                end = pos + 5
+            elif c == 'n' and _match_word(text, pos, 'null'):
+                end = pos + 4
+            else:
+                error = ERR_EMPTY if (pos >= length and state == ST_VALUE
+                                      and not stack) else ERR_VALUE
+            if not error:
+                pos = end
+                state = _after_value(stack)
+                continue
+        # Resuming can fail again at the same place: report it once
+        if pos != last:
+            errors.append((pos, _SYNTAX_ERRORS[error]))
+        last = pos
+        resumed = _recover(text, length, stack, state, error, pos)
+        if resumed is None:
+            break
+        pos, state = resumed
+    return errors[:max_errors] if max_errors >= 0 else errors
+
+# ---------------------------------------------------------------------------
+# Numeric arrays, typed decoding and key paths
+# ---------------------------------------------------------------------------
+
+_INT64_MIN = -(1 << 63)
+_INT64_MAX = (1 << 63) - 1
+_UINT64_MAX = (1 << 64) - 1
+
+class _ArraySpec:
+    """How to build a homogeneous numeric array (see parse(arrays=...))."""
+    __slots__ = ('numpy', 'typecode', 'dtype', 'kind', 'itemsize', 'lo', 'hi', 'label')
+
+    def __init__(self, label):
+        self.numpy = None      # numpy module for ndarray output, None for array.array
+        self.typecode = None   # fixed array.array typecode, or None
+        self.dtype = None      # fixed NumPy dtype, or None
+        self.kind = ''         # 'i', 'u' or 'f' of the fixed type, '' to infer it
+        self.itemsize = 0
+        self.lo = _INT64_MIN   # range of a fixed integer type
+        self.hi = _INT64_MAX
+        self.label = label     # name of the value in error messages
+
+    def build(self, values, floats, lo, hi):
+        """Pack the scanned values into an array of the fixed or narrowest type."""
+        kind = self.kind
+        itemsize = self.itemsize
+        if not kind:
+            if floats or not values:
+                kind, itemsize = 'f', 8
+            else:
+                kind, itemsize = _narrowest_int(lo, hi)
+        if self.numpy is None:
+            return array(self.typecode or _ARRAY_TYPECODES[kind, itemsize], values)
+        value = self.numpy.array(values, dtype=f"{kind}{itemsize}")
+        if self.dtype is not None and value.dtype != self.dtype:
+            value = value.astype(self.dtype)
+        return value
+
+class _ClassPlan:
+    """How to build instances of a target class (see parse(types=...))."""
+    __slots__ = ('cls', 'name', 'fields', 'required', 'use_setattr')
+
+    def build(self, values):
+        if not self.use_setattr:
+            return self.cls(**values)
+        instance = self.cls.__new__(self.cls)
+        for name, value in values.items():
+            setattr(instance, name, value)
+        return instance
+
+class _Shape:
+    """
+    What to build for a value: an instance of a target class and/or the
+    shapes of its children, and the types the decoded value may have.
+    """
+    __slots__ = ('plan', 'children', 'any', 'types', 'nullable', 'label', 'array')
+
+    def __init__(self, label):
+        self.plan = None       # _ClassPlan of the target class, or None
+        self.children = None   # key or index -> _Shape
+        self.any = None        # shape of any other key or index
+        self.types = None      # allowed types, or None for no check
+        self.nullable = False
+        self.label = label     # name of the value in error messages
+        self.array = None      # numeric array to build (see parse(arrays=...))
+
+    def has_children(self):
+        return self.children is not None or self.any is not None
+
+    def child(self, key):
+        if self.children is not None:
+            shape = self.children.get(key)
+            if shape is not None:
+                return shape
+        return self.any
+
+# JSON types of values, as bits of _SchemaNode.types
+T_NULL = 1
+T_BOOLEAN = 2
+T_INTEGER = 4   # Integers, and floats with an integral value
+T_NUMBER = 8    # Other numbers
+T_STRING = 16
+T_ARRAY = 32
+T_OBJECT = 64
+
+class _SchemaNode:
+    """
+    The checks of one JSON Schema (see compile_schema). The checks of a
+    value itself are separate from the schemas of its members, which the
+    decoder applies to each member as it is decoded.
+    """
+    __slots__ = ('never', 'types', 'enum', 'min_length', 'max_length', 'pattern',
+                 'has_bounds', 'minimum', 'maximum', 'exclusive_minimum', 'exclusive_maximum',
+                 'multiple_of', 'object_checks', 'properties', 'pattern_properties',
+                 'additional', 'required', 'min_properties', 'max_properties', 'array_checks',
+                 'prefix_items', 'items', 'min_items', 'max_items', 'unique_items',
+                 'combinators', 'all_of', 'any_of', 'one_of', 'negated')
+
+    def __init__(self):
+        self.never = False            # The false schema: no value is valid
+        self.types = 0                # Allowed T_* bits, 0 for any type
+        self.enum = None              # Allowed values (enum or const), or None
+        # Strings
+        self.min_length = self.max_length = -1
+        self.pattern = None           # Compiled regular expression, or None
+        # Numbers
+        self.has_bounds = False
+        self.minimum = self.maximum = None
+        self.exclusive_minimum = self.exclusive_maximum = self.multiple_of = None
+        # Objects
+        self.object_checks = False    # Any of the keywords below is set
+        self.properties = None        # Key -> _SchemaNode
+        self.pattern_properties = None  # (regular expression, _SchemaNode) pairs
+        self.additional = None        # Schema of the other keys, or None
+        self.required = ()
+        self.min_properties = self.max_properties = -1
+        # Arrays
+        self.array_checks = False
+        self.prefix_items = None      # Schemas of the first items, or None
+        self.items = None             # Schema of the other items, or None
+        self.min_items = self.max_items = -1
+        self.unique_items = False
+        # Applied to the decoded value as a whole
+        self.combinators = False
+        self.all_of = self.any_of = self.one_of = None
+        self.negated = None
+
+    def allows(self, json_type):
+        return not self.never and (self.types == 0 or self.types & json_type)
+
+    def check(self, json_type, value):
+        """
+        Return why value, of JSON type json_type, is invalid, or None.
+        Members and combinators are not checked.
+        """
+        if self.never:
+            return "no value is allowed here"
+        if self.types and not self.types & json_type:
+            return (f"expected {_json_type_names(self.types)}, "
+                    f"got {_json_type_names(json_type) or type(value).__name__}")
+        if self.enum is not None and not _in_enum(value, self.enum):
+            if len(self.enum) == 1:
+                return f"expected {reprlib.repr(self.enum[0])}, got {reprlib.repr(value)}"
+            return f"{reprlib.repr(value)} is not one of {reprlib.repr(list(self.enum))}"
+        if json_type == T_STRING:
+            return self.check_string(value)
+        if json_type & (T_INTEGER | T_NUMBER) and self.has_bounds:
+            return self.check_number(value)
+        return None
+
+    def check_string(self, value):
+        if self.min_length >= 0 or self.max_length >= 0:
+            n = len(value)
+            if self.min_length >= 0 and n < self.min_length:
+                return f"string of {n} characters is shorter than {self.min_length}"
+            if self.max_length >= 0 and n > self.max_length:
+                return f"string of {n} characters is longer than {self.max_length}"
+        if self.pattern is not None and self.pattern.search(value) is None:
+            return f"{reprlib.repr(value)} does not match {self.pattern.pattern!r}"
+        return None
+
+    def check_number(self, value):
+        if not isinstance(value, (int, float, Decimal)):
+            return None  # e.g. a hex literal kept as text by parse_hex_bin
+        if self.minimum is not None and value < self.minimum:
+            return f"{value!r} is less than the minimum of {self.minimum!r}"
+        if self.exclusive_minimum is not None and value <= self.exclusive_minimum:
+            return f"{value!r} is not greater than {self.exclusive_minimum!r}"
+        if self.maximum is not None and value > self.maximum:
+            return f"{value!r} is greater than the maximum of {self.maximum!r}"
+        if self.exclusive_maximum is not None and value >= self.exclusive_maximum:
+            return f"{value!r} is not less than {self.exclusive_maximum!r}"
+        if self.multiple_of is not None:
+            if isinstance(value, float) or isinstance(self.multiple_of, float):
+                try:
+                    quotient = value / self.multiple_of
+                    failed = int(quotient) != quotient
+                except (OverflowError, ValueError):
+                    failed = True
+            else:
+                failed = value % self.multiple_of != 0
+            if failed:
+                return f"{value!r} is not a multiple of {self.multiple_of!r}"
+        return None
+
+    def check_size(self, n, is_object):
+        """Return why an object or array of n members is invalid, or None."""
+        low = self.min_properties if is_object else self.min_items
+        high = self.max_properties if is_object else self.max_items
+        what = 'properties' if is_object else 'items'
+        if low >= 0 and n < low:
+            return f"expected at least {low} {what}, got {n}"
+        if high >= 0 and n > high:
+            return f"expected at most {high} {what}, got {n}"
+        return None
+
+    def property_schema(self, key, extra):
+        """
+        Return the schema of the member key, or None if it is not checked.
+        The schemas of matching patternProperties beyond the first one that
+        applies are appended to extra.
+        """
+        node = None
+        matched = False
+        if self.properties is not None:
+            node = self.properties.get(key)
+            matched = node is not None
+        if self.pattern_properties is not None and isinstance(key, str):
+            for regex, other in self.pattern_properties:
+                if regex.search(key) is not None:
+                    if matched:
+                        extra.append(other)
+                    else:
+                        node = other
+                        matched = True
+        if not matched:
+            return self.additional
+        return node
+
+    def item_schema(self, index):
+        """Return the schema of the item at index, or None if it is not checked."""
+        if self.prefix_items is not None and index < len(self.prefix_items):
+            return self.prefix_items[index]
+        return self.items
+
+    def validate(self, value, path, errors, first):
+        """
+        Check a decoded value, appending a (path, message) pair to errors
+        for each failure, or only for the first one if first is set.
+        """
+        json_type = _value_type(value)
+        message = self.check(json_type, value)
+        if message is not None:
+            errors.append((tuple(path), message))
+            return
+        if json_type == T_OBJECT and self.object_checks:
+            for name in self.required:
+                if name not in value:
+                    errors.append((tuple(path), f"missing required property {name!r}"))
+            message = self.check_size(len(value), True)
+            if message is not None:
+                errors.append((tuple(path), message))
+            extra = []
+            for key, item in value.items():
+                if first and errors:
+                    return
+                child = self.property_schema(key, extra)
+                if child is not None and child.never:
+                    errors.append((tuple(path), f"property {key!r} is not allowed"))
+                    continue
+                path.append(key)
+                if child is not None:
+                    child.validate(item, path, errors, first)
+                for other in extra:
+                    other.validate(item, path, errors, first)
+                del extra[:]
+                path.pop()
+        elif json_type == T_ARRAY and self.array_checks:
+            message = self.check_size(len(value), False)
+            if message is not None:
+                errors.append((tuple(path), message))
+            if self.unique_items and _has_duplicates(value):
+                errors.append((tuple(path), "array items are not unique"))
+            for index, item in enumerate(value):
+                if first and errors:
+                    return
+                child = self.item_schema(index)
+                if child is not None:
+                    path.append(index)
+                    child.validate(item, path, errors, first)
+                    path.pop()
+        if self.combinators and not (first and errors):
+            self.validate_combinators(value, path, errors, first)
+
+    def validate_combinators(self, value, path, errors, first):
+        """Check a decoded value against allOf, anyOf, oneOf and not."""
+        if self.all_of is not None:
+            for node in self.all_of:
+                node.validate(value, path, errors, first)
+                if first and errors:
+                    return
+        if self.any_of is not None:
+            for node in self.any_of:
+                if node.is_valid(value):
+                    break
+            else:
+                errors.append((tuple(path), "not valid under any of the schemas in anyOf"))
+        if self.one_of is not None:
+            matches = 0
+            for node in self.one_of:
+                matches += node.is_valid(value)
+            if matches == 0:
+                errors.append((tuple(path), "not valid under any of the schemas in oneOf"))
+            elif matches > 1:
+                errors.append((tuple(path), f"valid under {matches} of the schemas in oneOf, "
+                                            f"expected exactly one"))
+        if self.negated is not None and self.negated.is_valid(value):
+            errors.append((tuple(path), "must not be valid under the schema in not"))
+
+    def is_valid(self, value):
+        errors = []
+        self.validate(value, [], errors, True)
+        return not errors
+
+class _PathNode:
+    """
+    A node of the trie of key paths compiled by compile_paths: the paths
+    that end at this value and the nodes of its selected children.
+    """
+    __slots__ = ('children', 'names', 'any', 'slots')
+
+    def __init__(self):
+        self.children = None   # Key or index -> _PathNode
+        self.names = None      # The string keys of children
+        self.any = None        # Node of any key or index ("*")
+        self.slots = None      # Indices of the paths that end here
+
+    def has_children(self):
+        return self.children is not None or self.any is not None
+
+    def child(self, key):
+        if self.children is not None:
+            node = self.children.get(key)
+            if node is not None:
+                return node
+        return self.any
+
+# Value of a key path without wildcards that was not found (see extract)
+_MISSING = object()
+
+# JSON type of a scalar value or container, by its first character
+_CHAR_JSON_TYPES = {'"': T_STRING, "'": T_STRING, '{': T_OBJECT, '[': T_ARRAY,
+                    't': T_BOOLEAN, 'f': T_BOOLEAN, 'n': T_NULL}
+
+# First characters of whitespace and comments
+_SPACE_STARTS = frozenset(' \t\n\r\x0b\x0c\ufeff\x85\xa0\u1680\u2000\u2001\u2002\u2003'
+                          '\u2004\u2005\u2006\u2007\u2008\u2009\u200a\u2028\u2029'
+                          '\u202f\u205f\u3000/')
+
+# Separators surrounded by the usual whitespace (other whitespace and
+# comments are left to skip_ws)
+_COLON = re.compile('[ \t\n\r]*:[ \t\n\r]*').match
+_COMMA = re.compile('[ \t\n\r]*,[ \t\n\r]*').match
+
+# Decimal integers short enough to convert without checks
+_SHORT_INT = re.compile('-?(?:0|[1-9][0-9]{0,17})(?![0-9.eExXbB])').match
+
+_HEX4 = re.compile('[0-9A-Fa-f]{4}').match
+
+class _Decoder:
+    """
+    Single-pass recursive descent decoder for Triple-JSON5.
+
+    The decoder reads the input string by index and builds dicts, lists
+    and scalars as it goes. Comments, unquoted keys, trailing commas,
+    triple-quoted strings and hex/binary literals are all handled while
+    scanning, so no intermediate copies of the document are made. Syntax
+    errors are raised in document order, at the same positions and with
+    the same messages as the extension.
+    """
+    __slots__ = ('text', 'length', 'pos', 'memo', 'offset', 'line_offset', 'col_offset',
+                 'object_hook', 'object_pairs_hook', 'parse_float', 'parse_int',
+                 'parse_hex_bin', 'intern_keys', 'intern_values', 'shape', 'arrays',
+                 'schema', 'fail_fast', 'schema_path', 'schema_errors', 'paths', 'extracted',
+                 'remaining', 'n_objects', 'n_arrays', 'n_keys', 'n_strings', 'n_numbers',
+                 'n_comments')
+
+    def __init__(self, text):
+        self.set_text(text)
+        self.memo = {}
+        # Location of text within a larger streamed document (see _parse_error)
+        self.offset = self.line_offset = self.col_offset = 0
+        # Optional hooks called as values are built (see parse)
+        self.object_hook = self.object_pairs_hook = None
+        self.parse_float = self.parse_int = self.parse_hex_bin = None
+        # Interning: keys, and string values up to intern_values characters,
+        # are shared through memo (0 disables value interning)
+        self.intern_keys = True
+        self.intern_values = 0
+        # Target types of typed decoding (see parse(types=...)), or None
+        self.shape = None
+        # Numeric arrays to build for every homogeneous array, or None
+        self.arrays = None
+        # Schema the document is validated against (see parse(schema=...)),
+        # the key path of the value being decoded and the failures so far
+        self.schema = None
+        self.fail_fast = False
+        self.schema_path = self.schema_errors = None
+        # Key paths being extracted (see extract), the values found so far and
+        # the number of paths without a wildcard still to find (-1 if any path
+        # has one)
+        self.paths = self.extracted = None
+        self.remaining = -1
+        # Counters reported in the stats of parse (see parse_stats)
+        self.n_objects = self.n_arrays = self.n_keys = 0
+        self.n_strings = self.n_numbers = self.n_comments = 0
+
+    def set_hooks(self, object_hook, object_pairs_hook, parse_float, parse_int, parse_hex_bin):
+        self.object_hook = object_hook
+        self.object_pairs_hook = object_pairs_hook
+        self.parse_float = parse_float
+        self.parse_int = parse_int
+        self.parse_hex_bin = parse_hex_bin
+
+    def set_interning(self, intern_keys, intern_values, table):
+        self.intern_keys = intern_keys
+        self.intern_values = intern_values
+        if table is not None:
+            self.memo = table
+
+    def set_schema(self, schema):
+        self.schema = schema._root
+        self.fail_fast = schema.fail_fast
+        self.schema_path = []
+        self.schema_errors = []
+
+    def set_text(self, text):
+        """Point the decoder at a new buffer, keeping its key memo."""
+        self.text = text
+        self.length = len(text)
+        self.pos = 0
+
+    def error(self, msg, pos):
+        """Raise a TJSON5ParseError pointing at pos in the input."""
+        raise _parse_error(self.text, msg, pos, self.offset, self.line_offset, self.col_offset)
+
+    def syntax_error(self, error, pos):
+        """Raise the exception for an ERR_* code."""
+        if error == ERR_EMPTY:
+            raise TJSON5ParseError(_SYNTAX_ERRORS[error])
+        self.error(_SYNTAX_ERRORS[error], pos)
+
+    def skip_ws(self, pos):
+        """Return the position after the whitespace and comments at pos."""
+        text = self.text
+        if pos >= self.length or text[pos] not in _SPACE_STARTS:
+            return pos
+        pos = _SPACES(text, pos).end()
+        if text.startswith('/', pos):
+            return self.skip_comments(pos)
+        return pos
+
+    def skip_comments(self, pos):
+        """Slow path of skip_ws, from the '/' at pos."""
+        text = self.text
+        while True:
+            pos = _SPACES(text, pos).end()
+            if text.startswith('//', pos):
+                pos = _LINE_REST(text, pos + 2).end()
+            elif text.startswith('/*', pos):
+                end = text.find('*/', pos + 2)
+                if end < 0:
+                    self.syntax_error(ERR_COMMENT, pos)
+                pos = end + 2
+            else:
+                return pos
+            self.n_comments += 1
+
+    def check_end(self):
+        """Check that nothing but whitespace and comments follows the document."""
+        pos = self.skip_ws(self.pos)
+        if pos < self.length:
+            self.syntax_error(ERR_EXTRA_DATA, pos)
+        self.pos = pos
+
+    def decode_document(self):
+        """Decode the whole input as a single value."""
+        self.pos = start = self.skip_ws(self.pos)
+        if self.pos >= self.length:
+            self.syntax_error(ERR_EMPTY, self.pos)
+        try:
+            if self.schema is not None:
+                value = self.decode_validated(self.schema)
+            elif self.shape is None:
+                value = self.decode_value()
+            else:
+                value = self.decode_shaped(self.shape)
+            self.check_end()
+        except RecursionError:
+            # Where the recursion limit is reached depends on the call
+            # stack: the error is reported at the start of the value
+            self.error("Maximum nesting depth exceeded", start)
+        if self.schema_errors:
+            for error in self.schema_errors:
+                error.errors = self.schema_errors
+            raise self.schema_errors[0]
+        return value
+
+    def parse_stats(self, seconds):
+        return {'seconds': seconds, 'chars': self.length, 'objects': self.n_objects,
+                'arrays': self.n_arrays, 'keys': self.n_keys, 'strings': self.n_strings,
+                'numbers': self.n_numbers, 'comments': self.n_comments}
+
+    # Containers: open_container and next_member move self.pos to the
+    # first and next member of an object or array, past the separators.
+
+    def open_container(self, start, close):
+        """
+        Move past the opening bracket at start. Returns True if a member
+        follows, or False for an empty container (its closing bracket is
+        consumed).
+        """
+        pos = self.skip_ws(start + 1)
+        if self.text.startswith(close, pos):
+            self.pos = pos + 1
+            return False
+        self.pos = pos
+        return True
+
+    def next_member(self, close):
+        """
+        Move past the comma after a member. Returns True if another member
+        follows, or False at the closing bracket (which is consumed).
+        """
+        text = self.text
+        pos = self.skip_ws(self.pos)
+        if text.startswith(',', pos):
+            pos = self.skip_ws(pos + 1)
+            if not text.startswith(close, pos):
+                self.pos = pos
+                return True
+        elif not text.startswith(close, pos):
+            self.syntax_error(ERR_COMMA, pos)
+        self.pos = pos + 1
+        return False
+
+    def expect_colon(self):
+        pos = self.skip_ws(self.pos)
+        if not self.text.startswith(':', pos):
+            self.syntax_error(ERR_COLON, pos)
+        self.pos = pos + 1
+
+    def decode_value(self):
+        """Decode the value after the whitespace at the current position."""
+        pos = self.skip_ws(self.pos)
+        self.pos = pos
+        return self.decode_value_at(pos)
+
+    def decode_value_at(self, pos):
+        """Decode the value that starts at pos."""
+        c = self.text[pos] if pos < self.length else ''
+        if c == '{':
+            return self.decode_object(pos)
+        if c == '[':
+            return self.decode_array(pos)
+        return self.decode_scalar(pos)
+
+    def value_decoders(self):
+        """The methods that decode_value_at dispatches to, with the object
+        hooks resolved."""
+        if self.object_pairs_hook is None and self.object_hook is None:
+            return self.decode_dict, self.decode_array, self.decode_scalar
+        return self.decode_object, self.decode_array, self.decode_scalar
+
+    def decode_object(self, start):
+        if self.object_pairs_hook is not None:
+            return self.object_pairs_hook(self.decode_pairs(start))
+        if self.object_hook is not None:
+            return self.object_hook(self.decode_dict(start))
+        return self.decode_dict(start)
+
+    def decode_dict(self, start):
+        # The hot loop of most documents: the steps of open_container,
+        # decode_key, expect_colon and next_member are inlined
+        text = self.text
+        length = self.length
+        skip_ws = self.skip_ws
+        memo = self.memo if self.intern_keys else None
+        decode_object, decode_array, decode_scalar = self.value_decoders()
+        result = {}
+        self.n_objects += 1
+        pos = skip_ws(start + 1)
+        if text.startswith('}', pos):
+            self.pos = pos + 1
+            return result
+        while True:
+            c = text[pos] if pos < length else ''
+            if c == '"' or c == "'":
+                end = _STRING_RUNS[c](text, pos + 1).end()
+                if text.startswith(c, end) and end > pos + 1:
+                    key = text[pos + 1:end]
+                    pos = end + 1
+                else:
+                    key = self.decode_string(pos)
+                    pos = self.pos
+            else:
+                match = _IDENTIFIER(text, pos)
+                if match is None or (c > '\x7f' and not c.isalpha()):
+                    self.syntax_error(ERR_PROPERTY_NAME, pos)
+                key = match.group()
+                pos = match.end()
+            self.n_keys += 1
+            if memo is not None:
+                key = memo.setdefault(key, key)
+            match = _COLON(text, pos)
+            if match is None:
+                pos = skip_ws(pos)
+                if not text.startswith(':', pos):
+                    self.syntax_error(ERR_COLON, pos)
+                pos += 1
+            else:
+                pos = match.end()
+            if pos < length and text[pos] in _SPACE_STARTS:
+                pos = skip_ws(pos)
+            # decode_value_at, inlined to keep one frame per nesting level
+            c = text[pos] if pos < length else ''
+            if c == '{':
+                result[key] = decode_object(pos)
+            elif c == '[':
+                result[key] = decode_array(pos)
+            else:
+                result[key] = decode_scalar(pos)
+            pos = self.pos
+            match = _COMMA(text, pos)
+            if match is not None:
+                pos = match.end()
+            else:
+                # Comments or other whitespace around the comma
+                pos = skip_ws(pos)
+                if not text.startswith(',', pos):
+                    if not text.startswith('}', pos):
+                        self.syntax_error(ERR_COMMA, pos)
+                    break
+                pos += 1
+            if pos < length and text[pos] in _SPACE_STARTS:
+                pos = skip_ws(pos)
+            if text.startswith('}', pos):
+                break
+        self.pos = pos + 1
+        return result
+
+    def decode_pairs(self, start):
+        """Decode an object as a list of (key, value) pairs, in order."""
+        result = []
+        self.n_objects += 1
+        more = self.open_container(start, '}')
+        while more:
+            key = self.decode_key()
+            self.expect_colon()
+            result.append((key, self.decode_value()))
+            more = self.next_member('}')
+        return result
+
+    def decode_array(self, start):
+        if self.arrays is not None:
+            return self.decode_numeric_array(self.arrays, False, start)
+        text = self.text
+        length = self.length
+        skip_ws = self.skip_ws
+        decode_object, decode_array, decode_scalar = self.value_decoders()
+        result = []
+        append = result.append
+        self.n_arrays += 1
+        pos = skip_ws(start + 1)
+        if text.startswith(']', pos):
+            self.pos = pos + 1
+            return result
+        while True:
+            c = text[pos] if pos < length else ''
+            if c == '{':
+                append(decode_object(pos))
+            elif c == '[':
+                append(decode_array(pos))
+            else:
+                append(decode_scalar(pos))
+            pos = self.pos
+            match = _COMMA(text, pos)
+            if match is not None:
+                pos = match.end()
+            else:
+                # Comments or other whitespace around the comma
+                pos = skip_ws(pos)
+                if not text.startswith(',', pos):
+                    if not text.startswith(']', pos):
+                        self.syntax_error(ERR_COMMA, pos)
+                    break
+                pos += 1
+            if pos < length and text[pos] in _SPACE_STARTS:
+                pos = skip_ws(pos)
+            if text.startswith(']', pos):
+                break
+        self.pos = pos + 1
+        return result
+
+    def decode_key(self):
+        """Decode the object key at the current position."""
+        key = self.key_text()
+        self.n_keys += 1
+        # Share one string object per distinct key, like json's scanner does
+        if self.intern_keys:
+            return self.memo.setdefault(key, key)
+        return key
+
+    def key_text(self):
+        """Return the text of the key at the current position: a quoted string or a bare identifier."""
+        text = self.text
+        pos = self.pos
+        c = text[pos] if pos < self.length else ''
+        if c == '"' or c == "'":
+            return self.decode_string(pos)
+        match = _IDENTIFIER(text, pos)
+        if match is None or (c > '\x7f' and not c.isalpha()):
+            self.syntax_error(ERR_PROPERTY_NAME, pos)
+        self.pos = match.end()
+        return match.group()
+
+    def decode_scalar(self, pos):
+        """Decode the string, number or literal at pos."""
+        text = self.text
+        c = text[pos] if pos < self.length else ''
+        if c == '"' or c == "'":
+            self.n_strings += 1
+            end = _STRING_RUNS[c](text, pos + 1).end()
+            if text.startswith(c, end) and end > pos + 1:
+                # No escapes, and not a triple-quoted string
+                value = text[pos + 1:end]
+                self.pos = end + 1
+            else:
+                value = self.decode_string(pos)
+            if self.intern_values and len(value) <= self.intern_values:
+                return self.memo.setdefault(value, value)
+            return value
+        if c in _NUMBER_START:
+            match = _SHORT_INT(text, pos)
+            if match is not None and self.parse_int is None:
+                self.n_numbers += 1
+                self.pos = match.end()
+                return int(match.group())
+            return self.decode_number(pos)
+        if c == 't' and _match_word(text, pos, 'true'):
+            self.pos = pos + 4
+            return True
+        if c == 'f' and _match_word(text, pos, 'false'):
+            self.pos = pos + 5
+            return False
+        if c == 'n' and _match_word(text, pos, 'null'):
+            self.pos = pos + 4
+            return None
+        self.syntax_error(ERR_VALUE, pos)
+
+    def decode_string(self, pos):
+        """Decode the single, double or triple-quoted string at pos."""
+        text = self.text
+        quote = text[pos]
+        if quote == '"' and text.startswith('""', pos + 1):
+            # Triple-quoted: everything up to the closing """ is taken verbatim
+            end = text.find('"""', pos + 3)
+            if end < 0:
+                self.syntax_error(ERR_TRIPLE_STRING, pos)
+            self.pos = end + 3
+            return text[pos + 3:end]
+        start = pos + 1
+        end = _STRING_RUNS[quote](text, start).end()
+        if text.startswith(quote, end):
+            self.pos = end + 1
+            return text[start:end]
+        return self.decode_escaped_string(quote, start, end)
+
+    def decode_escaped_string(self, quote, start, i):
+        """
+        Slow path of decode_string for strings that contain escapes (or are
+        unterminated): i is the first escape, quote or line break.
+        """
+        text = self.text
+        length = self.length
+        run = _STRING_RUNS[quote]
+        chunks = []
+        chunk_start = start
+        while True:
+            i = run(text, i).end()
+            if i >= length:
+                break
+            c = text[i]
+            if c == quote:
+                if i > chunk_start:
+                    chunks.append(text[chunk_start:i])
+                self.pos = i + 1
+                return "".join(chunks)
+            if c != '\\':
+                break  # A line break
+            if i > chunk_start:
+                chunks.append(text[chunk_start:i])
+            i += 1
+            if i >= length:
+                break
+            c = text[i]
+            i += 1
+            simple = _ESCAPES.get(c)
+            if simple is not None:
+                # Line continuations map to nothing
+                if simple:
+                    chunks.append(simple)
+            elif c == '0' and not (i < length and _is_digit(text[i])):
+                chunks.append('\0')
+            elif c == 'x' or c == 'u':
+                code = 0
+                for _ in range(2 if c == 'x' else 4):
+                    digit = _HEX_VALUES.get(text[i]) if i < length else None
+                    if digit is None:
+                        self.syntax_error(ERR_X_ESCAPE if c == 'x' else ERR_U_ESCAPE, i - 2)
+                    code = code * 16 + digit
+                    i += 1
+                # Combine UTF-16 surrogate pairs written as \uXXXX\uXXXX
+                if 0xd800 <= code <= 0xdbff and text.startswith('\\u', i):
+                    match = _HEX4(text, i + 2)
+                    if match is not None:
+                        low = int(match.group(), 16)
+                        if 0xdc00 <= low <= 0xdfff:
+                            code = 0x10000 + ((code - 0xd800) << 10) + (low - 0xdc00)
+                            i += 6
+                chunks.append(chr(code))
+            elif c == '\r':
+                # Line continuation; \r\n counts as a single terminator
+                if text.startswith('\n', i):
+                    i += 1
+            elif _is_digit(c):
+                self.syntax_error(ERR_ESCAPE, i - 2)
+            else:
+                # \", \', \\, \/ and any other character escape to themselves
+                chunks.append(c)
+            chunk_start = i
+        self.error("Unterminated string starting at", start - 1)
+
+    def scan_number(self, pos):
+        """
+        Scan the number (decimal, hex, binary, Infinity or NaN) at pos
+        without converting it; see _scan_number.
+        """
+        number = _scan_number(self.text, pos, self.length)
+        if number[0] < 0:
+            self.syntax_error(-number[0], pos)
+        return number
+
+    def number_value(self, start, end, kind, base, digits):
+        """Convert a scanned number to a Python int or float."""
+        text = self.text
+        if kind == NUM_FLOAT:
+            if self.parse_float is not None:
+                return self.parse_float(text[start:end])
+            return float(text[start:end])
+        if kind == NUM_INF:
+            return NEG_INF if text.startswith('-', start) else POS_INF
+        if kind == NUM_NAN:
+            return NAN
+        if base != 10:
+            if self.parse_hex_bin is not None:
+                return self.parse_hex_bin(text[start:end])
+            value = int(text[digits:end], base)
+            return -value if text.startswith('-', start) else value
+        if self.parse_int is not None:
+            return self.parse_int(text[start:end])
+        try:
+            return int(text[start:end])
+        except ValueError as e:
+            self.error(str(e), start)
+
+    def decode_number(self, pos):
+        """Decode the decimal, hex or binary number, Infinity or NaN at pos."""
+        end, kind, base, digits = self.scan_number(pos)
+        self.n_numbers += 1
+        self.pos = end
+        return self.number_value(pos, end, kind, base, digits)
+
+    def int64_value(self, start, end, base, digits):
+        """
+        Return the value of an integer token, or None if it fits neither in
+        int64 nor in uint64.
+        """
+        literal = self.text[digits:end]
+        if len(literal) > 64:
+            literal = literal.lstrip('0')
+            if len(literal) > 64:
+                return None
+        value = int(literal or '0', base)
+        if self.text.startswith('-', start):
+            value = -value
+        if value < _INT64_MIN or value > _UINT64_MAX:
+            return None
+        return value
+
+    def decode_numeric_array(self, spec, strict, start):
+        """
+        Decode the items of the array starting at start as described by
+        spec, collecting the numbers as they are scanned and packing them
+        into the result. If the array turns out to hold other values (or
+        nothing), a non-strict call decodes it as a list instead.
+        """
+        text = self.text
+        length = self.length
+        values = []
+        # Where the numbers start, to decode them again for a list
+        positions = None if strict else []
+        floats = False
+        lo = hi = 0
+        more = self.open_container(start, ']')
+        while more:
+            pos = self.pos
+            if pos >= length or text[pos] not in _NUMBER_START:
+                if not strict:
+                    return self.decode_mixed_array(positions, pos)
+                self.check_token(pos)
+                self.error(f"Expected number in numeric array {spec.label}", pos)
+            end, kind, base, digits = self.scan_number(pos)
+            if kind == NUM_INT:
+                value = self.int64_value(pos, end, base, digits)
+                if value is None or (spec.kind and (value < spec.lo or value > spec.hi)) or (
+                        # Above the int64 range: only held by uint64, without negatives
+                        not floats and values and min(lo, value) < 0 < _INT64_MAX < max(hi, value)):
+                    if not strict:
+                        return self.decode_mixed_array(positions, pos)
+                    self.error(f"Number out of range for numeric array {spec.label}", pos)
+                if not floats:
+                    if not values or value < lo:
+                        lo = value
+                    if not values or value > hi:
+                        hi = value
+            else:
+                if spec.kind and spec.kind != 'f':
+                    self.error(f"Expected integer in numeric array {spec.label}", pos)
+                floats = True
+                if kind == NUM_FLOAT:
+                    value = float(text[pos:end])
+                elif kind == NUM_INF:
+                    value = NEG_INF if text.startswith('-', pos) else POS_INF
+                else:
+                    value = NAN
+            values.append(value)
+            if positions is not None:
+                positions.append(pos)
+            self.pos = end
+            more = self.next_member(']')
+        self.n_arrays += 1
+        if not values and not strict:
+            return []  # The type of an empty array is unknown
+        self.n_numbers += len(values)
+        return spec.build(values, floats, lo, hi)
+
+    def decode_mixed_array(self, positions, pos):
+        """
+        Finish a non-strict numeric array as a list: decode again the
+        numbers scanned so far, then the rest of the items from pos.
+        """
+        result = []
+        self.n_arrays += 1
+        self.n_numbers += len(positions)
+        for start in positions:
+            end, kind, base, digits = _scan_number(self.text, start, self.length)
+            result.append(self.number_value(start, end, kind, base, digits))
+        self.pos = pos
+        more = True
+        while more:
+            result.append(self.decode_value_at(self.pos))
+            more = self.next_member(']')
+        return result
+
+    # Typed decoding: objects with a target class are built as instances
+    # of it directly from the scanned fields, without an intermediate dict.
+
+    def decode_shaped(self, shape):
+        pos = self.skip_ws(self.pos)
+        self.pos = pos
+        c = self.text[pos] if pos < self.length else ''
+        if shape.array is not None:
+            if c != '[':
+                if c != '{':
+                    self.check_token(pos)
+                self.error(f"Expected numeric array for {shape.array.label}", pos)
+            value = self.decode_numeric_array(shape.array, True, pos)
+        elif shape.plan is not None and c == '{':
+            value = self.decode_instance(shape, pos)
+        elif (c == '{' or c == '[') and shape.has_children():
+            value = self.decode_shaped_container(shape, c == '{', pos)
+        else:
+            value = self.decode_value_at(pos)
+        if shape.types is not None and not _type_matches(value, shape):
+            self.error(f"Expected {_type_names(shape)} for {shape.label}, "
+                       f"got {type(value).__name__}", pos)
+        return value
+
+    def decode_shaped_container(self, shape, is_object, start):
+        """Decode an object or array whose children have shapes."""
+        if not is_object:
+            arr = []
+            index = 0
+            self.n_arrays += 1
+            more = self.open_container(start, ']')
+            while more:
+                child = shape.child(index)
+                arr.append(self.decode_value() if child is None else self.decode_shaped(child))
+                index += 1
+                more = self.next_member(']')
+            return arr
+        obj = {}
+        self.n_objects += 1
+        more = self.open_container(start, '}')
+        while more:
+            key = self.decode_key()
+            child = shape.child(key)
+            self.expect_colon()
+            obj[key] = self.decode_value() if child is None else self.decode_shaped(child)
+            more = self.next_member('}')
+        if self.object_pairs_hook is not None:
+            return self.object_pairs_hook(list(obj.items()))
+        if self.object_hook is not None:
+            return self.object_hook(obj)
+        return obj
+
+    def decode_instance(self, shape, start):
+        """Decode an object as an instance of the target class of shape."""
+        plan = shape.plan
+        values = {}
+        self.n_objects += 1
+        more = self.open_container(start, '}')
+        while more:
+            key_pos = self.pos
+            key = self.decode_key()
+            if key not in plan.fields:
+                self.error(f"Unknown field {key!r} for {plan.name}", key_pos)
+            # A shape given by key path takes precedence over the annotation
+            field = shape.child(key) if shape.has_children() else None
+            if field is None:
+                field = plan.fields[key]
+            self.expect_colon()
+            values[key] = self.decode_value() if field is None else self.decode_shaped(field)
+            more = self.next_member('}')
+        for name in plan.required:
+            if name not in values:
+                self.error(f"Missing field {name!r} for {plan.name}", start)
+        try:
+            return plan.build(values)
+        except (TypeError, ValueError) as e:
+            self.error(f"Cannot create {plan.name}: {e}", start)
+
+    # Schema validation: values are checked against the compiled schema
+    # while they are decoded, so that failures point at their source.
+
+    def decode_validated(self, node):
+        pos = self.skip_ws(self.pos)
+        self.pos = pos
+        c = self.text[pos] if pos < self.length else ''
+        if c == '{' and node.object_checks and node.allows(T_OBJECT):
+            json_type = T_OBJECT
+            value = self.decode_validated_object(node, pos)
+        elif c == '[' and node.array_checks and node.allows(T_ARRAY):
+            json_type = T_ARRAY
+            value = self.decode_validated_array(node, pos)
+        elif c in _NUMBER_START:
+            end, kind, base, digits = self.scan_number(pos)
+            self.n_numbers += 1
+            self.pos = end
+            value = self.number_value(pos, end, kind, base, digits)
+            json_type = T_INTEGER if kind == NUM_INT else T_NUMBER
+            if json_type == T_NUMBER and type(value) is float and value.is_integer():
+                json_type = T_INTEGER
+        else:
+            value = self.decode_value_at(pos)
+            json_type = _CHAR_JSON_TYPES[c]
+        message = node.check(json_type, value)
+        if message is not None:
+            self.invalid(message, pos, None)
+        elif node.combinators:
+            self.check_decoded(node, value, pos, True)
+        return value
+
+    def decode_validated_object(self, node, start):
+        """Decode an object, checking its members against the schema node."""
+        obj = {}
+        extra = []
+        self.n_objects += 1
+        more = self.open_container(start, '}')
+        while more:
+            key_pos = self.pos
+            key = self.decode_key()
+            child = node.property_schema(key, extra)
+            if child is not None and child.never:
+                self.invalid(f"property {key!r} is not allowed", key_pos, None)
+                child = None
+            self.schema_path.append(key)
+            self.expect_colon()
+            value_pos = self.pos = self.skip_ws(self.pos)
+            value = self.decode_value() if child is None else self.decode_validated(child)
+            for other in extra:
+                self.check_decoded(other, value, value_pos, False)
+            del extra[:]
+            self.schema_path.pop()
+            obj[key] = value
+            more = self.next_member('}')
+        for name in node.required:
+            if name not in obj:
+                self.invalid(f"missing required property {name!r}", start, None)
+        message = node.check_size(len(obj), True)
+        if message is not None:
+            self.invalid(message, start, None)
+        if self.object_pairs_hook is not None:
+            return self.object_pairs_hook(list(obj.items()))
+        if self.object_hook is not None:
+            return self.object_hook(obj)
+        return obj
+
+    def decode_validated_array(self, node, start):
+        """Decode an array, checking its items against the schema node."""
+        arr = []
+        index = 0
+        self.n_arrays += 1
+        more = self.open_container(start, ']')
+        while more:
+            child = node.item_schema(index)
+            self.schema_path.append(index)
+            arr.append(self.decode_value() if child is None else self.decode_validated(child))
+            self.schema_path.pop()
+            index += 1
+            more = self.next_member(']')
+        message = node.check_size(index, False)
+        if message is not None:
+            self.invalid(message, start, None)
+        if node.unique_items and _has_duplicates(arr):
+            self.invalid("array items are not unique", start, None)
+        return arr
+
+    def check_decoded(self, node, value, pos, combinators):
+        """
+        Check a value after it has been decoded, against the combinators of
+        node or against the whole of it, reporting failures at pos.
+        """
+        errors = []
+        if combinators:
+            node.validate_combinators(value, [], errors, self.fail_fast)
+        else:
+            node.validate(value, [], errors, self.fail_fast)
+        for path, message in errors:
+            self.invalid(message, pos, path)
+
+    def invalid(self, message, pos, path):
+        """
+        Report a schema failure at pos for the value being decoded (or at
+        path below it): raise it with fail_fast, or collect it.
+        """
+        full = tuple(self.schema_path)
+        if path is not None:
+            full += path
+        error = _parse_error(self.text, message, pos, self.offset, self.line_offset,
+                             self.col_offset, full)
+        if self.fail_fast:
+            raise error
+        self.schema_errors.append(error)
+
+    # Path extraction: only the values at the selected key paths are
+    # built, every other subtree is skipped.
+
+    def extract_document(self, paths):
+        """Return the value (or list of values) found for each path, or _MISSING."""
+        self.paths = paths
+        self.extracted = [[] if wildcard else _MISSING for wildcard in paths._wildcards]
+        self.remaining = len(paths._wildcards) if paths._plain else -1
+        self.pos = start = self.skip_ws(self.pos)
+        if self.pos >= self.length:
+            self.syntax_error(ERR_EMPTY, self.pos)
+        try:
+            if not self.extract_value(paths._root):
+                self.check_end()
+        except RecursionError:
+            self.error("Maximum nesting depth exceeded", start)
+        return self.extracted
+
+    def extract_value(self, node, found=None):
+        """
+        Extract the selected values within the next value, which is at node
+        of the path trie. Within an object member, the values are appended
+        to found after their slot, as a later duplicate of the key
+        replaces them the way parse keeps the last one; outside of any
+        object (found is None) they are final and stored at once. Returns
+        True once every path has been found and the rest of the input can
+        be ignored.
+        """
+        pos = self.skip_ws(self.pos)
+        self.pos = pos
+        if node.slots is not None:
+            pairs = [] if found is None else found
+            self.select_built(node, self.decode_value_at(pos), pairs)
+            return found is None and self.store_extracted(pairs)
+        c = self.text[pos] if pos < self.length else ''
+        if c == '{':
+            # The values found in the first selected member and, once there
+            # are others, by key: a duplicate takes the place of the first
+            first_key = first = members = None
+            more = self.open_container(pos, '}')
+            while more:
+                key = self.key_text()
+                child = node.child(key)
+                self.expect_colon()
+                if child is None:
+                    self.skip_value()
+                else:
+                    member = []
+                    if first is None or (members is None and key == first_key):
+                        first_key, first = key, member
+                    else:
+                        if members is None:
+                            members = {first_key: first}
+                        members[key] = member
+                    self.extract_value(child, member)
+                more = self.next_member('}')
+            if members is None:
+                if first is None:
+                    return False
+                if found is not None:
+                    found.extend(first)
+                    return False
+                return self.store_extracted(first)
+            for member in members.values():
+                if found is not None:
+                    found.extend(member)
+                elif self.store_extracted(member):
+                    return True
+        elif c == '[':
+            index = 0
+            more = self.open_container(pos, ']')
+            while more:
+                child = node.child(index)
+                index += 1
+                if child is None:
+                    self.skip_value()
+                elif self.extract_value(child, found):
+                    return True
+                more = self.next_member(']')
+        else:
+            self.pos = self.skip_scalar(pos)
+        return False
+
+    def store_extracted(self, pairs):
+        """Store the final values of pairs (slot, value, ...); returns True once every path has been found."""
+        extracted = self.extracted
+        wildcards = self.paths._wildcards
+        for i in range(0, len(pairs), 2):
+            slot, value = pairs[i], pairs[i + 1]
+            if wildcards[slot]:
+                extracted[slot].append(value)
+            else:
+                extracted[slot] = value
+                self.remaining -= 1
+        return self.remaining == 0
+
+    def select_built(self, node, value, pairs):
+        """Append the slots and values of the paths at node and below it within a built value."""
+        if node.slots is not None:
+            for slot in node.slots:
+                pairs.append(slot)
+                pairs.append(value)
+            if not node.has_children():
+                return
+        if type(value) is dict:
+            members = value.items()
+        elif type(value) is list:
+            members = enumerate(value)
+        else:
+            return
+        for key, item in members:
+            child = node.child(key)
+            if child is not None:
+                self.select_built(child, item, pairs)
+
+    # Structural scanning: the methods below walk values without building
+    # any Python objects for them. Their syntax is checked as the extension's
+    # tokenizer checks it, so escapes in strings are not.
+
+    def skip_value(self):
+        """Skip over the value at the current position."""
+        text = self.text
+        pos = self.skip_ws(self.pos)
+        # Closing brackets of the containers being skipped
+        closers = []
+        while True:
+            c = text[pos] if pos < self.length else ''
+            if c == '{' or c == '[':
+                close = '}' if c == '{' else ']'
+                pos = self.skip_ws(pos + 1)
+                if not text.startswith(close, pos):
+                    closers.append(close)
+                    if close == '}':
+                        pos = self.skip_member_key(pos)
+                    continue
+                pos += 1
+            else:
+                pos = self.skip_scalar(pos)
+            # After a value: close the containers it completes
+            while closers:
+                close = closers[-1]
+                pos = self.skip_ws(pos)
+                if text.startswith(',', pos):
+                    pos = self.skip_ws(pos + 1)
+                    if not text.startswith(close, pos):
+                        if close == '}':
+                            pos = self.skip_member_key(pos)
+                        break
+                elif not text.startswith(close, pos):
+                    self.syntax_error(ERR_COMMA, pos)
+                closers.pop()
+                pos += 1
+            else:
+                self.pos = pos
+                return
+
+    def skip_member_key(self, pos):
+        """Skip the key and colon of the object member at pos; returns where its value starts."""
+        pos = self.skip_ws(self.skip_key(pos))
+        if not self.text.startswith(':', pos):
+            self.syntax_error(ERR_COLON, pos)
+        return self.skip_ws(pos + 1)
+
+    def skip_key(self, pos):
+        """Return the position after the object key at pos."""
+        end = _scan_key(self.text, pos, self.length)
+        if end < 0:
+            self.syntax_error(_key_error(self.text, pos), pos)
+        return end
+
+    def skip_scalar(self, pos):
+        """Return the position after the string, number or literal at pos."""
+        text = self.text
+        c = text[pos] if pos < self.length else ''
+        if c == '"' or c == "'":
+            end = _scan_string(text, pos, self.length)
+            if end < 0:
+                self.syntax_error(_string_error(text, pos), pos)
+            return end
+        if c in _NUMBER_START:
+            return self.scan_number(pos)[0]
+        if c == 't' and _match_word(text, pos, 'true'):
+            return pos + 4
+        if c == 'f' and _match_word(text, pos, 'false'):
+            return pos + 5
+        if c == 'n' and _match_word(text, pos, 'null'):
+            return pos + 4
+        self.syntax_error(ERR_VALUE, pos)
+
+    def check_token(self, pos):
+        """
+        Raise the syntax error of the value at pos if it is not a valid
+        token: containers and strings with escapes are left to be checked
+        when they are decoded.
+        """
+        text = self.text
+        c = text[pos] if pos < self.length else ''
+        if c == '{' or c == '[':
+            return
+        if (c == '"' or c == "'") and not text.startswith('"""', pos) \
+                and text.startswith('\\', _STRING_RUNS[c](text, pos + 1).end()):
+            return
+        self.skip_scalar(pos)
+
+    def index_container(self):
+        """
+        Record where the direct children of the object or array at the
+        current position start, without decoding them. Returns a dict of
+        key to offset for an object and a list of offsets for an array.
+        """
+        is_object = self.text.startswith('{', self.pos)
+        close = '}' if is_object else ']'
+        key_offsets = {}
+        item_offsets = []
+        more = self.open_container(self.pos, close)
+        while more:
+            if is_object:
+                key = self.decode_key()
+                self.expect_colon()
+                self.pos = self.skip_ws(self.pos)
+                key_offsets[key] = self.pos
+            else:
+                item_offsets.append(self.pos)
+            self.skip_value()
+            more = self.next_member(close)
+        return key_offsets if is_object else item_offsets
+
+    def collect_nodes(self, out, path):
+        """
+        Append a (path, offset, value) tuple for the value at the current
+        position and then, in document order, for each of its descendants.
+        Objects and arrays are reported with the type dict or list as value.
+        """
+        pos = self.pos
+        c = self.text[pos] if pos < self.length else ''
+        if c != '{' and c != '[':
+            out.append((path, pos, self.decode_scalar(pos)))
+            return
+        is_object = c == '{'
+        close = '}' if is_object else ']'
+        out.append((path, pos, dict if is_object else list))
+        index = 0
+        more = self.open_container(pos, close)
+        while more:
+            if is_object:
+                key = self.decode_key()
+                self.expect_colon()
+                self.pos = self.skip_ws(self.pos)
+                self.collect_nodes(out, path + (key,))
+            else:
+                self.collect_nodes(out, path + (index,))
+                index += 1
+            more = self.next_member(close)
+
+    def decode_spans(self, nodes):
+        """
+        Decode the value at the current position and append its span node
+        to nodes: None for a scalar, or for an object or array a list
+        [length, keys, starts, ends, children] (see _decode_spans).
+        """
+        start = self.pos
+        c = self.text[start] if start < self.length else ''
+        if c != '{' and c != '[':
+            nodes.append(None)
+            return self.decode_scalar(start)
+        is_object = c == '{'
+        close = '}' if is_object else ']'
+        result = {} if is_object else []
+        keys = [] if is_object else None
+        starts = []
+        ends = []
+        children = []
+        node = [0, keys, starts, ends, children]
+        nodes.append(node)
+        more = self.open_container(start, close)
+        while more:
+            if is_object:
+                key = self.decode_key()
+                self.expect_colon()
+                self.pos = self.skip_ws(self.pos)
+                starts.append(self.pos - start)
+                result[key] = self.decode_spans(children)
+                keys.append(key)
+            else:
+                starts.append(self.pos - start)
+                result.append(self.decode_spans(children))
+            ends.append(self.pos - start)
+            more = self.next_member(close)
+        node[0] = self.pos - start
+        return result
+
+# ---------------------------------------------------------------------------
+# Parsing
+# ---------------------------------------------------------------------------
+
+def _sniff_encoding(buf):
+    """
+    Detect the encoding of raw input from its byte order mark or, failing
+    that, from the pattern of null bytes at the start (as json does).
+    Returns the encoding (or None if undetermined) and the BOM length.
+    """
+    n = len(buf)
+    if n >= 4 and buf[0] == 0 and buf[1] == 0 and buf[2] == 0xfe and buf[3] == 0xff:
+        return 'utf-32-be', 4
+    if n >= 4 and buf[0] == 0xff and buf[1] == 0xfe and buf[2] == 0 and buf[3] == 0:
+        return 'utf-32-le', 4
+    if n >= 3 and buf[0] == 0xef and buf[1] == 0xbb and buf[2] == 0xbf:
+        return 'utf-8', 3
+    if n >= 2 and buf[0] == 0xfe and buf[1] == 0xff:
+        return 'utf-16-be', 2
+    if n >= 2 and buf[0] == 0xff and buf[1] == 0xfe:
+        return 'utf-16-le', 2
+    if n >= 4:
+        if buf[0] == 0:
+            return ('utf-16-be' if buf[1] else 'utf-32-be'), 0
+        if buf[1] == 0:
+            return ('utf-16-le' if buf[2] or buf[3] else 'utf-32-le'), 0
+    elif n == 2:
+        if buf[0] == 0:
+            return 'utf-16-be', 0
+        if buf[1] == 0:
+            return 'utf-16-le', 0
+    return None, 0
+
+def _decode_input(data, encodings, stats=None):
+    """
+    Decode raw input (bytes, bytearray, memoryview, mmap, ...) to a string.
+
+    The buffer is decoded through a memoryview, without an intermediate
+    copy. An encoding found from a BOM or null-byte pattern is used as-is;
+    otherwise each of the given encodings is tried strictly in turn.
+    If stats is given, the 'decode' stage is recorded in it.
+    """
+    start = _clock() if stats is not None else 0
+    # Release the views before returning, so that an mmap can be closed
+    with memoryview(data) as view, view.cast('B') as buf:
+        return _decode_buffer(buf, encodings, stats, start)
+
+def _decode_buffer(buf, encodings, stats, start):
+    n = len(buf)
+    detected, bom_length = _sniff_encoding(buf)
+    if detected is not None:
+        candidates = (detected,)
+    elif encodings is None:
+        candidates = DEFAULT_ENCODINGS
+    elif isinstance(encodings, str):
+        candidates = (encodings,)
+    else:
+        candidates = encodings
+    last_error = None
+    for i, encoding in enumerate(candidates):
+        try:
+            text = str(buf[bom_length:], encoding, 'strict')
+        except (UnicodeDecodeError, LookupError) as e:
+            last_error = e
+            continue
+        if stats is not None:
+            stats['decode'] = {'seconds': _clock() - start, 'bytes': n, 'chars': len(text),
+                               'encoding': encoding, 'fallback': i > 0}
+        return text
+    raise TJSON5ParseError(f"Encoding error: {last_error}")
+
+# Called with the stats of every parse while profiling is active (see tjson5.profiling)
+_stats_sink = None
+
+def _set_stats_sink(sink):
+    global _stats_sink
+    _stats_sink = sink
+
+def parse(text, strip_comments=True, encodings=None, object_hook=None,
+          object_pairs_hook=None, parse_float=None, parse_int=None, parse_hex_bin=None,
+          intern_keys=True, intern_values=0, intern_table=None,
+          types=None, arrays=None, stats=None, schema=None):
+    """
+    Parse a Triple-JSON5 document and return the corresponding Python object.
+
+    Parameters:
+    - text: The Triple-JSON5 document, either as a string or as raw input
+      (bytes, bytearray, memoryview or mmap)
+    - strip_comments: Kept for backwards compatibility; comments are
+      always recognized by the decoder
+    - encodings: Encodings to try in order for raw input without a byte
+      order mark (default: utf-8, then latin1)
+    - object_hook, object_pairs_hook, parse_float, parse_int: As for
+      json.loads, called while the document is decoded
+    - parse_hex_bin: Called with the literal text of every hexadecimal or
+      binary integer (e.g. "0xFF", "-0b101") instead of converting it to int
+    - intern_keys: Share a single string object between equal keys
+    - intern_values: Also share string values of up to this many
+      characters (0, the default, disables value interning)
+    - intern_table: Dict used as the intern table, to share strings
+      across several parses (default: a new table per parse)
+    - types: Target class of the document, or a dict of key paths (as for
+      items(), e.g. "parts[*]") to target classes. Objects at those paths
+      are built as instances of the class directly while decoding. Target
+      classes are dataclasses, NamedTuples or __slots__ classes; their
+      fields are checked against the object keys and, for annotations of
+      plain types (int, str, list[Part], Optional[...]), the value types.
+      Annotated record classes are built recursively.
+    - arrays: Return arrays of numbers as array.array ('array') or
+      numpy.ndarray ('numpy', NumPy must be installed) instead of lists.
+      A string applies to every non-empty array that holds only numbers;
+      a dict maps key paths to 'array', 'numpy', an array typecode (e.g.
+      'H') or a NumPy dtype, and the values at those paths must be arrays
+      of numbers. The element type is the narrowest one that holds all
+      the values (e.g. uint8, int32 or float64) unless a typecode or
+      dtype is given. Integers must fit in int64, or in uint64 when the
+      array holds no negative integer, and the numbers are converted
+      directly, without the parse_* hooks.
+    - stats: Dict filled with the timing and counters of this call: the
+      'decode' stage for raw input (seconds, bytes, chars, encoding, and
+      fallback if the first encoding failed), the 'parse' stage (seconds,
+      chars and counts of objects, arrays, keys, strings, numbers and
+      comments) and 'error'. See also tjson5.profiling.
+    - schema: A Schema from compile_schema (or a schema dict, compiled on
+      every call) to validate the document against while it is decoded.
+      Cannot be combined with types or a dict of arrays.
+
+    Returns:
+    - A Python object (dict, list, str, int, float, bool, None)
+
+    Raises:
+    - TJSON5ParseError if the text is invalid
+    - TJSON5ValidationError if the document does not match the schema
+    """
+    if stats is None and _stats_sink is not None:
+        stats = {}
+    try:
+        # Skip invalid or empty input
+        if not text:
+            raise TJSON5ParseError("Empty or invalid input")
+        if not isinstance(text, str):
+            text = _decode_input(text, encodings, stats)
+        decoder = _Decoder(text)
+        decoder.set_hooks(object_hook, object_pairs_hook, parse_float, parse_int, parse_hex_bin)
+        decoder.set_interning(intern_keys, intern_values, intern_table)
+        if isinstance(arrays, dict):
+            decoder.shape = _types_shape(types, arrays)
+        else:
+            if arrays is not None and arrays is not False:
+                decoder.arrays = _global_array_spec(arrays)
+            if types is not None:
+                decoder.shape = _types_shape(types, None)
+        if schema is not None:
+            if decoder.shape is not None:
+                raise ValueError("schema cannot be combined with types or a dict of arrays")
+            decoder.set_schema(schema if isinstance(schema, Schema) else compile_schema(schema))
+        if stats is None:
+            return decoder.decode_document()
+        start = _clock()
+        try:
+            value = decoder.decode_document()
+        finally:
+            stats['parse'] = decoder.parse_stats(_clock() - start)
+        stats['error'] = False
+        return value
+    except BaseException:
+        if stats is not None:
+            stats['error'] = True
+        raise
+    finally:
+        if stats is not None and _stats_sink is not None:
+            _stats_sink(stats)
+
+def loads(text, *args, **kwargs):
+    """Alias for parse to match Python's json module API."""
+    return parse(text, *args, **kwargs)
+
+def load(file_obj, *args, **kwargs):
+    """
+    Parse a file object (text or binary) containing Triple-JSON5. Other
+    arguments are passed to parse.
+    """
+    try:
+        content = file_obj.read()
+        return parse(content, *args, **kwargs)
+    except UnicodeDecodeError as e:
+        # Handle encoding errors gracefully
+        raise TJSON5ParseError(f"Encoding error: {str(e)}. Try opening the file with a different encoding.")
+
+def _decode_source(data, encodings=None):
+    """Decode raw input to a string the way parse does."""
+    if isinstance(data, str):
+        return data
+    if not data:
+        raise TJSON5ParseError("Empty or invalid input")
+    return _decode_input(data, encodings)
+
+def _index_document(text):
+    """
+    Scan the document structure for lazy loading. Returns (offsets, None)
+    where offsets maps the keys (object) or indices (array) of the
+    top-level container to the offsets of their values, or (None, value)
+    if the document is a single scalar value.
+    """
+    decoder = _Decoder(text)
+    decoder.pos = decoder.skip_ws(0)
+    if decoder.pos >= decoder.length:
+        raise TJSON5ParseError("Empty or invalid input")
+    if text[decoder.pos] != '{' and text[decoder.pos] != '[':
+        return None, decoder.decode_document()
+    offsets = decoder.index_container()
+    decoder.check_end()
+    return offsets, None
+
+def _collect_nodes(text):
+    """
+    Return a (path, offset, value) tuple for every value in the document,
+    in document order. Paths are tuples of keys and indices, offsets are
+    character offsets into text, and objects and arrays have the type
+    dict or list as value (their children follow them).
+    """
+    decoder = _Decoder(text)
+    nodes = []
+    decoder.pos = start = decoder.skip_ws(0)
+    if decoder.pos >= decoder.length:
+        raise TJSON5ParseError("Empty or invalid input")
+    try:
+        decoder.collect_nodes(nodes, ())
+    except RecursionError:
+        decoder.error("Maximum nesting depth exceeded", start)
+    decoder.check_end()
+    return nodes
+
+def _decode_spans(text, pos, document):
+    """
+    Decode the value that starts at character offset pos of text, recording
+    where the members of its objects and arrays are. With document, pos is
+    where the document starts: leading whitespace is skipped and nothing but
+    whitespace may follow the value.
+
+    Returns (value, node, start, end): the value occupies text[start:end],
+    and node is None for a scalar or, for an object or array, a list
+    [length, keys, starts, ends, children]. keys lists the keys of an object
+    in source order (None for an array); the i-th member occupies
+    starts[i]:ends[i], offsets relative to the opening bracket, and
+    children[i] is its node.
+    """
+    decoder = _Decoder(text)
+    nodes = []
+    decoder.pos = pos
+    if document:
+        decoder.pos = decoder.skip_ws(pos)
+        if decoder.pos >= decoder.length:
+            raise TJSON5ParseError("Empty or invalid input")
+    start = decoder.pos
+    try:
+        value = decoder.decode_spans(nodes)
+    except RecursionError:
+        decoder.error("Maximum nesting depth exceeded", start)
+    end = decoder.pos
+    if document:
+        decoder.check_end()
+    return value, nodes[0], start, end
+
+def validate(text, max_errors=100, encodings=None):
+    """
+    Check the syntax of a Triple-JSON5 document without building it.
+
+    The document is scanned in a single pass that creates no Python value
+    for its contents. After a syntax error, scanning resumes at the next
+    comma or closing bracket of an enclosing object or array, so that a
+    single pass reports the errors of the whole document.
+
+    Parameters:
+    - text: The document, as a string or as raw input (bytes, bytearray,
+      memoryview or mmap)
+    - max_errors: Stop after this many errors (None for no limit)
+    - encodings: Encodings to try in order for raw input without a byte
+      order mark (default: utf-8, then latin1)
+
+    Returns:
+    - A list of (line, column, message) tuples, 1-based as in
+      TJSON5ParseError, in source order; empty if the document is valid.
+
+    Raises:
+    - TJSON5ParseError if raw input cannot be decoded
+    """
+    if not text:
+        return [(1, 1, _SYNTAX_ERRORS[ERR_EMPTY])]
+    if not isinstance(text, str):
+        text = _decode_input(text, encodings)
+    errors = _lint(text, -1 if max_errors is None else max_errors, _nesting_limit())
+    errors.sort(key=lambda error: error[0])
+    result = []
+    line = 1
+    line_start = last = 0
+    for pos, message in errors:
+        # Positions are in order: count the newlines since the previous one
+        line += text.count('\n', last, pos)
+        if line > 1:
+            line_start = text.rfind('\n', 0, pos) + 1
+        result.append((line, pos - line_start + 1, message))
+        last = pos
+    return result
+
+def _decode_at(text, pos):
+    """Decode the single value starting at character offset pos of text."""
+    decoder = _Decoder(text)
+    decoder.pos = pos
+    try:
+        return decoder.decode_value()
+    except RecursionError:
+        decoder.error("Maximum nesting depth exceeded", pos)
+
+def _copy_value(value):
+    if type(value) is dict:
+        return {key: _copy_value(item) for key, item in value.items()}
+    if type(value) is list:
+        return [_copy_value(item) for item in value]
+    if type(value) is array:
+        return value[:]
+    if _ndarray is not None and type(value) is _ndarray:
+        return value.copy()
+    return value
+
+def _copy_document(value):
+    """Copy the dicts, lists and numeric arrays of a parsed document, sharing the immutable leaves."""
+    return _copy_value(value)
+
+# Export preprocessing functions for testing
+def preprocessTripleQuotedStrings(text):
+    """Process triple-quoted strings for testing."""
+    return process_triple_quotes(text)
+
+def preprocessHexBinary(text):
+    """Process hex and binary literals for testing."""
+    return process_number_formats(text)
+
+# ---------------------------------------------------------------------------
+# Key paths
+# ---------------------------------------------------------------------------
+
+# Wildcard component of a compiled key path, matches any key or index
+_ANY = object()
+
+def _compile_path(path):
+    """
+    Compile a key path such as "parts[*].name" to a tuple of components.
+
+    Keys are separated by dots, array indices are written in brackets and
+    "*" matches any key or index. Keys that contain dots or brackets, or
+    start with a quote, can be quoted, as a dotted segment or in brackets:
+    '"a.b".c', 'pins["wirebonding-layout"]'. A quoted key runs to the next
+    matching quote (there are no escapes) and a quoted "*" is a literal
+    key. Indices are non-negative decimal integers. The empty path ""
+    denotes the document root. Tuples and lists of components are
+    accepted as-is, with "*" as the wildcard.
+    """
+    if isinstance(path, (tuple, list)):
+        return tuple(_ANY if c == '*' else c for c in path)
+    components = []
+    i = 0
+    n = len(path)
+    expect_key = True
+    while i < n:
+        c = path[i]
+        if c == '.':
+            if expect_key:
+                raise ValueError(f"Invalid key path {path!r}: empty key")
+            i += 1
+            expect_key = True
+            continue
+        if not expect_key and c != '[':
+            raise ValueError(f"Invalid key path {path!r}: expected '.' or '[' "
+                             f"at character {i}")
+        if c == '[':
+            i += 1
+            while i < n and path[i].isspace():
+                i += 1
+            if i < n and (path[i] == '"' or path[i] == "'"):
+                end = path.find(path[i], i + 1)
+                if end < 0:
+                    raise ValueError(f"Invalid key path {path!r}: unclosed quote")
+                components.append(path[i + 1:end])
+                end += 1
+            else:
+                end = path.find(']', i)
+                if end < 0:
+                    raise ValueError(f"Invalid key path {path!r}: unclosed '['")
+                token = path[i:end].strip()
+                if token == '*':
+                    components.append(_ANY)
+                elif token.isascii() and token.isdigit():
+                    components.append(int(token))
+                elif token[:1] == '-' and token[1:].isascii() and token[1:].isdigit():
+                    raise ValueError(f"Invalid key path {path!r}: negative index {token!r}")
+                else:
+                    raise ValueError(f"Invalid key path {path!r}: bad index {token!r}")
+            while end < n and path[end].isspace():
+                end += 1
+            if end >= n or path[end] != ']':
+                raise ValueError(f"Invalid key path {path!r}: unclosed '['")
+            i = end + 1
+        elif c == '"' or c == "'":
+            end = path.find(c, i + 1)
+            if end < 0:
+                raise ValueError(f"Invalid key path {path!r}: unclosed quote")
+            components.append(path[i + 1:end])
+            i = end + 1
+        else:
+            end = i
+            while end < n and path[end] != '.' and path[end] != '[':
+                end += 1
+            token = path[i:end]
+            components.append(_ANY if token == '*' else token)
+            i = end
+        expect_key = False
+    if expect_key and n > 0:
+        raise ValueError(f"Invalid key path {path!r}: empty key")
+    return tuple(components)
+
+def _parse_key_path(path):
+    """Compile a key path for Python callers, with None as the wildcard."""
+    return tuple(None if c is _ANY else c for c in _compile_path(path))
+
+def _path_matches(pattern, path):
+    """Return True if the concrete path matches the compiled pattern."""
+    if len(pattern) != len(path):
+        return False
+    for expected, component in zip(pattern, path):
+        if expected is not _ANY and expected != component:
+            return False
+    return True
+
+class Paths:
+    """
+    Key paths compiled by compile_paths, for extract(). Compiled paths
+    are immutable and can be reused across calls and threads.
+    """
+    __slots__ = ('_root', '_paths', '_wildcards', '_plain')
+
+    @property
+    def paths(self):
+        return self._paths
+
+    def __len__(self):
+        return len(self._paths)
+
+    def __repr__(self):
+        return f"tjson5.compile_paths({list(self._paths)!r})"
+
+def compile_paths(paths):
+    """
+    Compile key paths for extract(). Paths use the syntax of items():
+    keys separated by dots, array indices in brackets, "*" for any key or
+    index and quoted brackets for other keys, e.g. "parts[*].name" or
+    'pins["wirebonding-layout"]'. The empty path "" is the whole document.
+
+    Parameters:
+    - paths: A key path or a list of key paths
+
+    Returns:
+    - A Paths object
+
+    Raises:
+    - ValueError if a key path is invalid
+    """
+    compiled = Paths.__new__(Paths)
+    wildcards = []
+    if isinstance(paths, str):
+        paths = [paths]
+    paths = [tuple(path) if isinstance(path, list) else path for path in paths]
+    compiled._root = _PathNode()
+    for slot, path in enumerate(paths):
+        components = _compile_path(path)
+        node = compiled._root
+        for component in components:
+            if component is _ANY:
+                if node.any is None:
+                    node.any = _PathNode()
+                node = node.any
+                continue
+            if node.children is None:
+                node.children = {}
+            child = node.children.get(component)
+            if child is None:
+                child = node.children[component] = _PathNode()
+            node = child
+        if node.slots is None:
+            node.slots = []
+        node.slots.append(slot)
+        wildcards.append(any(component is _ANY for component in components))
+    _finish_path_node(compiled._root)
+    compiled._paths = tuple(paths)
+    compiled._wildcards = tuple(wildcards)
+    compiled._plain = not any(wildcards)
+    return compiled
+
+def _merge_path_node(target, source):
+    """Add the paths below source to target."""
+    if source.slots is not None:
+        if target.slots is None:
+            target.slots = []
+        target.slots.extend(slot for slot in source.slots if slot not in target.slots)
+    if source.any is not None:
+        if target.any is None:
+            target.any = _PathNode()
+        _merge_path_node(target.any, source.any)
+    if source.children is not None:
+        if target.children is None:
+            target.children = {}
+        for key, child in source.children.items():
+            if key not in target.children:
+                target.children[key] = _PathNode()
+            _merge_path_node(target.children[key], child)
+
+def _finish_path_node(node):
+    """
+    Prepare the trie below node for matching: the paths through "*" are
+    also added below each explicit key or index, so that a member only
+    ever follows one node.
+    """
+    if node.children is not None:
+        for child in node.children.values():
+            if node.any is not None:
+                _merge_path_node(child, node.any)
+            _finish_path_node(child)
+        node.names = tuple(key for key in node.children if isinstance(key, str))
+        if node.slots is not None:
+            node.slots.sort()
+    if node.any is not None:
+        _finish_path_node(node.any)
+
+def extract(text, paths, encodings=None):
+    """
+    Return the values at the given key paths of a Triple-JSON5 document,
+    without building the rest of it.
+
+    Only the selected values are decoded: every other subtree is skipped
+    without creating any string or number for it.
+    The values are those parse would give: for a duplicate key, the last
+    member wins, so the object around a match is always scanned to its
+    end. When no path has a wildcard, scanning stops as soon as every path
+    has been found outside of any open object (e.g. at the end of the
+    document's value, or after an item of a top-level array), so the rest
+    of the document is not read (nor checked).
+
+    Parameters:
+    - text: The document, as a string or as raw input (bytes, bytearray,
+      memoryview or mmap)
+    - paths: A Paths object from compile_paths, or key paths to compile
+      (see compile_paths)
+    - encodings: Encodings to try in order for raw input without a byte
+      order mark (default: utf-8, then latin1)
+
+    Returns:
+    - A dict mapping each path, as given, to its value. Paths without a
+      wildcard map to their value and are left out if absent; paths with
+      a wildcard map to the list of matching values, in the order of the
+      parsed document.
+
+    Raises:
+    - TJSON5ParseError if the part of the text that was scanned is
+      invalid. After an early stop, errors in the rest of the text are not
+      reported: use validate (or parse) to check the whole document.
+    """
+    compiled = paths if isinstance(paths, Paths) else compile_paths(paths)
+    if not text:
+        raise TJSON5ParseError("Empty or invalid input")
+    if not isinstance(text, str):
+        text = _decode_input(text, encodings)
+    values = _Decoder(text).extract_document(compiled)
+    return {path: value for path, value in zip(compiled._paths, values) if value is not _MISSING}
+
+# ---------------------------------------------------------------------------
+# Typed decoding
+# ---------------------------------------------------------------------------
+
+# Plans are built once per target class and reused by every parse
+_CLASS_PLANS = {}
+# Shapes built from the types argument of parse, by its items
+_TYPES_SHAPES = {}
+
+def _type_matches(value, shape):
+    if value is None:
+        return shape.nullable
+    if type(value) is bool and bool not in shape.types:
+        return False  # bool is an int subclass, but not a valid int field
+    return isinstance(value, shape.types)
+
+def _type_names(shape):
+    names = [t.__name__ for t in shape.types]
+    if shape.nullable:
+        names.append('null')
+    return ' or '.join(names)
+
+def _slot_names(cls):
+    """Return the names of the slots of cls and its bases."""
+    names = []
+    for klass in reversed(cls.__mro__):
+        slots = klass.__dict__.get('__slots__', ())
+        if isinstance(slots, str):
+            slots = (slots,)
+        for name in slots:
+            if name not in ('__dict__', '__weakref__') and name not in names:
+                names.append(name)
+    return names
+
+def _is_record_class(cls):
+    return isinstance(cls, type) and (
+        dataclasses.is_dataclass(cls)
+        or (issubclass(cls, tuple) and hasattr(cls, '_fields'))
+        or len(_slot_names(cls)) > 0)
+
+def _class_plan(cls, pending):
+    """
+    Return the plan for building instances of cls. Plans of classes used
+    in the annotations of its fields are built too; pending holds the plans
+    under construction so that recursive types terminate.
+    """
+    plan = _CLASS_PLANS.get(cls)
+    if plan is None:
+        plan = pending.get(cls)
+    if plan is not None:
+        return plan
+    if not _is_record_class(cls):
+        raise TypeError(f"{cls!r} is not a dataclass, NamedTuple or __slots__ class")
+    plan = _ClassPlan()
+    plan.cls = cls
+    plan.name = cls.__name__
+    plan.required = ()
+    plan.use_setattr = False
+    pending[cls] = plan
+    try:
+        hints = typing.get_type_hints(cls)
+    except Exception:
+        # Unresolvable forward references: use the raw annotations
+        hints = getattr(cls, '__annotations__', {})
+    if dataclasses.is_dataclass(cls):
+        names = [f.name for f in dataclasses.fields(cls) if f.init]
+    elif issubclass(cls, tuple):
+        names = list(cls._fields)
+    else:
+        names = _slot_names(cls)
+        plan.use_setattr = cls.__init__ is object.__init__
+        if plan.use_setattr:
+            plan.required = tuple(names)
+    plan.fields = {name: _annotation_shape(hints.get(name), f"{plan.name}.{name}", pending)
+                   for name in names}
+    return plan
+
+def _annotation_shape(annotation, label, pending):
+    """
+    Return the shape for a field annotation, or None if the field is not
+    checked (no annotation, Any, or a type that is not supported).
+    """
+    if annotation is None or annotation is typing.Any:
+        return None
+    origin = getattr(annotation, '__origin__', None)
+    args = getattr(annotation, '__args__', None) or ()
+    if origin is typing.Union or (_UnionType is not None and isinstance(annotation, _UnionType)):
+        others = [a for a in args if a is not type(None)]
+        if len(others) == 1:
+            shape = _annotation_shape(others[0], label, pending)
+        else:
+            shape = _Shape(label)
+            shape.types = ()
+            for other in others:
+                item = _annotation_shape(other, label, pending)
+                if item is None or item.types is None or item.has_children() or item.plan is not None:
+                    return None  # Only unions of plain types are checked
+                shape.types += item.types
+        if shape is not None:
+            shape.nullable = len(others) < len(args)
+        return shape
+    if origin is list or origin is dict:
+        shape = _Shape(label)
+        shape.types = (origin,)
+        if args and args[-1] is not typing.Any and not isinstance(args[-1], typing.TypeVar):
+            shape.any = _annotation_shape(args[-1], f"{label}[]", pending)
+        return shape
+    if origin is not None:
+        return None
+    if annotation is type(None):
+        shape = _Shape(label)
+        shape.types = ()
+        shape.nullable = True
+        return shape
+    if annotation is float:
+        shape = _Shape(label)
+        shape.types = (float, int)
+        return shape
+    if annotation in (int, str, bool, list, dict):
+        shape = _Shape(label)
+        shape.types = (annotation,)
+        return shape
+    if _is_record_class(annotation):
+        shape = _Shape(label)
+        shape.plan = _class_plan(annotation, pending)
+        shape.types = (annotation,)
+        return shape
+    return None
+
+def _path_shape(root, path):
+    """Return the shape for key path below root, adding it if needed."""
+    node = root
+    for component in _compile_path(path):
+        if component is _ANY:
+            if node.any is None:
+                node.any = _Shape(str(path))
+            node = node.any
+        else:
+            if node.children is None:
+                node.children = {}
+            child = node.children.get(component)
+            if child is None:
+                child = node.children[component] = _Shape(str(path))
+            node = child
+    return node
+
+def _types_shape(types, arrays):
+    """
+    Build the root shape for the types and arrays arguments of parse: a
+    class for the whole document, or a dict of key paths to classes, and
+    a dict of key paths to numeric array types.
+    """
+    if isinstance(types, type):
+        types = {'': types}
+    key = (tuple(types.items()) if types is not None else None,
+           tuple(arrays.items()) if arrays is not None else None)
+    root = _TYPES_SHAPES.get(key)
+    if root is not None:
+        return root
+    pending = {}
+    root = _Shape('document')
+    if types is not None:
+        for path, cls in types.items():
+            node = _path_shape(root, path)
+            if node.plan is not None:
+                raise ValueError(f"More than one type for key path {path!r}")
+            node.plan = _class_plan(cls, pending)
+            node.types = (cls,)
+    if arrays is not None:
+        for path, spec in arrays.items():
+            node = _path_shape(root, path)
+            if node.plan is not None or node.array is not None:
+                raise ValueError(f"More than one type for key path {path!r}")
+            node.array = _array_spec(spec, str(path))
+    # Only publish the plans once they are complete
+    _CLASS_PLANS.update(pending)
+    _TYPES_SHAPES[key] = root
+    return root
+
+# ---------------------------------------------------------------------------
+# Numeric arrays
+# ---------------------------------------------------------------------------
+
+_NUMERIC_TYPECODES = 'bBhHiIqQlLfd'
+# array.array typecode and itemsize of each (kind, itemsize)
+_ARRAY_TYPECODES = {}
+_ARRAY_ITEMSIZES = {}
+for _typecode in _NUMERIC_TYPECODES:
+    _ARRAY_ITEMSIZES[_typecode] = array(_typecode).itemsize
+    _ARRAY_TYPECODES.setdefault(
+        ('f' if _typecode in 'fd' else 'i' if _typecode.islower() else 'u',
+         _ARRAY_ITEMSIZES[_typecode]), _typecode)
+# Specs built from the arrays argument of parse when it is not a dict
+_GLOBAL_ARRAY_SPECS = {}
+# numpy.ndarray, once NumPy output has been requested (see _copy_value)
+_ndarray = None
+
+def _import_numpy():
+    global _ndarray
+    try:
+        import numpy
+    except ImportError:
+        raise ImportError("NumPy is required for numeric arrays of type 'numpy'") from None
+    _ndarray = numpy.ndarray
+    return numpy
+
+def _array_spec(spec, label):
+    """Build the spec for a value of the arrays argument of parse."""
+    result = _ArraySpec(label)
+    if spec is True or (isinstance(spec, str) and spec == 'array'):
+        return result
+    if isinstance(spec, str) and spec == 'numpy':
+        result.numpy = _import_numpy()
+        return result
+    if isinstance(spec, str) and len(spec) == 1:
+        if spec not in _NUMERIC_TYPECODES:
+            raise ValueError(f"Unsupported array typecode {spec!r}")
+        result.typecode = spec
+        result.kind = 'f' if spec in 'fd' else 'i' if spec.islower() else 'u'
+        result.itemsize = _ARRAY_ITEMSIZES[spec]
+    else:
+        result.numpy = _import_numpy()
+        result.dtype = result.numpy.dtype(spec)
+        if result.dtype.kind not in 'iuf':
+            raise ValueError(f"Unsupported dtype for a numeric array: {result.dtype}")
+        result.kind = result.dtype.kind
+        result.itemsize = result.dtype.itemsize
+        if result.kind == 'f' and result.itemsize != 4:
+            result.itemsize = 8  # Converted from float64 by the NumPy cast
+    if result.kind == 'u':
+        result.lo = 0
+        result.hi = (1 << (8 * result.itemsize)) - 1
+    elif result.kind == 'i' and result.itemsize < 8:
+        result.lo = -(1 << (8 * result.itemsize - 1))
+        result.hi = (1 << (8 * result.itemsize - 1)) - 1
+    return result
+
+def _global_array_spec(spec):
+    """Return the spec for arrays='array' or 'numpy'."""
+    result = _GLOBAL_ARRAY_SPECS.get(spec)
+    if result is None:
+        if not (spec is True or spec == 'array' or spec == 'numpy'):
+            raise ValueError(f"arrays must be 'array', 'numpy' or a dict of key paths, not {spec!r}")
+        result = _GLOBAL_ARRAY_SPECS[spec] = _array_spec(spec, 'array')
+    return result
+
+def _narrowest_int(lo, hi):
+    """Return the (kind, itemsize) of the narrowest integer type holding lo..hi."""
+    if lo >= 0:
+        if hi <= 0xFF:
+            return 'u', 1
+        if hi <= 0xFFFF:
+            return 'u', 2
+        if hi <= 0xFFFFFFFF:
+            return 'u', 4
+        return 'u', 8
+    if lo >= -0x80 and hi <= 0x7F:
+        return 'i', 1
+    if lo >= -0x8000 and hi <= 0x7FFF:
+        return 'i', 2
+    if lo >= -0x80000000 and hi <= 0x7FFFFFFF:
+        return 'i', 4
+    return 'i', 8
+
+# ---------------------------------------------------------------------------
+# JSON Schema validation
+# ---------------------------------------------------------------------------
+
+# JSON Schema type names and their T_* bits
+_JSON_TYPES = {
+    'null': T_NULL, 'boolean': T_BOOLEAN, 'integer': T_INTEGER,
+    'number': T_INTEGER | T_NUMBER, 'string': T_STRING, 'array': T_ARRAY, 'object': T_OBJECT,
+}
+
+# Keywords that check values; a schema with $ref and none of these is the
+# referenced schema itself
+_VALIDATION_KEYWORDS = frozenset([
+    'type', 'enum', 'const', 'minLength', 'maxLength', 'pattern', 'minimum', 'maximum',
+    'exclusiveMinimum', 'exclusiveMaximum', 'multipleOf', 'properties', 'patternProperties',
+    'additionalProperties', 'required', 'minProperties', 'maxProperties', 'items',
+    'prefixItems', 'additionalItems', 'minItems', 'maxItems', 'uniqueItems', 'allOf',
+    'anyOf', 'oneOf', 'not',
+])
+
+# Keywords that do not check values: identifiers, definitions for $ref and
+# annotations. Any other keyword makes compile_schema raise ValueError, so
+# that a schema is never applied only in part.
+_IGNORED_KEYWORDS = frozenset([
+    '$schema', '$id', 'id', '$anchor', '$ref', '$defs', 'definitions', '$comment',
+    'title', 'description', 'default', 'examples', 'deprecated', 'readOnly', 'writeOnly',
+])
+
+class Schema:
+    """
+    A JSON Schema compiled by compile_schema, for parse(schema=...).
+    Compiled schemas are immutable and can be shared between threads.
+    """
+    __slots__ = ('_root', '_schema', '_fail_fast')
+
+    @property
+    def schema(self):
+        return self._schema
+
+    @property
+    def fail_fast(self):
+        return self._fail_fast
+
+    def validate(self, value):
+        """
+        Check an already decoded value against the schema.
+
+        Raises:
+        - TJSON5ValidationError for the first failure, with every failure
+          in its errors attribute unless the schema is fail_fast. These
+          errors have no source location.
+        """
+        errors = []
+        self._root.validate(value, [], errors, self._fail_fast)
+        if errors:
+            exceptions = [TJSON5ValidationError(
+                f"Schema validation failed: {_format_path(path)}: {message}", path=path)
+                for path, message in errors]
+            for error in exceptions:
+                error.errors = exceptions
+            raise exceptions[0]
+
+    def is_valid(self, value):
+        """Return True if an already decoded value matches the schema."""
+        return self._root.is_valid(value)
+
+def compile_schema(schema, fail_fast=False):
+    """
+    Compile a JSON Schema for validating documents while they are parsed.
+
+    Supported keywords: type, enum, const, minLength, maxLength, pattern,
+    minimum, maximum, exclusiveMinimum, exclusiveMaximum (as numbers or,
+    as in draft 4, booleans), multipleOf, properties, patternProperties,
+    additionalProperties, required, minProperties, maxProperties, items
+    (a schema or, before draft 2020-12, a list), prefixItems,
+    additionalItems, minItems, maxItems, uniqueItems, allOf, anyOf, oneOf,
+    not, and $ref to the schema itself or to its definitions ("#",
+    "#/$defs/name", "#/definitions/name"). The annotations title,
+    description, $comment, default, examples, deprecated, readOnly and
+    writeOnly are ignored, as are $schema, $id, $anchor, $defs and
+    definitions. Any other keyword, such as contains, propertyNames,
+    dependentRequired, if or format, raises ValueError.
+
+    The decoder checks each value as it is built, so failures report the
+    line and column of the value in the source. allOf, anyOf, oneOf and
+    not are checked on the decoded value (after object_hook) and their
+    failures point at the start of that value.
+
+    Parameters:
+    - schema: The schema, as a dict (or a boolean)
+    - fail_fast: Stop parsing at the first failure instead of collecting
+      every failure in the document
+
+    Returns:
+    - A Schema, to pass as parse(schema=...) or to check decoded values
+      with its validate() method
+
+    Raises:
+    - ValueError or TypeError if the schema is invalid or uses an
+      unsupported keyword or $ref
+    """
+    compiled = Schema.__new__(Schema)
+    compiled._schema = schema
+    compiled._fail_fast = bool(fail_fast)
+    compiled._root = _schema_node(schema, schema, {})
+    return compiled
+
+def _resolve_ref(root, ref):
+    """Return the part of root that the local reference ref points to."""
+    if ref != '#' and not ref.startswith('#/'):
+        raise ValueError(f"Unsupported $ref {ref!r}: only local references are supported")
+    target = root
+    for part in ref[2:].split('/') if ref != '#' else ():
+        part = part.replace('~1', '/').replace('~0', '~')
+        try:
+            target = target[int(part) if isinstance(target, list) else part]
+        except (KeyError, IndexError, ValueError, TypeError):
+            raise ValueError(f"Unresolvable $ref {ref!r}")
+    return target
+
+def _schema_node(schema, root, pending):
+    """
+    Compile schema, a part of root. pending maps the id of each schema
+    already compiled to its node, so that recursive references terminate.
+    """
+    if schema is True or schema is False:
+        node = _SchemaNode()
+        node.never = schema is False
+        return node
+    if not isinstance(schema, Mapping):
+        raise TypeError(f"Schema must be an object or a boolean, not {type(schema).__name__}")
+    node = pending.get(id(schema))
+    if node is not None:
+        return node
+    for key in schema:
+        if key not in _VALIDATION_KEYWORDS and key not in _IGNORED_KEYWORDS:
+            raise ValueError(f"Unsupported keyword {key!r} in schema")
+    ref = schema.get('$ref')
+    if ref is not None and _VALIDATION_KEYWORDS.isdisjoint(schema):
+        node = _schema_node(_resolve_ref(root, ref), root, pending)
+        pending[id(schema)] = node
+        return node
+    node = _SchemaNode()
+    pending[id(schema)] = node
+
+    types = schema.get('type')
+    if types is not None:
+        for name in ([types] if isinstance(types, str) else types):
+            if name not in _JSON_TYPES:
+                raise ValueError(f"Unknown type {name!r} in schema")
+            node.types |= _JSON_TYPES[name]
+    if 'enum' in schema:
+        node.enum = tuple(schema['enum'])
+    if 'const' in schema:
+        node.enum = (schema['const'],)
+
+    node.min_length = schema.get('minLength', -1)
+    node.max_length = schema.get('maxLength', -1)
+    if 'pattern' in schema:
+        try:
+            node.pattern = re.compile(schema['pattern'])
+        except re.error as e:
+            raise ValueError(f"Invalid pattern {schema['pattern']!r} in schema: {e}")
+
+    node.minimum = schema.get('minimum')
+    node.maximum = schema.get('maximum')
+    node.exclusive_minimum = schema.get('exclusiveMinimum')
+    node.exclusive_maximum = schema.get('exclusiveMaximum')
+    # Draft 4: exclusiveMinimum and exclusiveMaximum modify minimum and maximum
+    if type(node.exclusive_minimum) is bool:
+        if node.exclusive_minimum:
+            node.exclusive_minimum, node.minimum = node.minimum, None
+        else:
+            node.exclusive_minimum = None
+    if type(node.exclusive_maximum) is bool:
+        if node.exclusive_maximum:
+            node.exclusive_maximum, node.maximum = node.maximum, None
+        else:
+            node.exclusive_maximum = None
+    node.multiple_of = schema.get('multipleOf')
+    node.has_bounds = (node.minimum is not None or node.maximum is not None
+                       or node.exclusive_minimum is not None or node.exclusive_maximum is not None
+                       or node.multiple_of is not None)
+
+    if 'properties' in schema:
+        node.properties = {key: _schema_node(value, root, pending)
+                           for key, value in schema['properties'].items()}
+    if 'patternProperties' in schema:
+        node.pattern_properties = [(re.compile(key), _schema_node(value, root, pending))
+                                   for key, value in schema['patternProperties'].items()]
+    node.additional = _member_node(schema.get('additionalProperties', True), root, pending)
+    node.required = tuple(schema.get('required', ()))
+    node.min_properties = schema.get('minProperties', -1)
+    node.max_properties = schema.get('maxProperties', -1)
+    node.object_checks = (node.properties is not None or node.pattern_properties is not None
+                          or node.additional is not None or len(node.required) > 0
+                          or node.min_properties >= 0 or node.max_properties >= 0)
+
+    items = schema.get('items', True)
+    if isinstance(items, list):
+        # Before draft 2020-12: a schema per index, then additionalItems
+        node.prefix_items = [_schema_node(item, root, pending) for item in items]
+        node.items = _member_node(schema.get('additionalItems', True), root, pending)
+    else:
+        if 'prefixItems' in schema:
+            node.prefix_items = [_schema_node(item, root, pending) for item in schema['prefixItems']]
+        node.items = _member_node(items, root, pending)
+    node.min_items = schema.get('minItems', -1)
+    node.max_items = schema.get('maxItems', -1)
+    node.unique_items = bool(schema.get('uniqueItems', False))
+    node.array_checks = (node.prefix_items is not None or node.items is not None
+                         or node.min_items >= 0 or node.max_items >= 0 or node.unique_items)
+
+    if 'allOf' in schema:
+        node.all_of = [_schema_node(item, root, pending) for item in schema['allOf']]
+    if ref is not None:
+        # $ref next to other keywords applies in addition to them
+        if node.all_of is None:
+            node.all_of = []
+        node.all_of.append(_schema_node(_resolve_ref(root, ref), root, pending))
+    if 'anyOf' in schema:
+        node.any_of = [_schema_node(item, root, pending) for item in schema['anyOf']]
+    if 'oneOf' in schema:
+        node.one_of = [_schema_node(item, root, pending) for item in schema['oneOf']]
+    if 'not' in schema:
+        node.negated = _schema_node(schema['not'], root, pending)
+    node.combinators = (node.all_of is not None or node.any_of is not None
+                        or node.one_of is not None or node.negated is not None)
+    return node
+
+def _member_node(schema, root, pending):
+    """Compile the schema of object members or array items; None if any value is valid."""
+    if schema is True:
+        return None
+    return _schema_node(schema, root, pending)
+
+def _value_type(value):
+    """Return the T_* bit of a decoded value, or 0 if it is not a JSON value."""
+    if value is None:
+        return T_NULL
+    t = type(value)
+    if t is str:
+        return T_STRING
+    if t is bool:
+        return T_BOOLEAN
+    if t is int:
+        return T_INTEGER
+    if t is float:
+        return T_INTEGER if value.is_integer() else T_NUMBER
+    if t is dict or isinstance(value, Mapping):
+        return T_OBJECT
+    if t is list or isinstance(value, (tuple, array)):
+        return T_ARRAY
+    if isinstance(value, int):
+        return T_INTEGER
+    if isinstance(value, (float, Decimal)):
+        return T_INTEGER if value == int(value) else T_NUMBER
+    if isinstance(value, str):
+        return T_STRING
+    return 0
+
+def _json_type_names(types):
+    names = []
+    for name, bits in _JSON_TYPES.items():
+        if name == 'number':
+            if types & T_NUMBER:
+                names.append(name)
+        elif types & bits and not (name == 'integer' and types & T_NUMBER):
+            names.append(name)
+    return ' or '.join(names)
+
+def _json_equal(a, b):
+    # true and 1 are different JSON values, even though True == 1
+    if (type(a) is bool) != (type(b) is bool):
+        return False
+    return a == b
+
+def _in_enum(value, values):
+    for other in values:
+        if _json_equal(value, other):
+            return True
+    return False
+
+def _has_duplicates(items):
+    try:
+        return len({(type(item) is bool, item) for item in items}) != len(items)
+    except TypeError:  # Unhashable items: compare every pair
+        items = list(items)
+        for i in range(len(items)):
+            for j in range(i):
+                if _json_equal(items[i], items[j]):
+                    return True
+        return False
+
+def _format_path(path):
+    """Format a key path in the syntax of items(), e.g. "parts[0].name"."""
+    parts = []
+    if not path:
+        return 'document'
+    for component in path:
+        if isinstance(component, int):
+            parts.append(f"[{component}]")
+        elif component and component.isidentifier():
+            parts.append(f".{component}" if parts else component)
+        else:
+            parts.append(f"[{component!r}]")
+    return ''.join(parts)
+
+# ---------------------------------------------------------------------------
+# Event-based (streaming) parsing
+# ---------------------------------------------------------------------------
+
+# Returned by _EventParser.next_event when the document is complete
+_END = object()
+
+class _EventParser:
+    """
+    Push-style event parser over a bounded text buffer.
+
+    Text is added with feed() and the end of input is signalled with
+    close(). next_event() returns the next (path, event, value) tuple, None
+    if more input is needed to complete the next token, or _END at the end
+    of the document. Tokens that are cut off by the end of the buffer
+    (strings, triple-quoted strings, comments, numbers) are retried once
+    enough input has arrived, and consumed input is dropped from the buffer,
+    so memory is bounded by the largest single token.
+    """
+    __slots__ = ('decoder', 'buf', 'pos', 'pending', 'pending_length', 'need', 'eof',
+                 'started', 'state', 'stack', 'path')
+
+    def __init__(self):
+        self.decoder = _Decoder('')
+        self.buf = ''
+        self.pos = 0
+        self.pending = []
+        self.pending_length = 0
+        self.need = 0
+        self.eof = False
+        self.started = False
+        self.state = ST_VALUE
+        self.stack = []
+        self.path = []
+
+    def feed(self, text):
+        """Add text to the input."""
+        if self.eof:
+            raise TJSON5ParseError("Cannot feed data after close()")
+        if text:
+            self.pending.append(text)
+            self.pending_length += len(text)
+
+    def close(self):
+        """Mark the end of input."""
+        self.eof = True
+
+    def compact(self):
+        """Drop consumed text and append pending input to the buffer."""
+        decoder = self.decoder
+        if self.pos:
+            # Keep track of where the buffer starts for error locations
+            newlines = self.buf.count('\n', 0, self.pos)
+            if newlines:
+                decoder.line_offset += newlines
+                decoder.col_offset = self.pos - self.buf.rfind('\n', 0, self.pos) - 1
+            else:
+                decoder.col_offset += self.pos
+            decoder.offset += self.pos
+        self.pending.insert(0, self.buf[self.pos:])
+        self.buf = "".join(self.pending)
+        self.pending = []
+        self.pending_length = 0
+        self.pos = 0
+        decoder.set_text(self.buf)
+
+    def skip_ws(self):
+        """
+        Skip whitespace and comments. Returns True if a comment is cut off
+        by the end of the buffer and more input is needed.
+        """
+        d = self.decoder
+        buf = self.buf
+        while True:
+            self.pos = _SPACES(buf, self.pos).end()
+            if not buf.startswith('/', self.pos):
+                return False
+            if buf.startswith('//', self.pos):
+                end = buf.find('\n', self.pos + 2)
+                if end < 0:
+                    if not self.eof:
+                        return True
+                    end = d.length
+                self.pos = end
+            elif buf.startswith('/*', self.pos):
+                end = buf.find('*/', self.pos + 2)
+                if end < 0:
+                    if not self.eof:
+                        return True
+                    d.error("Unterminated comment", self.pos)
+                self.pos = end + 2
+            elif self.pos + 1 >= d.length and not self.eof:
+                return True
+            else:
+                return False
+
+    def token_end(self, start):
+        """
+        Return the end of the scalar token or key starting at start, or -1
+        if it may continue past the end of the buffer.
+        """
+        buf = self.buf
+        length = self.decoder.length
+        i = start + 1
+        if self.eof:
+            return length
+        quote = buf[start]
+        if quote == '"' or quote == "'":
+            if buf.startswith('""', start):
+                if start + 2 >= length:
+                    return -1  # Could still become a triple-quoted string
+                if buf.startswith('"""', start):
+                    end = buf.find('"""', start + 3)
+                    return -1 if end < 0 else end + 3
+            run = _STRING_RUNS[quote]
+            while True:
+                i = run(buf, i).end()
+                if i >= length:
+                    return -1
+                c = buf[i]
+                if c == '\\':
+                    i += 2
+                elif c == quote or c == '\n':
+                    return i + 1
+                else:
+                    i += 1  # A lone '\r' does not end the token
+        # Numbers, literals and unquoted keys run until a delimiter
+        while i < length:
+            c = buf[i]
+            if not (_is_ident_part(c) or c == '.' or c == '+' or c == '-'):
+                return i
+            i += 1
+        return -1
+
+    def end_value(self):
+        """Set the state that follows a complete value."""
+        if not self.stack:
+            self.state = ST_DONE
+        elif self.stack[-1] is dict:
+            self.state = ST_MAP_NEXT
+        else:
+            self.state = ST_ARRAY_NEXT
+
+    def end_container(self, event):
+        self.pos += 1
+        self.stack.pop()
+        self.path.pop()
+        self.end_value()
+        return (tuple(self.path), event, None)
+
+    def next_event(self):
+        d = self.decoder
+        available = len(self.buf) - self.pos + self.pending_length
+        # Wait until enough input arrived to retry an incomplete token, which
+        # keeps the rescanning of long tokens linear overall
+        if available < self.need and not self.eof:
+            return None
+        if self.pending_length:
+            self.compact()
+        self.need = 0
+        while True:
+            if self.skip_ws():
+                return self.incomplete()
+            if self.pos >= d.length:
+                if not self.eof:
+                    return self.incomplete()
+                if self.state == ST_DONE:
+                    return _END
+                if not self.started:
+                    raise TJSON5ParseError("Empty or invalid input")
+                d.error("Unexpected end of data", self.pos)
+            c = self.buf[self.pos]
+            if self.state == ST_DONE:
+                d.error("Extra data", self.pos)
+            if self.state == ST_MAP_COLON:
+                if c != ':':
+                    d.error("Expecting ':' delimiter", self.pos)
+                self.pos += 1
+                self.state = ST_VALUE
+                continue
+            if self.state == ST_MAP_NEXT or self.state == ST_ARRAY_NEXT:
+                if c == ',':
+                    self.pos += 1
+                    self.state = ST_MAP_KEY if self.state == ST_MAP_NEXT else ST_ARRAY_VALUE
+                    continue
+                if c == '}' and self.state == ST_MAP_NEXT:
+                    return self.end_container('end_map')
+                if c == ']' and self.state == ST_ARRAY_NEXT:
+                    return self.end_container('end_array')
+                d.error("Expecting ',' delimiter", self.pos)
+            if self.state == ST_MAP_KEY:
+                if c == '}':
+                    return self.end_container('end_map')
+                if self.token_end(self.pos) < 0:
+                    return self.incomplete()
+                d.pos = self.pos
+                key = d.decode_key()
+                self.pos = d.pos
+                self.path[-1] = key
+                self.state = ST_MAP_COLON
+                return (tuple(self.path[:-1]), 'map_key', key)
+            if self.state == ST_ARRAY_VALUE and c == ']':
+                return self.end_container('end_array')
+            # A value
+            if c == '{' or c == '[':
+                if self.stack and self.stack[-1] is list:
+                    self.path[-1] += 1
+                self.started = True
+                self.pos += 1
+                event = (tuple(self.path), 'start_map' if c == '{' else 'start_array', None)
+                if c == '{':
+                    self.stack.append(dict)
+                    self.path.append(None)
+                    self.state = ST_MAP_KEY
+                else:
+                    self.stack.append(list)
+                    self.path.append(-1)
+                    self.state = ST_ARRAY_VALUE
+                return event
+            if self.token_end(self.pos) < 0:
+                return self.incomplete()
+            if self.stack and self.stack[-1] is list:
+                self.path[-1] += 1
+            self.started = True
+            value = d.decode_scalar(self.pos)
+            self.pos = d.pos
+            self.end_value()
+            return (tuple(self.path), 'value', value)
+
+    def incomplete(self):
+        """Ask for more input before the token at pos is retried."""
+        self.need = 2 * (len(self.buf) - self.pos)
+        return None
+
+    def next_document(self):
+        """
+        Start the next document of a stream and decode it in one go if it
+        is complete in the buffer. Returns its value, _END at the end of
+        input, or _MISSING if more input is needed or the document may be
+        cut off by the end of the buffer; next_event() then reads it.
+        """
+        d = self.decoder
+        available = len(self.buf) - self.pos + self.pending_length
+        if available < self.need and not self.eof:
+            return _MISSING
+        if self.pending_length:
+            self.compact()
+        self.need = 0
+        self.state = ST_VALUE
+        self.started = False
+        if self.skip_ws():
+            self.incomplete()
+            return _MISSING
+        if self.pos >= d.length:
+            if self.eof:
+                return _END
+            self.incomplete()
+            return _MISSING
+        c = self.buf[self.pos]
+        if c == '{' or c == '[':
+            # A complete object or array ends with its closing bracket, so
+            # nothing in it can have been cut off by the end of the buffer
+            try:
+                value = d.decode_value_at(self.pos)
+            except TJSON5ParseError:
+                if self.eof:
+                    raise
+                return _MISSING
+            except RecursionError:
+                d.error("Maximum nesting depth exceeded", self.pos)
+            self.pos = d.pos
+            return value
+        if self.token_end(self.pos) < 0:
+            self.incomplete()
+            return _MISSING
+        value = d.decode_scalar(self.pos)
+        self.pos = d.pos
+        return value
+
+def _read_chunks(source, chunk_size, encoding):
+    """
+    Yield the text of source in chunks of about chunk_size characters.
+
+    source may be a string, a bytes-like object (bytes, bytearray,
+    memoryview, mmap) or a file object opened in text or binary mode.
+    Raw input is decoded incrementally, with the encoding detected from the
+    byte order mark or null-byte pattern unless one is given.
+    """
+    if isinstance(source, str):
+        for start in range(0, len(source), chunk_size):
+            yield source[start:start + chunk_size]
+        return
+    if hasattr(source, 'read'):
+        read = source.read
+    else:
+        view = memoryview(source).cast('B')
+        offsets = iter(range(0, len(view), chunk_size))
+        read = lambda size: view[next(offsets, len(view)):][:size]
+    data = read(chunk_size)
+    if isinstance(data, str):
+        while data:
+            yield data
+            data = read(chunk_size)
+        return
+    # Raw input: detect the encoding from the first few bytes
+    data = bytes(data)
+    while 0 < len(data) < 4:
+        more = read(chunk_size)
+        if not more:
+            break
+        data += more
+    detected, bom_length = _sniff_encoding(data) if data else (None, 0)
+    decoder = codecs.getincrementaldecoder(encoding or detected or 'utf-8')('strict')
+    data = data[bom_length:]
+    try:
+        while data:
+            text = decoder.decode(data)
+            if text:
+                yield text
+            data = read(chunk_size)
+        yield decoder.decode(b'', True)
+    except UnicodeDecodeError as e:
+        raise TJSON5ParseError(f"Encoding error: {e}")
+
+class Parser:
+    """
+    Push parser for Triple-JSON5 input that arrives in pieces, e.g. from a
+    socket or an asyncio stream.
+
+    Input is added with feed() as it arrives and the end of input is
+    marked with close(). events() returns the (path, event, value) tuples
+    completed so far (see iterparse). State is kept across chunk
+    boundaries, so a chunk may end anywhere, including inside a string, a
+    triple-quoted string, a comment or a number:
+
+        parser = tjson5.Parser()
+        for chunk in chunks:
+            parser.feed(chunk)
+            for path, event, value in parser.events():
+                ...
+        parser.close()
+        for path, event, value in parser.events():
+            ...
+
+    Parameters:
+    - encoding: Encoding of raw (bytes) input; detected from the byte order
+      mark or null-byte pattern by default, falling back to utf-8
+    """
+    __slots__ = ('_parser', '_encoding', '_decoder', '_head', '_binary', '_finished')
+
+    def __init__(self, encoding=None):
+        self._parser = _EventParser()
+        self._encoding = encoding
+        self._decoder = None
+        self._head = b''
+        self._binary = None
+        self._finished = False
+
+    def feed(self, data):
+        """
+        Add the next piece of input: a string, or a bytes-like object that
+        is decoded incrementally. All pieces must be of the same kind.
+
+        Raises:
+        - TJSON5ParseError if called after close() or if the input cannot be decoded
+        """
+        if self._parser.eof:
+            raise TJSON5ParseError("Cannot feed data after close()")
+        if isinstance(data, str):
+            if self._binary is True:
+                raise TypeError("Cannot feed str after bytes input")
+            self._binary = False
+            self._parser.feed(data)
+            return
+        if self._binary is False:
+            raise TypeError(f"Cannot feed {type(data).__name__} after str input")
+        self._binary = True
+        data = bytes(data)
+        if self._decoder is None:
+            # Detect the encoding from the first few bytes
+            self._head += data
+            if len(self._head) < 4:
+                return
+            data = self._start_decoding()
+        self._decode(data, False)
+
+    def close(self):
+        """
+        Mark the end of input. The remaining events, or the error for a
+        truncated document, are returned by the next call to events().
+        """
+        if self._parser.eof:
+            return
+        if self._binary is True:
+            data = self._start_decoding() if self._decoder is None else b''
+            self._decode(data, True)
+        self._parser.close()
+
+    def events(self):
+        """
+        Return the list of events completed by the input so far. Events are
+        returned once; a token cut off by the end of the input is returned
+        by a later call, once enough input has been fed.
+
+        Raises:
+        - TJSON5ParseError if the document is invalid
+        """
+        events = []
+        if self._finished:
+            return events
+        while True:
+            event = self._parser.next_event()
+            if event is None:
+                return events
+            if event is _END:
+                self._finished = True
+                return events
+            events.append(event)
+
+    @property
+    def done(self):
+        """True once the whole document has been parsed and returned by events()."""
+        return self._finished
+
+    def _start_decoding(self):
+        """Create the incremental decoder and return the buffered input past the BOM."""
+        data = self._head
+        detected, bom_length = _sniff_encoding(data) if data else (None, 0)
+        self._decoder = codecs.getincrementaldecoder(self._encoding or detected or 'utf-8')('strict')
+        self._head = b''
+        return data[bom_length:]
+
+    def _decode(self, data, final):
+        try:
+            text = self._decoder.decode(data, final)
+        except UnicodeDecodeError as e:
+            raise TJSON5ParseError(f"Encoding error: {e}")
+        self._parser.feed(text)
+
+DEFAULT_CHUNK_SIZE = 65536
+
+def iterparse(source, chunk_size=DEFAULT_CHUNK_SIZE, encoding=None):
+    """
+    Parse a Triple-JSON5 document incrementally and yield parse events.
+
+    Parameters:
+    - source: A file object (text or binary), a string or a bytes-like
+      object (bytes, bytearray, memoryview, mmap)
+    - chunk_size: Number of characters or bytes read at a time
+    - encoding: Encoding of raw input; detected from the byte order mark
+      or null-byte pattern by default, falling back to utf-8
+
+    Yields (path, event, value) tuples, where path is a tuple of the keys
+    and array indices leading to the value and event is one of
+    'start_map', 'map_key', 'end_map', 'start_array', 'end_array' and
+    'value'. For 'map_key' events, path is the path of the enclosing
+    object and value is the key. Only one chunk of input plus the token
+    being read is held in memory at a time.
+
+    Raises:
+    - TJSON5ParseError if the document is invalid
+    """
+    parser = _EventParser()
+    chunks = _read_chunks(source, chunk_size, encoding)
+    while True:
+        event = parser.next_event()
+        if event is None:
+            chunk = next(chunks, None)
+            if chunk is None:
+                parser.close()
+            else:
+                parser.feed(chunk)
+        elif event is _END:
+            return
+        else:
+            yield event
+
+def items(source, prefix, chunk_size=DEFAULT_CHUNK_SIZE, encoding=None):
+    """
+    Incrementally parse a Triple-JSON5 document and yield the values found
+    at the given key path, e.g. "parts[*]" or "pins.config".
+
+    Only the value being built is kept in memory, so large documents can
+    be processed one record at a time. See iterparse for the parameters.
+    """
+    pattern = _compile_path(prefix)
+    containers = []
+    keys = []
+    for path, event, value in iterparse(source, chunk_size, encoding):
+        if not containers:
+            if event == 'map_key' or event == 'end_map' or event == 'end_array':
+                continue
+            if not _path_matches(pattern, path):
+                continue
+            if event == 'value':
+                yield value
+                continue
+        if event == 'map_key':
+            keys[-1] = value
+            continue
+        if event == 'end_map' or event == 'end_array':
+            # Nested containers were attached to their parent at the start
+            value = containers.pop()
+            keys.pop()
+            if not containers:
+                yield value
+            continue
+        if event == 'start_map' or event == 'start_array':
+            new = {} if event == 'start_map' else []
+            if containers:
+                _attach(containers[-1], keys[-1], new)
+            containers.append(new)
+            keys.append(None)
+            continue
+        _attach(containers[-1], keys[-1], value)
+
+def iter_documents(source, chunk_size=DEFAULT_CHUNK_SIZE, encoding=None):
+    """
+    Parse a stream of Triple-JSON5 documents and yield their values one at
+    a time.
+
+    The documents may simply follow each other or be separated by
+    whitespace, newlines (TJSON5-Lines, one document per line) or
+    comments; each may span several lines, e.g. with triple-quoted
+    strings. The same scanner is used for every document, each one that is
+    complete in the buffer is decoded in a single pass, and consumed input
+    is dropped as the stream is read, so memory is bounded by the chunk
+    size and the largest document. An empty stream yields nothing. See
+    iterparse for the parameters.
+
+    Raises:
+    - TJSON5ParseError if a document is invalid, after yielding those
+      before it
+    """
+    parser = _EventParser()
+    containers = []
+    keys = []
+    chunks = _read_chunks(source, chunk_size, encoding)
+    while True:
+        if not containers:
+            value = parser.next_document()
+            if value is _END:
+                return
+            if value is not _MISSING:
+                yield value
+                continue
+        # A document cut off by the end of the buffer is built from events
+        event = parser.next_event()
+        if event is None:
+            chunk = next(chunks, None)
+            if chunk is None:
+                parser.close()
+            else:
+                parser.feed(chunk)
+            continue
+        _, kind, value = event
+        if kind == 'map_key':
+            keys[-1] = value
+        elif kind == 'end_map' or kind == 'end_array':
+            value = containers.pop()
+            keys.pop()
+            if not containers:
+                yield value
+        elif kind == 'start_map' or kind == 'start_array':
+            new = {} if kind == 'start_map' else []
+            if containers:
+                _attach(containers[-1], keys[-1], new)
+            containers.append(new)
+            keys.append(None)
+        else:
+            _attach(containers[-1], keys[-1], value)
+
+def _attach(container, key, value):
+    if type(container) is dict:
+        container[key] = value
+    else:
+        container.append(value)
+
+# ---------------------------------------------------------------------------
+# Serialization
+# ---------------------------------------------------------------------------
+
+# dump() writes to the file object whenever this many characters are pending
+WRITE_CHUNK_SIZE = 65536
+
+# Control characters other than '\n' and '\t', which triple-quoted strings cannot hold
+_TRIPLE_UNSAFE = re.compile('[\x00-\x08\x0b-\x1f]').search
+
+def _is_identifier(key):
+    if not key or not _is_ident_start(key[0]):
+        return False
+    for c in key[1:]:
+        if not _is_ident_part(c):
+            return False
+    return True
+
+def _float_repr(o):
+    if o != o:
+        return 'NaN'
+    if o == POS_INF:
+        return 'Infinity'
+    if o == NEG_INF:
+        return '-Infinity'
+    return float.__repr__(o)
+
+class _Encoder:
+    """
+    Serializer writing TJSON5 (or, with the default options, standard
+    JSON identical to json.dumps) as a list of string parts. When a write
+    function is set, the parts are flushed to it in chunks.
+    """
+    __slots__ = ('parts', 'pending', 'write', 'indent', 'key_separator', 'item_separator',
+                 'ensure_ascii', 'triple_quotes', 'unquoted_keys', 'trailing_commas',
+                 'hex_patterns', 'path', 'markers')
+
+    def __init__(self, indent, ensure_ascii, triple_quotes, unquoted_keys,
+                 hex_paths, trailing_commas, write=None):
+        if indent is not None and not isinstance(indent, str):
+            indent = ' ' * indent
+        self.indent = indent
+        self.key_separator = ': '
+        self.item_separator = ',' if indent is not None else ', '
+        self.ensure_ascii = ensure_ascii
+        self.triple_quotes = triple_quotes
+        self.unquoted_keys = unquoted_keys
+        self.trailing_commas = trailing_commas
+        self.hex_patterns = [_compile_path(p) for p in hex_paths] if hex_paths else None
+        self.path = [] if hex_paths else None
+        self.markers = {}
+        self.parts = []
+        self.pending = 0
+        self.write = write
+
+    def emit(self, s):
+        self.parts.append(s)
+        if self.write is not None:
+            self.pending += len(s)
+            if self.pending >= WRITE_CHUNK_SIZE:
+                self.flush()
+
+    def flush(self):
+        if self.parts:
+            self.write(''.join(self.parts))
+            self.parts = []
+        self.pending = 0
+
+    def getvalue(self):
+        return ''.join(self.parts)
+
+    def encode_string(self, s):
+        if self.triple_quotes and '\n' in s and '"""' not in s and not s.endswith('"') \
+                and (not self.ensure_ascii or s.isascii()) and _TRIPLE_UNSAFE(s) is None:
+            return '"""' + s + '"""'
+        if self.ensure_ascii:
+            return encode_basestring_ascii(s)
+        return encode_basestring(s)
+
+    def encode_key(self, key):
+        if isinstance(key, str):
+            if self.unquoted_keys and _is_identifier(key):
+                return key
+            return self.encode_string(key)
+        # Non-string keys are converted as by json
+        if isinstance(key, float):
+            key = _float_repr(key)
+        elif key is True:
+            key = 'true'
+        elif key is False:
+            key = 'false'
+        elif key is None:
+            key = 'null'
+        elif isinstance(key, int):
+            key = int.__repr__(key)
+        else:
+            raise TypeError(f"keys must be str, int, float, bool or None, "
+                            f"not {key.__class__.__name__}")
+        return self.encode_string(key)
+
+    def encode_int(self, o):
+        if self.hex_patterns is not None:
+            path = tuple(self.path)
+            for pattern in self.hex_patterns:
+                if _path_matches(pattern, path):
+                    return f"-0x{-o:X}" if o < 0 else f"0x{o:X}"
+        return int.__repr__(o)
+
+    def encode_value(self, o, level):
+        if isinstance(o, str):
+            self.emit(self.encode_string(o))
+        elif o is None:
+            self.emit('null')
+        elif o is True:
+            self.emit('true')
+        elif o is False:
+            self.emit('false')
+        elif isinstance(o, int):
+            self.emit(self.encode_int(o))
+        elif isinstance(o, float):
+            self.emit(_float_repr(o))
+        elif isinstance(o, (list, tuple)):
+            self.encode_array(o, level)
+        elif isinstance(o, (dict, Mapping)):
+            self.encode_object(o, level)
+        elif isinstance(o, array):
+            # Numeric arrays from parse(arrays=...)
+            self.encode_array(o, level)
+        elif hasattr(o, 'tolist') and hasattr(o, 'dtype'):
+            # numpy.ndarray (nested lists for several dimensions) and numpy scalars
+            self.encode_value(o.tolist(), level)
+        else:
+            raise TypeError(f"Object of type {o.__class__.__name__} is not TJSON5 serializable")
+
+    def enter(self, o):
+        marker = id(o)
+        if marker in self.markers:
+            raise ValueError("Circular reference detected")
+        self.markers[marker] = o
+
+    def leave(self, o):
+        del self.markers[id(o)]
+
+    def encode_array(self, o, level):
+        if not o:
+            self.emit('[]')
+            return
+        self.enter(o)
+        try:
+            if self.indent is not None:
+                newline_indent = '\n' + self.indent * (level + 1)
+                separator = self.item_separator + newline_indent
+                self.emit('[' + newline_indent)
+            else:
+                separator = self.item_separator
+                self.emit('[')
+            for index, item in enumerate(o):
+                if index:
+                    self.emit(separator)
+                if self.path is not None:
+                    self.path.append(index)
+                self.encode_value(item, level + 1)
+                if self.path is not None:
+                    self.path.pop()
+            self.close_container(']', level)
+        finally:
+            self.leave(o)
+
+    def encode_object(self, o, level):
+        if not o:
+            self.emit('{}')
+            return
+        self.enter(o)
+        try:
+            if self.indent is not None:
+                newline_indent = '\n' + self.indent * (level + 1)
+                separator = self.item_separator + newline_indent
+                self.emit('{' + newline_indent)
+            else:
+                separator = self.item_separator
+                self.emit('{')
+            first = True
+            for key, value in o.items():
+                if not first:
+                    self.emit(separator)
+                first = False
+                self.emit(self.encode_key(key))
+                self.emit(self.key_separator)
+                if self.path is not None:
+                    self.path.append(key)
+                self.encode_value(value, level + 1)
+                if self.path is not None:
+                    self.path.pop()
+            self.close_container('}', level)
+        finally:
+            self.leave(o)
+
+    def close_container(self, close, level):
+        if self.trailing_commas:
+            self.emit(',')
+        if self.indent is not None:
+            self.emit('\n' + self.indent * level + close)
+        else:
+            self.emit(close)
+
+def _json_default(o):
+    # Types accepted by _Encoder that the json module does not know
+    if isinstance(o, Mapping):
+        return dict(o)
+    if isinstance(o, array):
+        return o.tolist()
+    if hasattr(o, 'tolist') and hasattr(o, 'dtype'):
+        return o.tolist()
+    raise TypeError(f"Object of type {o.__class__.__name__} is not TJSON5 serializable")
+
+# Compact output with none of the Triple-JSON5 options is standard JSON,
+# which the C encoder of the json module writes faster than _Encoder.
+# Indented output is left to _Encoder, as json only indents in Python.
+_JSON_ENCODERS = {ensure_ascii: JSONEncoder(ensure_ascii=ensure_ascii, default=_json_default)
+                  for ensure_ascii in (False, True)}
+
+def _json_encoder(indent, ensure_ascii, triple_quotes, unquoted_keys, hex_paths, trailing_commas):
+    if indent is None and not (triple_quotes or unquoted_keys or hex_paths or trailing_commas):
+        return _JSON_ENCODERS[bool(ensure_ascii)]
+    return None
+
+def dump(obj, file_obj, indent=None, *, ensure_ascii=True, triple_quotes=False,
+         unquoted_keys=False, hex_paths=None, trailing_commas=False):
+    """
+    Serialize obj to a file, written in chunks as it is encoded.
+
+    With the default options the output is standard JSON, identical to
+    json.dump. See dumps for the Triple-JSON5 options.
+    """
+    encoder = _Encoder(indent, ensure_ascii, triple_quotes, unquoted_keys,
+                       hex_paths, trailing_commas, file_obj.write)
+    encoder.encode_value(obj, 0)
+    encoder.flush()
+
+def dump_documents(values, file_obj, indent=None, *, ensure_ascii=True, triple_quotes=False,
+                   unquoted_keys=False, hex_paths=None, trailing_commas=False):
+    """
+    Serialize each value of an iterable to a file as a separate document,
+    followed by a newline, for iter_documents to read back.
+
+    Without indent every document is written on a single line
+    (TJSON5-Lines), except for the line breaks of triple-quoted strings.
+    The same encoder is used for every value and its output is written in
+    chunks. See dumps for the other options.
+    """
+    encoder = _Encoder(indent, ensure_ascii, triple_quotes, unquoted_keys,
+                       hex_paths, trailing_commas, file_obj.write)
+    json_encoder = _json_encoder(indent, ensure_ascii, triple_quotes, unquoted_keys,
+                                 hex_paths, trailing_commas)
+    for value in values:
+        if json_encoder is not None:
+            encoder.emit(json_encoder.encode(value))
+        else:
+            encoder.encode_value(value, 0)
+        encoder.emit('\n')
+    encoder.flush()
+
+def dumps(obj, indent=None, *, ensure_ascii=True, triple_quotes=False,
+          unquoted_keys=False, hex_paths=None, trailing_commas=False):
+    """
+    Serialize obj to a string.
+
+    With the default options the output is standard JSON, identical to
+    json.dumps. The Triple-JSON5 options are:
+
+    triple_quotes: write multi-line strings as triple-quoted strings
+        (verbatim, so only strings that round-trip unchanged are converted)
+    unquoted_keys: write keys that are identifiers without quotes
+    hex_paths: key paths (as for items(), e.g. "registers[*].mask") whose
+        integer values are written in hexadecimal
+    trailing_commas: write a comma after the last item of every object
+        and array
+    """
+    json_encoder = _json_encoder(indent, ensure_ascii, triple_quotes, unquoted_keys,
+                                 hex_paths, trailing_commas)
+    if json_encoder is not None:
+        return json_encoder.encode(obj)
+    encoder = _Encoder(indent, ensure_ascii, triple_quotes, unquoted_keys,
+                       hex_paths, trailing_commas)
+    encoder.encode_value(obj, 0)
+    return encoder.getvalue()
@@ -0,0 +1,211 @@
+"""
+Instrumentation of parse and load_file for production profiling.
+
+Every call can fill a stats dict (parse(..., stats={})) with the wall
+time, sizes and counters of its stages:
+- 'read' (load_file only): reading or memory-mapping the file
+- 'decode' (raw input only): detecting the encoding and decoding the
+  bytes, including whether a fallback encoding was needed
+- 'parse': decoding the document, with counts of the values it holds
+- 'cache' (FileCache only): 'hit' or 'miss'; a hit has no other stage
+
+profiling() (also tjson5.profiling) collects the stats of every call
+made inside a with block, and registry keeps process-wide cumulative counters and latency
+histograms that can be scraped. While neither is active, parse only
+checks that no stats are wanted.
+"""
+
+import threading
+import contextlib
+import contextvars
+
+from tjson5._backend import parser as _parser
+
+STAGES = ('read', 'decode', 'parse')
+
+# Counters of the 'parse' stage
+COUNTS = ('objects', 'arrays', 'keys', 'strings', 'numbers', 'comments')
+
+# Upper bounds of the latency histogram buckets, in seconds
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025,
+                   0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Profiles collecting the calls of the current thread or task
+_profiles = contextvars.ContextVar('tjson5_profiles', default=())
+_lock = threading.Lock()
+_active_profiles = 0
+
+# True while stats are collected, so that load_file also times the read
+enabled = False
+
+class Profile:
+    """The stats of the calls made inside a profiling() block."""
+
+    def __init__(self):
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def _add(self, stats):
+        with self._lock:
+            self.calls.append(stats)
+
+    def totals(self):
+        """
+        Sum the stats of all calls: number of calls, errors, encoding
+        fallbacks and FileCache hits and misses, and per stage the seconds,
+        sizes and counts.
+        """
+        totals = {'calls': 0, 'errors': 0, 'fallbacks': 0, 'cache_hits': 0, 'cache_misses': 0}
+        with self._lock:
+            calls = list(self.calls)
+        for stats in calls:
+            totals['calls'] += 1
+            totals['errors'] += bool(stats.get('error'))
+            totals['fallbacks'] += bool(stats.get('decode', {}).get('fallback'))
+            totals['cache_hits'] += stats.get('cache') == 'hit'
+            totals['cache_misses'] += stats.get('cache') == 'miss'
+            for stage in STAGES:
+                if stage in stats:
+                    total = totals.setdefault(stage, {})
+                    for name, value in stats[stage].items():
+                        if type(value) in (int, float):
+                            total[name] = total.get(name, 0) + value
+        return totals
+
+class _Histogram:
+    """Cumulative latency histogram with fixed buckets."""
+
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, seconds):
+        for i, bound in enumerate(LATENCY_BUCKETS):
+            if seconds <= bound:
+                break
+        else:
+            i = len(LATENCY_BUCKETS)
+        self.counts[i] += 1
+        self.sum += seconds
+        self.count += 1
+
+    def snapshot(self):
+        buckets = []
+        cumulative = 0
+        for bound, count in zip(LATENCY_BUCKETS + (float('inf'),), self.counts):
+            cumulative += count
+            buckets.append((bound, cumulative))
+        return {'buckets': buckets, 'sum': self.sum, 'count': self.count}
+
+class Registry:
+    """
+    Process-wide cumulative counters and per-stage latency histograms of
+    all parse calls, from every thread. Disabled until enable() is called.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self._lock = threading.Lock()
+        self.reset()
+
+    def enable(self):
+        self.enabled = True
+        _update_sink()
+
+    def disable(self):
+        self.enabled = False
+        _update_sink()
+
+    def reset(self):
+        """Set all counters and histograms back to zero."""
+        with self._lock:
+            self._counters = dict.fromkeys(
+                ('calls', 'errors', 'fallbacks', 'cache_hits', 'cache_misses', 'bytes_read',
+                 'bytes_decoded', 'chars_parsed') + COUNTS, 0)
+            self._histograms = {stage: _Histogram() for stage in STAGES}
+
+    def _observe(self, stats):
+        with self._lock:
+            counters = self._counters
+            counters['calls'] += 1
+            counters['errors'] += bool(stats.get('error'))
+            counters['cache_hits'] += stats.get('cache') == 'hit'
+            counters['cache_misses'] += stats.get('cache') == 'miss'
+            if 'read' in stats:
+                counters['bytes_read'] += stats['read']['bytes']
+            if 'decode' in stats:
+                counters['bytes_decoded'] += stats['decode']['bytes']
+                counters['fallbacks'] += stats['decode']['fallback']
+            if 'parse' in stats:
+                parse = stats['parse']
+                counters['chars_parsed'] += parse['chars']
+                for name in COUNTS:
+                    counters[name] += parse[name]
+            for stage in STAGES:
+                if stage in stats:
+                    self._histograms[stage].observe(stats[stage]['seconds'])
+
+    def snapshot(self):
+        """Return the counters and the histogram of each stage as a dict."""
+        with self._lock:
+            return {'counters': dict(self._counters),
+                    'histograms': {stage: histogram.snapshot()
+                                   for stage, histogram in self._histograms.items()}}
+
+    def prometheus(self, prefix='tjson5'):
+        """Return the counters and histograms in the Prometheus text format."""
+        snapshot = self.snapshot()
+        lines = []
+        for name, value in snapshot['counters'].items():
+            lines.append(f"# TYPE {prefix}_{name}_total counter")
+            lines.append(f"{prefix}_{name}_total {value}")
+        name = f"{prefix}_stage_seconds"
+        lines.append(f"# TYPE {name} histogram")
+        for stage, histogram in snapshot['histograms'].items():
+            for bound, count in histogram['buckets']:
+                le = '+Inf' if bound == float('inf') else repr(bound)
+                lines.append(f'{name}_bucket{{stage="{stage}",le="{le}"}} {count}')
+            lines.append(f'{name}_sum{{stage="{stage}"}} {histogram["sum"]!r}')
+            lines.append(f'{name}_count{{stage="{stage}"}} {histogram["count"]}')
+        return "\n".join(lines) + "\n"
+
+registry = Registry()
+
+def _record(stats):
+    for profile in _profiles.get():
+        profile._add(stats)
+    if registry.enabled:
+        registry._observe(stats)
+
+def _update_sink():
+    global enabled
+    with _lock:
+        enabled = _active_profiles > 0 or registry.enabled
+        _parser._set_stats_sink(_record if enabled else None)
+
+@contextlib.contextmanager
+def profiling():
+    """
+    Collect the stats of every parse and load_file call made in the with
+    block, in the same thread or asyncio task. This includes the files
+    loaded by aload and load_many, whose workers report to the profiles of
+    their caller; other threads started in the block are not included.
+
+        with tjson5.profiling() as profile:
+            tjson5.load_file('config.tjson5')
+        print(profile.calls[0]['read']['seconds'], profile.totals())
+    """
+    global _active_profiles
+    profile = Profile()
+    token = _profiles.set(_profiles.get() + (profile,))
+    with _lock:
+        _active_profiles += 1
+    _update_sink()
+    try:
+        yield profile
+    finally:
+        _profiles.reset(token)
+        with _lock:
+            _active_profiles -= 1
+        _update_sink()
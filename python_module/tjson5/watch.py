@@ -0,0 +1,414 @@
+"""
+Hot reloading of TJSON5 files.
+
+A Watcher keeps the last parsed value of every file it watches and calls
+back with a structural diff (see tjson5.diff) when one changes. On Linux
+it sleeps until inotify reports activity in the watched directories;
+elsewhere it polls os.stat every `interval` seconds, walking directories
+with os.scandir. Either way, only files whose modification time or size
+changed are read, and only those whose content hash changed are parsed.
+
+Changes are debounced: a file is reloaded once it has been left alone for
+`debounce` seconds, so that a burst of writes (an editor saving, a deploy
+copying a tree) is reported once, with its final contents.
+"""
+
+import os
+import sys
+import glob
+import errno
+import select
+import struct
+import hashlib
+import threading
+
+from tjson5._backend import parser as _parser
+from tjson5._entry import Entry as _Entry
+from tjson5.document import Diff, diff
+
+parse, TJSON5ParseError = _parser.parse, _parser.TJSON5ParseError
+
+# inotify event masks (linux/inotify.h)
+IN_MODIFY = 0x2
+IN_ATTRIB = 0x4
+IN_CLOSE_WRITE = 0x8
+IN_MOVED_FROM = 0x40
+IN_MOVED_TO = 0x80
+IN_CREATE = 0x100
+IN_DELETE = 0x200
+IN_DELETE_SELF = 0x400
+IN_MOVE_SELF = 0x800
+IN_IGNORED = 0x8000
+IN_ONLYDIR = 0x1000000
+
+_WATCH_MASK = (IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO
+               | IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR)
+
+# struct inotify_event, without its variable-length name
+_EVENT = struct.Struct('iIII')
+
+_libc = None
+
+def _load_libc():
+    """Return libc with its inotify functions, or None where inotify is unavailable."""
+    global _libc
+    if _libc is None:
+        _libc = False
+        if sys.platform.startswith('linux'):
+            try:
+                import ctypes
+                libc = ctypes.CDLL(None, use_errno=True)
+                libc.inotify_init1.argtypes = [ctypes.c_int]
+                libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+                _libc = libc
+            except (ImportError, OSError, AttributeError):
+                pass
+    return _libc or None
+
+class _Inotify:
+    """An inotify instance watching directories, with a pipe to wake up its reader."""
+
+    def __init__(self, libc):
+        import ctypes
+        self._libc = libc
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            error = ctypes.get_errno()
+            raise OSError(error, os.strerror(error))
+        self._wake_read, self._wake_write = os.pipe()
+        self._directories = {}
+        self._descriptors = {}
+
+    def add(self, directory):
+        """Watch directory, if it is not watched yet."""
+        if directory in self._directories:
+            return
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(directory), _WATCH_MASK)
+        if wd >= 0:  # Otherwise it vanished or cannot be read: the scan reports its files
+            self._directories[directory] = wd
+            self._descriptors[wd] = directory
+
+    def wait(self, timeout):
+        """
+        Wait up to timeout seconds (None for no limit) for events, and
+        consume them. Returns True if there were events.
+        """
+        ready, _, _ = select.select([self.fd, self._wake_read], [], [], timeout)
+        if self._wake_read in ready:
+            os.read(self._wake_read, 64)
+        if self.fd not in ready:
+            return False
+        while True:
+            try:
+                data = os.read(self.fd, 65536)
+            except BlockingIOError:
+                return True
+            offset = 0
+            while offset < len(data):
+                wd, mask, _, length = _EVENT.unpack_from(data, offset)
+                offset += _EVENT.size + length
+                if mask & IN_IGNORED:
+                    # The directory was removed: watch it again if it is recreated
+                    directory = self._descriptors.pop(wd, None)
+                    self._directories.pop(directory, None)
+
+    def wake(self):
+        """Make a pending wait() return."""
+        os.write(self._wake_write, b'\0')
+
+    def close(self):
+        for fd in (self.fd, self._wake_read, self._wake_write):
+            os.close(fd)
+
+# Value of a file that has never been parsed successfully
+_NO_VALUE = object()
+
+class Watcher:
+    """
+    Watch TJSON5 files and report their changes.
+
+    Args:
+        paths: A directory (all *.tjson5 files below it, including those
+            created later), a glob pattern, a file path, or an iterable of these
+        callback: Called as callback(path, value, diff) for each file that was
+            added, changed or removed. value is the new parsed content (None
+            for a removed file) and diff a Diff(added, removed, changed) of
+            key paths relative to the last good value: a new file is
+            Diff([()], [], []) and a removed one Diff([], [()], []). A file
+            that fails to parse is reported as callback(path, error, None)
+            with its TJSON5ParseError, and its last good value is kept.
+            Changes that leave the value equal (comments, formatting) are
+            not reported.
+        interval: Seconds between two polls when inotify is not used
+        debounce: Seconds a changed file must be left alone before it is
+            reloaded
+        inotify: True to require inotify, False to poll, None (the default)
+            to use inotify where it is available
+        encodings: List of encodings to try when there is no byte order mark,
+            defaults to ['utf-8', 'latin1']
+        **options: Decoder options passed to parse
+
+    check() looks for changes once, in the calling thread; start() reports
+    the files present, then watches in a background thread until stop().
+    Exceptions raised by the callback in that thread are printed with
+    sys.excepthook and the watcher carries on. The callback is called
+    without any lock of the watcher held, so it may use the watcher (e.g.
+    values or check()) or wait for other threads that do.
+    """
+
+    def __init__(self, paths, callback, interval=1.0, debounce=0.1, inotify=None,
+                 encodings=None, **options):
+        if isinstance(paths, (str, bytes, os.PathLike)):
+            paths = [paths]
+        self.paths = [os.fspath(path) for path in paths]
+        self.callback = callback
+        self.interval = interval
+        self.debounce = debounce
+        self.encodings = encodings
+        self.options = options
+        libc = _load_libc() if inotify is not False else None
+        if inotify and libc is None:
+            raise OSError(errno.ENOSYS, "inotify is not available on this platform")
+        self._libc = libc
+        self._inotify = None
+        self._files = {}
+        self._lock = threading.RLock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def values(self):
+        """A dict mapping each watched file to its last good parsed value."""
+        with self._lock:
+            return {path: entry.value for path, entry in self._files.items()
+                    if entry.value is not _NO_VALUE}
+
+    @property
+    def using_inotify(self):
+        """True if changes are detected with inotify rather than by polling."""
+        return self._libc is not None
+
+    def check(self):
+        """
+        Look for changes once and report them to the callback, waiting
+        `debounce` seconds for changed files to settle first.
+
+        Returns:
+            The list of paths that were reported
+        """
+        return self._check(self.debounce)
+
+    def start(self):
+        """Report the files present now, then watch for changes in a background thread."""
+        if self._thread is not None:
+            raise RuntimeError("Watcher already started")
+        if self._libc is not None:
+            self._inotify = _Inotify(self._libc)
+        self._stop.clear()
+        self._check(0)
+        self._thread = threading.Thread(target=self._run, name='tjson5-watch', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop the background thread started by start()."""
+        if self._thread is None:
+            return
+        self._stop.set()
+        if self._inotify is not None:
+            self._inotify.wake()
+        self._thread.join()
+        self._thread = None
+        if self._inotify is not None:
+            self._inotify.close()
+            self._inotify = None
+
+    def __enter__(self):
+        if self._thread is None:
+            self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def _run(self):
+        while not self._stop.is_set():
+            if self._inotify is not None:
+                if not self._inotify.wait(None):
+                    continue
+                # Wait for the directories to be quiet for `debounce` seconds
+                while not self._stop.is_set() and self._inotify.wait(self.debounce):
+                    pass
+                debounce = 0
+            else:
+                if self._stop.wait(self.interval):
+                    break
+                debounce = self.debounce
+            if self._stop.is_set():
+                break
+            try:
+                self._check(debounce)
+            except Exception:
+                sys.excepthook(*sys.exc_info())
+
+    def _check(self, debounce):
+        stats = self._scan()
+        with self._lock:
+            pending = {path: stat for path, stat in stats.items()
+                       if path not in self._files or not self._files[path].stat_matches(stat)}
+            pending.update((path, None) for path in self._files if path not in stats)
+        if pending and debounce > 0:
+            # Leave out the files that are still being written to (they are
+            # found again by the next check)
+            if self._stop.wait(debounce):
+                return []
+            pending = {path: stat for path, stat in pending.items()
+                       if _same_stat(stat, _stat(path))}
+        reports = []
+        for path in sorted(pending):
+            report = self._reload(path, pending[path])
+            if report is not None:
+                reports.append(report)
+        # The callback runs without the lock, so that it may call back into
+        # the watcher; the first exception it raises is raised once every
+        # report has been made
+        error = None
+        for report in reports:
+            try:
+                self.callback(*report)
+            except Exception as e:
+                if error is None:
+                    error = e
+        if error is not None:
+            raise error
+        return [report[0] for report in reports]
+
+    def _reload(self, path, stat):
+        """
+        Read path again and return the (path, value, diff) arguments of its
+        report if its value changed, else None. The file is read and parsed
+        without the lock, which is only taken to swap in the result; as
+        another check() may have reloaded the file in the meantime, its entry
+        is looked up again each time.
+        """
+        if stat is None:
+            if _stat(path) is not None:
+                return None  # Created again meanwhile: reported by the next check
+            with self._lock:
+                entry = self._files.pop(path, None)
+            if entry is None or entry.value is _NO_VALUE:
+                return None
+            return (path, None, Diff([], [()], []))
+        try:
+            with open(path, 'rb') as f:
+                stat = os.fstat(f.fileno())
+                data = f.read()
+        except OSError:
+            return None  # Removed meanwhile: reported by the next check
+        digest = hashlib.blake2b(data, digest_size=16).digest()
+        with self._lock:
+            entry = self._files.get(path)
+            if entry is not None and entry.digest == digest:
+                entry.update_stat(stat)
+                return None
+        error = None
+        try:
+            value = parse(data, encodings=self.encodings, **self.options)
+        except TJSON5ParseError as e:
+            error = e
+        with self._lock:
+            entry = self._files.get(path)
+            if entry is not None and (entry.digest == digest
+                                      or entry.mtime_ns > stat.st_mtime_ns):
+                return None  # Reloaded meanwhile, from this content or a later one
+            if error is not None:
+                if entry is None:
+                    self._files[path] = _Entry(stat, digest, _NO_VALUE)
+                else:
+                    entry.digest = digest
+                    entry.update_stat(stat)
+                return (path, error, None)
+            if entry is None or entry.value is _NO_VALUE:
+                self._files[path] = _Entry(stat, digest, value)
+                return (path, value, Diff([()], [], []))
+            old = entry.value
+            entry.digest = digest
+            entry.value = value
+            entry.update_stat(stat)
+        changes = diff(old, value)
+        if not (changes.added or changes.removed or changes.changed):
+            return None
+        return (path, value, changes)
+
+    def _scan(self):
+        """Return a dict mapping each watched file to its os.stat result."""
+        stats = {}
+        for path in self.paths:
+            if os.path.isdir(path):
+                self._walk(path, stats, True)
+            elif glob.has_magic(path):
+                if self._inotify is not None:
+                    # New matches may appear anywhere below the fixed part of the pattern
+                    base = path
+                    while glob.has_magic(base):
+                        base = os.path.dirname(base)
+                    self._walk(base or os.curdir, None, False)
+                for match in glob.glob(path, recursive=True):
+                    stat = _stat(match)
+                    if stat is not None and not os.path.isdir(match):
+                        stats[match] = stat
+            else:
+                if self._inotify is not None:
+                    self._inotify.add(os.path.dirname(path) or os.curdir)
+                stat = _stat(path)
+                if stat is not None:
+                    stats[path] = stat
+        return stats
+
+    def _walk(self, directory, stats, files):
+        """
+        Watch directory and the directories below it with inotify (if used)
+        and, with files, add the stat of the *.tjson5 files in them to stats.
+        Hidden files and directories are skipped, as glob does.
+        """
+        if self._inotify is not None:
+            # Watched before listing, so that no change falls in between
+            self._inotify.add(directory)
+        elif not files:
+            return
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if entry.name.startswith('.'):
+                        continue
+                    try:
+                        if entry.is_dir():
+                            self._walk(entry.path, stats, files)
+                        elif files and entry.name.endswith('.tjson5'):
+                            stats[entry.path] = entry.stat()
+                    except OSError:
+                        pass  # Removed while scanning
+        except OSError:
+            pass
+
+def _stat(path):
+    try:
+        return os.stat(path)
+    except OSError:
+        return None
+
+def _same_stat(a, b):
+    if a is None or b is None:
+        return a is b
+    return a.st_mtime_ns == b.st_mtime_ns and a.st_size == b.st_size
+
+def watch(paths, callback, interval=1.0, debounce=0.1, **options):
+    """
+    Watch TJSON5 files in a background thread and report their changes.
+
+    The files present are reported to callback(path, value, diff) as added
+    before this returns; see Watcher for the arguments and the reports.
+    Call stop() on the returned Watcher (or use it as a context manager) to
+    stop watching.
+    """
+    return Watcher(paths, callback, interval, debounce, **options).start()
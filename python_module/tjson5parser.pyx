@@ -1,79 +1,222 @@
-# cython: language_level=3
+# cython: language_level=3, freethreading_compatible=True
 """
-Triple-JSON5 parser implemented in Cython - Fixed version.
+Triple-JSON5 parser implemented in Cython.
 This parser supports JSON5 with the addition of triple-quoted strings
 and special number formats (hex: 0x, binary: 0b).
 
 This is a standalone parser implementation with no external dependencies
-on json5 or other parsing libraries.
+on json5 or other parsing libraries. The input string is scanned once,
+without holding the GIL, and the resulting Python objects are built
+directly from the scanned tokens.
 """
+cimport cython
 import re
-import json  # We'll still use the standard json module for the final parsing
-import os
-import tempfile
-from cpython.ref cimport PyObject
-from libc.stdlib cimport malloc, free
+from json import JSONEncoder
+from json.encoder import encode_basestring, encode_basestring_ascii
+from collections.abc import Mapping
+import dataclasses
+import typing
+try:
+    from types import UnionType as _UnionType
+except ImportError:  # Python < 3.10
+    _UnionType = None
+import codecs
+import reprlib
+from decimal import Decimal
+from time import perf_counter as _clock
+from array import array
+from cpython cimport array as carray
+from cpython.bytearray cimport PyByteArray_FromStringAndSize, PyByteArray_AS_STRING
+from cpython.dict cimport PyDict_SetItem
+from cpython.mem cimport (PyMem_Malloc, PyMem_Realloc, PyMem_Free,
+                          PyMem_RawMalloc, PyMem_RawRealloc, PyMem_RawFree)
+from cpython.object cimport PyObject
+from cpython.list cimport PyList_Append, PyList_New, PyList_SET_ITEM
+from cpython.ref cimport Py_INCREF
+from cpython.long cimport PyLong_FromLongLong
+from cpython.unicode cimport PyUnicode_Decode
+from cpython.unicode cimport (PyUnicode_KIND, PyUnicode_DATA, PyUnicode_READ,
+                              PyUnicode_1BYTE_KIND,
+                              PyUnicode_GET_LENGTH, PyUnicode_Substring,
+                              PyUnicode_Find, PyUnicode_FindChar, PyUnicode_Tailmatch)
+from libc.limits cimport LLONG_MIN, LLONG_MAX, ULLONG_MAX
+from libc.math cimport INFINITY, NAN as C_NAN
+from libc.string cimport memchr
+from libc.stdint cimport (int8_t, uint8_t, int16_t, uint16_t, int32_t, uint32_t,
+                          int64_t)
+
+cdef extern from "Python.h":
+    # Returns 1, not -1, when the recursion limit is exceeded
+    bint Py_EnterRecursiveCall(const char *where) except True
+    void Py_LeaveRecursiveCall()
+    double PyOS_string_to_double(const char *s, char **endptr,
+                                 PyObject *overflow_exception) except? -1.0
+    # Reading characters and the Unicode database lookups do not need the
+    # GIL, which the tokenizer releases while it scans
+    Py_UCS4 _read_char "PyUnicode_READ"(unsigned int kind, const void *data,
+                                        Py_ssize_t index) nogil
+    bint _is_space "Py_UNICODE_ISSPACE"(Py_UCS4 ch) nogil
+    bint _is_alpha "Py_UNICODE_ISALPHA"(Py_UCS4 ch) nogil
+    bint _is_alnum "Py_UNICODE_ISALNUM"(Py_UCS4 ch) nogil
 
 # Define exception class for parse errors
 class TJSON5ParseError(Exception):
-    """Exception raised for Triple-JSON5 parsing errors."""
-    pass
+    """
+    Exception raised for Triple-JSON5 parsing errors.
+
+    Syntax errors carry their location in the original source: pos is the
+    character offset, lineno and colno are 1-based, and excerpt shows the
+    offending line with a caret under the column. These attributes are
+    None for errors without a location (e.g. encoding errors).
+    """
+    def __init__(self, message, pos=None, lineno=None, colno=None, excerpt=None):
+        super().__init__(message)
+        self.pos = pos
+        self.lineno = lineno
+        self.colno = colno
+        self.excerpt = excerpt
+
+    def __reduce__(self):
+        return (self.__class__, (self.args[0], self.pos, self.lineno, self.colno, self.excerpt))
+
+class TJSON5ValidationError(TJSON5ParseError):
+    """
+    Exception raised when a value does not match a JSON Schema (see
+    compile_schema).
+
+    path is the key path of the invalid value, as a tuple of keys and
+    array indices. Errors found while parsing carry the location of the
+    value in the source, like syntax errors. Unless the schema was
+    compiled with fail_fast, every failure in the document is collected
+    and errors lists them all in the order they were found; the first one
+    is raised.
+    """
+    def __init__(self, message, pos=None, lineno=None, colno=None, excerpt=None, path=()):
+        super().__init__(message, pos, lineno, colno, excerpt)
+        self.path = path
+        self.errors = [self]
+
+    def __reduce__(self):
+        return (self.__class__, (self.args[0], self.pos, self.lineno, self.colno, self.excerpt,
+                                 self.path))
+
+# Longest stretch of a source line shown on either side of an error
+cdef Py_ssize_t EXCERPT_CONTEXT = 40
+
+cdef object _parse_error(str text, str msg, Py_ssize_t pos,
+                         Py_ssize_t offset=0, Py_ssize_t line_offset=0, Py_ssize_t col_offset=0,
+                         tuple path=None):
+    """
+    Build a TJSON5ParseError for msg at character offset pos of text, or
+    a TJSON5ValidationError for the value at key path if one is given.
+
+    When text is only the tail of a larger (streamed) document, offset is the
+    number of characters before it, line_offset the number of newlines in
+    them and col_offset the length of the partial line they end with.
+    """
+    cdef Py_ssize_t line_start = text.rfind('\n', 0, pos) + 1
+    cdef Py_ssize_t line_end = text.find('\n', pos)
+    if line_end < 0:
+        line_end = len(text)
+    lineno = line_offset + text.count('\n', 0, line_start) + 1
+    colno = pos - line_start + 1
+    if line_start == 0:
+        colno += col_offset
+    # Show the line around the error, clipped for very long (minified) lines
+    start = max(line_start, pos - EXCERPT_CONTEXT)
+    end = min(line_end, pos + EXCERPT_CONTEXT)
+    prefix = '...' if start > line_start or (start == 0 and col_offset > 0) else ''
+    suffix = '...' if end < line_end else ''
+    snippet = text[start:end].rstrip('\r').replace('\t', ' ')
+    gutter = f"{lineno} | "
+    excerpt = (f"{gutter}{prefix}{snippet}{suffix}\n"
+               f"{' ' * (len(gutter) - 2)}| {' ' * (len(prefix) + pos - start)}^")
+    location = f"line {lineno} column {colno} (char {offset + pos})\n{excerpt}"
+    if path is not None:
+        return TJSON5ValidationError(
+            f"Schema validation failed: {_format_path(path)}: {msg}: {location}",
+            offset + pos, lineno, colno, excerpt, path
+        )
+    return TJSON5ParseError(
+        f"Failed to parse Triple-JSON5: {msg}: {location}",
+        offset + pos, lineno, colno, excerpt
+    )
 
-# Regular expressions for parsing
+# Regular expressions for the preprocessing helpers
 cdef object HEX_REGEX = re.compile(r'\b0x([0-9A-Fa-f]+)\b')
 cdef object BINARY_REGEX = re.compile(r'\b0b([01]+)\b')
-cdef object COMMENT_LINE_REGEX = re.compile(r'^\s*//.*$', re.MULTILINE)
-cdef object FIRST_JSON_CHAR_REGEX = re.compile(r'[\[\{]')
-cdef object SINGLE_LINE_COMMENT_REGEX = re.compile(r'//.*?$', re.MULTILINE)
-cdef object MULTI_LINE_COMMENT_REGEX = re.compile(r'/\*.*?\*/', re.DOTALL)
-cdef object UNQUOTED_KEY_REGEX = re.compile(r'([{,]\s*)([a-zA-Z_][a-zA-Z0-9_]*)\s*:', re.DOTALL)
-cdef object TRAILING_COMMA_OBJ_REGEX = re.compile(r',\s*\}')
-cdef object TRAILING_COMMA_ARR_REGEX = re.compile(r',\s*\]')
 
 # We won't use json5 - we'll implement everything ourselves
 HAS_JSON5 = False
 
+# Encodings tried in order for bytes input without a byte order mark
+DEFAULT_ENCODINGS = ('utf-8', 'latin1')
+
+cdef object NAN = float('nan')
+cdef object POS_INF = float('inf')
+cdef object NEG_INF = float('-inf')
+
+cdef inline str _escape_triple_content(str segment):
+    """Escape the content of a triple-quoted string for a regular JSON string."""
+    return (segment.replace('\\', '\\\\').replace('"', '\\"')
+            .replace('\n', '\\n').replace('\r', '\\r').replace('\t', '\\t'))
+
 # Convert triple-quoted strings to regular quoted strings
 cdef str process_triple_quotes(str text):
     """
     Process triple-quoted strings by converting them to regular quoted strings.
-    This is a simpler implementation focusing on correctness first.
+
+    The scanner walks the text once, skipping over regular strings and
+    comments, and copies everything between triple-quoted strings as whole
+    slices. The content of each triple-quoted string is located with a
+    single find() and escaped in one go.
     """
     cdef list result_parts = []
-    cdef int pos = 0
-    cdef int length = len(text)
-    cdef bint in_string = False
-    cdef bint in_triple_string = False
-    cdef str current_part = ""
-    
+    cdef unsigned int kind = PyUnicode_KIND(text)
+    cdef void *data = PyUnicode_DATA(text)
+    cdef Py_ssize_t length = PyUnicode_GET_LENGTH(text)
+    cdef Py_ssize_t pos = 0
+    cdef Py_ssize_t copy_start = 0
+    cdef Py_ssize_t end
+    cdef Py_UCS4 c, quote
+
     while pos < length:
-        # Check for triple quotes
-        if pos + 2 < length and text[pos:pos+3] == '"""':
-            if in_triple_string:  # Closing triple quote
-                result_parts.append(current_part.replace('"', '\\"').replace('\n', '\\n'))
-                current_part = ""
-                result_parts.append('"')  # Close with single quote
-                in_triple_string = False
-                pos += 3
-            elif not in_string:  # Opening triple quote
-                result_parts.append('"')  # Open with single quote
-                in_triple_string = True
-                pos += 3
-            else:  # Triple quote inside a regular string (unlikely)
-                current_part += text[pos]
-                pos += 1
-        elif in_triple_string:  # Inside triple string, collect content
-            current_part += text[pos]
-            pos += 1
-        elif pos < length and text[pos] == '"' and not in_triple_string:
-            # Toggle regular string state if not in triple string
-            in_string = not in_string
+        c = PyUnicode_READ(kind, data, pos)
+        if c == u'"' and pos + 2 < length and PyUnicode_READ(kind, data, pos + 1) == u'"' \
+                and PyUnicode_READ(kind, data, pos + 2) == u'"':
+            end = PyUnicode_Find(text, '"""', pos + 3, length, 1)
+            if end < 0:  # Unterminated, leave the rest untouched
+                break
+            result_parts.append(PyUnicode_Substring(text, copy_start, pos))
             result_parts.append('"')
+            result_parts.append(_escape_triple_content(PyUnicode_Substring(text, pos + 3, end)))
+            result_parts.append('"')
+            pos = end + 3
+            copy_start = pos
+        elif c == u'"' or c == u"'":
+            # Regular string, copied as-is
+            quote = c
             pos += 1
-        else:  # Regular character
-            result_parts.append(text[pos])
+            while pos < length:
+                c = PyUnicode_READ(kind, data, pos)
+                if c == u'\\':
+                    pos += 2
+                    continue
+                pos += 1
+                if c == quote or c == u'\n':
+                    break
+        elif c == u'/' and pos + 1 < length and PyUnicode_READ(kind, data, pos + 1) == u'/':
+            end = PyUnicode_FindChar(text, u'\n', pos + 2, length, 1)
+            pos = length if end < 0 else end
+        elif c == u'/' and pos + 1 < length and PyUnicode_READ(kind, data, pos + 1) == u'*':
+            end = PyUnicode_Find(text, '*/', pos + 2, length, 1)
+            pos = length if end < 0 else end + 2
+        else:
             pos += 1
-    
+
+    if copy_start == 0:
+        return text
+    result_parts.append(PyUnicode_Substring(text, copy_start, length))
     return "".join(result_parts)
 
 # Convert hex and binary literals to decimal
@@ -85,173 +228,2666 @@ cdef str process_number_formats(str text):
     text = BINARY_REGEX.sub(lambda m: str(int(m.group(1), 2)), text)
     return text
 
-cdef str strip_leading_comments(str text):
+# Character classification helpers used by the decoder
+cdef inline bint _is_digit(Py_UCS4 c) noexcept nogil:
+    return c >= u'0' and c <= u'9'
+
+cdef inline int _hex_value(Py_UCS4 c) noexcept nogil:
+    if c >= u'0' and c <= u'9':
+        return <int>c - ord('0')
+    if c >= u'a' and c <= u'f':
+        return <int>c - ord('a') + 10
+    if c >= u'A' and c <= u'F':
+        return <int>c - ord('A') + 10
+    return -1
+
+cdef inline bint _is_ident_start(Py_UCS4 c) noexcept nogil:
+    if (c >= u'a' and c <= u'z') or (c >= u'A' and c <= u'Z') or c == u'_' or c == u'$':
+        return True
+    return c > 127 and _is_alpha(c)
+
+cdef inline bint _is_ident_part(Py_UCS4 c) noexcept nogil:
+    if _is_ident_start(c) or _is_digit(c):
+        return True
+    return c > 127 and _is_alnum(c)
+
+cdef inline bint _is_line_terminator(Py_UCS4 c) noexcept nogil:
+    return c == u'\n' or c == u'\r' or c == 0x2028 or c == 0x2029
+
+# Kinds of number tokens
+cdef enum:
+    NUM_INT
+    NUM_FLOAT
+    NUM_INF
+    NUM_NAN
+
+cdef struct _NumberToken:
+    Py_ssize_t start         # First character, including the sign
+    Py_ssize_t digits_start  # First digit, after the sign and 0x/0b prefix
+    Py_ssize_t end
+    int kind
+    int base                 # 10, 16 or 2
+    bint negative
+
+# ---------------------------------------------------------------------------
+# Tokenizer
+# ---------------------------------------------------------------------------
+#
+# The tokenizer checks the syntax of the input and splits it into tokens
+# without creating any Python objects, so it runs without the GIL. The
+# decoder holds the GIL only to build the values from the tokens.
+
+# Parser states: what is expected next (shared with the event parser)
+cdef enum:
+    ST_VALUE        # expecting a value
+    ST_MAP_KEY      # expecting a key or '}'
+    ST_MAP_COLON    # expecting ':'
+    ST_MAP_NEXT     # expecting ',' or '}'
+    ST_ARRAY_VALUE  # expecting a value or ']'
+    ST_ARRAY_NEXT   # expecting ',' or ']'
+    ST_DONE         # the document is complete
+
+# Kinds of tokens
+cdef enum:
+    TOK_OBJECT      # '{'
+    TOK_OBJECT_END  # '}'
+    TOK_ARRAY       # '['
+    TOK_ARRAY_END   # ']'
+    TOK_KEY         # quoted string or identifier before ':'
+    TOK_STRING
+    TOK_NUMBER
+    TOK_TRUE
+    TOK_FALSE
+    TOK_NULL
+    TOK_END         # end of the value
+    TOK_ERROR       # syntax error: the ERR_* code is in flags
+
+# Flags of string and key tokens
+cdef enum:
+    TF_IDENT = 1    # unquoted key
+    TF_ESCAPED = 2  # contains backslash escapes, the first one at aux
+    TF_TRIPLE = 4   # triple-quoted string
+
+# Syntax errors found while scanning, with their messages in _SYNTAX_ERRORS
+cdef enum:
+    ERR_NONE
+    ERR_EMPTY
+    ERR_VALUE
+    ERR_PROPERTY_NAME
+    ERR_COLON
+    ERR_COMMA
+    ERR_EXTRA_DATA
+    ERR_STRING
+    ERR_TRIPLE_STRING
+    ERR_COMMENT
+    ERR_HEX
+    ERR_BINARY
+    ERR_LEADING_ZERO
+    ERR_EXPONENT
+    ERR_X_ESCAPE
+    ERR_U_ESCAPE
+    ERR_ESCAPE
+    ERR_MEMORY
+
+cdef tuple _SYNTAX_ERRORS = (
+    None,
+    "Empty or invalid input",
+    "Expecting value",
+    "Expecting property name",
+    "Expecting ':' delimiter",
+    "Expecting ',' delimiter",
+    "Extra data",
+    "Unterminated string starting at",
+    "Unterminated triple-quoted string",
+    "Unterminated comment",
+    "Invalid hex literal",
+    "Invalid binary literal",
+    "Invalid number with leading zero",
+    "Invalid exponent",
+    "Invalid \\x escape",
+    "Invalid \\u escape",
+    "Invalid escape",
+    "Out of memory",
+)
+
+# Tokens scanned per batch, and initial depth of the container stack
+cdef Py_ssize_t TOKEN_CAPACITY = 1024
+cdef Py_ssize_t STACK_CAPACITY = 64
+# A batch of tokens is scanned without the GIL when at least this many
+# characters are left, below that releasing it costs more than it gains
+cdef Py_ssize_t NOGIL_MIN_CHARS = 4096
+
+cdef struct _Token:
+    int type
+    int flags        # TF_* for strings and keys, packed _NumberToken fields
+                     # for numbers, ERR_* for errors
+    Py_ssize_t start
+    Py_ssize_t end
+    Py_ssize_t aux   # first escape of a string, first digit of a number
+
+cdef struct _Tokenizer:
+    unsigned int kind
+    const void *data
+    Py_ssize_t length
+    Py_ssize_t pos         # where the next batch starts
+    int state              # ST_* expected at pos
+    bint document          # the value must be followed by the end of input
+    char *stack            # '{' or '[' of each open container
+    Py_ssize_t depth
+    Py_ssize_t stack_size
+    _Token *tokens
+    Py_ssize_t count       # tokens in the current batch
+    Py_ssize_t next        # next token of the batch to consume
+    Py_ssize_t capacity    # at least 2
+    Py_ssize_t comments    # comments skipped so far
+    int error              # ERR_* of the last failed scan
+    Py_ssize_t error_pos
+
+cdef inline Py_UCS4 _char_at(const _Tokenizer *t, Py_ssize_t i) noexcept nogil:
+    """Return the character at index i, or 0 past the end of the input."""
+    if i < t.length:
+        return _read_char(t.kind, t.data, i)
+    return 0
+
+cdef inline Py_ssize_t _fail(_Tokenizer *t, int error, Py_ssize_t pos) noexcept nogil:
+    t.error = error
+    t.error_pos = pos
+    return -1
+
+cdef inline Py_ssize_t _skip_spaces(const _Tokenizer *t, Py_ssize_t pos) noexcept nogil:
+    """Return the position after the whitespace at pos, not counting comments."""
+    cdef Py_UCS4 c
+    while pos < t.length:
+        c = _read_char(t.kind, t.data, pos)
+        if c == u' ' or c == u'\n' or c == u'\r' or c == u'\t':
+            pos += 1
+        elif c == 0x0b or c == 0x0c or c == 0xfeff or (c > 127 and _is_space(c)):
+            pos += 1
+        else:
+            break
+    return pos
+
+cdef inline Py_ssize_t _find_char(const _Tokenizer *t, Py_UCS4 ch, Py_ssize_t pos) noexcept nogil:
+    """Return the index of the first ch (< 256) at or after pos, or -1."""
+    cdef const char *found
+    if t.kind == PyUnicode_1BYTE_KIND:
+        if pos >= t.length:
+            return -1
+        found = <const char *>memchr(<const char *>t.data + pos, <int>ch, t.length - pos)
+        return -1 if found == NULL else found - <const char *>t.data
+    while pos < t.length:
+        if _read_char(t.kind, t.data, pos) == ch:
+            return pos
+        pos += 1
+    return -1
+
+cdef Py_ssize_t _skip_ws(_Tokenizer *t, Py_ssize_t pos) noexcept nogil:
+    """Return the position after the whitespace and comments at pos."""
+    cdef Py_ssize_t i
+    cdef Py_UCS4 c
+    while True:
+        pos = _skip_spaces(t, pos)
+        if _char_at(t, pos) != u'/':
+            return pos
+        c = _char_at(t, pos + 1)
+        i = pos + 2
+        if c == u'/':
+            while i < t.length and not _is_line_terminator(_read_char(t.kind, t.data, i)):
+                i += 1
+        elif c == u'*':
+            while True:
+                i = _find_char(t, u'*', i)
+                if i < 0:
+                    return _fail(t, ERR_COMMENT, pos)
+                if _char_at(t, i + 1) == u'/':
+                    break
+                i += 1
+            i += 2
+        else:
+            return pos
+        t.comments += 1
+        pos = i
+
+cdef Py_ssize_t _match_word(const _Tokenizer *t, Py_ssize_t pos, const char *word) noexcept nogil:
+    """Return the end of the ASCII word at pos, or 0 if it is not there."""
+    cdef Py_ssize_t i = 0
+    while word[i]:
+        if _char_at(t, pos + i) != <Py_UCS4>word[i]:
+            return 0
+        i += 1
+    if _is_ident_part(_char_at(t, pos + i)):
+        return 0
+    return pos + i
+
+cdef Py_ssize_t _scan_string(_Tokenizer *t, Py_ssize_t pos, _Token *tok) noexcept nogil:
     """
-    Strip comments at the beginning of the file before the first { or [
+    Scan the single, double or triple-quoted string at pos into tok.
+    Returns the position after it, or -1 if it is unterminated.
     """
-    # Find the first opening brace or bracket
-    match = FIRST_JSON_CHAR_REGEX.search(text)
-    if match:
-        start_pos = match.start()
-        if start_pos > 0:
-            # Get the part of the text before the first JSON character
-            prefix = text[:start_pos]
-            # If it's only comments and whitespace, remove it
-            if re.match(r'^(\s*((//[^\n]*\n)|(\/\*[\s\S]*?\*\/)))*\s*$', prefix):
-                return text[start_pos:]
-    return text
+    cdef Py_UCS4 quote = _char_at(t, pos)
+    cdef Py_ssize_t i = pos + 1
+    cdef Py_UCS4 c
+    tok.start = pos
+    tok.flags = 0
+    if quote == u'"' and _char_at(t, i) == u'"' and _char_at(t, i + 1) == u'"':
+        # Triple-quoted: everything up to the closing """ is taken verbatim
+        tok.flags = TF_TRIPLE
+        i += 2
+        while True:
+            i = _find_char(t, u'"', i)
+            if i < 0:
+                return _fail(t, ERR_TRIPLE_STRING, pos)
+            if _char_at(t, i + 1) == u'"' and _char_at(t, i + 2) == u'"':
+                tok.end = i + 3
+                return tok.end
+            i += 1
+    while i < t.length:
+        c = _read_char(t.kind, t.data, i)
+        if c == quote:
+            tok.end = i + 1
+            return tok.end
+        if c == u'\\':
+            if not tok.flags:
+                tok.flags = TF_ESCAPED
+                tok.aux = i
+            # A line continuation with \r\n counts as a single escape
+            if _char_at(t, i + 1) == u'\r' and _char_at(t, i + 2) == u'\n':
+                i += 1
+            i += 2
+            continue
+        if c == u'\n' or c == u'\r':
+            break
+        i += 1
+    return _fail(t, ERR_STRING, pos)
+
+cdef Py_ssize_t _check_escapes(_Tokenizer *t, Py_UCS4 quote, Py_ssize_t i) noexcept nogil:
+    """
+    Check the escapes of a string from its first backslash at i up to the
+    closing quote (or the end of the line), as they are decoded. Returns
+    0 if they are valid, or -1 with the error in t.
+    """
+    cdef Py_UCS4 c
+    cdef int k
+    while i < t.length:
+        c = _read_char(t.kind, t.data, i)
+        if c == quote or c == u'\n' or c == u'\r':
+            return 0
+        i += 1
+        if c != u'\\':
+            continue
+        if i >= t.length:
+            return 0
+        c = _read_char(t.kind, t.data, i)
+        i += 1
+        if c == u'x' or c == u'u':
+            for k in range(2 if c == u'x' else 4):
+                if _hex_value(_char_at(t, i)) < 0:
+                    return _fail(t, ERR_X_ESCAPE if c == u'x' else ERR_U_ESCAPE, i - 2)
+                i += 1
+        elif c == u'\r':
+            if _char_at(t, i) == u'\n':
+                i += 1
+        elif _is_digit(c) and not (c == u'0' and not _is_digit(_char_at(t, i))):
+            return _fail(t, ERR_ESCAPE, i - 2)
+    return 0
+
+cdef Py_ssize_t _scan_key(_Tokenizer *t, Py_ssize_t pos, _Token *tok) noexcept nogil:
+    """Scan the object key at pos, a quoted string or an identifier, into tok."""
+    cdef Py_UCS4 c = _char_at(t, pos)
+    if c == u'"' or c == u"'":
+        return _scan_string(t, pos, tok)
+    tok.flags = 0
+    if pos >= t.length or not _is_ident_start(c):
+        return _fail(t, ERR_PROPERTY_NAME, pos)
+    tok.start = pos
+    tok.flags = TF_IDENT
+    pos += 1
+    while _is_ident_part(_char_at(t, pos)):
+        pos += 1
+    tok.end = pos
+    return pos
+
+cdef Py_ssize_t _scan_number(_Tokenizer *t, Py_ssize_t pos, _NumberToken *num) noexcept nogil:
+    """
+    Scan the number (decimal, hex, binary, Infinity or NaN) at pos into num
+    without converting it. Returns the position after it, or -1.
+    """
+    cdef Py_ssize_t i = pos
+    cdef int digit
+    cdef Py_UCS4 c = _char_at(t, i)
+    num.start = pos
+    num.negative = False
+    num.kind = NUM_INT
+    num.base = 10
+    if c == u'-' or c == u'+':
+        num.negative = c == u'-'
+        i += 1
+        c = _char_at(t, i)
+    num.digits_start = i
+    if c == u'I' or c == u'N':
+        num.end = _match_word(t, i, b'Infinity')
+        if num.end:
+            num.kind = NUM_INF
+            return num.end
+        num.end = _match_word(t, i, b'NaN')
+        if num.end:
+            num.kind = NUM_NAN
+            return num.end
+        return _fail(t, ERR_VALUE, pos)
+    if c == u'0' and _char_at(t, i + 1) in u'xXbB':
+        num.base = 16 if _char_at(t, i + 1) in u'xX' else 2
+        i += 2
+        num.digits_start = i
+        while True:
+            digit = _hex_value(_char_at(t, i))
+            if digit < 0 or digit >= num.base:
+                break
+            i += 1
+        if i == num.digits_start:
+            return _fail(t, ERR_HEX if num.base == 16 else ERR_BINARY, pos)
+        num.end = i
+        return i
+    # Decimal integer part
+    while _is_digit(_char_at(t, i)):
+        i += 1
+    if i - num.digits_start > 1 and _char_at(t, num.digits_start) == u'0':
+        return _fail(t, ERR_LEADING_ZERO, pos)
+    if _char_at(t, i) == u'.':
+        num.kind = NUM_FLOAT
+        i += 1
+        while _is_digit(_char_at(t, i)):
+            i += 1
+        if i - num.digits_start == 1:
+            return _fail(t, ERR_VALUE, pos)
+    elif i == num.digits_start:
+        return _fail(t, ERR_VALUE, pos)
+    c = _char_at(t, i)
+    if c == u'e' or c == u'E':
+        num.kind = NUM_FLOAT
+        i += 1
+        c = _char_at(t, i)
+        if c == u'-' or c == u'+':
+            i += 1
+        if not _is_digit(_char_at(t, i)):
+            return _fail(t, ERR_EXPONENT, pos)
+        while _is_digit(_char_at(t, i)):
+            i += 1
+    num.end = i
+    return i
+
+cdef inline void _unpack_number(const _Token *tok, _NumberToken *num) noexcept nogil:
+    num.start = tok.start
+    num.end = tok.end
+    num.digits_start = tok.aux
+    num.kind = tok.flags & 3
+    num.base = (tok.flags >> 2) & 31
+    num.negative = (tok.flags >> 7) & 1
+
+cdef inline int _after_value(const _Tokenizer *t) noexcept nogil:
+    """Return the state that follows a complete value."""
+    if t.depth == 0:
+        return ST_DONE
+    return ST_MAP_NEXT if t.stack[t.depth - 1] == ord('{') else ST_ARRAY_NEXT
+
+cdef void _tokenize(_Tokenizer *t) noexcept nogil:
+    """
+    Scan the next batch of tokens of t, resuming where the previous batch
+    ended, until the batch is full or the value is complete. The last
+    token of the value is TOK_END, or TOK_ERROR for a syntax error.
+    """
+    cdef Py_ssize_t pos = t.pos
+    cdef Py_ssize_t end = 0
+    cdef _Token *tok
+    cdef _NumberToken num
+    cdef char *stack
+    cdef Py_UCS4 c
+    cdef int error = ERR_NONE
+    t.count = 0
+    t.next = 0
+    # The last slot is kept for an error token that follows a string
+    while t.count < t.capacity - 1:
+        tok = &t.tokens[t.count]
+        t.count += 1
+        if t.state == ST_DONE and not t.document:
+            tok.type = TOK_END
+            tok.start = pos
+            break
+        pos = _skip_ws(t, pos)
+        if pos < 0:
+            error = t.error
+            pos = t.error_pos
+            break
+        c = _char_at(t, pos)
+        tok.start = pos
+        if t.state == ST_DONE:
+            if pos < t.length:
+                error = ERR_EXTRA_DATA
+            else:
+                tok.type = TOK_END
+            break
+        if t.state == ST_MAP_COLON:
+            if c != u':':
+                error = ERR_COLON
+                break
+            t.count -= 1
+            pos += 1
+            t.state = ST_VALUE
+            continue
+        if t.state == ST_MAP_NEXT or t.state == ST_ARRAY_NEXT:
+            if c == u',':
+                t.count -= 1
+                pos += 1
+                t.state = ST_MAP_KEY if t.state == ST_MAP_NEXT else ST_ARRAY_VALUE
+                continue
+            if not (c == u'}' if t.state == ST_MAP_NEXT else c == u']'):
+                error = ERR_COMMA
+                break
+        if (c == u'}' and (t.state == ST_MAP_KEY or t.state == ST_MAP_NEXT)) or (
+                c == u']' and (t.state == ST_ARRAY_VALUE or t.state == ST_ARRAY_NEXT)):
+            tok.type = TOK_OBJECT_END if c == u'}' else TOK_ARRAY_END
+            t.depth -= 1
+            t.state = _after_value(t)
+            pos += 1
+            continue
+        if t.state == ST_MAP_KEY:
+            end = _scan_key(t, pos, tok)
+            if end < 0:
+                # An unterminated string with escapes is passed on before the
+                # error, so that errors in its escapes are reported first
+                if tok.flags & TF_ESCAPED:
+                    tok.type = TOK_KEY
+                    tok = &t.tokens[t.count]
+                    t.count += 1
+                error = t.error
+                pos = t.error_pos
+                break
+            tok.type = TOK_KEY
+            t.state = ST_MAP_COLON
+            pos = end
+            continue
+        # A value
+        if c == u'{' or c == u'[':
+            if t.depth == t.stack_size:
+                stack = <char *>PyMem_RawRealloc(t.stack, 2 * t.stack_size)
+                if stack == NULL:
+                    error = ERR_MEMORY
+                    break
+                t.stack = stack
+                t.stack_size *= 2
+            t.stack[t.depth] = <char>c
+            t.depth += 1
+            tok.type = TOK_OBJECT if c == u'{' else TOK_ARRAY
+            t.state = ST_MAP_KEY if c == u'{' else ST_ARRAY_VALUE
+            pos += 1
+            continue
+        if c == u'"' or c == u"'":
+            end = _scan_string(t, pos, tok)
+            if end < 0:
+                if tok.flags & TF_ESCAPED:
+                    tok.type = TOK_STRING
+                    tok = &t.tokens[t.count]
+                    t.count += 1
+                error = t.error
+                pos = t.error_pos
+                break
+            tok.type = TOK_STRING
+        elif _is_digit(c) or c == u'-' or c == u'+' or c == u'.' or c == u'I' or c == u'N':
+            end = _scan_number(t, pos, &num)
+            if end < 0:
+                error = t.error
+                pos = t.error_pos
+                break
+            tok.type = TOK_NUMBER
+            tok.end = end
+            tok.aux = num.digits_start
+            tok.flags = num.kind | (num.base << 2) | (num.negative << 7)
+        elif c == u't' and _match_word(t, pos, b'true'):
+            tok.type = TOK_TRUE
+            end = pos + 4
+        elif c == u'f' and _match_word(t, pos, b'false'):
+            tok.type = TOK_FALSE
+            end = pos + 5
+        elif c == u'n' and _match_word(t, pos, b'null'):
+            tok.type = TOK_NULL
+            end = pos + 4
+        else:
+            error = ERR_EMPTY if (t.document and pos >= t.length and t.state == ST_VALUE
+                                  and t.depth == 0) else ERR_VALUE
+            break
+        t.state = _after_value(t)
+        pos = end
+    if error != ERR_NONE:
+        tok.type = TOK_ERROR
+        tok.flags = error
+        tok.start = pos
+    t.pos = pos
+
+cdef bint _recover(_Tokenizer *t, int error, Py_ssize_t pos) noexcept nogil:
+    """
+    Prepare t to resume scanning after the syntax error at pos. A missing
+    comma (before anything but a closing bracket) or colon is taken as
+    present; otherwise scanning resumes at the next comma, or at the next
+    closing bracket of an open container (closing the ones inside it),
+    skipping strings, comments and nested brackets on the way. Returns False
+    if there is nothing to resume.
+    """
+    cdef Py_ssize_t end, d
+    cdef Py_ssize_t nested = 0
+    cdef _Token tok
+    cdef Py_UCS4 c, opening
+    if t.depth == 0 or pos >= t.length or error == ERR_EXTRA_DATA \
+            or error == ERR_COMMENT or error == ERR_TRIPLE_STRING:
+        return False
+    c = _read_char(t.kind, t.data, pos)
+    if (error == ERR_COMMA and c != u'}' and c != u']') or error == ERR_COLON:
+        t.state = ST_VALUE if error == ERR_COLON else (
+            ST_MAP_KEY if t.state == ST_MAP_NEXT else ST_ARRAY_VALUE)
+        t.pos = pos
+        return True
+    if error == ERR_STRING:
+        # The string runs to the end of its line
+        while pos < t.length and not _is_line_terminator(_read_char(t.kind, t.data, pos)):
+            pos += 1
+    while pos < t.length:
+        c = _read_char(t.kind, t.data, pos)
+        if c == u'{' or c == u'[':
+            nested += 1
+            pos += 1
+        elif nested > 0 and (c == u'}' or c == u']'):
+            nested -= 1
+            pos += 1
+        elif c == u',' and nested == 0:
+            t.state = ST_MAP_KEY if t.stack[t.depth - 1] == ord('{') else ST_ARRAY_VALUE
+            t.pos = pos + 1
+            return True
+        elif c == u'}' or c == u']':
+            opening = u'{' if c == u'}' else u'['
+            d = t.depth - 1
+            while d >= 0 and t.stack[d] != <char>opening:
+                d -= 1
+            if d >= 0:
+                # The tokenizer closes the container when it reads c
+                t.depth = d + 1
+                t.state = ST_MAP_NEXT if c == u'}' else ST_ARRAY_NEXT
+                t.pos = pos
+                return True
+            pos += 1
+        elif c == u'"' or c == u"'":
+            end = _scan_string(t, pos, &tok)
+            pos = end if end > 0 else pos + 1
+        elif c == u'/' and (_char_at(t, pos + 1) == u'/' or _char_at(t, pos + 1) == u'*'):
+            pos = _skip_ws(t, pos)
+            if pos < 0:
+                return False
+        else:
+            pos += 1
+    return False
+
+# A scanned element of a numeric array: an integer until the first float
+cdef union _NumberSlot:
+    long long i
+    double d
+
+@cython.final
+cdef class _ArraySpec:
+    """How to build a homogeneous numeric array (see parse(arrays=...))."""
+    cdef object numpy      # numpy module for ndarray output, None for array.array
+    cdef str typecode      # fixed array.array typecode, or None
+    cdef object dtype      # fixed NumPy dtype, or None
+    cdef int kind          # 'i', 'u' or 'f' of the fixed type, 0 to infer it
+    cdef int itemsize
+    cdef long long lo, hi  # range of a fixed integer type
+    cdef str label         # name of the value in error messages
+
+    cdef object build(self, _NumberSlot *values, Py_ssize_t n, bint floats,
+                      long long lo, long long hi, bint big):
+        """
+        Pack the scanned values into an array of the fixed or narrowest type.
+        With big, some integers are above the int64 range and stored as
+        uint64 (none is then negative).
+        """
+        cdef int kind = self.kind
+        cdef int itemsize = self.itemsize
+        cdef carray.array result
+        if kind == 0:
+            if floats or n == 0:
+                kind, itemsize = ord('f'), 8
+            elif big:
+                kind, itemsize = ord('u'), 8
+            else:
+                kind, itemsize = _narrowest_int(lo, hi)
+        if self.numpy is None:
+            typecode = self.typecode or _ARRAY_TYPECODES[kind, itemsize]
+            result = carray.clone(_ARRAY_TEMPLATES[typecode], n, False)
+            _pack_numbers(values, n, floats, kind, itemsize, result.data.as_chars)
+            return result
+        buffer = PyByteArray_FromStringAndSize(NULL, n * itemsize)
+        _pack_numbers(values, n, floats, kind, itemsize, PyByteArray_AS_STRING(buffer))
+        value = self.numpy.frombuffer(buffer, dtype=f"{chr(kind)}{itemsize}")
+        if self.dtype is not None and value.dtype != self.dtype:
+            value = value.astype(self.dtype)
+        return value
+
+cdef class _Shape
+
+@cython.final
+cdef class _ClassPlan:
+    """How to build instances of a target class (see parse(types=...))."""
+    cdef object cls
+    cdef str name
+    cdef dict fields       # field name -> _Shape of its value, or None
+    cdef tuple required    # fields that must be present in the object
+    cdef bint use_setattr  # __slots__ class without an __init__ of its own
+
+    cdef object build(self, dict values):
+        if not self.use_setattr:
+            return self.cls(**values)
+        instance = self.cls.__new__(self.cls)
+        for name, value in values.items():
+            setattr(instance, name, value)
+        return instance
+
+@cython.final
+cdef class _Shape:
+    """
+    What to build for a value: an instance of a target class and/or the
+    shapes of its children, and the types the decoded value may have.
+    """
+    cdef _ClassPlan plan
+    cdef dict children     # key or index -> _Shape
+    cdef _Shape any        # shape of any other key or index
+    cdef tuple types       # allowed types, or None for no check
+    cdef bint nullable
+    cdef str label         # name of the value in error messages
+    cdef _ArraySpec array  # numeric array to build (see parse(arrays=...))
+
+    cdef inline bint has_children(self):
+        return self.children is not None or self.any is not None
+
+    cdef inline _Shape child(self, key):
+        cdef _Shape shape
+        if self.children is not None:
+            shape = self.children.get(key)
+            if shape is not None:
+                return shape
+        return self.any
+
+# JSON types of values, as bits of _SchemaNode.types
+cdef enum:
+    T_NULL = 1
+    T_BOOLEAN = 2
+    T_INTEGER = 4   # Integers, and floats with an integral value
+    T_NUMBER = 8    # Other numbers
+    T_STRING = 16
+    T_ARRAY = 32
+    T_OBJECT = 64
+
+@cython.final
+cdef class _SchemaNode:
+    """
+    The checks of one JSON Schema (see compile_schema). The checks of a
+    value itself are separate from the schemas of its members, which the
+    decoder applies to each member as it is decoded.
+    """
+    cdef bint never            # The false schema: no value is valid
+    cdef int types             # Allowed T_* bits, 0 for any type
+    cdef tuple enum            # Allowed values (enum or const), or None
+    # Strings
+    cdef Py_ssize_t min_length, max_length  # -1 when not set
+    cdef object pattern        # Compiled regular expression, or None
+    # Numbers
+    cdef bint has_bounds
+    cdef object minimum, maximum, exclusive_minimum, exclusive_maximum, multiple_of
+    # Objects
+    cdef bint object_checks    # Any of the keywords below is set
+    cdef dict properties       # Key -> _SchemaNode
+    cdef list pattern_properties  # (regular expression, _SchemaNode) pairs
+    cdef _SchemaNode additional   # Schema of the other keys, or None
+    cdef tuple required
+    cdef Py_ssize_t min_properties, max_properties
+    # Arrays
+    cdef bint array_checks
+    cdef list prefix_items     # Schemas of the first items, or None
+    cdef _SchemaNode items     # Schema of the other items, or None
+    cdef Py_ssize_t min_items, max_items
+    cdef bint unique_items
+    # Applied to the decoded value as a whole
+    cdef bint combinators
+    cdef list all_of, any_of, one_of
+    cdef _SchemaNode negated
+
+    def __cinit__(self):
+        self.min_length = self.max_length = -1
+        self.min_properties = self.max_properties = -1
+        self.min_items = self.max_items = -1
+        self.required = ()
+
+    cdef inline bint allows(self, int json_type):
+        return not self.never and (self.types == 0 or self.types & json_type)
+
+    cdef str check(self, int json_type, value):
+        """
+        Return why value, of JSON type json_type, is invalid, or None.
+        Members and combinators are not checked.
+        """
+        if self.never:
+            return "no value is allowed here"
+        if self.types and not self.types & json_type:
+            return (f"expected {_json_type_names(self.types)}, "
+                    f"got {_json_type_names(json_type) or type(value).__name__}")
+        if self.enum is not None and not _in_enum(value, self.enum):
+            if len(self.enum) == 1:
+                return f"expected {reprlib.repr(self.enum[0])}, got {reprlib.repr(value)}"
+            return f"{reprlib.repr(value)} is not one of {reprlib.repr(list(self.enum))}"
+        if json_type == T_STRING:
+            return self.check_string(value)
+        if json_type & (T_INTEGER | T_NUMBER) and self.has_bounds:
+            return self.check_number(value)
+        return None
+
+    cdef str check_string(self, str value):
+        cdef Py_ssize_t n
+        if self.min_length >= 0 or self.max_length >= 0:
+            n = len(value)
+            if self.min_length >= 0 and n < self.min_length:
+                return f"string of {n} characters is shorter than {self.min_length}"
+            if self.max_length >= 0 and n > self.max_length:
+                return f"string of {n} characters is longer than {self.max_length}"
+        if self.pattern is not None and self.pattern.search(value) is None:
+            return f"{reprlib.repr(value)} does not match {self.pattern.pattern!r}"
+        return None
+
+    cdef str check_number(self, value):
+        if not isinstance(value, (int, float, Decimal)):
+            return None  # e.g. a hex literal kept as text by parse_hex_bin
+        if self.minimum is not None and value < self.minimum:
+            return f"{value!r} is less than the minimum of {self.minimum!r}"
+        if self.exclusive_minimum is not None and value <= self.exclusive_minimum:
+            return f"{value!r} is not greater than {self.exclusive_minimum!r}"
+        if self.maximum is not None and value > self.maximum:
+            return f"{value!r} is greater than the maximum of {self.maximum!r}"
+        if self.exclusive_maximum is not None and value >= self.exclusive_maximum:
+            return f"{value!r} is not less than {self.exclusive_maximum!r}"
+        if self.multiple_of is not None:
+            if isinstance(value, float) or isinstance(self.multiple_of, float):
+                try:
+                    quotient = value / self.multiple_of
+                    failed = int(quotient) != quotient
+                except (OverflowError, ValueError):
+                    failed = True
+            else:
+                failed = value % self.multiple_of != 0
+            if failed:
+                return f"{value!r} is not a multiple of {self.multiple_of!r}"
+        return None
+
+    cdef str check_size(self, Py_ssize_t n, bint is_object):
+        """Return why an object or array of n members is invalid, or None."""
+        cdef Py_ssize_t low = self.min_properties if is_object else self.min_items
+        cdef Py_ssize_t high = self.max_properties if is_object else self.max_items
+        what = 'properties' if is_object else 'items'
+        if low >= 0 and n < low:
+            return f"expected at least {low} {what}, got {n}"
+        if high >= 0 and n > high:
+            return f"expected at most {high} {what}, got {n}"
+        return None
+
+    cdef _SchemaNode property_schema(self, key, list extra):
+        """
+        Return the schema of the member key, or None if it is not checked.
+        The schemas of matching patternProperties beyond the first one that
+        applies are appended to extra.
+        """
+        cdef _SchemaNode node = None
+        cdef _SchemaNode other
+        cdef bint matched = False
+        if self.properties is not None:
+            node = self.properties.get(key)
+            matched = node is not None
+        if self.pattern_properties is not None and isinstance(key, str):
+            for regex, other in self.pattern_properties:
+                if regex.search(key) is not None:
+                    if matched:
+                        extra.append(other)
+                    else:
+                        node = other
+                        matched = True
+        if not matched:
+            return self.additional
+        return node
+
+    cdef inline _SchemaNode item_schema(self, Py_ssize_t index):
+        """Return the schema of the item at index, or None if it is not checked."""
+        if self.prefix_items is not None and index < len(self.prefix_items):
+            return self.prefix_items[index]
+        return self.items
+
+    cdef int validate(self, value, list path, list errors, bint first) except -1:
+        """
+        Check a decoded value, appending a (path, message) pair to errors
+        for each failure, or only for the first one if first is set.
+        """
+        cdef int json_type = _value_type(value)
+        cdef _SchemaNode child, other
+        cdef list extra
+        cdef Py_ssize_t index
+        message = self.check(json_type, value)
+        if message is not None:
+            errors.append((tuple(path), message))
+            return 0
+        if json_type == T_OBJECT and self.object_checks:
+            for name in self.required:
+                if name not in value:
+                    errors.append((tuple(path), f"missing required property {name!r}"))
+            message = self.check_size(len(value), True)
+            if message is not None:
+                errors.append((tuple(path), message))
+            extra = []
+            for key, item in value.items():
+                if first and errors:
+                    return 0
+                child = self.property_schema(key, extra)
+                if child is not None and child.never:
+                    errors.append((tuple(path), f"property {key!r} is not allowed"))
+                    continue
+                path.append(key)
+                if child is not None:
+                    child.validate(item, path, errors, first)
+                for other in extra:
+                    other.validate(item, path, errors, first)
+                del extra[:]
+                path.pop()
+        elif json_type == T_ARRAY and self.array_checks:
+            message = self.check_size(len(value), False)
+            if message is not None:
+                errors.append((tuple(path), message))
+            if self.unique_items and _has_duplicates(value):
+                errors.append((tuple(path), "array items are not unique"))
+            for index, item in enumerate(value):
+                if first and errors:
+                    return 0
+                child = self.item_schema(index)
+                if child is not None:
+                    path.append(index)
+                    child.validate(item, path, errors, first)
+                    path.pop()
+        if self.combinators and not (first and errors):
+            self.validate_combinators(value, path, errors, first)
+        return 0
+
+    cdef int validate_combinators(self, value, list path, list errors, bint first) except -1:
+        """Check a decoded value against allOf, anyOf, oneOf and not."""
+        cdef _SchemaNode node
+        cdef Py_ssize_t matches
+        if self.all_of is not None:
+            for node in self.all_of:
+                node.validate(value, path, errors, first)
+                if first and errors:
+                    return 0
+        if self.any_of is not None:
+            for node in self.any_of:
+                if node.is_valid(value):
+                    break
+            else:
+                errors.append((tuple(path), "not valid under any of the schemas in anyOf"))
+        if self.one_of is not None:
+            matches = 0
+            for node in self.one_of:
+                matches += node.is_valid(value)
+            if matches == 0:
+                errors.append((tuple(path), "not valid under any of the schemas in oneOf"))
+            elif matches > 1:
+                errors.append((tuple(path), f"valid under {matches} of the schemas in oneOf, "
+                                            f"expected exactly one"))
+        if self.negated is not None and self.negated.is_valid(value):
+            errors.append((tuple(path), "must not be valid under the schema in not"))
+        return 0
+
+    cdef bint is_valid(self, value) except -1:
+        cdef list errors = []
+        self.validate(value, [], errors, True)
+        return not errors
+
+@cython.final
+cdef class _PathNode:
+    """
+    A node of the trie of key paths compiled by compile_paths: the paths
+    that end at this value and the nodes of its selected children.
+    """
+    cdef dict children     # Key or index -> _PathNode
+    cdef tuple names       # The string keys of children
+    cdef _PathNode any     # Node of any key or index ("*")
+    cdef list slots        # Indices of the paths that end here
+
+    cdef inline bint has_children(self):
+        return self.children is not None or self.any is not None
+
+    cdef inline _PathNode child(self, key):
+        cdef _PathNode node
+        if self.children is not None:
+            node = self.children.get(key)
+            if node is not None:
+                return node
+        return self.any
+
+@cython.final
+cdef class _Decoder:
+    """
+    Single-pass recursive descent decoder for Triple-JSON5.
+
+    The tokenizer scans the input string in batches, releasing the GIL for
+    long inputs, and the decoder builds dicts, lists and scalars from the
+    tokens as it goes. Comments, unquoted keys, trailing commas,
+    triple-quoted strings and hex/binary literals are all handled while
+    scanning, so no intermediate copies of the document are made.
+    """
+    cdef str text
+    cdef unsigned int kind
+    cdef void *data
+    cdef Py_ssize_t length
+    cdef Py_ssize_t pos
+    cdef dict memo
+    # Tokenizer over text, also used by the character-level methods
+    cdef _Tokenizer tokens
+    # Location of text within a larger streamed document (see _parse_error)
+    cdef Py_ssize_t offset, line_offset, col_offset
+    # Optional hooks called as values are built (see parse)
+    cdef object object_hook, object_pairs_hook, parse_float, parse_int, parse_hex_bin
+    # Interning: keys, and string values up to intern_values characters,
+    # are shared through memo (0 disables value interning)
+    cdef bint intern_keys
+    cdef Py_ssize_t intern_values
+    # Target types of typed decoding (see parse(types=...)), or None
+    cdef _Shape shape
+    # Numeric arrays to build for every homogeneous array, or None
+    cdef _ArraySpec arrays
+    # Schema the document is validated against (see parse(schema=...)),
+    # the key path of the value being decoded and the failures so far
+    cdef _SchemaNode schema
+    cdef bint fail_fast
+    cdef list schema_path
+    cdef list schema_errors
+    # Key paths being extracted (see extract), the values found so far and
+    # the number of paths without a wildcard still to find (-1 if any path
+    # has one)
+    cdef Paths paths
+    cdef list extracted
+    cdef Py_ssize_t remaining
+    # Counters reported in the stats of parse (see parse_stats); comments
+    # are counted by the tokenizer
+    cdef Py_ssize_t n_objects, n_arrays, n_keys, n_strings, n_numbers
+
+    def __dealloc__(self):
+        PyMem_RawFree(self.tokens.tokens)
+        PyMem_RawFree(self.tokens.stack)
+
+    cdef int reset(self, str text) except -1:
+        self.set_text(text)
+        self.memo = {}
+        self.intern_keys = True
+        self.intern_values = 0
+        self.offset = self.line_offset = self.col_offset = 0
+        self.n_objects = self.n_arrays = self.n_keys = 0
+        self.n_strings = self.n_numbers = self.tokens.comments = 0
+        return 0
+
+    cdef int set_hooks(self, object_hook, object_pairs_hook, parse_float, parse_int,
+                       parse_hex_bin) except -1:
+        self.object_hook = object_hook
+        self.object_pairs_hook = object_pairs_hook
+        self.parse_float = parse_float
+        self.parse_int = parse_int
+        self.parse_hex_bin = parse_hex_bin
+        return 0
+
+    cdef int set_interning(self, bint intern_keys, Py_ssize_t intern_values,
+                           dict table) except -1:
+        self.intern_keys = intern_keys
+        self.intern_values = intern_values
+        if table is not None:
+            self.memo = table
+        return 0
+
+    cdef int set_schema(self, Schema schema) except -1:
+        self.schema = schema.root
+        self.fail_fast = schema.fail_fast
+        self.schema_path = []
+        self.schema_errors = []
+        return 0
+
+    cdef int set_text(self, str text) except -1:
+        """Point the decoder at a new buffer, keeping its key memo."""
+        self.text = text
+        self.kind = PyUnicode_KIND(text)
+        self.data = PyUnicode_DATA(text)
+        self.length = PyUnicode_GET_LENGTH(text)
+        self.pos = 0
+        self.tokens.kind = self.kind
+        self.tokens.data = self.data
+        self.tokens.length = self.length
+        return 0
+
+    cdef inline Py_UCS4 char_at(self, Py_ssize_t i):
+        """Return the character at index i, or 0 past the end of the input."""
+        if i < self.length:
+            return PyUnicode_READ(self.kind, self.data, i)
+        return 0
+
+    cdef error(self, str msg, Py_ssize_t pos):
+        """Raise a TJSON5ParseError pointing at pos in the input."""
+        raise _parse_error(self.text, msg, pos, self.offset, self.line_offset, self.col_offset)
+
+    cdef int syntax_error(self, int error, Py_ssize_t pos) except -1:
+        """Raise the exception for an ERR_* code of the tokenizer."""
+        if error == ERR_MEMORY:
+            raise MemoryError()
+        if error == ERR_EMPTY:
+            raise TJSON5ParseError(_SYNTAX_ERRORS[error])
+        self.error(_SYNTAX_ERRORS[error], pos)
+
+    cdef inline int check_scan(self, Py_ssize_t end) except -1:
+        """Move to end, as returned by a scan function, or raise its error."""
+        if end < 0:
+            self.syntax_error(self.tokens.error, self.tokens.error_pos)
+        self.pos = end
+        return 0
+
+    cdef int skip_ws(self) except -1:
+        """Skip whitespace and comments."""
+        return self.check_scan(_skip_ws(&self.tokens, self.pos))
+
+    cdef inline void skip_ws_only(self):
+        """Skip whitespace, but not comments."""
+        self.pos = _skip_spaces(&self.tokens, self.pos)
+
+    cdef bint match_word(self, const char *word):
+        """Consume the ASCII word at the current position if it is there."""
+        cdef Py_ssize_t end = _match_word(&self.tokens, self.pos, word)
+        if end:
+            self.pos = end
+            return True
+        return False
+
+    cdef object decode_document(self):
+        """Decode the whole input as a single value."""
+        cdef Py_ssize_t start = self.pos
+        self.start_tokens(self.pos, True)
+        try:
+            if self.schema is not None:
+                value = self.decode_validated(self.schema)
+            elif self.shape is None:
+                value = self.decode_value()
+            else:
+                value = self.decode_shaped(self.shape)
+            self.next_token()  # The end of input, or "Extra data"
+        except RecursionError:
+            self.depth_error(start)
+        if self.schema_errors:
+            for error in self.schema_errors:
+                error.errors = self.schema_errors
+            raise self.schema_errors[0]
+        return value
+
+    cdef int depth_error(self, Py_ssize_t start) except -1:
+        """
+        Raise the error for a document nested deeper than the recursion
+        limit allows, at the start of its value (after the whitespace and
+        comments at start): where the limit is reached depends on the call
+        stack, so no position within the value would be reproducible.
+        """
+        self.pos = start
+        self.skip_ws()
+        self.error("Maximum nesting depth exceeded", self.pos)
+
+    cdef dict parse_stats(self, double seconds):
+        return {'seconds': seconds, 'chars': self.length, 'objects': self.n_objects,
+                'arrays': self.n_arrays, 'keys': self.n_keys, 'strings': self.n_strings,
+                'numbers': self.n_numbers, 'comments': self.tokens.comments}
+
+    # Token stream: the tokenizer scans a batch of tokens at a time, and
+    # the methods below build the values from them. A token pointer is
+    # only valid until the next call of next_token or peek_token.
+
+    cdef int start_tokens(self, Py_ssize_t pos, bint document) except -1:
+        """Start tokenizing the value (or document) at pos."""
+        cdef _Tokenizer *t = &self.tokens
+        if t.tokens == NULL:
+            # Small inputs never need a full batch
+            t.capacity = min(TOKEN_CAPACITY, self.length - pos + 2)
+            t.tokens = <_Token *>PyMem_RawMalloc(t.capacity * sizeof(_Token))
+            t.stack_size = STACK_CAPACITY
+            t.stack = <char *>PyMem_RawMalloc(t.stack_size)
+            if t.tokens == NULL or t.stack == NULL:
+                raise MemoryError()
+        t.pos = pos
+        t.state = ST_VALUE
+        t.document = document
+        t.depth = 0
+        t.count = t.next = 0
+        return 0
+
+    cdef int fill_tokens(self) except -1:
+        """Scan the next batch of tokens, without the GIL for long inputs."""
+        cdef _Tokenizer *t = &self.tokens
+        if t.length - t.pos >= NOGIL_MIN_CHARS:
+            with nogil:
+                _tokenize(t)
+        else:
+            _tokenize(t)
+        return 0
+
+    cdef inline _Token *peek_token(self) except NULL:
+        """Return the next token without consuming it."""
+        cdef _Token *tok
+        if self.tokens.next == self.tokens.count:
+            self.fill_tokens()
+        tok = &self.tokens.tokens[self.tokens.next]
+        if tok.type == TOK_ERROR:
+            self.syntax_error(tok.flags, tok.start)
+        return tok
+
+    cdef inline _Token *next_token(self) except NULL:
+        """Consume and return the next token."""
+        cdef _Token *tok = self.peek_token()
+        self.tokens.next += 1
+        return tok
+
+    cdef object decode_value(self):
+        """Decode the value of the next tokens."""
+        return self.decode_token(self.next_token())
+
+    cdef object decode_token(self, _Token *tok):
+        """Decode the value that starts with tok."""
+        cdef int token_type = tok.type
+        cdef _NumberToken num
+        if token_type == TOK_STRING:
+            self.n_strings += 1
+            if self.intern_values:
+                return self.intern_value(self.token_text(tok))
+            return self.token_text(tok)
+        if token_type == TOK_NUMBER:
+            self.n_numbers += 1
+            _unpack_number(tok, &num)
+            return self.number_value(&num)
+        if token_type == TOK_OBJECT:
+            return self.decode_object(tok.start)
+        if token_type == TOK_ARRAY:
+            return self.decode_array(tok.start)
+        if token_type == TOK_TRUE:
+            return True
+        if token_type == TOK_FALSE:
+            return False
+        return None
+
+    cdef object decode_object(self, Py_ssize_t start):
+        self.pos = start
+        if self.object_pairs_hook is not None:
+            return self.object_pairs_hook(self.decode_pairs())
+        if self.object_hook is not None:
+            return self.object_hook(self.decode_dict())
+        return self.decode_dict()
+
+    cdef dict decode_dict(self):
+        cdef dict result = {}
+        cdef _Token *tok
+        self.n_objects += 1
+        Py_EnterRecursiveCall(" while decoding a Triple-JSON5 object")
+        try:
+            while True:
+                tok = self.next_token()
+                if tok.type == TOK_OBJECT_END:
+                    return result
+                key = self.decode_key_token(tok)
+                PyDict_SetItem(result, key, self.decode_value())
+        finally:
+            Py_LeaveRecursiveCall()
+
+    cdef list decode_pairs(self):
+        """Decode an object as a list of (key, value) pairs, in order."""
+        cdef list result = []
+        cdef _Token *tok
+        self.n_objects += 1
+        Py_EnterRecursiveCall(" while decoding a Triple-JSON5 object")
+        try:
+            while True:
+                tok = self.next_token()
+                if tok.type == TOK_OBJECT_END:
+                    return result
+                key = self.decode_key_token(tok)
+                PyList_Append(result, (key, self.decode_value()))
+        finally:
+            Py_LeaveRecursiveCall()
+
+    cdef object decode_array(self, Py_ssize_t start):
+        cdef list result = []
+        if self.arrays is not None:
+            return self.decode_numeric_array(self.arrays, False, start)
+        self.n_arrays += 1
+        self.pos = start
+        Py_EnterRecursiveCall(" while decoding a Triple-JSON5 array")
+        try:
+            self.decode_items(result)
+        finally:
+            Py_LeaveRecursiveCall()
+        return result
+
+    cdef int decode_items(self, list result) except -1:
+        """Append the remaining items of an array to result."""
+        cdef _Token *tok
+        while True:
+            tok = self.next_token()
+            if tok.type == TOK_ARRAY_END:
+                return 0
+            PyList_Append(result, self.decode_token(tok))
+
+    cdef object decode_key_token(self, _Token *tok):
+        """Decode an object key token."""
+        key = self.token_text(tok)
+        self.n_keys += 1
+        # Share one string object per distinct key, like json's scanner does
+        if self.intern_keys:
+            return self.memo.setdefault(key, key)
+        return key
+
+    cdef object token_text(self, _Token *tok):
+        """Return the text of a string or key token, with escapes decoded."""
+        if tok.flags == 0:
+            return PyUnicode_Substring(self.text, tok.start + 1, tok.end - 1)
+        if tok.flags & TF_IDENT:
+            return PyUnicode_Substring(self.text, tok.start, tok.end)
+        if tok.flags & TF_TRIPLE:
+            return PyUnicode_Substring(self.text, tok.start + 3, tok.end - 3)
+        return self.decode_escaped_string(PyUnicode_READ(self.kind, self.data, tok.start),
+                                          tok.start + 1, tok.aux)
+
+    cdef object intern_value(self, str value):
+        if len(value) <= self.intern_values:
+            return self.memo.setdefault(value, value)
+        return value
+
+    # Character-level decoding of single tokens at the current position,
+    # for the event parser and the structural scans below
+
+    cdef object decode_scalar(self):
+        """Decode the string, number or literal at the current position."""
+        cdef Py_UCS4 c = self.char_at(self.pos)
+        if c == u'"' or c == u"'":
+            self.n_strings += 1
+            if self.intern_values:
+                return self.intern_value(self.decode_string())
+            return self.decode_string()
+        if _is_digit(c) or c == u'-' or c == u'+' or c == u'.':
+            return self.decode_number()
+        if c == u't' and self.match_word(b'true'):
+            return True
+        if c == u'f' and self.match_word(b'false'):
+            return False
+        if c == u'n' and self.match_word(b'null'):
+            return None
+        if c == u'I' or c == u'N':
+            return self.decode_number()
+        self.error("Expecting value", self.pos)
+
+    cdef object decode_key(self):
+        """Decode an object key: a quoted string or a bare identifier."""
+        cdef _Token tok
+        cdef Py_ssize_t end = _scan_key(&self.tokens, self.pos, &tok)
+        # Errors in escapes are reported before an unterminated string
+        if end < 0 and not tok.flags & TF_ESCAPED:
+            self.check_scan(end)
+        key = self.decode_key_token(&tok)
+        self.pos = end
+        return key
+
+    cdef object decode_string(self):
+        """Decode a single, double or triple-quoted string."""
+        cdef _Token tok
+        cdef Py_ssize_t end = _scan_string(&self.tokens, self.pos, &tok)
+        if end < 0 and not tok.flags & TF_ESCAPED:
+            self.check_scan(end)
+        value = self.token_text(&tok)
+        self.pos = end
+        return value
+
+    cdef object decode_escaped_string(self, Py_UCS4 quote, Py_ssize_t start, Py_ssize_t i):
+        """Slow path of decode_string for strings that contain escapes."""
+        cdef list chunks = []
+        cdef Py_ssize_t chunk_start = start
+        cdef Py_UCS4 c
+        cdef int h, k
+        cdef long code, low
+        while i < self.length:
+            c = PyUnicode_READ(self.kind, self.data, i)
+            if c == quote:
+                if i > chunk_start:
+                    chunks.append(PyUnicode_Substring(self.text, chunk_start, i))
+                self.pos = i + 1
+                return "".join(chunks)
+            if c == u'\n' or c == u'\r':
+                break
+            if c != u'\\':
+                i += 1
+                continue
+            if i > chunk_start:
+                chunks.append(PyUnicode_Substring(self.text, chunk_start, i))
+            i += 1
+            if i >= self.length:
+                break
+            c = PyUnicode_READ(self.kind, self.data, i)
+            i += 1
+            if c == u'n':
+                chunks.append('\n')
+            elif c == u't':
+                chunks.append('\t')
+            elif c == u'r':
+                chunks.append('\r')
+            elif c == u'b':
+                chunks.append('\b')
+            elif c == u'f':
+                chunks.append('\f')
+            elif c == u'v':
+                chunks.append('\v')
+            elif c == u'0' and not _is_digit(self.char_at(i)):
+                chunks.append('\0')
+            elif c == u'x' or c == u'u':
+                k = 2 if c == u'x' else 4
+                code = 0
+                for _ in range(k):
+                    h = _hex_value(self.char_at(i))
+                    if h < 0:
+                        self.syntax_error(ERR_X_ESCAPE if c == u'x' else ERR_U_ESCAPE, i - 2)
+                    code = code * 16 + h
+                    i += 1
+                # Combine UTF-16 surrogate pairs written as \uXXXX\uXXXX
+                if (0xd800 <= code <= 0xdbff and self.char_at(i) == u'\\'
+                        and self.char_at(i + 1) == u'u'):
+                    low = 0
+                    for k in range(4):
+                        h = _hex_value(self.char_at(i + 2 + k))
+                        if h < 0:
+                            break
+                        low = low * 16 + h
+                    else:
+                        if 0xdc00 <= low <= 0xdfff:
+                            code = 0x10000 + ((code - 0xd800) << 10) + (low - 0xdc00)
+                            i += 6
+                chunks.append(chr(code))
+            elif c == u'\r':
+                # Line continuation; \r\n counts as a single terminator
+                if self.char_at(i) == u'\n':
+                    i += 1
+            elif c == u'\n' or c == 0x2028 or c == 0x2029:
+                pass
+            elif _is_digit(c):
+                self.syntax_error(ERR_ESCAPE, i - 2)
+            else:
+                # \", \', \\, \/ and any other character escape to themselves
+                chunks.append(chr(c))
+            chunk_start = i
+        self.error("Unterminated string starting at", start - 1)
+
+    cdef int scan_number(self, _NumberToken *tok) except -1:
+        """
+        Scan the number (decimal, hex, binary, Infinity or NaN) at the
+        current position into tok without converting it.
+        """
+        return self.check_scan(_scan_number(&self.tokens, self.pos, tok))
+
+    cdef object number_value(self, _NumberToken *tok):
+        """Convert a scanned number token to a Python int or float."""
+        cdef long long value = 0
+        cdef Py_ssize_t j
+        if tok.kind == NUM_FLOAT:
+            if self.parse_float is not None:
+                return self.parse_float(PyUnicode_Substring(self.text, tok.start, tok.end))
+            return float(PyUnicode_Substring(self.text, tok.start, tok.end))
+        if tok.kind == NUM_INF:
+            return NEG_INF if tok.negative else POS_INF
+        if tok.kind == NUM_NAN:
+            return NAN
+        if tok.base != 10 and self.parse_hex_bin is not None:
+            return self.parse_hex_bin(PyUnicode_Substring(self.text, tok.start, tok.end))
+        if tok.base == 10 and self.parse_int is not None:
+            return self.parse_int(PyUnicode_Substring(self.text, tok.start, tok.end))
+        if tok.base != 10:
+            if (tok.end - tok.digits_start) * (4 if tok.base == 16 else 1) <= 62:
+                for j in range(tok.digits_start, tok.end):
+                    value = value * tok.base + _hex_value(PyUnicode_READ(self.kind, self.data, j))
+                return PyLong_FromLongLong(-value if tok.negative else value)
+            result = int(PyUnicode_Substring(self.text, tok.digits_start, tok.end), tok.base)
+            return -result if tok.negative else result
+        if tok.end - tok.digits_start <= 18:
+            for j in range(tok.digits_start, tok.end):
+                value = value * 10 + (<int>PyUnicode_READ(self.kind, self.data, j) - ord('0'))
+            return PyLong_FromLongLong(-value if tok.negative else value)
+        try:
+            return int(PyUnicode_Substring(self.text, tok.start, tok.end))
+        except ValueError as e:
+            self.error(str(e), tok.start)
+
+    cdef object decode_number(self):
+        """Decode a decimal, hex or binary number, Infinity or NaN."""
+        cdef _NumberToken tok
+        self.n_numbers += 1
+        self.scan_number(&tok)
+        return self.number_value(&tok)
+
+    cdef bint token_int64(self, _NumberToken *tok, long long *out):
+        """
+        Convert an integer token to a C integer. Returns False if it does
+        not fit in 64 bits.
+        """
+        cdef unsigned long long value = 0
+        cdef unsigned long long limit = (<unsigned long long>1) << 63
+        cdef unsigned long long digit
+        cdef Py_ssize_t j
+        for j in range(tok.digits_start, tok.end):
+            digit = _hex_value(PyUnicode_READ(self.kind, self.data, j))
+            if value > (limit - digit) // <unsigned long long>tok.base:
+                return False
+            value = value * tok.base + digit
+        if tok.negative:
+            out[0] = <long long>(0 - value)
+        elif value == limit:
+            return False
+        else:
+            out[0] = <long long>value
+        return True
+
+    cdef bint token_uint64(self, _NumberToken *tok, unsigned long long *out):
+        """
+        Convert a non-negative integer token to an unsigned C integer.
+        Returns False if it is negative or does not fit in 64 bits.
+        """
+        cdef unsigned long long value = 0
+        cdef unsigned long long digit
+        cdef Py_ssize_t j
+        if tok.negative:
+            return False
+        for j in range(tok.digits_start, tok.end):
+            digit = _hex_value(PyUnicode_READ(self.kind, self.data, j))
+            if value > (ULLONG_MAX - digit) // <unsigned long long>tok.base:
+                return False
+            value = value * tok.base + digit
+        out[0] = value
+        return True
+
+    cdef double token_double(self, _NumberToken *tok) except? -1.0:
+        """Convert a number token to a C double."""
+        cdef char buf[64]
+        cdef Py_ssize_t length = tok.end - tok.start
+        cdef Py_ssize_t j
+        if tok.kind == NUM_INF:
+            return -INFINITY if tok.negative else INFINITY
+        if tok.kind == NUM_NAN:
+            return C_NAN
+        if length >= 64:
+            return float(PyUnicode_Substring(self.text, tok.start, tok.end))
+        for j in range(length):
+            buf[j] = <char>PyUnicode_READ(self.kind, self.data, tok.start + j)
+        buf[length] = 0
+        return PyOS_string_to_double(buf, NULL, NULL)
+
+    cdef object decode_numeric_array(self, _ArraySpec spec, bint strict, Py_ssize_t start):
+        """
+        Decode the items of the array starting at start as described by
+        spec, converting the numbers straight into a C buffer that is then
+        packed into the result. If the array turns out to hold other values
+        (or nothing), a non-strict call decodes it as a list instead.
+        """
+        cdef Py_ssize_t n = 0
+        cdef Py_ssize_t capacity = 64
+        cdef Py_ssize_t k
+        cdef _NumberSlot *values
+        cdef _NumberSlot *grown
+        cdef Py_ssize_t *positions = NULL
+        cdef Py_ssize_t *grown_positions
+        cdef _Token *tok
+        cdef _NumberToken num
+        cdef bint floats = False
+        cdef bint big = False, is_big, in_range
+        cdef long long lo = 0, hi = 0, value
+        cdef unsigned long long uvalue = 0
+        values = <_NumberSlot *>PyMem_Malloc(capacity * sizeof(_NumberSlot))
+        if values == NULL:
+            raise MemoryError()
+        try:
+            if not strict:
+                # Where the numbers start, to decode them again for a list
+                positions = <Py_ssize_t *>PyMem_Malloc(capacity * sizeof(Py_ssize_t))
+                if positions == NULL:
+                    raise MemoryError()
+            while True:
+                tok = self.next_token()
+                if tok.type == TOK_ARRAY_END:
+                    self.n_arrays += 1
+                    if n == 0 and not strict:
+                        return []  # The type of an empty array is unknown
+                    self.n_numbers += n
+                    return spec.build(values, n, floats, lo, hi, big)
+                if tok.type != TOK_NUMBER:
+                    if not strict:
+                        return self.decode_mixed_array(positions, n, tok, start)
+                    self.error(f"Expected number in numeric array {spec.label}", tok.start)
+                _unpack_number(tok, &num)
+                if n == capacity:
+                    capacity *= 2
+                    grown = <_NumberSlot *>PyMem_Realloc(values, capacity * sizeof(_NumberSlot))
+                    if grown == NULL:
+                        raise MemoryError()
+                    values = grown
+                    if positions != NULL:
+                        grown_positions = <Py_ssize_t *>PyMem_Realloc(
+                            positions, capacity * sizeof(Py_ssize_t))
+                        if grown_positions == NULL:
+                            raise MemoryError()
+                        positions = grown_positions
+                if num.kind == NUM_INT:
+                    is_big = False
+                    if self.token_int64(&num, &value):
+                        in_range = (spec.kind == 0 or spec.lo <= value <= spec.hi) and not (
+                            value < 0 and big and not floats)
+                    elif self.token_uint64(&num, &uvalue):
+                        # Above the int64 range: only held by uint64, without negatives
+                        is_big = True
+                        value = <long long>uvalue
+                        in_range = (spec.kind == ord('u') and spec.itemsize == 8) or (
+                            spec.kind == 0 and (floats or n == 0 or lo >= 0))
+                    else:
+                        in_range = False
+                    if not in_range:
+                        if not strict:
+                            return self.decode_mixed_array(positions, n, tok, start)
+                        self.error(f"Number out of range for numeric array {spec.label}", tok.start)
+                    if floats:
+                        values[n].d = <double>uvalue if is_big else <double>value
+                    else:
+                        values[n].i = value
+                        if is_big:
+                            big = True
+                        else:
+                            if n == 0 or value < lo:
+                                lo = value
+                            if n == 0 or value > hi:
+                                hi = value
+                else:
+                    if spec.kind != 0 and spec.kind != ord('f'):
+                        self.error(f"Expected integer in numeric array {spec.label}", tok.start)
+                    if not floats:
+                        for k in range(n):
+                            if big:
+                                values[k].d = <double><unsigned long long>values[k].i
+                            else:
+                                values[k].d = <double>values[k].i
+                        floats = True
+                    values[n].d = self.token_double(&num)
+                if positions != NULL:
+                    positions[n] = tok.start
+                n += 1
+        finally:
+            PyMem_Free(values)
+            PyMem_Free(positions)
+
+    cdef list decode_mixed_array(self, Py_ssize_t *positions, Py_ssize_t n, _Token *tok,
+                                 Py_ssize_t start):
+        """
+        Finish a non-strict numeric array as a list: decode again the n
+        numbers scanned so far, then tok and the rest of the items.
+        """
+        cdef list result = []
+        cdef _NumberToken num
+        cdef Py_ssize_t k
+        self.n_arrays += 1
+        self.n_numbers += n
+        for k in range(n):
+            _scan_number(&self.tokens, positions[k], &num)
+            PyList_Append(result, self.number_value(&num))
+        self.pos = start
+        Py_EnterRecursiveCall(" while decoding a Triple-JSON5 array")
+        try:
+            PyList_Append(result, self.decode_token(tok))
+            self.decode_items(result)
+        finally:
+            Py_LeaveRecursiveCall()
+        return result
+
+    # Typed decoding: objects with a target class are built as instances
+    # of it directly from the scanned fields, without an intermediate dict.
+
+    cdef object decode_shaped(self, _Shape shape):
+        cdef _Token *tok = self.next_token()
+        cdef Py_ssize_t start = tok.start
+        cdef int token_type = tok.type
+        if shape.array is not None:
+            if token_type != TOK_ARRAY:
+                self.error(f"Expected numeric array for {shape.array.label}", start)
+            value = self.decode_numeric_array(shape.array, True, start)
+        elif shape.plan is not None and token_type == TOK_OBJECT:
+            value = self.decode_instance(shape, start)
+        elif (token_type == TOK_OBJECT or token_type == TOK_ARRAY) and shape.has_children():
+            value = self.decode_shaped_container(shape, token_type == TOK_OBJECT, start)
+        else:
+            value = self.decode_token(tok)
+        if shape.types is not None and not _type_matches(value, shape):
+            self.error(f"Expected {_type_names(shape)} for {shape.label}, "
+                       f"got {type(value).__name__}", start)
+        return value
+
+    cdef object decode_shaped_container(self, _Shape shape, bint is_object, Py_ssize_t start):
+        """Decode an object or array whose children have shapes."""
+        cdef dict obj = {}
+        cdef list arr = []
+        cdef Py_ssize_t index = 0
+        cdef _Shape child
+        cdef _Token *tok
+        if is_object:
+            self.n_objects += 1
+        else:
+            self.n_arrays += 1
+        self.pos = start
+        Py_EnterRecursiveCall(" while decoding a Triple-JSON5 value")
+        try:
+            while True:
+                if is_object:
+                    tok = self.next_token()
+                    if tok.type == TOK_OBJECT_END:
+                        break
+                    key = self.decode_key_token(tok)
+                    child = shape.child(key)
+                    PyDict_SetItem(obj, key, self.decode_value() if child is None
+                                   else self.decode_shaped(child))
+                else:
+                    if self.peek_token().type == TOK_ARRAY_END:
+                        self.tokens.next += 1
+                        break
+                    child = shape.child(index)
+                    PyList_Append(arr, self.decode_value() if child is None
+                                  else self.decode_shaped(child))
+                    index += 1
+        finally:
+            Py_LeaveRecursiveCall()
+        if not is_object:
+            return arr
+        if self.object_pairs_hook is not None:
+            return self.object_pairs_hook(list(obj.items()))
+        if self.object_hook is not None:
+            return self.object_hook(obj)
+        return obj
+
+    cdef object decode_instance(self, _Shape shape, Py_ssize_t start):
+        """Decode an object as an instance of the target class of shape."""
+        cdef _ClassPlan plan = shape.plan
+        cdef dict values = {}
+        cdef _Shape field
+        cdef _Token *tok
+        cdef Py_ssize_t key_pos
+        self.n_objects += 1
+        self.pos = start
+        Py_EnterRecursiveCall(" while decoding a Triple-JSON5 object")
+        try:
+            while True:
+                tok = self.next_token()
+                if tok.type == TOK_OBJECT_END:
+                    break
+                key_pos = tok.start
+                key = self.decode_key_token(tok)
+                if key not in plan.fields:
+                    self.error(f"Unknown field {key!r} for {plan.name}", key_pos)
+                # A shape given by key path takes precedence over the annotation
+                field = shape.child(key) if shape.has_children() else None
+                if field is None:
+                    field = plan.fields[key]
+                PyDict_SetItem(values, key, self.decode_value() if field is None
+                               else self.decode_shaped(field))
+        finally:
+            Py_LeaveRecursiveCall()
+        for name in plan.required:
+            if name not in values:
+                self.error(f"Missing field {name!r} for {plan.name}", start)
+        try:
+            return plan.build(values)
+        except (TypeError, ValueError) as e:
+            self.error(f"Cannot create {plan.name}: {e}", start)
+
+    # Schema validation: values are checked against the compiled schema
+    # while they are decoded, so that failures point at their source.
+
+    cdef object decode_validated(self, _SchemaNode node):
+        cdef _Token *tok = self.next_token()
+        cdef Py_ssize_t start = tok.start
+        cdef int token_type = tok.type
+        cdef int json_type = _token_json_type(tok)
+        if token_type == TOK_OBJECT and node.object_checks and node.allows(T_OBJECT):
+            value = self.decode_validated_object(node, start)
+        elif token_type == TOK_ARRAY and node.array_checks and node.allows(T_ARRAY):
+            value = self.decode_validated_array(node, start)
+        else:
+            value = self.decode_token(tok)
+            if json_type == T_NUMBER and type(value) is float and value.is_integer():
+                json_type = T_INTEGER
+        message = node.check(json_type, value)
+        if message is not None:
+            self.invalid(message, start, None)
+        elif node.combinators:
+            self.check_decoded(node, value, start, True)
+        return value
+
+    cdef object decode_validated_object(self, _SchemaNode node, Py_ssize_t start):
+        """Decode an object, checking its members against the schema node."""
+        cdef dict obj = {}
+        cdef list extra = []
+        cdef _SchemaNode child, other
+        cdef _Token *tok
+        cdef Py_ssize_t key_pos, value_pos
+        self.n_objects += 1
+        self.pos = start
+        Py_EnterRecursiveCall(" while decoding a Triple-JSON5 object")
+        try:
+            while True:
+                tok = self.next_token()
+                if tok.type == TOK_OBJECT_END:
+                    break
+                key_pos = tok.start
+                key = self.decode_key_token(tok)
+                child = node.property_schema(key, extra)
+                if child is not None and child.never:
+                    self.invalid(f"property {key!r} is not allowed", key_pos, None)
+                    child = None
+                self.schema_path.append(key)
+                value_pos = self.peek_token().start
+                value = self.decode_value() if child is None else self.decode_validated(child)
+                for other in extra:
+                    self.check_decoded(other, value, value_pos, False)
+                del extra[:]
+                self.schema_path.pop()
+                PyDict_SetItem(obj, key, value)
+        finally:
+            Py_LeaveRecursiveCall()
+        for name in node.required:
+            if name not in obj:
+                self.invalid(f"missing required property {name!r}", start, None)
+        message = node.check_size(len(obj), True)
+        if message is not None:
+            self.invalid(message, start, None)
+        if self.object_pairs_hook is not None:
+            return self.object_pairs_hook(list(obj.items()))
+        if self.object_hook is not None:
+            return self.object_hook(obj)
+        return obj
+
+    cdef list decode_validated_array(self, _SchemaNode node, Py_ssize_t start):
+        """Decode an array, checking its items against the schema node."""
+        cdef list arr = []
+        cdef Py_ssize_t index = 0
+        cdef _SchemaNode child
+        self.n_arrays += 1
+        self.pos = start
+        Py_EnterRecursiveCall(" while decoding a Triple-JSON5 array")
+        try:
+            while True:
+                if self.peek_token().type == TOK_ARRAY_END:
+                    self.tokens.next += 1
+                    break
+                child = node.item_schema(index)
+                self.schema_path.append(index)
+                PyList_Append(arr, self.decode_value() if child is None
+                              else self.decode_validated(child))
+                self.schema_path.pop()
+                index += 1
+        finally:
+            Py_LeaveRecursiveCall()
+        message = node.check_size(index, False)
+        if message is not None:
+            self.invalid(message, start, None)
+        if node.unique_items and _has_duplicates(arr):
+            self.invalid("array items are not unique", start, None)
+        return arr
+
+    cdef int check_decoded(self, _SchemaNode node, value, Py_ssize_t pos,
+                           bint combinators) except -1:
+        """
+        Check a value after it has been decoded, against the combinators of
+        node or against the whole of it, reporting failures at pos.
+        """
+        cdef list errors = []
+        if combinators:
+            node.validate_combinators(value, [], errors, self.fail_fast)
+        else:
+            node.validate(value, [], errors, self.fail_fast)
+        for path, message in errors:
+            self.invalid(message, pos, path)
+        return 0
+
+    cdef int invalid(self, str message, Py_ssize_t pos, tuple path) except -1:
+        """
+        Report a schema failure at pos for the value being decoded (or at
+        path below it): raise it with fail_fast, or collect it.
+        """
+        cdef tuple full = tuple(self.schema_path)
+        if path is not None:
+            full += path
+        error = _parse_error(self.text, message, pos, self.offset, self.line_offset,
+                             self.col_offset, full)
+        if self.fail_fast:
+            raise error
+        self.schema_errors.append(error)
+        return 0
+
+    # Path extraction: only the values at the selected key paths are
+    # built, the tokens of every other subtree are skipped.
+
+    cdef list extract_document(self, Paths paths):
+        """Return the value (or list of values) found for each path, or _MISSING."""
+        self.paths = paths
+        self.extracted = [[] if wildcard else _MISSING for wildcard in paths.wildcards]
+        self.remaining = len(paths.wildcards) if paths.plain else -1
+        cdef Py_ssize_t start = self.pos
+        self.start_tokens(self.pos, True)
+        try:
+            if not self.extract_value(paths.root, None):
+                self.next_token()  # The end of input, or "Extra data"
+        except RecursionError:
+            self.depth_error(start)
+        return self.extracted
+
+    cdef bint extract_value(self, _PathNode node, list found) except -1:
+        """
+        Extract the selected values within the next value, which is at node
+        of the path trie. Within an object member, the values are appended
+        to found after their slot, as a later duplicate of the key
+        replaces them the way parse keeps the last one; outside of any
+        object (found is None) they are final and stored at once. Returns
+        True once every path has been found and the rest of the input can
+        be ignored.
+        """
+        cdef _Token *tok = self.next_token()
+        cdef Py_ssize_t index = 0
+        cdef _PathNode child
+        cdef list pairs, member, first
+        cdef dict members
+        if node.slots is not None:
+            pairs = [] if found is None else found
+            self.select_built(node, self.decode_token(tok), pairs)
+            return found is None and self.store_extracted(pairs)
+        if tok.type == TOK_OBJECT:
+            # The values found in the first selected member and, once there
+            # are others, by key: a duplicate takes the place of the first
+            first_key = first = members = None
+            while True:
+                tok = self.next_token()
+                if tok.type == TOK_OBJECT_END:
+                    break
+                key = self.member_key(node, tok)
+                child = None if key is None else node.child(key)
+                if child is None:
+                    self.skip_tokens(self.next_token())
+                    continue
+                member = []
+                if first is None or (members is None and key == first_key):
+                    first_key, first = key, member
+                else:
+                    if members is None:
+                        members = {first_key: first}
+                    members[key] = member
+                self.extract_value(child, member)
+            if members is None:
+                if first is None:
+                    return False
+                if found is not None:
+                    found.extend(first)
+                    return False
+                return self.store_extracted(first)
+            for member in members.values():
+                if found is not None:
+                    found.extend(member)
+                elif self.store_extracted(member):
+                    return True
+        elif tok.type == TOK_ARRAY:
+            while True:
+                tok = self.peek_token()
+                if tok.type == TOK_ARRAY_END:
+                    self.tokens.next += 1
+                    return False
+                child = node.child(index)
+                index += 1
+                if child is None:
+                    self.tokens.next += 1
+                    self.skip_tokens(tok)
+                elif self.extract_value(child, found):
+                    return True
+        return False
+
+    cdef object member_key(self, _PathNode node, _Token *tok):
+        """
+        Return the text of a key token if node may have a child for it,
+        else None, comparing plain keys with the child names in place.
+        """
+        cdef Py_ssize_t start, end
+        if node.names is None:
+            return None if node.any is None else self.token_text(tok)
+        if tok.flags & TF_IDENT:
+            start, end = tok.start, tok.end
+        elif tok.flags & TF_TRIPLE:
+            start, end = tok.start + 3, tok.end - 3
+        elif tok.flags:
+            return self.token_text(tok)
+        else:
+            start, end = tok.start + 1, tok.end - 1
+        for name in node.names:
+            if PyUnicode_GET_LENGTH(name) == end - start and \
+                    PyUnicode_Tailmatch(self.text, name, start, end, -1):
+                return name
+        return None if node.any is None else self.token_text(tok)
+
+    cdef int skip_tokens(self, _Token *tok) except -1:
+        """Skip the rest of the value that starts with tok, without decoding it."""
+        cdef _Tokenizer *t = &self.tokens
+        cdef Py_ssize_t depth
+        cdef int token_type = tok.type
+        if token_type != TOK_OBJECT and token_type != TOK_ARRAY:
+            return 0
+        depth = 1
+        while depth:
+            if t.next == t.count:
+                self.fill_tokens()
+            tok = &t.tokens[t.next]
+            t.next += 1
+            token_type = tok.type
+            if token_type == TOK_OBJECT or token_type == TOK_ARRAY:
+                depth += 1
+            elif token_type == TOK_OBJECT_END or token_type == TOK_ARRAY_END:
+                depth -= 1
+            elif token_type == TOK_ERROR:
+                self.syntax_error(tok.flags, tok.start)
+        return 0
+
+    cdef bint store_extracted(self, list pairs) except -1:
+        """Store the final values of pairs (slot, value, ...); returns True once every path has been found."""
+        cdef list extracted = self.extracted
+        cdef tuple wildcards = self.paths.wildcards
+        cdef Py_ssize_t i
+        for i in range(0, len(pairs), 2):
+            slot, value = pairs[i], pairs[i + 1]
+            if wildcards[slot]:
+                extracted[slot].append(value)
+            else:
+                extracted[slot] = value
+                self.remaining -= 1
+        return self.remaining == 0
+
+    cdef int select_built(self, _PathNode node, value, list pairs) except -1:
+        """Append the slots and values of the paths at node and below it within a built value."""
+        cdef _PathNode child
+        if node.slots is not None:
+            for slot in node.slots:
+                pairs.append(slot)
+                pairs.append(value)
+            if not node.has_children():
+                return 0
+        if type(value) is dict:
+            members = (<dict>value).items()
+        elif type(value) is list:
+            members = enumerate(<list>value)
+        else:
+            return 0
+        for key, item in members:
+            child = node.child(key)
+            if child is not None:
+                self.select_built(child, item, pairs)
+        return 0
+
+    # Linting: the whole input is tokenized without building any value,
+    # resuming after each syntax error.
+
+    cdef list lint(self, Py_ssize_t max_errors):
+        """
+        Return the (pos, message) of the syntax errors in the input, at most
+        max_errors of them (all of them if max_errors is negative).
+
+        Every open object or array takes a level of the recursion limit,
+        as it does while decoding, so a document nested too deeply for
+        parse() gets the same error, at the start of its value, and ends
+        the scan.
+        """
+        cdef _Tokenizer *t = &self.tokens
+        cdef _Token *tok
+        cdef list errors = []
+        cdef Py_ssize_t i
+        cdef Py_ssize_t last = -1
+        cdef Py_ssize_t entered = 0
+        cdef int token_type
+        self.start_tokens(0, True)
+        try:
+            while max_errors < 0 or len(errors) < max_errors:
+                self.fill_tokens()
+                for i in range(t.count):
+                    tok = &t.tokens[i]
+                    token_type = tok.type
+                    if token_type == TOK_OBJECT or token_type == TOK_ARRAY:
+                        try:
+                            Py_EnterRecursiveCall(" while scanning a Triple-JSON5 value")
+                        except RecursionError:
+                            self.pos = 0
+                            self.skip_ws()
+                            errors.append((self.pos, "Maximum nesting depth exceeded"))
+                            return errors[:max_errors] if max_errors >= 0 else errors
+                        entered += 1
+                    elif token_type == TOK_OBJECT_END or token_type == TOK_ARRAY_END:
+                        Py_LeaveRecursiveCall()
+                        entered -= 1
+                    elif (token_type == TOK_STRING or token_type == TOK_KEY) and tok.flags & TF_ESCAPED:
+                        if _check_escapes(t, _char_at(t, tok.start), tok.aux) < 0:
+                            errors.append((t.error_pos, _SYNTAX_ERRORS[t.error]))
+                    elif token_type == TOK_END:
+                        return errors[:max_errors] if max_errors >= 0 else errors
+                    elif token_type == TOK_ERROR:
+                        if tok.flags == ERR_MEMORY:
+                            raise MemoryError()
+                        # Resuming can fail again at the same place: report it once
+                        if tok.start != last:
+                            errors.append((tok.start, _SYNTAX_ERRORS[tok.flags]))
+                        last = tok.start
+                        if not _recover(t, tok.flags, tok.start):
+                            return errors[:max_errors] if max_errors >= 0 else errors
+                        # Recovery closes the containers that it skips
+                        while entered > t.depth:
+                            Py_LeaveRecursiveCall()
+                            entered -= 1
+            return errors[:max_errors]
+        finally:
+            while entered:
+                Py_LeaveRecursiveCall()
+                entered -= 1
+
+    # Structural scanning: the methods below walk values without building
+    # any Python objects for them.
+
+    cdef int skip_value(self) except -1:
+        """Skip over the value at the current position, checking its syntax."""
+        cdef _NumberToken tok
+        cdef Py_UCS4 c
+        self.skip_ws()
+        if self.pos >= self.length:
+            self.error("Expecting value", self.pos)
+        c = PyUnicode_READ(self.kind, self.data, self.pos)
+        if c == u'{' or c == u'[':
+            return self.skip_container()
+        if c == u'"' or c == u"'":
+            return self.skip_string()
+        if c == u't' and self.match_word(b'true'):
+            return 0
+        if c == u'f' and self.match_word(b'false'):
+            return 0
+        if c == u'n' and self.match_word(b'null'):
+            return 0
+        if _is_digit(c) or c == u'-' or c == u'+' or c == u'.' or c == u'I' or c == u'N':
+            return self.scan_number(&tok)
+        self.error("Expecting value", self.pos)
+
+    cdef int skip_container(self) except -1:
+        """Skip over the object or array at the current position."""
+        cdef bint is_object = PyUnicode_READ(self.kind, self.data, self.pos) == u'{'
+        cdef Py_UCS4 close = u'}' if is_object else u']'
+        cdef Py_UCS4 c
+        Py_EnterRecursiveCall(" while scanning a Triple-JSON5 value")
+        try:
+            self.pos += 1
+            self.skip_ws()
+            if self.char_at(self.pos) == close:
+                self.pos += 1
+                return 0
+            while True:
+                if is_object:
+                    self.skip_key()
+                    self.skip_ws()
+                    if self.char_at(self.pos) != u':':
+                        self.error("Expecting ':' delimiter", self.pos)
+                    self.pos += 1
+                self.skip_value()
+                self.skip_ws()
+                c = self.char_at(self.pos)
+                if c == u',':
+                    self.pos += 1
+                    self.skip_ws()
+                    if self.char_at(self.pos) == close:
+                        self.pos += 1
+                        return 0
+                elif c == close:
+                    self.pos += 1
+                    return 0
+                else:
+                    self.error("Expecting ',' delimiter", self.pos)
+        finally:
+            Py_LeaveRecursiveCall()
+
+    cdef int skip_key(self) except -1:
+        """Skip over an object key."""
+        cdef _Token tok
+        return self.check_scan(_scan_key(&self.tokens, self.pos, &tok))
+
+    cdef int skip_string(self) except -1:
+        """Skip over a single, double or triple-quoted string."""
+        cdef _Token tok
+        return self.check_scan(_scan_string(&self.tokens, self.pos, &tok))
+
+    cdef object index_container(self):
+        """
+        Record where the direct children of the object or array at the
+        current position start, without decoding them. Returns a dict of
+        key to offset for an object and a list of offsets for an array.
+        """
+        cdef bint is_object = self.char_at(self.pos) == u'{'
+        cdef Py_UCS4 close = u'}' if is_object else u']'
+        cdef Py_UCS4 c
+        cdef dict key_offsets = {}
+        cdef list item_offsets = []
+        self.pos += 1
+        self.skip_ws()
+        if self.char_at(self.pos) == close:
+            self.pos += 1
+            return key_offsets if is_object else item_offsets
+        try:
+            while True:
+                if is_object:
+                    key = self.decode_key()
+                    self.skip_ws()
+                    if self.char_at(self.pos) != u':':
+                        self.error("Expecting ':' delimiter", self.pos)
+                    self.pos += 1
+                    self.skip_ws()
+                    PyDict_SetItem(key_offsets, key, self.pos)
+                else:
+                    self.skip_ws()
+                    PyList_Append(item_offsets, self.pos)
+                self.skip_value()
+                self.skip_ws()
+                c = self.char_at(self.pos)
+                if c == u',':
+                    self.pos += 1
+                    self.skip_ws()
+                    if self.char_at(self.pos) == close:
+                        self.pos += 1
+                        break
+                elif c == close:
+                    self.pos += 1
+                    break
+                else:
+                    self.error("Expecting ',' delimiter", self.pos)
+        except RecursionError:
+            self.error("Maximum nesting depth exceeded", self.pos)
+        return key_offsets if is_object else item_offsets
+
+    cdef int collect_nodes(self, list out, tuple path) except -1:
+        """
+        Append a (path, offset, value) tuple for the value at the current
+        position and then, in document order, for each of its descendants.
+        Objects and arrays are reported with the type dict or list as value.
+        """
+        cdef Py_UCS4 c = self.char_at(self.pos)
+        cdef Py_UCS4 close
+        cdef bint is_object
+        cdef Py_ssize_t index = 0
+        if c != u'{' and c != u'[':
+            PyList_Append(out, (path, self.pos, self.decode_scalar()))
+            return 0
+        is_object = c == u'{'
+        close = u'}' if is_object else u']'
+        PyList_Append(out, (path, self.pos, dict if is_object else list))
+        Py_EnterRecursiveCall(" while indexing a Triple-JSON5 document")
+        try:
+            self.pos += 1
+            self.skip_ws()
+            if self.char_at(self.pos) == close:
+                self.pos += 1
+                return 0
+            while True:
+                if is_object:
+                    key = self.decode_key()
+                    self.skip_ws()
+                    if self.char_at(self.pos) != u':':
+                        self.error("Expecting ':' delimiter", self.pos)
+                    self.pos += 1
+                    self.skip_ws()
+                    self.collect_nodes(out, path + (key,))
+                else:
+                    self.collect_nodes(out, path + (index,))
+                    index += 1
+                self.skip_ws()
+                c = self.char_at(self.pos)
+                if c == u',':
+                    self.pos += 1
+                    self.skip_ws()
+                    if self.char_at(self.pos) == close:
+                        self.pos += 1
+                        return 0
+                elif c == close:
+                    self.pos += 1
+                    return 0
+                else:
+                    self.error("Expecting ',' delimiter", self.pos)
+        finally:
+            Py_LeaveRecursiveCall()
+
+    cdef object decode_spans(self, list nodes):
+        """
+        Decode the value at the current position and append its span node
+        to nodes: None for a scalar, or for an object or array a list
+        [length, keys, starts, ends, children] (see _decode_spans).
+        """
+        cdef Py_ssize_t start = self.pos
+        cdef Py_UCS4 c = self.char_at(start)
+        cdef Py_UCS4 close
+        cdef bint is_object
+        cdef list keys, starts, ends, children, node
+        if c != u'{' and c != u'[':
+            PyList_Append(nodes, None)
+            return self.decode_scalar()
+        is_object = c == u'{'
+        close = u'}' if is_object else u']'
+        result = {} if is_object else []
+        keys = [] if is_object else None
+        starts = []
+        ends = []
+        children = []
+        node = [0, keys, starts, ends, children]
+        PyList_Append(nodes, node)
+        Py_EnterRecursiveCall(" while decoding a Triple-JSON5 document")
+        try:
+            self.pos += 1
+            self.skip_ws()
+            if self.char_at(self.pos) == close:
+                self.pos += 1
+                node[0] = self.pos - start
+                return result
+            while True:
+                if is_object:
+                    key = self.decode_key()
+                    self.skip_ws()
+                    if self.char_at(self.pos) != u':':
+                        self.error("Expecting ':' delimiter", self.pos)
+                    self.pos += 1
+                    self.skip_ws()
+                    PyList_Append(starts, self.pos - start)
+                    PyDict_SetItem(result, key, self.decode_spans(children))
+                    PyList_Append(keys, key)
+                else:
+                    PyList_Append(starts, self.pos - start)
+                    PyList_Append(result, self.decode_spans(children))
+                PyList_Append(ends, self.pos - start)
+                self.skip_ws()
+                c = self.char_at(self.pos)
+                if c == u',':
+                    self.pos += 1
+                    self.skip_ws()
+                    if self.char_at(self.pos) == close:
+                        self.pos += 1
+                        break
+                elif c == close:
+                    self.pos += 1
+                    break
+                else:
+                    self.error("Expecting ',' delimiter", self.pos)
+        finally:
+            Py_LeaveRecursiveCall()
+        node[0] = self.pos - start
+        return result
+
+cdef tuple _sniff_encoding(const unsigned char[::1] buf):
+    """
+    Detect the encoding of raw input from its byte order mark or, failing
+    that, from the pattern of null bytes at the start (as json does).
+    Returns the encoding (or None if undetermined) and the BOM length.
+    """
+    cdef Py_ssize_t n = buf.shape[0]
+    if n >= 4 and buf[0] == 0 and buf[1] == 0 and buf[2] == 0xfe and buf[3] == 0xff:
+        return 'utf-32-be', 4
+    if n >= 4 and buf[0] == 0xff and buf[1] == 0xfe and buf[2] == 0 and buf[3] == 0:
+        return 'utf-32-le', 4
+    if n >= 3 and buf[0] == 0xef and buf[1] == 0xbb and buf[2] == 0xbf:
+        return 'utf-8', 3
+    if n >= 2 and buf[0] == 0xfe and buf[1] == 0xff:
+        return 'utf-16-be', 2
+    if n >= 2 and buf[0] == 0xff and buf[1] == 0xfe:
+        return 'utf-16-le', 2
+    if n >= 4:
+        if buf[0] == 0:
+            return ('utf-16-be' if buf[1] else 'utf-32-be'), 0
+        if buf[1] == 0:
+            return ('utf-16-le' if buf[2] or buf[3] else 'utf-32-le'), 0
+    elif n == 2:
+        if buf[0] == 0:
+            return 'utf-16-be', 0
+        if buf[1] == 0:
+            return 'utf-16-le', 0
+    return None, 0
+
+cdef str _decode_input(const unsigned char[::1] buf, encodings, dict stats=None):
+    """
+    Decode raw input (bytes, bytearray, memoryview, mmap, ...) to a string.
+
+    The buffer is decoded in place, without an intermediate copy. An
+    encoding found from a BOM or null-byte pattern is used as-is;
+    otherwise each of the given encodings is tried strictly in turn.
+    If stats is given, the 'decode' stage is recorded in it.
+    """
+    cdef Py_ssize_t n = buf.shape[0]
+    cdef bytes encoding_name
+    cdef str text
+    cdef double start = _clock() if stats is not None else 0
+    detected, bom_length = _sniff_encoding(buf)
+    if detected is not None:
+        candidates = (detected,)
+    elif encodings is None:
+        candidates = DEFAULT_ENCODINGS
+    elif isinstance(encodings, str):
+        candidates = (encodings,)
+    else:
+        candidates = encodings
+    last_error = None
+    for i, encoding in enumerate(candidates):
+        encoding_name = encoding.encode('ascii')
+        try:
+            text = PyUnicode_Decode(<const char *>&buf[0] + <Py_ssize_t>bom_length,
+                                    n - <Py_ssize_t>bom_length, encoding_name, b"strict")
+        except (UnicodeDecodeError, LookupError) as e:
+            last_error = e
+            continue
+        if stats is not None:
+            stats['decode'] = {'seconds': _clock() - start, 'bytes': n, 'chars': len(text),
+                               'encoding': encoding, 'fallback': i > 0}
+        return text
+    raise TJSON5ParseError(f"Encoding error: {last_error}")
+
+# Called with the stats of every parse while profiling is active (see tjson5.profiling)
+cdef object _stats_sink = None
+
+def _set_stats_sink(sink):
+    global _stats_sink
+    _stats_sink = sink
+
+cpdef parse(text, bint strip_comments=True, encodings=None, object_hook=None,
+            object_pairs_hook=None, parse_float=None, parse_int=None, parse_hex_bin=None,
+            bint intern_keys=True, Py_ssize_t intern_values=0, dict intern_table=None,
+            types=None, arrays=None, dict stats=None, schema=None):
+    """
+    Parse a Triple-JSON5 document and return the corresponding Python object.
 
-# Process JSON5 unquoted keys and other features
-cdef str process_json5_features(str text):
-    """
-    Process JSON5 features like unquoted keys, comments, and trailing commas.
-    
-    This function converts a JSON5 string to valid JSON by:
-    1. Removing single and multi-line comments
-    2. Converting unquoted keys to quoted keys
-    3. Removing trailing commas in objects and arrays
-    """
-    cdef str processed = text
-    
-    # 1. Remove comments first
-    # Remove single-line comments (//...)
-    processed = SINGLE_LINE_COMMENT_REGEX.sub('', processed)
-    # Remove multi-line comments (/* ... */)
-    processed = MULTI_LINE_COMMENT_REGEX.sub('', processed)
-    
-    # 2. Handle unquoted keys - convert objects like {key: value} to {"key": value}
-    # The positive lookbehind (?<= ensures we're matching after a { or ,
-    processed = UNQUOTED_KEY_REGEX.sub(r'\1"\2":', processed)
-    
-    # 3. Handle trailing commas in objects and arrays
-    processed = TRAILING_COMMA_OBJ_REGEX.sub('}', processed)
-    processed = TRAILING_COMMA_ARR_REGEX.sub(']', processed)
-    
-    return processed
-
-cpdef parse(str text, bint strip_comments=True):
-    """
-    Parse a Triple-JSON5 string and return the corresponding Python object.
-    
     Parameters:
-    - text: The Triple-JSON5 string to parse
-    - strip_comments: Whether to strip comments (default True)
-    
+    - text: The Triple-JSON5 document, either as a string or as raw input
+      (bytes, bytearray, memoryview or mmap)
+    - strip_comments: Kept for backwards compatibility; comments are
+      always recognized by the decoder
+    - encodings: Encodings to try in order for raw input without a byte
+      order mark (default: utf-8, then latin1)
+    - object_hook, object_pairs_hook, parse_float, parse_int: As for
+      json.loads, called while the document is decoded
+    - parse_hex_bin: Called with the literal text of every hexadecimal or
+      binary integer (e.g. "0xFF", "-0b101") instead of converting it to int
+    - intern_keys: Share a single string object between equal keys
+    - intern_values: Also share string values of up to this many
+      characters (0, the default, disables value interning)
+    - intern_table: Dict used as the intern table, to share strings
+      across several parses (default: a new table per parse)
+    - types: Target class of the document, or a dict of key paths (as for
+      items(), e.g. "parts[*]") to target classes. Objects at those paths
+      are built as instances of the class directly while decoding. Target
+      classes are dataclasses, NamedTuples or __slots__ classes; their
+      fields are checked against the object keys and, for annotations of
+      plain types (int, str, list[Part], Optional[...]), the value types.
+      Annotated record classes are built recursively.
+    - arrays: Return arrays of numbers as array.array ('array') or
+      numpy.ndarray ('numpy', NumPy must be installed) instead of lists.
+      A string applies to every non-empty array that holds only numbers;
+      a dict maps key paths to 'array', 'numpy', an array typecode (e.g.
+      'H') or a NumPy dtype, and the values at those paths must be arrays
+      of numbers. The element type is the narrowest one that holds all
+      the values (e.g. uint8, int32 or float64) unless a typecode or
+      dtype is given. Integers must fit in int64, or in uint64 when the
+      array holds no negative integer, and the numbers are converted
+      directly, without the parse_* hooks.
+    - stats: Dict filled with the timing and counters of this call: the
+      'decode' stage for raw input (seconds, bytes, chars, encoding, and
+      fallback if the first encoding failed), the 'parse' stage (seconds,
+      chars and counts of objects, arrays, keys, strings, numbers and
+      comments) and 'error'. See also tjson5.profiling.
+    - schema: A Schema from compile_schema (or a schema dict, compiled on
+      every call) to validate the document against while it is decoded.
+      Cannot be combined with types or a dict of arrays.
+
     Returns:
     - A Python object (dict, list, str, int, float, bool, None)
-    
+
     Raises:
     - TJSON5ParseError if the text is invalid
+    - TJSON5ValidationError if the document does not match the schema
     """
-    # Skip invalid or empty input
-    if not text or not text.strip():
-        raise TJSON5ParseError("Empty or invalid input")
-    
+    cdef _Decoder decoder
+    cdef double start
+    if stats is None and _stats_sink is not None:
+        stats = {}
     try:
-        # Multi-stage parsing process:
-        
-        # Check if the file has comments before the actual JSON content
-        has_leading_comments = text.lstrip().startswith('//')
-        
-        if has_leading_comments:
-            # Strip leading comments before the first { or [
-            text = strip_leading_comments(text)
-            
-        # Stage 1: Process triple-quoted strings
-        processed_text = process_triple_quotes(text)
-        
-        # Stage 2: Process hex and binary literals
-        processed_text = process_number_formats(processed_text)
-        
-        # Stage 3: Process JSON5 features (comments, unquoted keys, trailing commas)
+        # Skip invalid or empty input
+        if not text:
+            raise TJSON5ParseError("Empty or invalid input")
+        if not isinstance(text, str):
+            text = _decode_input(text, encodings, stats)
+        decoder = _Decoder()
+        decoder.reset(text)
+        decoder.set_hooks(object_hook, object_pairs_hook, parse_float, parse_int, parse_hex_bin)
+        decoder.set_interning(intern_keys, intern_values, intern_table)
+        if isinstance(arrays, dict):
+            decoder.shape = _types_shape(types, arrays)
+        else:
+            if arrays is not None and arrays is not False:
+                decoder.arrays = _global_array_spec(arrays)
+            if types is not None:
+                decoder.shape = _types_shape(types, None)
+        if schema is not None:
+            if decoder.shape is not None:
+                raise ValueError("schema cannot be combined with types or a dict of arrays")
+            decoder.set_schema(schema if isinstance(schema, Schema) else compile_schema(schema))
+        if stats is None:
+            return decoder.decode_document()
+        start = _clock()
         try:
-            final_text = process_json5_features(processed_text)
-            
-            # Stage 4: Parse with standard JSON
-            try:
-                return json.loads(final_text)
-            except json.JSONDecodeError as je:
-                # If direct parsing fails, try using a temporary file approach
-                # This can help overcome certain parsing limitations
-                
-                with tempfile.NamedTemporaryFile(mode='w+', suffix='.json', delete=False) as tf:
-                    temp_filename = tf.name
-                    tf.write(final_text)
-                
-                try:
-                    # Try parsing from the file instead
-                    with open(temp_filename, 'r', encoding='utf-8') as f:
-                        try:
-                            return json.load(f)
-                        except json.JSONDecodeError as je2:
-                            # If it still fails, provide a helpful error message
-                            error_context = je2.doc[max(0, je2.pos-20):min(len(je2.doc), je2.pos+20)]
-                            raise TJSON5ParseError(
-                                f"Failed to parse Triple-JSON5: {str(je2)}\n"
-                                f"Error near: ...{error_context}..."
-                            )
-                finally:
-                    # Clean up temporary file
-                    try:
-                        os.unlink(temp_filename)
-                    except:
-                        pass
-                        
-        except Exception as e:
-            # If our JSON5 processor fails, try one more approach with regex-based fixes
-            # This is a more aggressive approach that might handle edge cases
-            
-            fixed_text = processed_text
-            # Apply multiple passes of regex fixes
-            
-            # 1. Remove all comments first
-            fixed_text = SINGLE_LINE_COMMENT_REGEX.sub('', fixed_text)
-            fixed_text = MULTI_LINE_COMMENT_REGEX.sub('', fixed_text)
-            
-            # 2. Fix unquoted keys
-            fixed_text = UNQUOTED_KEY_REGEX.sub(r'\1"\2":', fixed_text)
-            
-            # 3. Fix trailing commas
-            fixed_text = TRAILING_COMMA_OBJ_REGEX.sub('}', fixed_text)
-            fixed_text = TRAILING_COMMA_ARR_REGEX.sub(']', fixed_text)
-            
-            try:
-                # Try parsing the fixed text
-                return json.loads(fixed_text)
-            except json.JSONDecodeError as je:
-                # If all parsing attempts fail, provide a helpful error
-                error_context = je.doc[max(0, je.pos-20):min(len(je.doc), je.pos+20)]
-                raise TJSON5ParseError(
-                    f"Failed to parse Triple-JSON5: {str(je)}\n"
-                    f"Error near: ...{error_context}..."
-                )
-                    
-    except Exception as e:
-        # Ensure we always return a TJSON5ParseError
-        if not isinstance(e, TJSON5ParseError):
-            raise TJSON5ParseError(f"Parsing error: {str(e)}")
+            value = decoder.decode_document()
+        finally:
+            stats['parse'] = decoder.parse_stats(_clock() - start)
+        stats['error'] = False
+        return value
+    except BaseException:
+        if stats is not None:
+            stats['error'] = True
         raise
+    finally:
+        if stats is not None and _stats_sink is not None:
+            _stats_sink(stats)
 
-cpdef loads(str text, bint strip_comments=True):
+def loads(text, *args, **kwargs):
     """Alias for parse to match Python's json module API."""
-    return parse(text, strip_comments)
+    return parse(text, *args, **kwargs)
 
-cpdef load(file_obj, bint strip_comments=True):
-    """Parse a file object containing Triple-JSON5."""
+def load(file_obj, *args, **kwargs):
+    """
+    Parse a file object (text or binary) containing Triple-JSON5. Other
+    arguments are passed to parse.
+    """
     try:
         content = file_obj.read()
-        return parse(content, strip_comments)
+        return parse(content, *args, **kwargs)
     except UnicodeDecodeError as e:
         # Handle encoding errors gracefully
         raise TJSON5ParseError(f"Encoding error: {str(e)}. Try opening the file with a different encoding.")
 
-cpdef dump(obj, file_obj, indent=None):
-    """Serialize obj to a file as JSON."""
-    json.dump(obj, file_obj, indent=indent)
+def _decode_source(data, encodings=None):
+    """Decode raw input to a string the way parse does."""
+    if isinstance(data, str):
+        return data
+    if not data:
+        raise TJSON5ParseError("Empty or invalid input")
+    return _decode_input(data, encodings)
 
-cpdef dumps(obj, indent=None):
-    """Serialize obj to a JSON string."""
-    return json.dumps(obj, indent=indent)
+def _index_document(str text):
+    """
+    Scan the document structure for lazy loading. Returns (offsets, None)
+    where offsets maps the keys (object) or indices (array) of the
+    top-level container to the offsets of their values, or (None, value)
+    if the document is a single scalar value.
+    """
+    cdef _Decoder decoder = _Decoder()
+    decoder.reset(text)
+    decoder.skip_ws()
+    if decoder.pos >= decoder.length:
+        raise TJSON5ParseError("Empty or invalid input")
+    if decoder.char_at(decoder.pos) != u'{' and decoder.char_at(decoder.pos) != u'[':
+        return None, decoder.decode_document()
+    offsets = decoder.index_container()
+    decoder.skip_ws()
+    if decoder.pos < decoder.length:
+        decoder.error("Extra data", decoder.pos)
+    return offsets, None
+
+def _collect_nodes(str text):
+    """
+    Return a (path, offset, value) tuple for every value in the document,
+    in document order. Paths are tuples of keys and indices, offsets are
+    character offsets into text, and objects and arrays have the type
+    dict or list as value (their children follow them).
+    """
+    cdef _Decoder decoder = _Decoder()
+    cdef list nodes = []
+    decoder.reset(text)
+    decoder.skip_ws()
+    if decoder.pos >= decoder.length:
+        raise TJSON5ParseError("Empty or invalid input")
+    start = decoder.pos
+    try:
+        decoder.collect_nodes(nodes, ())
+    except RecursionError:
+        decoder.error("Maximum nesting depth exceeded", start)
+    decoder.skip_ws()
+    if decoder.pos < decoder.length:
+        decoder.error("Extra data", decoder.pos)
+    return nodes
+
+def _decode_spans(str text, Py_ssize_t pos, bint document):
+    """
+    Decode the value that starts at character offset pos of text, recording
+    where the members of its objects and arrays are. With document, pos is
+    where the document starts: leading whitespace is skipped and nothing but
+    whitespace may follow the value.
+
+    Returns (value, node, start, end): the value occupies text[start:end],
+    and node is None for a scalar or, for an object or array, a list
+    [length, keys, starts, ends, children]. keys lists the keys of an object
+    in source order (None for an array); the i-th member occupies
+    starts[i]:ends[i], offsets relative to the opening bracket, and
+    children[i] is its node.
+    """
+    cdef _Decoder decoder = _Decoder()
+    cdef list nodes = []
+    decoder.reset(text)
+    decoder.pos = pos
+    if document:
+        decoder.skip_ws()
+        if decoder.pos >= decoder.length:
+            raise TJSON5ParseError("Empty or invalid input")
+    start = decoder.pos
+    try:
+        value = decoder.decode_spans(nodes)
+    except RecursionError:
+        decoder.error("Maximum nesting depth exceeded", start)
+    end = decoder.pos
+    if document:
+        decoder.skip_ws()
+        if decoder.pos < decoder.length:
+            decoder.error("Extra data", decoder.pos)
+    return value, nodes[0], start, end
+
+def validate(text, max_errors=100, encodings=None):
+    """
+    Check the syntax of a Triple-JSON5 document without building it.
+
+    The document is scanned in a single pass that creates no Python value
+    for its contents (and runs without the GIL for long inputs). After a
+    syntax error, scanning resumes at the next comma or closing bracket of
+    an enclosing object or array, so that a single pass reports the errors
+    of the whole document.
+
+    Parameters:
+    - text: The document, as a string or as raw input (bytes, bytearray,
+      memoryview or mmap)
+    - max_errors: Stop after this many errors (None for no limit)
+    - encodings: Encodings to try in order for raw input without a byte
+      order mark (default: utf-8, then latin1)
+
+    Returns:
+    - A list of (line, column, message) tuples, 1-based as in
+      TJSON5ParseError, in source order; empty if the document is valid.
+
+    Raises:
+    - TJSON5ParseError if raw input cannot be decoded
+    """
+    cdef _Decoder decoder
+    cdef list errors
+    cdef Py_ssize_t line = 1
+    cdef Py_ssize_t line_start = 0
+    cdef Py_ssize_t last = 0
+    if not text:
+        return [(1, 1, _SYNTAX_ERRORS[ERR_EMPTY])]
+    if not isinstance(text, str):
+        text = _decode_input(text, encodings)
+    decoder = _Decoder()
+    decoder.reset(text)
+    errors = decoder.lint(-1 if max_errors is None else max_errors)
+    errors.sort(key=lambda error: error[0])
+    result = []
+    for pos, message in errors:
+        # Positions are in order: count the newlines since the previous one
+        line += text.count('\n', last, pos)
+        if line > 1:
+            line_start = text.rfind('\n', 0, pos) + 1
+        result.append((line, pos - line_start + 1, message))
+        last = pos
+    return result
+
+def _decode_at(str text, Py_ssize_t pos):
+    """Decode the single value starting at character offset pos of text."""
+    cdef _Decoder decoder = _Decoder()
+    decoder.reset(text)
+    decoder.start_tokens(pos, False)
+    try:
+        return decoder.decode_value()
+    except RecursionError:
+        decoder.error("Maximum nesting depth exceeded", pos)
+
+cdef object _copy_value(object value):
+    cdef dict copy_dict
+    cdef list source, copy_list
+    cdef Py_ssize_t i, n
+    if type(value) is dict:
+        copy_dict = {}
+        for key, item in (<dict>value).items():
+            PyDict_SetItem(copy_dict, key, _copy_value(item))
+        return copy_dict
+    if type(value) is list:
+        source = <list>value
+        n = len(source)
+        copy_list = PyList_New(n)
+        for i in range(n):
+            item = _copy_value(source[i])
+            Py_INCREF(item)
+            PyList_SET_ITEM(copy_list, i, item)
+        return copy_list
+    if type(value) is array:
+        return value[:]
+    if _ndarray is not None and type(value) is _ndarray:
+        return value.copy()
+    return value
+
+def _copy_document(value):
+    """Copy the dicts, lists and numeric arrays of a parsed document, sharing the immutable leaves."""
+    return _copy_value(value)
 
 # Export preprocessing functions for testing
 cpdef preprocessTripleQuotedStrings(str text):
@@ -260,4 +2896,1813 @@ cpdef preprocessTripleQuotedStrings(str text):
 
 cpdef preprocessHexBinary(str text):
     """Process hex and binary literals for testing."""
-    return process_number_formats(text)
\ No newline at end of file
+    return process_number_formats(text)
+
+# ---------------------------------------------------------------------------
+# Key paths
+# ---------------------------------------------------------------------------
+
+# Wildcard component of a compiled key path, matches any key or index
+cdef object _ANY = object()
+
+cdef tuple _compile_path(path):
+    """
+    Compile a key path such as "parts[*].name" to a tuple of components.
+
+    Keys are separated by dots, array indices are written in brackets and
+    "*" matches any key or index. Keys that contain dots or brackets, or
+    start with a quote, can be quoted, as a dotted segment or in brackets:
+    '"a.b".c', 'pins["wirebonding-layout"]'. A quoted key runs to the next
+    matching quote (there are no escapes) and a quoted "*" is a literal
+    key. Indices are non-negative decimal integers. The empty path ""
+    denotes the document root. Tuples and lists of components are
+    accepted as-is, with "*" as the wildcard.
+    """
+    if isinstance(path, (tuple, list)):
+        return tuple(_ANY if c == '*' else c for c in path)
+    cdef list components = []
+    cdef Py_ssize_t i = 0
+    cdef Py_ssize_t n = len(path)
+    cdef Py_ssize_t end
+    expect_key = True
+    while i < n:
+        c = path[i]
+        if c == '.':
+            if expect_key:
+                raise ValueError(f"Invalid key path {path!r}: empty key")
+            i += 1
+            expect_key = True
+            continue
+        if not expect_key and c != '[':
+            raise ValueError(f"Invalid key path {path!r}: expected '.' or '[' "
+                             f"at character {i}")
+        if c == '[':
+            i += 1
+            while i < n and path[i].isspace():
+                i += 1
+            if i < n and (path[i] == '"' or path[i] == "'"):
+                end = path.find(path[i], i + 1)
+                if end < 0:
+                    raise ValueError(f"Invalid key path {path!r}: unclosed quote")
+                components.append(path[i + 1:end])
+                end += 1
+            else:
+                end = path.find(']', i)
+                if end < 0:
+                    raise ValueError(f"Invalid key path {path!r}: unclosed '['")
+                token = path[i:end].strip()
+                if token == '*':
+                    components.append(_ANY)
+                elif token.isascii() and token.isdigit():
+                    components.append(int(token))
+                elif token[:1] == '-' and token[1:].isascii() and token[1:].isdigit():
+                    raise ValueError(f"Invalid key path {path!r}: negative index {token!r}")
+                else:
+                    raise ValueError(f"Invalid key path {path!r}: bad index {token!r}")
+            while end < n and path[end].isspace():
+                end += 1
+            if end >= n or path[end] != ']':
+                raise ValueError(f"Invalid key path {path!r}: unclosed '['")
+            i = end + 1
+        elif c == '"' or c == "'":
+            end = path.find(c, i + 1)
+            if end < 0:
+                raise ValueError(f"Invalid key path {path!r}: unclosed quote")
+            components.append(path[i + 1:end])
+            i = end + 1
+        else:
+            end = i
+            while end < n and path[end] != '.' and path[end] != '[':
+                end += 1
+            token = path[i:end]
+            components.append(_ANY if token == '*' else token)
+            i = end
+        expect_key = False
+    if expect_key and n > 0:
+        raise ValueError(f"Invalid key path {path!r}: empty key")
+    return tuple(components)
+
+def _parse_key_path(path):
+    """Compile a key path for Python callers, with None as the wildcard."""
+    return tuple(None if c is _ANY else c for c in _compile_path(path))
+
+cdef inline bint _path_matches(tuple pattern, tuple path):
+    """Return True if the concrete path matches the compiled pattern."""
+    cdef Py_ssize_t i
+    if len(pattern) != len(path):
+        return False
+    for i in range(len(pattern)):
+        if pattern[i] is not _ANY and pattern[i] != path[i]:
+            return False
+    return True
+
+# Value of a key path without wildcards that was not found (see extract)
+cdef object _MISSING = object()
+
+@cython.final
+cdef class Paths:
+    """
+    Key paths compiled by compile_paths, for extract(). Compiled paths
+    are immutable and can be reused across calls and threads.
+    """
+    cdef _PathNode root
+    cdef readonly tuple paths
+    cdef tuple wildcards   # Whether each path has a "*" component
+    cdef bint plain        # No path has a wildcard
+
+    def __len__(self):
+        return len(self.paths)
+
+    def __repr__(self):
+        return f"tjson5.compile_paths({list(self.paths)!r})"
+
+def compile_paths(paths):
+    """
+    Compile key paths for extract(). Paths use the syntax of items():
+    keys separated by dots, array indices in brackets, "*" for any key or
+    index and quoted brackets for other keys, e.g. "parts[*].name" or
+    'pins["wirebonding-layout"]'. The empty path "" is the whole document.
+
+    Parameters:
+    - paths: A key path or a list of key paths
+
+    Returns:
+    - A Paths object
+
+    Raises:
+    - ValueError if a key path is invalid
+    """
+    cdef Paths compiled = Paths.__new__(Paths)
+    cdef _PathNode node, child
+    cdef list wildcards = []
+    if isinstance(paths, str):
+        paths = [paths]
+    paths = [tuple(path) if isinstance(path, list) else path for path in paths]
+    compiled.root = _PathNode()
+    for slot, path in enumerate(paths):
+        components = _compile_path(path)
+        node = compiled.root
+        for component in components:
+            if component is _ANY:
+                if node.any is None:
+                    node.any = _PathNode()
+                node = node.any
+                continue
+            if node.children is None:
+                node.children = {}
+            child = node.children.get(component)
+            if child is None:
+                child = node.children[component] = _PathNode()
+            node = child
+        if node.slots is None:
+            node.slots = []
+        node.slots.append(slot)
+        wildcards.append(any(component is _ANY for component in components))
+    _finish_path_node(compiled.root)
+    compiled.paths = tuple(paths)
+    compiled.wildcards = tuple(wildcards)
+    compiled.plain = not any(wildcards)
+    return compiled
+
+cdef int _merge_path_node(_PathNode target, _PathNode source) except -1:
+    """Add the paths below source to target."""
+    cdef _PathNode child
+    if source.slots is not None:
+        if target.slots is None:
+            target.slots = []
+        target.slots.extend(slot for slot in source.slots if slot not in target.slots)
+    if source.any is not None:
+        if target.any is None:
+            target.any = _PathNode()
+        _merge_path_node(target.any, source.any)
+    if source.children is not None:
+        if target.children is None:
+            target.children = {}
+        for key, child in source.children.items():
+            if key not in target.children:
+                target.children[key] = _PathNode()
+            _merge_path_node(target.children[key], child)
+    return 0
+
+cdef int _finish_path_node(_PathNode node) except -1:
+    """
+    Prepare the trie below node for matching: the paths through "*" are
+    also added below each explicit key or index, so that a member only
+    ever follows one node.
+    """
+    cdef _PathNode child
+    if node.children is not None:
+        for child in node.children.values():
+            if node.any is not None:
+                _merge_path_node(child, node.any)
+            _finish_path_node(child)
+        node.names = tuple(key for key in node.children if isinstance(key, str))
+        if node.slots is not None:
+            node.slots.sort()
+    if node.any is not None:
+        _finish_path_node(node.any)
+    return 0
+
+def extract(text, paths, encodings=None):
+    """
+    Return the values at the given key paths of a Triple-JSON5 document,
+    without building the rest of it.
+
+    Only the selected values are decoded: every other subtree is skipped
+    token by token, without creating any string or number for it.
+    The values are those parse would give: for a duplicate key, the last
+    member wins, so the object around a match is always scanned to its
+    end. When no path has a wildcard, scanning stops as soon as every path
+    has been found outside of any open object (e.g. at the end of the
+    document's value, or after an item of a top-level array), so the rest
+    of the document is not read (nor checked).
+
+    Parameters:
+    - text: The document, as a string or as raw input (bytes, bytearray,
+      memoryview or mmap)
+    - paths: A Paths object from compile_paths, or key paths to compile
+      (see compile_paths)
+    - encodings: Encodings to try in order for raw input without a byte
+      order mark (default: utf-8, then latin1)
+
+    Returns:
+    - A dict mapping each path, as given, to its value. Paths without a
+      wildcard map to their value and are left out if absent; paths with
+      a wildcard map to the list of matching values, in the order of the
+      parsed document.
+
+    Raises:
+    - TJSON5ParseError if the part of the text that was scanned is
+      invalid. After an early stop, errors in the rest of the text are not
+      reported: use validate (or parse) to check the whole document.
+    """
+    cdef Paths compiled = paths if isinstance(paths, Paths) else compile_paths(paths)
+    cdef _Decoder decoder
+    if not text:
+        raise TJSON5ParseError("Empty or invalid input")
+    if not isinstance(text, str):
+        text = _decode_input(text, encodings)
+    decoder = _Decoder()
+    decoder.reset(text)
+    values = decoder.extract_document(compiled)
+    return {path: value for path, value in zip(compiled.paths, values) if value is not _MISSING}
+
+# ---------------------------------------------------------------------------
+# Typed decoding
+# ---------------------------------------------------------------------------
+
+# Plans are built once per target class and reused by every parse
+cdef dict _CLASS_PLANS = {}
+# Shapes built from the types argument of parse, by its items
+cdef dict _TYPES_SHAPES = {}
+
+cdef inline bint _type_matches(value, _Shape shape):
+    if value is None:
+        return shape.nullable
+    if type(value) is bool and bool not in shape.types:
+        return False  # bool is an int subclass, but not a valid int field
+    return isinstance(value, shape.types)
+
+cdef str _type_names(_Shape shape):
+    names = [t.__name__ for t in shape.types]
+    if shape.nullable:
+        names.append('null')
+    return ' or '.join(names)
+
+cdef list _slot_names(cls):
+    """Return the names of the slots of cls and its bases."""
+    cdef list names = []
+    for klass in reversed(cls.__mro__):
+        slots = klass.__dict__.get('__slots__', ())
+        if isinstance(slots, str):
+            slots = (slots,)
+        for name in slots:
+            if name not in ('__dict__', '__weakref__') and name not in names:
+                names.append(name)
+    return names
+
+cdef bint _is_record_class(cls):
+    return isinstance(cls, type) and (
+        dataclasses.is_dataclass(cls)
+        or (issubclass(cls, tuple) and hasattr(cls, '_fields'))
+        or len(_slot_names(cls)) > 0)
+
+cdef _ClassPlan _class_plan(cls, dict pending):
+    """
+    Return the plan for building instances of cls. Plans of classes used
+    in the annotations of its fields are built too; pending holds the plans
+    under construction so that recursive types terminate.
+    """
+    cdef _ClassPlan plan = _CLASS_PLANS.get(cls)
+    if plan is None:
+        plan = pending.get(cls)
+    if plan is not None:
+        return plan
+    if not _is_record_class(cls):
+        raise TypeError(f"{cls!r} is not a dataclass, NamedTuple or __slots__ class")
+    plan = _ClassPlan()
+    plan.cls = cls
+    plan.name = cls.__name__
+    plan.required = ()
+    plan.use_setattr = False
+    pending[cls] = plan
+    try:
+        hints = typing.get_type_hints(cls)
+    except Exception:
+        # Unresolvable forward references: use the raw annotations
+        hints = getattr(cls, '__annotations__', {})
+    if dataclasses.is_dataclass(cls):
+        names = [f.name for f in dataclasses.fields(cls) if f.init]
+    elif issubclass(cls, tuple):
+        names = list(cls._fields)
+    else:
+        names = _slot_names(cls)
+        plan.use_setattr = cls.__init__ is object.__init__
+        if plan.use_setattr:
+            plan.required = tuple(names)
+    plan.fields = {name: _annotation_shape(hints.get(name), f"{plan.name}.{name}", pending)
+                   for name in names}
+    return plan
+
+cdef _Shape _new_shape(str label):
+    cdef _Shape shape = _Shape()
+    shape.label = label
+    return shape
+
+cdef _Shape _annotation_shape(annotation, str label, dict pending):
+    """
+    Return the shape for a field annotation, or None if the field is not
+    checked (no annotation, Any, or a type that is not supported).
+    """
+    cdef _Shape shape
+    cdef _Shape item
+    if annotation is None or annotation is typing.Any:
+        return None
+    origin = getattr(annotation, '__origin__', None)
+    args = getattr(annotation, '__args__', None) or ()
+    if origin is typing.Union or (_UnionType is not None and isinstance(annotation, _UnionType)):
+        others = [a for a in args if a is not type(None)]
+        if len(others) == 1:
+            shape = _annotation_shape(others[0], label, pending)
+        else:
+            shape = _new_shape(label)
+            shape.types = ()
+            for other in others:
+                item = _annotation_shape(other, label, pending)
+                if item is None or item.types is None or item.has_children() or item.plan is not None:
+                    return None  # Only unions of plain types are checked
+                shape.types += item.types
+        if shape is not None:
+            shape.nullable = len(others) < len(args)
+        return shape
+    if origin is list or origin is dict:
+        shape = _new_shape(label)
+        shape.types = (origin,)
+        if args and args[-1] is not typing.Any and not isinstance(args[-1], typing.TypeVar):
+            shape.any = _annotation_shape(args[-1], f"{label}[]", pending)
+        return shape
+    if origin is not None:
+        return None
+    if annotation is type(None):
+        shape = _new_shape(label)
+        shape.types = ()
+        shape.nullable = True
+        return shape
+    if annotation is float:
+        shape = _new_shape(label)
+        shape.types = (float, int)
+        return shape
+    if annotation in (int, str, bool, list, dict):
+        shape = _new_shape(label)
+        shape.types = (annotation,)
+        return shape
+    if _is_record_class(annotation):
+        shape = _new_shape(label)
+        shape.plan = _class_plan(annotation, pending)
+        shape.types = (annotation,)
+        return shape
+    return None
+
+cdef _Shape _path_shape(_Shape root, path):
+    """Return the shape for key path below root, adding it if needed."""
+    cdef _Shape node = root
+    cdef _Shape child
+    for component in _compile_path(path):
+        if component is _ANY:
+            if node.any is None:
+                node.any = _new_shape(str(path))
+            node = node.any
+        else:
+            if node.children is None:
+                node.children = {}
+            child = node.children.get(component)
+            if child is None:
+                child = node.children[component] = _new_shape(str(path))
+            node = child
+    return node
+
+cdef _Shape _types_shape(types, dict arrays):
+    """
+    Build the root shape for the types and arrays arguments of parse: a
+    class for the whole document, or a dict of key paths to classes, and
+    a dict of key paths to numeric array types.
+    """
+    cdef _Shape root, node
+    cdef dict pending
+    if isinstance(types, type):
+        types = {'': types}
+    key = (tuple(types.items()) if types is not None else None,
+           tuple(arrays.items()) if arrays is not None else None)
+    root = _TYPES_SHAPES.get(key)
+    if root is not None:
+        return root
+    pending = {}
+    root = _new_shape('document')
+    if types is not None:
+        for path, cls in types.items():
+            node = _path_shape(root, path)
+            if node.plan is not None:
+                raise ValueError(f"More than one type for key path {path!r}")
+            node.plan = _class_plan(cls, pending)
+            node.types = (cls,)
+    if arrays is not None:
+        for path, spec in arrays.items():
+            node = _path_shape(root, path)
+            if node.plan is not None or node.array is not None:
+                raise ValueError(f"More than one type for key path {path!r}")
+            node.array = _array_spec(spec, str(path))
+    # Only publish the plans once they are complete
+    _CLASS_PLANS.update(pending)
+    _TYPES_SHAPES[key] = root
+    return root
+
+# ---------------------------------------------------------------------------
+# Numeric arrays
+# ---------------------------------------------------------------------------
+
+_NUMERIC_TYPECODES = 'bBhHiIqQlLfd'
+# array.array typecode and empty template for each (kind, itemsize)
+cdef dict _ARRAY_TYPECODES = {}
+cdef dict _ARRAY_TEMPLATES = {}
+for _typecode in _NUMERIC_TYPECODES:
+    _ARRAY_TEMPLATES[_typecode] = array(_typecode)
+    _ARRAY_TYPECODES.setdefault(
+        (ord('f' if _typecode in 'fd' else 'i' if _typecode.islower() else 'u'),
+         _ARRAY_TEMPLATES[_typecode].itemsize), _typecode)
+# Specs built from the arrays argument of parse when it is not a dict
+cdef dict _GLOBAL_ARRAY_SPECS = {}
+# numpy.ndarray, once NumPy output has been requested (see _copy_value)
+cdef object _ndarray = None
+
+cdef object _import_numpy():
+    global _ndarray
+    try:
+        import numpy
+    except ImportError:
+        raise ImportError("NumPy is required for numeric arrays of type 'numpy'") from None
+    _ndarray = numpy.ndarray
+    return numpy
+
+cdef _ArraySpec _array_spec(spec, str label):
+    """Build the spec for a value of the arrays argument of parse."""
+    cdef _ArraySpec result = _ArraySpec()
+    result.label = label
+    result.lo = LLONG_MIN
+    result.hi = LLONG_MAX
+    if spec is True or (isinstance(spec, str) and spec == 'array'):
+        return result
+    if isinstance(spec, str) and spec == 'numpy':
+        result.numpy = _import_numpy()
+        return result
+    if isinstance(spec, str) and len(spec) == 1:
+        if spec not in _NUMERIC_TYPECODES:
+            raise ValueError(f"Unsupported array typecode {spec!r}")
+        result.typecode = spec
+        result.kind = ord('f' if spec in 'fd' else 'i' if spec.islower() else 'u')
+        result.itemsize = _ARRAY_TEMPLATES[spec].itemsize
+    else:
+        result.numpy = _import_numpy()
+        result.dtype = result.numpy.dtype(spec)
+        if result.dtype.kind not in 'iuf':
+            raise ValueError(f"Unsupported dtype for a numeric array: {result.dtype}")
+        result.kind = ord(result.dtype.kind)
+        result.itemsize = result.dtype.itemsize
+        if result.kind == ord('f') and result.itemsize != 4:
+            result.itemsize = 8  # Converted from float64 by the NumPy cast
+    if result.kind == ord('u'):
+        result.lo = 0
+        if result.itemsize < 8:
+            result.hi = (<long long>1 << (8 * result.itemsize)) - 1
+    elif result.kind == ord('i') and result.itemsize < 8:
+        result.lo = -(<long long>1 << (8 * result.itemsize - 1))
+        result.hi = (<long long>1 << (8 * result.itemsize - 1)) - 1
+    return result
+
+cdef _ArraySpec _global_array_spec(spec):
+    """Return the spec for arrays='array' or 'numpy'."""
+    cdef _ArraySpec result = _GLOBAL_ARRAY_SPECS.get(spec)
+    if result is None:
+        if not (spec is True or spec == 'array' or spec == 'numpy'):
+            raise ValueError(f"arrays must be 'array', 'numpy' or a dict of key paths, not {spec!r}")
+        result = _GLOBAL_ARRAY_SPECS[spec] = _array_spec(spec, 'array')
+    return result
+
+cdef tuple _narrowest_int(long long lo, long long hi):
+    """Return the (kind, itemsize) of the narrowest integer type holding lo..hi."""
+    if lo >= 0:
+        if hi <= 0xFF:
+            return ord('u'), 1
+        if hi <= 0xFFFF:
+            return ord('u'), 2
+        if hi <= 0xFFFFFFFF:
+            return ord('u'), 4
+        return ord('u'), 8
+    if lo >= -0x80 and hi <= 0x7F:
+        return ord('i'), 1
+    if lo >= -0x8000 and hi <= 0x7FFF:
+        return ord('i'), 2
+    if lo >= -0x80000000 and hi <= 0x7FFFFFFF:
+        return ord('i'), 4
+    return ord('i'), 8
+
+cdef void _pack_numbers(_NumberSlot *values, Py_ssize_t n, bint floats, int kind,
+                        int itemsize, char *out):
+    """Store the scanned values in out as native numbers of kind and itemsize."""
+    cdef Py_ssize_t k
+    if kind == ord('f'):
+        if itemsize == 4:
+            for k in range(n):
+                (<float *>out)[k] = <float>(values[k].d if floats else <double>values[k].i)
+        else:
+            for k in range(n):
+                (<double *>out)[k] = values[k].d if floats else <double>values[k].i
+    elif itemsize == 1:
+        for k in range(n):
+            if kind == ord('u'):
+                (<uint8_t *>out)[k] = <uint8_t>values[k].i
+            else:
+                (<int8_t *>out)[k] = <int8_t>values[k].i
+    elif itemsize == 2:
+        for k in range(n):
+            if kind == ord('u'):
+                (<uint16_t *>out)[k] = <uint16_t>values[k].i
+            else:
+                (<int16_t *>out)[k] = <int16_t>values[k].i
+    elif itemsize == 4:
+        for k in range(n):
+            if kind == ord('u'):
+                (<uint32_t *>out)[k] = <uint32_t>values[k].i
+            else:
+                (<int32_t *>out)[k] = <int32_t>values[k].i
+    else:
+        for k in range(n):
+            (<int64_t *>out)[k] = <int64_t>values[k].i
+
+# ---------------------------------------------------------------------------
+# JSON Schema validation
+# ---------------------------------------------------------------------------
+
+# JSON Schema type names and their T_* bits
+cdef dict _JSON_TYPES = {
+    'null': T_NULL, 'boolean': T_BOOLEAN, 'integer': T_INTEGER,
+    'number': T_INTEGER | T_NUMBER, 'string': T_STRING, 'array': T_ARRAY, 'object': T_OBJECT,
+}
+
+# Keywords that check values; a schema with $ref and none of these is the
+# referenced schema itself
+cdef frozenset _VALIDATION_KEYWORDS = frozenset([
+    'type', 'enum', 'const', 'minLength', 'maxLength', 'pattern', 'minimum', 'maximum',
+    'exclusiveMinimum', 'exclusiveMaximum', 'multipleOf', 'properties', 'patternProperties',
+    'additionalProperties', 'required', 'minProperties', 'maxProperties', 'items',
+    'prefixItems', 'additionalItems', 'minItems', 'maxItems', 'uniqueItems', 'allOf',
+    'anyOf', 'oneOf', 'not',
+])
+
+# Keywords that do not check values: identifiers, definitions for $ref and
+# annotations. Any other keyword makes compile_schema raise ValueError, so
+# that a schema is never applied only in part.
+cdef frozenset _IGNORED_KEYWORDS = frozenset([
+    '$schema', '$id', 'id', '$anchor', '$ref', '$defs', 'definitions', '$comment',
+    'title', 'description', 'default', 'examples', 'deprecated', 'readOnly', 'writeOnly',
+])
+
+@cython.final
+cdef class Schema:
+    """
+    A JSON Schema compiled by compile_schema, for parse(schema=...).
+    Compiled schemas are immutable and can be shared between threads.
+    """
+    cdef _SchemaNode root
+    cdef readonly object schema
+    cdef readonly bint fail_fast
+
+    def validate(self, value):
+        """
+        Check an already decoded value against the schema.
+
+        Raises:
+        - TJSON5ValidationError for the first failure, with every failure
+          in its errors attribute unless the schema is fail_fast. These
+          errors have no source location.
+        """
+        cdef list errors = []
+        self.root.validate(value, [], errors, self.fail_fast)
+        if errors:
+            exceptions = [TJSON5ValidationError(
+                f"Schema validation failed: {_format_path(path)}: {message}", path=path)
+                for path, message in errors]
+            for error in exceptions:
+                error.errors = exceptions
+            raise exceptions[0]
+
+    def is_valid(self, value):
+        """Return True if an already decoded value matches the schema."""
+        return self.root.is_valid(value)
+
+def compile_schema(schema, fail_fast=False):
+    """
+    Compile a JSON Schema for validating documents while they are parsed.
+
+    Supported keywords: type, enum, const, minLength, maxLength, pattern,
+    minimum, maximum, exclusiveMinimum, exclusiveMaximum (as numbers or,
+    as in draft 4, booleans), multipleOf, properties, patternProperties,
+    additionalProperties, required, minProperties, maxProperties, items
+    (a schema or, before draft 2020-12, a list), prefixItems,
+    additionalItems, minItems, maxItems, uniqueItems, allOf, anyOf, oneOf,
+    not, and $ref to the schema itself or to its definitions ("#",
+    "#/$defs/name", "#/definitions/name"). The annotations title,
+    description, $comment, default, examples, deprecated, readOnly and
+    writeOnly are ignored, as are $schema, $id, $anchor, $defs and
+    definitions. Any other keyword, such as contains, propertyNames,
+    dependentRequired, if or format, raises ValueError.
+
+    The decoder checks each value as it is built, so failures report the
+    line and column of the value in the source. allOf, anyOf, oneOf and
+    not are checked on the decoded value (after object_hook) and their
+    failures point at the start of that value.
+
+    Parameters:
+    - schema: The schema, as a dict (or a boolean)
+    - fail_fast: Stop parsing at the first failure instead of collecting
+      every failure in the document
+
+    Returns:
+    - A Schema, to pass as parse(schema=...) or to check decoded values
+      with its validate() method
+
+    Raises:
+    - ValueError or TypeError if the schema is invalid or uses an
+      unsupported keyword or $ref
+    """
+    cdef Schema compiled = Schema.__new__(Schema)
+    compiled.schema = schema
+    compiled.fail_fast = fail_fast
+    compiled.root = _schema_node(schema, schema, {})
+    return compiled
+
+cdef object _resolve_ref(root, str ref):
+    """Return the part of root that the local reference ref points to."""
+    if ref != '#' and not ref.startswith('#/'):
+        raise ValueError(f"Unsupported $ref {ref!r}: only local references are supported")
+    target = root
+    for part in ref[2:].split('/') if ref != '#' else ():
+        part = part.replace('~1', '/').replace('~0', '~')
+        try:
+            target = target[int(part) if isinstance(target, list) else part]
+        except (KeyError, IndexError, ValueError, TypeError):
+            raise ValueError(f"Unresolvable $ref {ref!r}")
+    return target
+
+cdef _SchemaNode _schema_node(schema, root, dict pending):
+    """
+    Compile schema, a part of root. pending maps the id of each schema
+    already compiled to its node, so that recursive references terminate.
+    """
+    cdef _SchemaNode node
+    if schema is True or schema is False:
+        node = _SchemaNode()
+        node.never = schema is False
+        return node
+    if not isinstance(schema, Mapping):
+        raise TypeError(f"Schema must be an object or a boolean, not {type(schema).__name__}")
+    node = pending.get(id(schema))
+    if node is not None:
+        return node
+    for key in schema:
+        if key not in _VALIDATION_KEYWORDS and key not in _IGNORED_KEYWORDS:
+            raise ValueError(f"Unsupported keyword {key!r} in schema")
+    ref = schema.get('$ref')
+    if ref is not None and _VALIDATION_KEYWORDS.isdisjoint(schema):
+        node = _schema_node(_resolve_ref(root, ref), root, pending)
+        pending[id(schema)] = node
+        return node
+    node = _SchemaNode()
+    pending[id(schema)] = node
+
+    types = schema.get('type')
+    if types is not None:
+        for name in ([types] if isinstance(types, str) else types):
+            if name not in _JSON_TYPES:
+                raise ValueError(f"Unknown type {name!r} in schema")
+            node.types |= _JSON_TYPES[name]
+    if 'enum' in schema:
+        node.enum = tuple(schema['enum'])
+    if 'const' in schema:
+        node.enum = (schema['const'],)
+
+    node.min_length = schema.get('minLength', -1)
+    node.max_length = schema.get('maxLength', -1)
+    if 'pattern' in schema:
+        try:
+            node.pattern = re.compile(schema['pattern'])
+        except re.error as e:
+            raise ValueError(f"Invalid pattern {schema['pattern']!r} in schema: {e}")
+
+    node.minimum = schema.get('minimum')
+    node.maximum = schema.get('maximum')
+    node.exclusive_minimum = schema.get('exclusiveMinimum')
+    node.exclusive_maximum = schema.get('exclusiveMaximum')
+    # Draft 4: exclusiveMinimum and exclusiveMaximum modify minimum and maximum
+    if type(node.exclusive_minimum) is bool:
+        if node.exclusive_minimum:
+            node.exclusive_minimum, node.minimum = node.minimum, None
+        else:
+            node.exclusive_minimum = None
+    if type(node.exclusive_maximum) is bool:
+        if node.exclusive_maximum:
+            node.exclusive_maximum, node.maximum = node.maximum, None
+        else:
+            node.exclusive_maximum = None
+    node.multiple_of = schema.get('multipleOf')
+    node.has_bounds = (node.minimum is not None or node.maximum is not None
+                       or node.exclusive_minimum is not None or node.exclusive_maximum is not None
+                       or node.multiple_of is not None)
+
+    if 'properties' in schema:
+        node.properties = {key: _schema_node(value, root, pending)
+                           for key, value in schema['properties'].items()}
+    if 'patternProperties' in schema:
+        node.pattern_properties = [(re.compile(key), _schema_node(value, root, pending))
+                                   for key, value in schema['patternProperties'].items()]
+    node.additional = _member_node(schema.get('additionalProperties', True), root, pending)
+    node.required = tuple(schema.get('required', ()))
+    node.min_properties = schema.get('minProperties', -1)
+    node.max_properties = schema.get('maxProperties', -1)
+    node.object_checks = (node.properties is not None or node.pattern_properties is not None
+                          or node.additional is not None or len(node.required) > 0
+                          or node.min_properties >= 0 or node.max_properties >= 0)
+
+    items = schema.get('items', True)
+    if isinstance(items, list):
+        # Before draft 2020-12: a schema per index, then additionalItems
+        node.prefix_items = [_schema_node(item, root, pending) for item in items]
+        node.items = _member_node(schema.get('additionalItems', True), root, pending)
+    else:
+        if 'prefixItems' in schema:
+            node.prefix_items = [_schema_node(item, root, pending) for item in schema['prefixItems']]
+        node.items = _member_node(items, root, pending)
+    node.min_items = schema.get('minItems', -1)
+    node.max_items = schema.get('maxItems', -1)
+    node.unique_items = schema.get('uniqueItems', False)
+    node.array_checks = (node.prefix_items is not None or node.items is not None
+                         or node.min_items >= 0 or node.max_items >= 0 or node.unique_items)
+
+    if 'allOf' in schema:
+        node.all_of = [_schema_node(item, root, pending) for item in schema['allOf']]
+    if ref is not None:
+        # $ref next to other keywords applies in addition to them
+        if node.all_of is None:
+            node.all_of = []
+        node.all_of.append(_schema_node(_resolve_ref(root, ref), root, pending))
+    if 'anyOf' in schema:
+        node.any_of = [_schema_node(item, root, pending) for item in schema['anyOf']]
+    if 'oneOf' in schema:
+        node.one_of = [_schema_node(item, root, pending) for item in schema['oneOf']]
+    if 'not' in schema:
+        node.negated = _schema_node(schema['not'], root, pending)
+    node.combinators = (node.all_of is not None or node.any_of is not None
+                        or node.one_of is not None or node.negated is not None)
+    return node
+
+cdef _SchemaNode _member_node(schema, root, dict pending):
+    """Compile the schema of object members or array items; None if any value is valid."""
+    if schema is True:
+        return None
+    return _schema_node(schema, root, pending)
+
+cdef inline int _token_json_type(const _Token *tok):
+    cdef int token_type = tok.type
+    if token_type == TOK_STRING:
+        return T_STRING
+    if token_type == TOK_NUMBER:
+        return T_INTEGER if (tok.flags & 3) == NUM_INT else T_NUMBER
+    if token_type == TOK_TRUE or token_type == TOK_FALSE:
+        return T_BOOLEAN
+    if token_type == TOK_OBJECT:
+        return T_OBJECT
+    if token_type == TOK_ARRAY:
+        return T_ARRAY
+    return T_NULL
+
+cdef int _value_type(value):
+    """Return the T_* bit of a decoded value, or 0 if it is not a JSON value."""
+    if value is None:
+        return T_NULL
+    t = type(value)
+    if t is str:
+        return T_STRING
+    if t is bool:
+        return T_BOOLEAN
+    if t is int:
+        return T_INTEGER
+    if t is float:
+        return T_INTEGER if value.is_integer() else T_NUMBER
+    if t is dict or isinstance(value, Mapping):
+        return T_OBJECT
+    if t is list or isinstance(value, (tuple, array)):
+        return T_ARRAY
+    if isinstance(value, int):
+        return T_INTEGER
+    if isinstance(value, (float, Decimal)):
+        return T_INTEGER if value == int(value) else T_NUMBER
+    if isinstance(value, str):
+        return T_STRING
+    return 0
+
+cdef str _json_type_names(int types):
+    names = []
+    for name, bits in _JSON_TYPES.items():
+        if name == 'number':
+            if types & T_NUMBER:
+                names.append(name)
+        elif types & bits and not (name == 'integer' and types & T_NUMBER):
+            names.append(name)
+    return ' or '.join(names)
+
+cdef inline bint _json_equal(a, b) except -1:
+    # true and 1 are different JSON values, even though True == 1
+    if (type(a) is bool) != (type(b) is bool):
+        return False
+    return a == b
+
+cdef bint _in_enum(value, tuple values) except -1:
+    for other in values:
+        if _json_equal(value, other):
+            return True
+    return False
+
+cdef bint _has_duplicates(items) except -1:
+    cdef Py_ssize_t i, j
+    try:
+        return len({(type(item) is bool, item) for item in items}) != len(items)
+    except TypeError:  # Unhashable items: compare every pair
+        items = list(items)
+        for i in range(len(items)):
+            for j in range(i):
+                if _json_equal(items[i], items[j]):
+                    return True
+        return False
+
+cdef str _format_path(tuple path):
+    """Format a key path in the syntax of items(), e.g. "parts[0].name"."""
+    cdef list parts = []
+    if not path:
+        return 'document'
+    for component in path:
+        if isinstance(component, int):
+            parts.append(f"[{component}]")
+        elif component and component.isidentifier():
+            parts.append(f".{component}" if parts else component)
+        else:
+            parts.append(f"[{component!r}]")
+    return ''.join(parts)
+
+# ---------------------------------------------------------------------------
+# Event-based (streaming) parsing
+# ---------------------------------------------------------------------------
+
+# Returned by _EventParser.next_event when the document is complete
+cdef object _END = object()
+
+@cython.final
+cdef class _EventParser:
+    """
+    Push-style event parser over a bounded text buffer.
+
+    Text is added with feed() and the end of input is signalled with
+    close(). next_event() returns the next (path, event, value) tuple, None
+    if more input is needed to complete the next token, or _END at the end
+    of the document. Tokens that are cut off by the end of the buffer
+    (strings, triple-quoted strings, comments, numbers) are retried once
+    enough input has arrived, and consumed input is dropped from the buffer,
+    so memory is bounded by the largest single token.
+    """
+    cdef _Decoder decoder
+    cdef str buf
+    cdef Py_ssize_t pos
+    cdef list pending
+    cdef Py_ssize_t pending_length
+    cdef Py_ssize_t need
+    cdef bint eof
+    cdef bint started
+    cdef int state
+    cdef list stack
+    cdef list path
+
+    def __cinit__(self):
+        self.decoder = _Decoder()
+        self.decoder.reset('')
+        self.buf = ''
+        self.pos = 0
+        self.pending = []
+        self.pending_length = 0
+        self.need = 0
+        self.eof = False
+        self.started = False
+        self.state = ST_VALUE
+        self.stack = []
+        self.path = []
+
+    cdef int feed(self, str text) except -1:
+        """Add text to the input."""
+        if self.eof:
+            raise TJSON5ParseError("Cannot feed data after close()")
+        if text:
+            self.pending.append(text)
+            self.pending_length += len(text)
+        return 0
+
+    cdef int close(self) except -1:
+        """Mark the end of input."""
+        self.eof = True
+        return 0
+
+    cdef int compact(self) except -1:
+        """Drop consumed text and append pending input to the buffer."""
+        cdef _Decoder decoder = self.decoder
+        cdef str consumed
+        cdef Py_ssize_t newlines
+        if self.pos:
+            # Keep track of where the buffer starts for error locations
+            consumed = PyUnicode_Substring(self.buf, 0, self.pos)
+            newlines = consumed.count('\n')
+            if newlines:
+                decoder.line_offset += newlines
+                decoder.col_offset = self.pos - consumed.rfind('\n') - 1
+            else:
+                decoder.col_offset += self.pos
+            decoder.offset += self.pos
+        self.pending.insert(0, PyUnicode_Substring(self.buf, self.pos, PyUnicode_GET_LENGTH(self.buf)))
+        self.buf = "".join(self.pending)
+        self.pending = []
+        self.pending_length = 0
+        self.pos = 0
+        decoder.set_text(self.buf)
+        return 0
+
+    cdef int skip_ws(self) except -1:
+        """
+        Skip whitespace and comments. Returns 1 if a comment is cut off by
+        the end of the buffer and more input is needed, 0 otherwise.
+        """
+        cdef _Decoder d = self.decoder
+        cdef Py_ssize_t end
+        cdef Py_UCS4 c
+        while True:
+            d.pos = self.pos
+            d.skip_ws_only()
+            self.pos = d.pos
+            if self.pos >= d.length or d.char_at(self.pos) != u'/':
+                return 0
+            c = d.char_at(self.pos + 1)
+            if c == u'/':
+                end = PyUnicode_FindChar(self.buf, u'\n', self.pos + 2, d.length, 1)
+                if end < 0:
+                    if not self.eof:
+                        return 1
+                    end = d.length
+                self.pos = end
+            elif c == u'*':
+                end = PyUnicode_Find(self.buf, '*/', self.pos + 2, d.length, 1)
+                if end < 0:
+                    if not self.eof:
+                        return 1
+                    d.error("Unterminated comment", self.pos)
+                self.pos = end + 2
+            elif self.pos + 1 >= d.length and not self.eof:
+                return 1
+            else:
+                return 0
+
+    cdef Py_ssize_t token_end(self, Py_ssize_t start):
+        """
+        Return the end of the scalar token or key starting at start, or -1
+        if it may continue past the end of the buffer.
+        """
+        cdef _Decoder d = self.decoder
+        cdef Py_ssize_t i = start + 1
+        cdef Py_ssize_t end
+        cdef Py_UCS4 quote = d.char_at(start)
+        cdef Py_UCS4 c
+        if self.eof:
+            return d.length
+        if quote == u'"' or quote == u"'":
+            if quote == u'"' and d.char_at(start + 1) == u'"':
+                if start + 2 >= d.length:
+                    return -1  # Could still become a triple-quoted string
+                if d.char_at(start + 2) == u'"':
+                    end = PyUnicode_Find(self.buf, '"""', start + 3, d.length, 1)
+                    return -1 if end < 0 else end + 3
+            while i < d.length:
+                c = d.char_at(i)
+                if c == u'\\':
+                    i += 2
+                    continue
+                if c == quote or c == u'\n':
+                    return i + 1
+                i += 1
+            return -1
+        # Numbers, literals and unquoted keys run until a delimiter
+        while i < d.length:
+            c = d.char_at(i)
+            if not (_is_ident_part(c) or c == u'.' or c == u'+' or c == u'-'):
+                return i
+            i += 1
+        return -1
+
+    cdef int end_value(self):
+        """Set the state that follows a complete value."""
+        if not self.stack:
+            self.state = ST_DONE
+        elif self.stack[-1] is dict:
+            self.state = ST_MAP_NEXT
+        else:
+            self.state = ST_ARRAY_NEXT
+        return 0
+
+    cdef object end_container(self, str event):
+        self.pos += 1
+        self.stack.pop()
+        self.path.pop()
+        self.end_value()
+        return (tuple(self.path), event, None)
+
+    cdef object next_event(self):
+        cdef _Decoder d = self.decoder
+        cdef Py_UCS4 c
+        cdef Py_ssize_t end
+        cdef Py_ssize_t available = PyUnicode_GET_LENGTH(self.buf) - self.pos + self.pending_length
+        # Wait until enough input arrived to retry an incomplete token, which
+        # keeps the rescanning of long tokens linear overall
+        if available < self.need and not self.eof:
+            return None
+        if self.pending_length:
+            self.compact()
+        self.need = 0
+        while True:
+            if self.skip_ws():
+                return self.incomplete()
+            if self.pos >= d.length:
+                if not self.eof:
+                    return self.incomplete()
+                if self.state == ST_DONE:
+                    return _END
+                if not self.started:
+                    raise TJSON5ParseError("Empty or invalid input")
+                d.error("Unexpected end of data", self.pos)
+            c = d.char_at(self.pos)
+            if self.state == ST_DONE:
+                d.error("Extra data", self.pos)
+            if self.state == ST_MAP_COLON:
+                if c != u':':
+                    d.error("Expecting ':' delimiter", self.pos)
+                self.pos += 1
+                self.state = ST_VALUE
+                continue
+            if self.state == ST_MAP_NEXT or self.state == ST_ARRAY_NEXT:
+                if c == u',':
+                    self.pos += 1
+                    self.state = ST_MAP_KEY if self.state == ST_MAP_NEXT else ST_ARRAY_VALUE
+                    continue
+                if c == u'}' and self.state == ST_MAP_NEXT:
+                    return self.end_container('end_map')
+                if c == u']' and self.state == ST_ARRAY_NEXT:
+                    return self.end_container('end_array')
+                d.error("Expecting ',' delimiter", self.pos)
+            if self.state == ST_MAP_KEY:
+                if c == u'}':
+                    return self.end_container('end_map')
+                end = self.token_end(self.pos)
+                if end < 0:
+                    return self.incomplete()
+                d.pos = self.pos
+                key = d.decode_key()
+                self.pos = d.pos
+                self.path[-1] = key
+                self.state = ST_MAP_COLON
+                return (tuple(self.path[:-1]), 'map_key', key)
+            if self.state == ST_ARRAY_VALUE and c == u']':
+                return self.end_container('end_array')
+            # A value
+            if c == u'{' or c == u'[':
+                if self.stack and self.stack[-1] is list:
+                    self.path[-1] += 1
+                self.started = True
+                self.pos += 1
+                event = (tuple(self.path), 'start_map' if c == u'{' else 'start_array', None)
+                if c == u'{':
+                    self.stack.append(dict)
+                    self.path.append(None)
+                    self.state = ST_MAP_KEY
+                else:
+                    self.stack.append(list)
+                    self.path.append(-1)
+                    self.state = ST_ARRAY_VALUE
+                return event
+            end = self.token_end(self.pos)
+            if end < 0:
+                return self.incomplete()
+            if self.stack and self.stack[-1] is list:
+                self.path[-1] += 1
+            self.started = True
+            d.pos = self.pos
+            value = d.decode_scalar()
+            self.pos = d.pos
+            self.end_value()
+            return (tuple(self.path), 'value', value)
+
+    cdef object incomplete(self):
+        """Ask for more input before the token at pos is retried."""
+        self.need = 2 * (PyUnicode_GET_LENGTH(self.buf) - self.pos)
+        return None
+
+    cdef object next_document(self):
+        """
+        Start the next document of a stream and decode it in one go if it
+        is complete in the buffer. Returns its value, _END at the end of
+        input, or _MISSING if more input is needed or the document may be
+        cut off by the end of the buffer; next_event() then reads it.
+        """
+        cdef _Decoder d = self.decoder
+        cdef Py_UCS4 c
+        cdef Py_ssize_t available = PyUnicode_GET_LENGTH(self.buf) - self.pos + self.pending_length
+        if available < self.need and not self.eof:
+            return _MISSING
+        if self.pending_length:
+            self.compact()
+        self.need = 0
+        self.state = ST_VALUE
+        self.started = False
+        if self.skip_ws():
+            self.incomplete()
+            return _MISSING
+        if self.pos >= d.length:
+            if self.eof:
+                return _END
+            self.incomplete()
+            return _MISSING
+        c = d.char_at(self.pos)
+        if c == u'{' or c == u'[':
+            # A complete object or array ends with its closing bracket, so
+            # nothing in it can have been cut off by the end of the buffer
+            d.start_tokens(self.pos, False)
+            try:
+                value = d.decode_value()
+                self.pos = d.next_token().start
+            except TJSON5ParseError:
+                if self.eof:
+                    raise
+                return _MISSING
+            except RecursionError:
+                d.error("Maximum nesting depth exceeded", self.pos)
+            return value
+        if self.token_end(self.pos) < 0:
+            self.incomplete()
+            return _MISSING
+        d.pos = self.pos
+        value = d.decode_scalar()
+        self.pos = d.pos
+        return value
+
+def _read_chunks(source, Py_ssize_t chunk_size, encoding):
+    """
+    Yield the text of source in chunks of about chunk_size characters.
+
+    source may be a string, a bytes-like object (bytes, bytearray,
+    memoryview, mmap) or a file object opened in text or binary mode.
+    Raw input is decoded incrementally, with the encoding detected from the
+    byte order mark or null-byte pattern unless one is given.
+    """
+    if isinstance(source, str):
+        for start in range(0, len(source), chunk_size):
+            yield source[start:start + chunk_size]
+        return
+    if hasattr(source, 'read'):
+        read = source.read
+    else:
+        view = memoryview(source).cast('B')
+        offsets = iter(range(0, len(view), chunk_size))
+        read = lambda size: view[next(offsets, len(view)):][:size]
+    data = read(chunk_size)
+    if isinstance(data, str):
+        while data:
+            yield data
+            data = read(chunk_size)
+        return
+    # Raw input: detect the encoding from the first few bytes
+    data = bytes(data)
+    while 0 < len(data) < 4:
+        more = read(chunk_size)
+        if not more:
+            break
+        data += more
+    detected, bom_length = _sniff_encoding(data) if data else (None, 0)
+    decoder = codecs.getincrementaldecoder(encoding or detected or 'utf-8')('strict')
+    data = data[bom_length:]
+    try:
+        while data:
+            text = decoder.decode(data)
+            if text:
+                yield text
+            data = read(chunk_size)
+        yield decoder.decode(b'', True)
+    except UnicodeDecodeError as e:
+        raise TJSON5ParseError(f"Encoding error: {e}")
+
+@cython.final
+cdef class Parser:
+    """
+    Push parser for Triple-JSON5 input that arrives in pieces, e.g. from a
+    socket or an asyncio stream.
+
+    Input is added with feed() as it arrives and the end of input is
+    marked with close(). events() returns the (path, event, value) tuples
+    completed so far (see iterparse). State is kept across chunk
+    boundaries, so a chunk may end anywhere, including inside a string, a
+    triple-quoted string, a comment or a number:
+
+        parser = tjson5.Parser()
+        for chunk in chunks:
+            parser.feed(chunk)
+            for path, event, value in parser.events():
+                ...
+        parser.close()
+        for path, event, value in parser.events():
+            ...
+
+    Parameters:
+    - encoding: Encoding of raw (bytes) input; detected from the byte order
+      mark or null-byte pattern by default, falling back to utf-8
+    """
+    cdef _EventParser parser
+    cdef object encoding
+    cdef object decoder
+    cdef bytes head
+    cdef object binary
+    cdef bint finished
+
+    def __cinit__(self, encoding=None):
+        self.parser = _EventParser()
+        self.encoding = encoding
+        self.decoder = None
+        self.head = b''
+        self.binary = None
+        self.finished = False
+
+    def feed(self, data):
+        """
+        Add the next piece of input: a string, or a bytes-like object that
+        is decoded incrementally. All pieces must be of the same kind.
+
+        Raises:
+        - TJSON5ParseError if called after close() or if the input cannot be decoded
+        """
+        if self.parser.eof:
+            raise TJSON5ParseError("Cannot feed data after close()")
+        if isinstance(data, str):
+            if self.binary is True:
+                raise TypeError("Cannot feed str after bytes input")
+            self.binary = False
+            self.parser.feed(<str>data)
+            return
+        if self.binary is False:
+            raise TypeError(f"Cannot feed {type(data).__name__} after str input")
+        self.binary = True
+        data = bytes(data)
+        if self.decoder is None:
+            # Detect the encoding from the first few bytes
+            self.head += data
+            if len(self.head) < 4:
+                return
+            data = self.start_decoding()
+        self.decode(data, False)
+
+    def close(self):
+        """
+        Mark the end of input. The remaining events, or the error for a
+        truncated document, are returned by the next call to events().
+        """
+        if self.parser.eof:
+            return
+        if self.binary is True:
+            data = self.start_decoding() if self.decoder is None else b''
+            self.decode(data, True)
+        self.parser.close()
+
+    def events(self):
+        """
+        Return the list of events completed by the input so far. Events are
+        returned once; a token cut off by the end of the input is returned
+        by a later call, once enough input has been fed.
+
+        Raises:
+        - TJSON5ParseError if the document is invalid
+        """
+        cdef list events = []
+        if self.finished:
+            return events
+        while True:
+            event = self.parser.next_event()
+            if event is None:
+                return events
+            if event is _END:
+                self.finished = True
+                return events
+            events.append(event)
+
+    @property
+    def done(self):
+        """True once the whole document has been parsed and returned by events()."""
+        return self.finished
+
+    cdef bytes start_decoding(self):
+        """Create the incremental decoder and return the buffered input past the BOM."""
+        cdef bytes data = self.head
+        detected, bom_length = _sniff_encoding(data) if data else (None, 0)
+        self.decoder = codecs.getincrementaldecoder(self.encoding or detected or 'utf-8')('strict')
+        self.head = b''
+        return data[bom_length:]
+
+    cdef int decode(self, bytes data, bint final) except -1:
+        try:
+            text = self.decoder.decode(data, final)
+        except UnicodeDecodeError as e:
+            raise TJSON5ParseError(f"Encoding error: {e}")
+        self.parser.feed(text)
+        return 0
+
+DEFAULT_CHUNK_SIZE = 65536
+
+def iterparse(source, chunk_size=DEFAULT_CHUNK_SIZE, encoding=None):
+    """
+    Parse a Triple-JSON5 document incrementally and yield parse events.
+
+    Parameters:
+    - source: A file object (text or binary), a string or a bytes-like
+      object (bytes, bytearray, memoryview, mmap)
+    - chunk_size: Number of characters or bytes read at a time
+    - encoding: Encoding of raw input; detected from the byte order mark
+      or null-byte pattern by default, falling back to utf-8
+
+    Yields (path, event, value) tuples, where path is a tuple of the keys
+    and array indices leading to the value and event is one of
+    'start_map', 'map_key', 'end_map', 'start_array', 'end_array' and
+    'value'. For 'map_key' events, path is the path of the enclosing
+    object and value is the key. Only one chunk of input plus the token
+    being read is held in memory at a time.
+
+    Raises:
+    - TJSON5ParseError if the document is invalid
+    """
+    cdef _EventParser parser = _EventParser()
+    chunks = _read_chunks(source, chunk_size, encoding)
+    while True:
+        event = parser.next_event()
+        if event is None:
+            chunk = next(chunks, None)
+            if chunk is None:
+                parser.close()
+            else:
+                parser.feed(chunk)
+        elif event is _END:
+            return
+        else:
+            yield event
+
+def items(source, prefix, chunk_size=DEFAULT_CHUNK_SIZE, encoding=None):
+    """
+    Incrementally parse a Triple-JSON5 document and yield the values found
+    at the given key path, e.g. "parts[*]" or "pins.config".
+
+    Only the value being built is kept in memory, so large documents can
+    be processed one record at a time. See iterparse for the parameters.
+    """
+    cdef tuple pattern = _compile_path(prefix)
+    cdef list containers = []
+    cdef list keys = []
+    for path, event, value in iterparse(source, chunk_size, encoding):
+        if not containers:
+            if event == 'map_key' or event == 'end_map' or event == 'end_array':
+                continue
+            if not _path_matches(pattern, path):
+                continue
+            if event == 'value':
+                yield value
+                continue
+        if event == 'map_key':
+            keys[-1] = value
+            continue
+        if event == 'end_map' or event == 'end_array':
+            # Nested containers were attached to their parent at the start
+            value = containers.pop()
+            keys.pop()
+            if not containers:
+                yield value
+            continue
+        if event == 'start_map' or event == 'start_array':
+            new = {} if event == 'start_map' else []
+            if containers:
+                _attach(containers[-1], keys[-1], new)
+            containers.append(new)
+            keys.append(None)
+            continue
+        _attach(containers[-1], keys[-1], value)
+
+def iter_documents(source, chunk_size=DEFAULT_CHUNK_SIZE, encoding=None):
+    """
+    Parse a stream of Triple-JSON5 documents and yield their values one at
+    a time.
+
+    The documents may simply follow each other or be separated by
+    whitespace, newlines (TJSON5-Lines, one document per line) or
+    comments; each may span several lines, e.g. with triple-quoted
+    strings. The same scanner is used for every document, each one that is
+    complete in the buffer is decoded in a single pass, and consumed input
+    is dropped as the stream is read, so memory is bounded by the chunk
+    size and the largest document. An empty stream yields nothing. See
+    iterparse for the parameters.
+
+    Raises:
+    - TJSON5ParseError if a document is invalid, after yielding those
+      before it
+    """
+    cdef _EventParser parser = _EventParser()
+    cdef list containers = []
+    cdef list keys = []
+    chunks = _read_chunks(source, chunk_size, encoding)
+    while True:
+        if not containers:
+            value = parser.next_document()
+            if value is _END:
+                return
+            if value is not _MISSING:
+                yield value
+                continue
+        # A document cut off by the end of the buffer is built from events
+        event = parser.next_event()
+        if event is None:
+            chunk = next(chunks, None)
+            if chunk is None:
+                parser.close()
+            else:
+                parser.feed(chunk)
+            continue
+        _, kind, value = event
+        if kind == 'map_key':
+            keys[-1] = value
+        elif kind == 'end_map' or kind == 'end_array':
+            value = containers.pop()
+            keys.pop()
+            if not containers:
+                yield value
+        elif kind == 'start_map' or kind == 'start_array':
+            new = {} if kind == 'start_map' else []
+            if containers:
+                _attach(containers[-1], keys[-1], new)
+            containers.append(new)
+            keys.append(None)
+        else:
+            _attach(containers[-1], keys[-1], value)
+
+cdef inline int _attach(container, key, value) except -1:
+    if type(container) is dict:
+        container[key] = value
+    else:
+        container.append(value)
+    return 0
+
+# ---------------------------------------------------------------------------
+# Serialization
+# ---------------------------------------------------------------------------
+
+# dump() writes to the file object whenever this many characters are pending
+WRITE_CHUNK_SIZE = 65536
+
+cdef inline bint _is_identifier(str key):
+    cdef Py_ssize_t i
+    cdef Py_ssize_t n = len(key)
+    if n == 0 or not _is_ident_start(key[0]):
+        return False
+    for i in range(1, n):
+        if not _is_ident_part(key[i]):
+            return False
+    return True
+
+cdef str _float_repr(object o):
+    if o != o:
+        return 'NaN'
+    if o == POS_INF:
+        return 'Infinity'
+    if o == NEG_INF:
+        return '-Infinity'
+    return float.__repr__(o)
+
+@cython.final
+cdef class _Encoder:
+    """
+    Serializer writing TJSON5 (or, with the default options, standard
+    JSON identical to json.dumps) as a list of string parts. When a write
+    function is set, the parts are flushed to it in chunks.
+    """
+    cdef list parts
+    cdef Py_ssize_t pending
+    cdef object write
+    cdef str indent
+    cdef str key_separator
+    cdef str item_separator
+    cdef bint ensure_ascii
+    cdef bint triple_quotes
+    cdef bint unquoted_keys
+    cdef bint trailing_commas
+    cdef list hex_patterns
+    cdef list path
+    cdef dict markers
+
+    def __init__(self, indent, ensure_ascii, triple_quotes, unquoted_keys,
+                 hex_paths, trailing_commas, write=None):
+        if indent is not None and not isinstance(indent, str):
+            indent = ' ' * indent
+        self.indent = indent
+        self.key_separator = ': '
+        self.item_separator = ',' if indent is not None else ', '
+        self.ensure_ascii = ensure_ascii
+        self.triple_quotes = triple_quotes
+        self.unquoted_keys = unquoted_keys
+        self.trailing_commas = trailing_commas
+        self.hex_patterns = [_compile_path(p) for p in hex_paths] if hex_paths else None
+        self.path = [] if hex_paths else None
+        self.markers = {}
+        self.parts = []
+        self.pending = 0
+        self.write = write
+
+    cdef inline int emit(self, str s) except -1:
+        PyList_Append(self.parts, s)
+        if self.write is not None:
+            self.pending += len(s)
+            if self.pending >= WRITE_CHUNK_SIZE:
+                self.flush()
+        return 0
+
+    cdef int flush(self) except -1:
+        if self.parts:
+            self.write(''.join(self.parts))
+            self.parts = []
+        self.pending = 0
+        return 0
+
+    cdef str getvalue(self):
+        return ''.join(self.parts)
+
+    cdef str encode_string(self, str s):
+        cdef Py_UCS4 c
+        if self.triple_quotes and '\n' in s and '"""' not in s and not s.endswith('"') \
+                and (not self.ensure_ascii or s.isascii()):
+            for c in s:
+                if c < 0x20 and c != u'\n' and c != u'\t':
+                    break
+            else:
+                return '"""' + s + '"""'
+        if self.ensure_ascii:
+            return encode_basestring_ascii(s)
+        return encode_basestring(s)
+
+    cdef str encode_key(self, object key):
+        if isinstance(key, str):
+            if self.unquoted_keys and _is_identifier(key):
+                return key
+            return self.encode_string(key)
+        # Non-string keys are converted as by json
+        if isinstance(key, float):
+            key = _float_repr(key)
+        elif key is True:
+            key = 'true'
+        elif key is False:
+            key = 'false'
+        elif key is None:
+            key = 'null'
+        elif isinstance(key, int):
+            key = int.__repr__(key)
+        else:
+            raise TypeError(f"keys must be str, int, float, bool or None, "
+                            f"not {key.__class__.__name__}")
+        return self.encode_string(key)
+
+    cdef str encode_int(self, object o):
+        cdef tuple pattern
+        if self.hex_patterns is not None:
+            path = tuple(self.path)
+            for pattern in self.hex_patterns:
+                if _path_matches(pattern, path):
+                    return f"-0x{-o:X}" if o < 0 else f"0x{o:X}"
+        return int.__repr__(o)
+
+    cdef int encode_value(self, object o, Py_ssize_t level) except -1:
+        if isinstance(o, str):
+            self.emit(self.encode_string(o))
+        elif o is None:
+            self.emit('null')
+        elif o is True:
+            self.emit('true')
+        elif o is False:
+            self.emit('false')
+        elif isinstance(o, int):
+            self.emit(self.encode_int(o))
+        elif isinstance(o, float):
+            self.emit(_float_repr(o))
+        elif isinstance(o, (list, tuple)):
+            self.encode_array(o, level)
+        elif isinstance(o, (dict, Mapping)):
+            self.encode_object(o, level)
+        elif isinstance(o, array):
+            # Numeric arrays from parse(arrays=...)
+            self.encode_array(o, level)
+        elif hasattr(o, 'tolist') and hasattr(o, 'dtype'):
+            # numpy.ndarray (nested lists for several dimensions) and numpy scalars
+            self.encode_value(o.tolist(), level)
+        else:
+            raise TypeError(f"Object of type {o.__class__.__name__} is not TJSON5 serializable")
+        return 0
+
+    cdef int enter(self, object o) except -1:
+        marker = id(o)
+        if marker in self.markers:
+            raise ValueError("Circular reference detected")
+        Py_EnterRecursiveCall(" while encoding a Triple-JSON5 object")
+        self.markers[marker] = o
+        return 0
+
+    cdef void leave(self, object o):
+        Py_LeaveRecursiveCall()
+        del self.markers[id(o)]
+
+    cdef int encode_array(self, object o, Py_ssize_t level) except -1:
+        cdef Py_ssize_t index = 0
+        cdef str separator, newline_indent
+        if not o:
+            self.emit('[]')
+            return 0
+        self.enter(o)
+        try:
+            if self.indent is not None:
+                newline_indent = '\n' + self.indent * (level + 1)
+                separator = self.item_separator + newline_indent
+                self.emit('[' + newline_indent)
+            else:
+                separator = self.item_separator
+                self.emit('[')
+            for item in o:
+                if index:
+                    self.emit(separator)
+                if self.path is not None:
+                    self.path.append(index)
+                self.encode_value(item, level + 1)
+                if self.path is not None:
+                    self.path.pop()
+                index += 1
+            self.close_container(']', level)
+        finally:
+            self.leave(o)
+        return 0
+
+    cdef int encode_object(self, object o, Py_ssize_t level) except -1:
+        cdef bint first = True
+        cdef str separator, newline_indent
+        if not o:
+            self.emit('{}')
+            return 0
+        self.enter(o)
+        try:
+            if self.indent is not None:
+                newline_indent = '\n' + self.indent * (level + 1)
+                separator = self.item_separator + newline_indent
+                self.emit('{' + newline_indent)
+            else:
+                separator = self.item_separator
+                self.emit('{')
+            for key, value in o.items():
+                if not first:
+                    self.emit(separator)
+                first = False
+                self.emit(self.encode_key(key))
+                self.emit(self.key_separator)
+                if self.path is not None:
+                    self.path.append(key)
+                self.encode_value(value, level + 1)
+                if self.path is not None:
+                    self.path.pop()
+            self.close_container('}', level)
+        finally:
+            self.leave(o)
+        return 0
+
+    cdef int close_container(self, str close, Py_ssize_t level) except -1:
+        if self.trailing_commas:
+            self.emit(',')
+        if self.indent is not None:
+            self.emit('\n' + self.indent * level + close)
+        else:
+            self.emit(close)
+        return 0
+
+def _json_default(o):
+    # Types accepted by _Encoder that the json module does not know
+    if isinstance(o, Mapping):
+        return dict(o)
+    if isinstance(o, array):
+        return o.tolist()
+    if hasattr(o, 'tolist') and hasattr(o, 'dtype'):
+        return o.tolist()
+    raise TypeError(f"Object of type {o.__class__.__name__} is not TJSON5 serializable")
+
+# Compact output with none of the Triple-JSON5 options is standard JSON,
+# which the C encoder of the json module writes faster than _Encoder.
+# Indented output is left to _Encoder, as json only indents in Python.
+_JSON_ENCODERS = {ensure_ascii: JSONEncoder(ensure_ascii=ensure_ascii, default=_json_default)
+                  for ensure_ascii in (False, True)}
+
+def _json_encoder(indent, ensure_ascii, triple_quotes, unquoted_keys, hex_paths, trailing_commas):
+    if indent is None and not (triple_quotes or unquoted_keys or hex_paths or trailing_commas):
+        return _JSON_ENCODERS[bool(ensure_ascii)]
+    return None
+
+def dump(obj, file_obj, indent=None, *, ensure_ascii=True, triple_quotes=False,
+         unquoted_keys=False, hex_paths=None, trailing_commas=False):
+    """
+    Serialize obj to a file, written in chunks as it is encoded.
+
+    With the default options the output is standard JSON, identical to
+    json.dump. See dumps for the Triple-JSON5 options.
+    """
+    cdef _Encoder encoder = _Encoder(indent, ensure_ascii, triple_quotes, unquoted_keys,
+                                     hex_paths, trailing_commas, file_obj.write)
+    encoder.encode_value(obj, 0)
+    encoder.flush()
+
+def dump_documents(values, file_obj, indent=None, *, ensure_ascii=True, triple_quotes=False,
+                   unquoted_keys=False, hex_paths=None, trailing_commas=False):
+    """
+    Serialize each value of an iterable to a file as a separate document,
+    followed by a newline, for iter_documents to read back.
+
+    Without indent every document is written on a single line
+    (TJSON5-Lines), except for the line breaks of triple-quoted strings.
+    The same encoder is used for every value and its output is written in
+    chunks. See dumps for the other options.
+    """
+    cdef _Encoder encoder = _Encoder(indent, ensure_ascii, triple_quotes, unquoted_keys,
+                                     hex_paths, trailing_commas, file_obj.write)
+    json_encoder = _json_encoder(indent, ensure_ascii, triple_quotes, unquoted_keys,
+                                 hex_paths, trailing_commas)
+    for value in values:
+        if json_encoder is not None:
+            encoder.emit(json_encoder.encode(value))
+        else:
+            encoder.encode_value(value, 0)
+        encoder.emit('\n')
+    encoder.flush()
+
+def dumps(obj, indent=None, *, ensure_ascii=True, triple_quotes=False,
+          unquoted_keys=False, hex_paths=None, trailing_commas=False):
+    """
+    Serialize obj to a string.
+
+    With the default options the output is standard JSON, identical to
+    json.dumps. The Triple-JSON5 options are:
+
+    triple_quotes: write multi-line strings as triple-quoted strings
+        (verbatim, so only strings that round-trip unchanged are converted)
+    unquoted_keys: write keys that are identifiers without quotes
+    hex_paths: key paths (as for items(), e.g. "registers[*].mask") whose
+        integer values are written in hexadecimal
+    trailing_commas: write a comma after the last item of every object
+        and array
+    """
+    json_encoder = _json_encoder(indent, ensure_ascii, triple_quotes, unquoted_keys,
+                                 hex_paths, trailing_commas)
+    if json_encoder is not None:
+        return json_encoder.encode(obj)
+    cdef _Encoder encoder = _Encoder(indent, ensure_ascii, triple_quotes, unquoted_keys,
+                                     hex_paths, trailing_commas)
+    encoder.encode_value(obj, 0)
+    return encoder.getvalue()